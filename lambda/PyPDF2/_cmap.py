@@ -1,12 +1,18 @@
 import warnings
 from binascii import unhexlify
+from collections import OrderedDict
 from math import ceil
-from typing import Any, Dict, List, Tuple, Union, cast
+from typing import Any, Dict, Hashable, List, Tuple, Union, cast
 
 from ._codecs import adobe_glyphs, charset_encoding
 from ._utils import logger_warning
 from .errors import PdfReadWarning
-from .generic import DecodedStreamObject, DictionaryObject, StreamObject
+from .generic import (
+    DecodedStreamObject,
+    DictionaryObject,
+    IndirectObject,
+    StreamObject,
+)
 
 
 # code freely inspired from @twiggy ; see #711
@@ -68,6 +74,81 @@ def build_char_map(
     )
 
 
+class CharMapCache:
+    """Reader-scoped cache of :func:`build_char_map` results.
+
+    Pages of the same document usually share a handful of font objects, so
+    parsing each /Encoding and /ToUnicode CMap once per document instead of once
+    per page removes most of the per-page setup cost of text extraction.
+
+    Fonts are keyed by identity: the indirect reference (object number and
+    generation) of the font dictionary, or ``id()`` of an inline font
+    dictionary (the cached entry keeps that dictionary alive, so the id cannot
+    be reused while cached), together with the ``space_width`` default.
+
+    Memory is bounded in least-recently-used order by both the number of fonts
+    and the total number of mapped character codes.
+
+    Args:
+        max_fonts: maximum number of cached fonts
+        max_codes: maximum total size of the cached encoding and unicode maps
+    """
+
+    def __init__(self, max_fonts: int = 256, max_codes: int = 500_000) -> None:
+        self.max_fonts = max_fonts
+        self.max_codes = max_codes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._codes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(font_name: str, space_width: float, obj: DictionaryObject) -> Hashable:
+        fonts = cast(DictionaryObject, obj["/Resources"]["/Font"])  # type: ignore
+        ref = fonts.raw_get(font_name)
+        if isinstance(ref, IndirectObject):
+            return ("ref", ref.idnum, ref.generation, space_width)
+        return ("id", id(ref), space_width)
+
+    @staticmethod
+    def _size(char_map: Tuple[Any, ...]) -> int:
+        encoding, map_dict = char_map[2], char_map[3]
+        return 1 + len(map_dict) + (len(encoding) if isinstance(encoding, dict) else 0)
+
+    def get(
+        self, font_name: str, space_width: float, obj: DictionaryObject
+    ) -> Tuple[str, float, Union[str, Dict[int, str]], Dict, DictionaryObject]:
+        """Return the char map of ``font_name``, building it on first use.
+
+        Same arguments and result as :func:`build_char_map`; the returned maps
+        are shared between pages and must not be modified.
+        """
+        key = self._key(font_name, space_width, obj)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        char_map = build_char_map(font_name, space_width, obj)
+        size = self._size(char_map)
+        if size > self.max_codes:
+            return char_map
+        self._entries[key] = (char_map, size)
+        self._codes += size
+        while len(self._entries) > self.max_fonts or self._codes > self.max_codes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._codes -= evicted
+        return char_map
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._codes = 0
+
+
 # used when missing data, e.g. font def missing
 unknown_char_map: Tuple[str, float, Union[str, Dict[int, str]], Dict[Any, Any]] = (
     "Unknown",
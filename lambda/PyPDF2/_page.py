@@ -47,6 +47,7 @@ from typing import (
 
 from ._cmap import build_char_map, unknown_char_map
 from ._protocols import PdfReaderProtocol
+from ._text_scanner import content_stream_bytes, scan_text_operations
 from ._utils import (
     CompressedTransformationMatrix,
     File,
@@ -1338,8 +1339,13 @@ class PageObject(DictionaryObject):
         except Exception:
             return ""  # no resources means no text is possible (no font) we consider the file as not damaged, no need to check for TJ or Tj
         if "/Font" in resources_dict:
+            # Readers share parsed char maps between pages; see CharMapCache.
+            char_map_cache = getattr(pdf, "_char_map_cache", None)
             for f in cast(DictionaryObject, resources_dict["/Font"]):
-                cmaps[f] = build_char_map(f, space_width, obj)
+                if char_map_cache is not None:
+                    cmaps[f] = char_map_cache.get(f, space_width, obj)
+                else:
+                    cmaps[f] = build_char_map(f, space_width, obj)
         cmap: Tuple[
             Union[str, Dict[int, str]], Dict[str, str], str, Optional[DictionaryObject]
         ] = (
@@ -1352,8 +1358,15 @@ class PageObject(DictionaryObject):
             content = (
                 obj[content_key].get_object() if isinstance(content_key, str) else obj
             )
-            if not isinstance(content, ContentStream):
-                content = ContentStream(content, pdf, "bytes")
+            if isinstance(content, ContentStream):
+                operations = content.operations
+            elif visitor_operand_before is None and visitor_operand_after is None:
+                # nobody observes the other operators: only parse the text ones
+                operations = scan_text_operations(
+                    content_stream_bytes(content), "bytes"
+                )
+            else:
+                operations = ContentStream(content, pdf, "bytes").operations
         except KeyError:  # it means no content can be extracted(certainly empty page)
             return ""
         # Note: we check all strings are TextStringObjects.  ByteStringObjects
@@ -1693,7 +1706,7 @@ class PageObject(DictionaryObject):
                 except Exception:
                     pass
 
-        for operands, operator in content.operations:
+        for operands, operator in operations:
             if visitor_operand_before is not None:
                 visitor_operand_before(operator, operands, cm_matrix, tm_matrix)
             # multiple operators are defined in here ####
@@ -39,6 +39,7 @@ from typing import (
     Callable,
     Dict,
     Iterable,
+    Iterator,
     List,
     Optional,
     Tuple,
@@ -46,6 +47,7 @@ from typing import (
     cast,
 )
 
+from ._cmap import CharMapCache
 from ._encryption import Encryption, PasswordType
 from ._page import PageObject, _VirtualList
 from ._utils import (
@@ -307,6 +309,8 @@ class PdfReader:
         self._page_id2num: Optional[
             Dict[Any, Any]
         ] = None  # map page indirect_reference number to Page Number
+        # parsed font char maps shared by every page of this document
+        self._char_map_cache = CharMapCache()
         if hasattr(stream, "mode") and "b" not in stream.mode:  # type: ignore
             logger_warning(
                 "PdfReader stream/file object is not in binary mode. "
@@ -1127,6 +1131,119 @@ class PdfReader:
             # TODO: Could flattened_pages be None at this point?
             self.flattened_pages.append(page_obj)  # type: ignore
 
+    def iter_pages(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[PageObject]:
+        """
+        Yield the pages ``start`` to ``stop`` (exclusive) in document order.
+
+        Unlike :py:attr:`pages`, this does not flatten the whole page tree: it
+        walks the tree depth-first, uses each node's ``/Count`` to skip
+        subtrees that end before ``start`` and stops once ``stop`` is reached,
+        so only the requested pages (and their ancestors) are resolved.
+        Inheritable attributes are applied as in :meth:`_flatten`.
+
+        :param int start: index of the first page (pages begin at zero)
+        :param int stop: index after the last page; ``None`` for the last page
+        """
+        if start < 0 or (stop is not None and stop < 0):
+            raise ValueError("page range must not be negative")
+        if stop is not None and stop <= start:
+            return
+        if self.flattened_pages is not None:
+            yield from self.flattened_pages[start:stop]
+            return
+        catalog = self.trailer[TK.ROOT].get_object()
+        root = catalog["/Pages"].get_object()  # type: ignore
+        yield from self._iter_page_tree(root, {}, None, [0], start, stop, set())
+
+    def _iter_page_tree(
+        self,
+        node: DictionaryObject,
+        inherit: Dict[str, Any],
+        indirect_reference: Optional[IndirectObject],
+        position: List[int],
+        start: int,
+        stop: Optional[int],
+        visited: set,
+    ) -> Iterator[PageObject]:
+        if id(node) in visited:  # malformed tree referencing one of its ancestors
+            return
+        # ``node[...]`` resolves indirect values; ``node.get`` would not.
+        node_type = node[PA.TYPE] if PA.TYPE in node else "/Pages"
+        if node_type == "/Pages":
+            count = node[PA.COUNT] if PA.COUNT in node else None
+            if isinstance(count, int) and count >= 0 and position[0] + count <= start:
+                position[0] += count
+                return
+            inherit = dict(inherit)
+            for attr in (PG.RESOURCES, PG.MEDIABOX, PG.CROPBOX, PG.ROTATE):
+                if attr in node:
+                    inherit[NameObject(attr)] = node[attr]
+            visited.add(id(node))
+            kids = node[PA.KIDS] if PA.KIDS in node else ArrayObject()
+            for kid in cast(ArrayObject, kids):
+                if stop is not None and position[0] >= stop:
+                    break
+                reference = kid if isinstance(kid, IndirectObject) else None
+                yield from self._iter_page_tree(
+                    kid.get_object(), inherit, reference, position, start, stop, visited
+                )
+            visited.discard(id(node))
+        elif node_type == "/Page":
+            index = position[0]
+            position[0] += 1
+            if index < start:
+                return
+            for attr, value in inherit.items():
+                if attr not in node:
+                    node[attr] = value
+            page = PageObject(self, indirect_reference)
+            page.update(node)
+            yield page
+
+    def extract_text_range(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        should_stop: Optional[Callable[[int, str], bool]] = None,
+        separator: str = "\n",
+        **kwargs: Any,
+    ) -> str:
+        """
+        Extract text from a range of pages, optionally within a character budget.
+
+        Pages are resolved lazily with :meth:`iter_pages`, so extracting the
+        first pages of a long document neither flattens the page tree nor
+        decodes the remaining pages.
+
+        :param int start: index of the first page
+        :param int stop: index after the last page; ``None`` for the last page
+        :param int max_chars: stop once this many characters have been
+            extracted; the result is truncated to ``max_chars``
+        :param should_stop: called as ``should_stop(page_index, page_text)``
+            after each page; returning ``True`` ends extraction after that page
+        :param str separator: inserted between the text of consecutive pages
+        :param kwargs: passed to :meth:`PageObject.extract_text`
+        :return: the extracted text
+        """
+        parts: List[str] = []
+        length = 0
+        for index, page in enumerate(self.iter_pages(start, stop), start):
+            if parts:
+                parts.append(separator)
+                length += len(separator)
+            page_text = page.extract_text(**kwargs)
+            parts.append(page_text)
+            length += len(page_text)
+            if max_chars is not None and length >= max_chars:
+                break
+            if should_stop is not None and should_stop(index, page_text):
+                break
+        text = "".join(parts)
+        return text if max_chars is None else text[:max_chars]
+
     def _get_object_from_stream(
         self, indirect_reference: IndirectObject
     ) -> Union[int, PdfObject, str]:
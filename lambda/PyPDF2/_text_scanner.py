@@ -0,0 +1,287 @@
+"""
+Fast content-stream scanner for text extraction.
+
+:class:`ContentStream<PyPDF2.generic.ContentStream>` reads a content stream
+byte by byte and turns every operand of every operator into a PdfObject,
+although text extraction only looks at the text operators and the few
+graphics-state operators that position text. Path construction, painting,
+colour and marked-content operators are all parsed and then discarded.
+
+:func:`scan_text_operations` matches whole operations (operands followed by
+an operator) with one precompiled regular expression, so skipped operators
+cost a single match, and builds operands only for the operators in
+:data:`TEXT_OPERATORS`. Names, strings and arrays are built directly from the
+matched bytes and anything unusual is handed to ``read_object``, so operands
+are the objects ContentStream would produce, except that numbers are plain
+``int``/``float`` instead of NumberObject/FloatObject (text extraction only
+ever converts them with ``float()``).
+"""
+
+import re
+from io import BytesIO
+from typing import Any, Dict, List, Match, Tuple, Union
+
+from ._utils import b_, logger_warning
+from .generic import (
+    ArrayObject,
+    NameObject,
+    create_string_object,
+    read_object,
+)
+
+#: Operators consumed by ``PageObject._extract_text``: text objects, text
+#: state and positioning, text showing, plus the graphics state (q, Q, cm)
+#: and XObject (Do) operators that affect where and whether text is emitted.
+TEXT_OPERATORS = frozenset(
+    {
+        b"BT",
+        b"ET",
+        b"Tf",
+        b"Tm",
+        b"Td",
+        b"TD",
+        b"T*",
+        b"TL",
+        b"Tw",
+        b"Tz",
+        b"Tj",
+        b"TJ",
+        b"'",
+        b'"',
+        b"q",
+        b"Q",
+        b"cm",
+        b"Do",
+    }
+)
+
+_WS = rb"\x00\t\n\x0c\r "
+_REGULAR = rb"[^" + _WS + rb"()<>\[\]{}/%]"
+# Literal strings with up to three levels of balanced parentheses; deeper
+# nesting falls through to _skip_string.
+_STRING = rb"\((?:[^()\\]|\\.|\((?:[^()\\]|\\.|\((?:[^()\\]|\\.)*\))*\))*\)"
+# Every alternative ends on a token boundary, so a run of operands can only be
+# split one way and a failed match cannot backtrack exponentially.
+_OPERAND = (
+    rb"[" + _WS + rb"]"
+    rb"|%[^\r\n]*(?![^\r\n])"
+    rb"|" + _STRING + rb"|<<|>>|<[^<>]*>|[\[\]{}]"
+    rb"|/" + _REGULAR + rb"*(?!" + _REGULAR + rb")"
+    rb"|(?:true|false|null)(?!" + _REGULAR + rb")"
+    rb"|[^A-Za-z'\"" + _WS + rb"()<>\[\]{}/%]" + _REGULAR + rb"*(?!" + _REGULAR + rb")"
+)
+# group 1: operands; group 2: operator, "(" of an unbalanced string or a stray byte
+_OPERATION = re.compile(
+    rb"((?:" + _OPERAND + rb")*)([A-Za-z'\"]" + _REGULAR + rb"*|.)", re.S
+)
+# Operand tokens, by group: 1 literal string, 2 "[", 3 "]", 4 ASCII name
+# without "#" escapes, 5 hex string, 6 number, 7 anything read with
+# read_object. Leading whitespace and comments are part of the match, and
+# trailing ones match no group, so consecutive matches never skip input.
+_TOKEN = re.compile(
+    rb"(?:[" + _WS + rb"]|%[^\r\n]*(?![^\r\n]))*"
+    rb"(?:(" + _STRING + rb")|(\[)|(\])"
+    rb"|(/[^#\x00-\x20\x7f-\xff()<>\[\]{}/%]*)(?!" + _REGULAR + rb")"
+    rb"|(<[^<>]*>)"
+    rb"|([+\-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+))(?!" + _REGULAR + rb")"
+    rb"|(<<|/" + _REGULAR + rb"*|" + _REGULAR + rb"+|[^" + _WS + rb"%])"
+    rb"|\Z)",
+    re.S,
+)
+_STRING_SPECIAL = re.compile(rb"[()\\]")
+_INLINE_IMAGE_DATA = re.compile(rb"ID[" + _WS + rb"]")
+_INLINE_IMAGE_END = re.compile(rb"[" + _WS + rb"]EI(?:[" + _WS + rb"]|$)")
+_HEX_IGNORED = re.compile(rb"[\x00\t\n\r ]")
+_ESCAPE = re.compile(rb"\\(?:([0-7]{1,3})|([\r\n][\r\n]?)|(.))", re.S)
+_ESCAPES = {
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"c": rb"\c",
+    **{bytes((char,)): bytes((char,)) for char in b"()/\\ %<>[]#_&$"},
+}
+
+Operations = List[Tuple[List[Any], bytes]]
+
+
+def _skip_string(data: bytes, pos: int) -> int:
+    """Return the position after the literal string opened at ``pos``."""
+    depth = 0
+    length = len(data)
+    while pos < length:
+        match = _STRING_SPECIAL.search(data, pos)
+        if match is None:
+            return length
+        char = data[match.start()]
+        if char == 0x5C:  # backslash escapes the next byte
+            pos = match.start() + 2
+            continue
+        depth += 1 if char == 0x28 else -1
+        pos = match.end()
+        if depth == 0:
+            return pos
+    return length
+
+
+def _skip_inline_image(data: bytes, pos: int) -> int:
+    """Return the position after the ``EI`` closing an inline image started before ``pos``."""
+    start = _INLINE_IMAGE_DATA.search(data, pos)
+    if start is None:
+        return len(data)
+    end = _INLINE_IMAGE_END.search(data, start.end())
+    return len(data) if end is None else end.end()
+
+
+def _decode_escape(match: Match[bytes]) -> bytes:
+    octal, line_break, char = match.groups()
+    if octal is not None:
+        return b_(chr(int(octal, base=8)))
+    if line_break is not None:  # escaped end of line: no character
+        return b""
+    try:
+        return _ESCAPES[char]
+    except KeyError:
+        logger_warning(rf"Unexpected escaped string: {char.decode('utf8')}", __name__)
+        return char
+
+
+def _parse_operands(
+    data: bytes, start: int, end: int, stream: BytesIO, forced_encoding: Any
+) -> List[Any]:
+    """
+    Build the operands between ``start`` and ``end``.
+
+    Numbers, plain names, literal and hex strings and arrays of those are built
+    directly; anything else is handed to ``read_object``.
+    """
+    operands: List[Any] = []
+    target = operands
+    stack: List[List[Any]] = []
+    pos = start
+    while pos < end:
+        for match in _TOKEN.finditer(data, pos, end):
+            kind = match.lastindex
+            if kind is None:  # only whitespace and comments left
+                continue
+            if kind == 1:
+                body = match.group(1)[1:-1]
+                if b"\\" in body:
+                    body = _ESCAPE.sub(_decode_escape, body)
+                target.append(create_string_object(body, forced_encoding))
+            elif kind == 2:
+                stack.append(target)
+                target = ArrayObject()
+            elif kind == 3:
+                if stack:
+                    array = target
+                    target = stack.pop()
+                    target.append(array)
+            elif kind == 4:
+                target.append(NameObject(match.group(4).decode("ascii")))
+            elif kind == 5:
+                digits = _HEX_IGNORED.sub(b"", match.group(5)[1:-1])
+                if len(digits) % 2:
+                    digits += b"0"
+                target.append(
+                    create_string_object(
+                        bytes.fromhex(digits.decode("ascii")), forced_encoding
+                    )
+                )
+            elif kind == 6:
+                number = match.group(6)
+                target.append(float(number) if b"." in number else int(number))
+            else:  # needs the stream parser; restart tokenizing after it
+                pos = match.start(7)
+                if data[pos] == 0x28:  # string nested deeper than _STRING handles
+                    stream.seek(_skip_string(data, pos))
+                    body = data[pos + 1 : stream.tell() - 1]
+                    target.append(
+                        create_string_object(
+                            _ESCAPE.sub(_decode_escape, body), forced_encoding
+                        )
+                    )
+                else:
+                    stream.seek(pos)
+                    target.append(read_object(stream, None, forced_encoding))
+                pos = stream.tell()
+                break
+        else:
+            pos = end
+    while stack:  # unterminated array: keep what was read
+        array = target
+        target = stack.pop()
+        target.append(array)
+    return operands
+
+
+def content_stream_bytes(stream: Any) -> bytes:
+    """Decoded bytes of a content stream, or of an array of streams joined like ContentStream does."""
+    stream = stream.get_object()
+    if not isinstance(stream, ArrayObject):
+        return b_(stream.get_data())
+    data = b""
+    for part in stream:
+        data += b_(part.get_object().get_data())
+        if len(data) == 0 or data[-1] != b"\n":
+            data += b"\n"
+    return data
+
+
+def scan_text_operations(
+    data: bytes,
+    forced_encoding: Union[None, str, List[str], Dict[int, str]] = None,
+    operators: frozenset = TEXT_OPERATORS,
+) -> Operations:
+    """
+    Return ``(operands, operator)`` pairs for the ``operators`` in ``data``.
+
+    Args:
+        data: decoded content-stream bytes
+        forced_encoding: passed to ``read_object`` for string operands
+        operators: operators to materialize; all others are skipped
+
+    Returns:
+        A list shaped like ``ContentStream.operations`` without the skipped
+        operators, with numbers as ``int``/``float``.
+    """
+    operations: Operations = []
+    stream = BytesIO(data)
+    length = len(data)
+    operation = _OPERATION.match
+    operand_start = -1
+    pos = 0
+    while pos < length:
+        match = operation(data, pos)
+        if match is None:
+            break
+        if operand_start < 0 and match.end(1) > pos:
+            operand_start = pos
+        op_start, pos = match.span(2)
+        first = data[op_start]
+        if first == 0x28:  # string nested deeper than _STRING handles
+            if operand_start < 0:
+                operand_start = op_start
+            pos = _skip_string(data, op_start)
+            continue
+        if not (0x41 <= first <= 0x5A or 0x61 <= first <= 0x7A or first in (0x22, 0x27)):
+            # stray delimiter or trailing operand; ContentStream would fail on it
+            if operand_start < 0:
+                operand_start = op_start
+            continue
+        operator = data[op_start:pos]
+        if operator == b"BI":
+            pos = _skip_inline_image(data, pos)
+        elif operator in operators:
+            operands = (
+                _parse_operands(data, operand_start, op_start, stream, forced_encoding)
+                if operand_start >= 0
+                else []
+            )
+            operations.append((operands, operator))
+        operand_start = -1
+    return operations
+
+
+__all__ = ["TEXT_OPERATORS", "content_stream_bytes", "scan_text_operations"]
@@ -0,0 +1,302 @@
+"""
+Structure-aware, token-budgeted chunking of extracted document text.
+
+The handlers used to split raw characters with a fixed-size recursive splitter
+(1000 characters, 150 overlap), which cut through headings and paragraphs and
+produced many small, heavily overlapping chunks, each costing an embedding, a
+vector and retrieval tokens. Chunks are now packed up to a token budget from
+whole paragraphs where possible and whole sentences otherwise, never span a
+heading (a heading opens a new chunk and is carried on every chunk of its
+section), and overlap the previous chunk by a configurable number of sentences.
+
+The chunker consumes an iterable of page texts and yields chunks as soon as
+they are full, so callers that stream pages never need the whole document as
+one string. Offsets refer to the pages joined with ``page_separator`` (what
+``PdfReader.extract_text_range`` returns), which keeps highlights and citations
+addressable in the stored content.
+
+Token counts use tiktoken when it is installed and its encoding can be loaded,
+and a word/punctuation approximation otherwise.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+try:  # exact token counts when the wheel is available
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+DEFAULT_CHUNK_TOKENS = 400
+DEFAULT_OVERLAP_SENTENCES = 1
+TOKEN_ENCODING = "cl100k_base"
+# A chunk this full ends at a paragraph boundary rather than splitting the next paragraph.
+PARAGRAPH_BREAK_FILL = 0.75
+# Sections shorter than this share a chunk with the next section instead of
+# becoming a chunk (and an embedding) of their own.
+MIN_SECTION_FILL = 0.25
+MAX_HEADING_CHARS = 120
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_LINE_RE = re.compile(r"[^\n]*(?:\n|$)")
+_SENTENCE_END_RE = re.compile(r"[.!?]+[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+_WHITESPACE_RE = re.compile(r"\s+")
+_HEADING_RE = re.compile(
+    r"^(?:#{1,6}\s+\S"
+    r"|(?:chapter|section|part|article|appendix)\s+[\dIVXLC]+\b"
+    r"|\d+(?:\.\d+)*\.?\s+[A-Z]"
+    r"|[IVXLC]+\.\s+[A-Z])",
+    re.IGNORECASE,
+)
+
+TokenCounter = Callable[[str], int]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A chunk of text with its position in the source document."""
+
+    text: str
+    start: int
+    end: int
+    page_start: int
+    page_end: int
+    tokens: int
+    heading: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class _Unit:
+    text: str
+    start: int
+    end: int
+    page: int
+    tokens: int
+    paragraph_start: bool
+
+
+def approximate_token_count(text: str) -> int:
+    """Rough BPE token count: one per word or punctuation mark, plus one per 8 characters of long words."""
+
+    return sum(1 + len(token) // 8 for token in _WORD_RE.findall(text))
+
+
+@lru_cache(maxsize=4)
+def token_counter(encoding: str = TOKEN_ENCODING) -> TokenCounter:
+    """Return a token counting function, falling back to the approximation without tiktoken."""
+
+    if tiktoken is None:
+        return approximate_token_count
+    try:
+        encoder = tiktoken.get_encoding(encoding)
+    except Exception as error:  # encodings are downloaded on first use and may be unavailable
+        print(f"⚠️ tiktoken encoding {encoding} unavailable, approximating token counts: {error}")
+        return approximate_token_count
+    return lambda text: len(encoder.encode(text, disallowed_special=()))
+
+
+def is_heading(line: str) -> bool:
+    """Heuristic for heading lines in extracted text: numbered, markdown or short upper-case titles."""
+
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_CHARS or line.endswith((".", ",", ";", ":")) and not line.startswith("#"):
+        return False
+    if _HEADING_RE.match(line):
+        return True
+    letters = [char for char in line if char.isalpha()]
+    return len(letters) >= 3 and all(char.isupper() for char in letters)
+
+
+def _paragraphs(page: str) -> Iterator[Tuple[int, int, bool]]:
+    """Yield ``(start, end, is_heading)`` spans of paragraphs and heading lines in ``page``."""
+
+    start = None
+    end = 0
+    for match in _LINE_RE.finditer(page):
+        line = match.group().rstrip("\n")
+        if match.start() == len(page) and not line:
+            break
+        if not line.strip():
+            if start is not None:
+                yield start, end, False
+                start = None
+            continue
+        if is_heading(line):
+            if start is not None:
+                yield start, end, False
+                start = None
+            yield match.start(), match.start() + len(line), True
+            continue
+        if start is None:
+            start = match.start()
+        end = match.start() + len(line)
+    if start is not None:
+        yield start, end, False
+
+
+def _sentences(text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    cursor = start
+    for match in _SENTENCE_END_RE.finditer(text, start, end):
+        yield cursor, match.start() + len(match.group().rstrip())
+        cursor = match.end()
+    if cursor < end:
+        yield cursor, end
+
+
+class StructuredChunker:
+    """Packs paragraphs and sentences from a page stream into token-budgeted chunks."""
+
+    def __init__(self, max_tokens: int = DEFAULT_CHUNK_TOKENS, *,
+                 overlap_sentences: int = DEFAULT_OVERLAP_SENTENCES,
+                 count_tokens: Optional[TokenCounter] = None, page_separator: str = "\n") -> None:
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be positive")
+        if overlap_sentences < 0:
+            raise ValueError("overlap_sentences must not be negative")
+        self.max_tokens = max_tokens
+        self.overlap_sentences = overlap_sentences
+        self._count_tokens = count_tokens
+        self.page_separator = page_separator
+
+    @property
+    def count_tokens(self) -> TokenCounter:
+        # Resolved on first use so module-level chunkers do not load an encoding at import.
+        if self._count_tokens is None:
+            self._count_tokens = token_counter()
+        return self._count_tokens
+
+    def _units(self, text: str, start: int, end: int, base: int, page: int) -> Iterator[_Unit]:
+        """Sentences of a paragraph; sentences over budget are split on whitespace."""
+
+        first = True
+        for sent_start, sent_end in _sentences(text, start, end):
+            sentence = _WHITESPACE_RE.sub(" ", text[sent_start:sent_end]).strip()
+            if not sentence:
+                continue
+            tokens = self.count_tokens(sentence)
+            if tokens <= self.max_tokens:
+                yield _Unit(sentence, base + sent_start, base + sent_end, page, tokens, first)
+                first = False
+                continue
+            for piece_start, piece_end in self._split_long(text, sent_start, sent_end):
+                piece = _WHITESPACE_RE.sub(" ", text[piece_start:piece_end]).strip()
+                yield _Unit(piece, base + piece_start, base + piece_end, page, self.count_tokens(piece), first)
+                first = False
+
+    def _split_long(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        piece_start = None
+        piece_end = start
+        tokens = 0
+        for match in re.finditer(r"\S+", text[start:end]):
+            word_tokens = self.count_tokens(match.group())
+            if piece_start is not None and tokens + word_tokens > self.max_tokens:
+                yield piece_start, piece_end
+                piece_start = None
+                tokens = 0
+            if piece_start is None:
+                piece_start = start + match.start()
+            piece_end = start + match.end()
+            tokens += word_tokens
+        if piece_start is not None:
+            yield piece_start, piece_end
+
+    def chunk_pages(self, pages: Iterable[str]) -> Iterator[Chunk]:
+        """Yield chunks for ``pages`` in document order."""
+
+        current: List[_Unit] = []
+        tokens = 0
+        heading: Optional[str] = None
+        chunk_heading: Optional[str] = None
+
+        def emit() -> Chunk:
+            text = ""
+            for unit in current:
+                if text:
+                    text += "\n\n" if unit.paragraph_start else " "
+                text += unit.text
+            return Chunk(text, current[0].start, current[-1].end, current[0].page, current[-1].page,
+                         tokens, chunk_heading)
+
+        def carry_overlap() -> None:
+            nonlocal current, tokens, body, carried
+            keep = current[-self.overlap_sentences:] if self.overlap_sentences else []
+            while keep and sum(unit.tokens for unit in keep) > self.max_tokens // 2:
+                keep = keep[1:]
+            current = [_Unit(unit.text, unit.start, unit.end, unit.page, unit.tokens, index == 0)
+                       for index, unit in enumerate(keep)]
+            tokens = sum(unit.tokens for unit in current)
+            body = False
+            carried = True
+
+        # ``body`` is False while ``current`` only holds headings or carried-over
+        # overlap (``carried``), which are never emitted on their own.
+        body = carried = False
+        base = 0
+        for page_index, page in enumerate(pages):
+            for para_start, para_end, heading_line in _paragraphs(page):
+                units = list(self._units(page, para_start, para_end, base, page_index))
+                if heading_line:
+                    if body and tokens < self.max_tokens * MIN_SECTION_FILL:
+                        # Too short to stand alone: keep packing the next section into this chunk.
+                        current.extend(units)
+                        tokens += sum(unit.tokens for unit in units)
+                        heading = _WHITESPACE_RE.sub(" ", page[para_start:para_end]).strip().lstrip("#").strip()
+                        continue
+                    if body:
+                        yield emit()
+                    if body or carried:
+                        # Sections do not overlap; consecutive headings stay together.
+                        current, tokens = [], 0
+                    heading = _WHITESPACE_RE.sub(" ", page[para_start:para_end]).strip().lstrip("#").strip()
+                    current.extend(units)
+                    tokens += sum(unit.tokens for unit in units)
+                    chunk_heading = heading
+                    body = carried = False
+                    continue
+
+                paragraph_tokens = sum(unit.tokens for unit in units)
+                if body and tokens + paragraph_tokens > self.max_tokens \
+                        and tokens >= self.max_tokens * PARAGRAPH_BREAK_FILL:
+                    yield emit()
+                    carry_overlap()
+                    chunk_heading = heading
+                for unit in units:
+                    if current and tokens + unit.tokens > self.max_tokens:
+                        if body:
+                            yield emit()
+                            carry_overlap()
+                            chunk_heading = heading
+                        if tokens + unit.tokens > self.max_tokens:
+                            current, tokens = [], 0
+                    if not current:
+                        unit = _Unit(unit.text, unit.start, unit.end, unit.page, unit.tokens, True)
+                    current.append(unit)
+                    tokens += unit.tokens
+                    body = True
+                    carried = False
+            base += len(page) + len(self.page_separator)
+        if body:
+            yield emit()
+
+    def chunk_text(self, text: str) -> Iterator[Chunk]:
+        return self.chunk_pages([text])
+
+    def split_text(self, text: str) -> List[str]:
+        """Drop-in replacement for ``RecursiveCharacterTextSplitter.split_text``."""
+
+        return [chunk.text for chunk in self.chunk_pages([text])]
+
+
+__all__ = [
+    "Chunk",
+    "DEFAULT_CHUNK_TOKENS",
+    "DEFAULT_OVERLAP_SENTENCES",
+    "StructuredChunker",
+    "approximate_token_count",
+    "is_heading",
+    "token_counter",
+]
@@ -34,6 +34,19 @@ class Settings:
     default_model_id: str | None
     media_bucket: str | None
     media_queue_url: str | None
+    jobs_queue_url: str | None
+    content_bucket: str | None
+    media_worker_concurrency: int
+    nova_segment_concurrency: int
+    llm_concurrency: int
+    nova_by_reference: bool
+    nova_inline_max_bytes: int
+    text_embedding_backend: str
+    text_embedding_model: str
+    media_index_host: str
+    media_namespace: str | None
+    text_min_score: float
+    media_min_score: float
 
 
 @lru_cache(maxsize=1)
@@ -58,6 +71,20 @@ def get_settings() -> Settings:
         default_model_id=os.environ.get("DEFAULT_MODEL_ID"),
         media_bucket=os.environ.get("MEDIA_BUCKET"),
         media_queue_url=os.environ.get("MEDIA_QUEUE_URL"),
+        jobs_queue_url=os.environ.get("JOBS_QUEUE_URL"),
+        content_bucket=os.environ.get("CONTENT_BUCKET"),
+        media_worker_concurrency=max(1, int(os.environ.get("MEDIA_WORKER_CONCURRENCY", "4"))),
+        nova_segment_concurrency=max(1, int(os.environ.get("NOVA_SEGMENT_CONCURRENCY", "4"))),
+        llm_concurrency=max(1, int(os.environ.get("LLM_CONCURRENCY", "8"))),
+        nova_by_reference=os.environ.get("NOVA_BY_REFERENCE", "true").lower() == "true",
+        nova_inline_max_bytes=max(0, int(os.environ.get("NOVA_INLINE_MAX_BYTES", str(10 * 1024 * 1024)))),
+        text_embedding_backend=os.environ.get("TEXT_EMBEDDING_BACKEND", "openai"),
+        text_embedding_model=os.environ.get("TEXT_EMBEDDING_MODEL", "text-embedding-3-small"),
+        media_index_host=os.environ.get("MEDIA_PINECONE_INDEX_HOST") or _get_env("PINECONE_INDEX_HOST"),
+        media_namespace=os.environ.get("MEDIA_PINECONE_NAMESPACE", "media") or None,
+        # Similarity floors per embedding space; cross-modal Nova scores run lower than text-only ones.
+        text_min_score=float(os.environ.get("TEXT_MIN_SCORE", "0.2")),
+        media_min_score=float(os.environ.get("MEDIA_MIN_SCORE", "0.1")),
     )
 
 
@@ -0,0 +1,150 @@
+"""
+Content hashing helpers used to keep document vectors in sync with edits.
+
+Like ``knowledge_graph``, this module is free of AWS and LLM side effects so the
+diffing rules can be unit-tested in isolation. Handlers persist the manifest
+produced here on the ``DOC#`` item and use the diff to decide which chunks need
+an embedding call and which vector ids can be deleted. Whole-document
+fingerprints feed the per-user ``HASH#`` index used to short-circuit duplicate
+uploads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+CHUNK_HASH_LENGTH = 16
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class ChunkDiff:
+    """Result of comparing a fresh chunking against the stored manifest."""
+
+    manifest: List[str]
+    added: List[Tuple[int, str, str]]
+    unchanged: List[str]
+    removed: List[str]
+
+
+def normalise_text(text: str) -> str:
+    """Collapse whitespace so cosmetic edits do not invalidate chunk hashes."""
+
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def chunk_hash(text: str) -> str:
+    """Return a short, stable digest for a chunk of text."""
+
+    digest = hashlib.sha256(normalise_text(text).encode("utf-8")).hexdigest()
+    return digest[:CHUNK_HASH_LENGTH]
+
+
+def fingerprint_bytes(payload: bytes) -> str:
+    """SHA-256 of the raw upload, used before any extraction work happens."""
+
+    return hashlib.sha256(payload or b"").hexdigest()
+
+
+def document_content_hash(text: str) -> str:
+    """
+    SHA-256 of a saved document body exactly as sent.
+
+    Unlike ``chunk_hash`` this is whitespace-sensitive and covers the whole
+    text, so any edit (including one past the inline-storage limit) counts as
+    a change. It equals ``fingerprint_bytes`` of the UTF-8 text, so hashes
+    stored by earlier saves still match.
+    """
+
+    return fingerprint_bytes((text or "").encode("utf-8"))
+
+
+def fingerprint_text(text: str) -> str:
+    """SHA-256 of the normalised text so re-exports of the same document still match."""
+
+    return hashlib.sha256(normalise_text(text).lower().encode("utf-8")).hexdigest()
+
+
+def hash_index_sk(kind: str, digest: str) -> str:
+    """Sort key for a per-user hash index row (``kind`` is ``RAW`` or ``TEXT``)."""
+
+    return f"HASH#{kind.upper()}#{digest}"
+
+
+def chunk_vector_id(doc_id: str, digest: str) -> str:
+    """Vector ids are content-addressed so unchanged chunks keep their id across saves."""
+
+    return f"{doc_id}-{digest}"
+
+
+def segment_hash(position: int, segment: Optional[Mapping[str, Any]] = None) -> str:
+    """Digest for the ``position``-th media embedding and the segment it was requested for."""
+
+    canonical = json.dumps({"position": position, "segment": segment or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:CHUNK_HASH_LENGTH]
+
+
+def job_fingerprint(job: Mapping[str, Any]) -> str:
+    """
+    Idempotency key for a queued job.
+
+    Producers that stamp a ``job_id`` get exactly-once semantics per enqueue;
+    older messages fall back to a digest of the fields that define the work.
+    """
+
+    if job.get("job_id"):
+        return str(job["job_id"])
+    identity = {field: job.get(field) for field in ("user_id", "doc_id", "bucket", "key", "media_type", "segments")}
+    canonical = json.dumps(identity, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def diff_chunks(chunks: Sequence[str], previous_manifest: Optional[Sequence[str]]) -> ChunkDiff:
+    """
+    Compare the new chunking with the manifest stored on the previous save.
+
+    ``added`` carries ``(chunk_index, digest, text)`` for chunks that need an
+    embedding; ``removed`` lists digests whose vectors should be deleted. Exact
+    repeats inside one document collapse onto a single digest and vector.
+    """
+
+    previous = set(previous_manifest or [])
+    manifest: List[str] = []
+    added: List[Tuple[int, str, str]] = []
+    unchanged: List[str] = []
+    seen: Dict[str, int] = {}
+
+    for idx, chunk in enumerate(chunks):
+        digest = chunk_hash(chunk)
+        if digest in seen:
+            continue
+        seen[digest] = idx
+        manifest.append(digest)
+        if digest in previous:
+            unchanged.append(digest)
+        else:
+            added.append((idx, digest, chunk))
+
+    removed = [digest for digest in (previous_manifest or []) if digest not in seen]
+    return ChunkDiff(manifest=manifest, added=added, unchanged=unchanged, removed=removed)
+
+
+__all__ = [
+    "CHUNK_HASH_LENGTH",
+    "ChunkDiff",
+    "chunk_hash",
+    "chunk_vector_id",
+    "diff_chunks",
+    "document_content_hash",
+    "fingerprint_bytes",
+    "fingerprint_text",
+    "hash_index_sk",
+    "job_fingerprint",
+    "normalise_text",
+    "segment_hash",
+]
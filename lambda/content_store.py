@@ -0,0 +1,203 @@
+"""
+S3-backed storage for full document text.
+
+DynamoDB rows only keep a pointer, sizes, a hash and a short preview; the text
+itself is written to S3 as a sequence of independently compressed frames. The
+frame index stored on the row lets readers fetch just the frames covering the
+characters they need with a single ranged GET instead of downloading the whole
+object.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:  # zstd is smaller and faster when the wheel is available
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+FRAME_CHARS = 256 * 1024
+PREVIEW_CHARS = 2000
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress ``data`` with ``"zstd"`` or ``"gzip"``."""
+
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """Inverse of ``compress``."""
+
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def default_encoding() -> str:
+    """``"zstd"`` when the zstandard wheel is installed, otherwise ``"gzip"``."""
+
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def encode_frames(text: str, *, encoding: Optional[str] = None,
+                  frame_chars: int = FRAME_CHARS) -> Tuple[bytes, List[List[int]]]:
+    """
+    Compress ``text`` into independent frames.
+
+    Returns the object body and a frame index of ``[char_start, byte_start, byte_end]``
+    triples (``byte_end`` exclusive).
+    """
+
+    encoding = encoding or default_encoding()
+    parts: List[bytes] = []
+    frames: List[List[int]] = []
+    byte_cursor = 0
+    for char_start in range(0, max(len(text), 1), frame_chars):
+        compressed = compress(text[char_start : char_start + frame_chars].encode("utf-8"), encoding)
+        parts.append(compressed)
+        frames.append([char_start, byte_cursor, byte_cursor + len(compressed)])
+        byte_cursor += len(compressed)
+    return b"".join(parts), frames
+
+
+def select_frames(frames: Sequence[Sequence[int]], offset: int, length: Optional[int]) -> List[Sequence[int]]:
+    """Return the frames overlapping ``[offset, offset + length)``."""
+
+    end = None if length is None else offset + length
+    selected = []
+    for idx, frame in enumerate(frames):
+        frame_start = int(frame[0])
+        frame_end = int(frames[idx + 1][0]) if idx + 1 < len(frames) else None
+        if frame_end is not None and frame_end <= offset:
+            continue
+        if end is not None and frame_start >= end:
+            break
+        selected.append(frame)
+    return selected
+
+
+class ContentStore:
+    """Writes and lazily reads compressed document text in S3."""
+
+    def __init__(self, s3_client, bucket: str, *, prefix: str = "content", frame_chars: int = FRAME_CHARS) -> None:
+        if not bucket:
+            raise ValueError("ContentStore requires a bucket")
+        self._s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.frame_chars = frame_chars
+
+    def object_key(self, user_id: str, doc_id: str) -> str:
+        return f"{self.prefix}/{user_id}/{doc_id}.txt"
+
+    def put(self, user_id: str, doc_id: str, text: str) -> Dict[str, Any]:
+        """Store ``text`` and return the attributes to persist on the DOC# row."""
+
+        encoding = default_encoding()
+        body, frames = encode_frames(text, encoding=encoding, frame_chars=self.frame_chars)
+        key = self.object_key(user_id, doc_id)
+        self._s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=body,
+            ContentType="text/plain; charset=utf-8",
+            Metadata={"content-encoding-frames": encoding},
+        )
+        return {
+            "content_bucket": self.bucket,
+            "content_key": key,
+            "content_encoding": encoding,
+            "content_size": Decimal(len(text)),
+            "content_bytes": Decimal(len(body)),
+            "content_hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "content_preview": text[:PREVIEW_CHARS],
+            "content_frames": [[Decimal(value) for value in frame] for frame in frames],
+        }
+
+    def load(self, item: Dict[str, Any], *, offset: int = 0, length: Optional[int] = None) -> str:
+        """Read ``length`` characters from ``offset`` using one ranged GET."""
+
+        frames = item.get("content_frames") or []
+        selected = select_frames(frames, offset, length)
+        if not selected:
+            return ""
+
+        first_byte = int(selected[0][1])
+        last_byte = int(selected[-1][2])
+        response = self._s3.get_object(
+            Bucket=item.get("content_bucket") or self.bucket,
+            Key=item["content_key"],
+            Range=f"bytes={first_byte}-{last_byte - 1}",
+        )
+        payload = response["Body"].read()
+
+        encoding = item.get("content_encoding") or "gzip"
+        text = "".join(
+            decompress(payload[int(frame[1]) - first_byte : int(frame[2]) - first_byte], encoding).decode("utf-8")
+            for frame in selected
+        )
+        relative = offset - int(selected[0][0])
+        return text[relative:] if length is None else text[relative : relative + length]
+
+    def delete(self, item: Dict[str, Any]) -> None:
+        if item.get("content_key"):
+            self._s3.delete_object(Bucket=item.get("content_bucket") or self.bucket, Key=item["content_key"])
+
+
+def content_attributes(store: Optional[ContentStore], user_id: str, doc_id: str, text: str,
+                       *, inline_limit: int) -> Dict[str, Any]:
+    """Use the content store when configured, otherwise fall back to inline (truncated) content."""
+
+    if store is None:
+        return {"content": text[:inline_limit]}
+    return store.put(user_id, doc_id, text)
+
+
+def parse_content_range(offset: Any, length: Any) -> Tuple[int, Optional[int]]:
+    """
+    Validate ``offset``/``length`` query parameters.
+
+    Raises ``ValueError`` for non-integer or negative values so handlers can
+    answer 400 instead of failing the request.
+    """
+
+    try:
+        start = int(offset) if offset not in (None, "") else 0
+        size = int(length) if length not in (None, "") else None
+    except (TypeError, ValueError):
+        raise ValueError("offset and length must be integers") from None
+    if start < 0 or (size is not None and size < 0):
+        raise ValueError("offset and length must not be negative")
+    return start, size
+
+
+def load_content(store: Optional[ContentStore], item: Dict[str, Any], *, offset: int = 0,
+                 length: Optional[int] = None) -> str:
+    """Return document text from the store or, for legacy rows, the inline attribute."""
+
+    if item.get("content_key") and store is not None:
+        return store.load(item, offset=offset, length=length)
+    inline = item.get("content") or item.get("content_preview") or ""
+    return inline[offset:] if length is None else inline[offset : offset + length]
+
+
+__all__ = [
+    "ContentStore",
+    "FRAME_CHARS",
+    "PREVIEW_CHARS",
+    "compress",
+    "content_attributes",
+    "decompress",
+    "default_encoding",
+    "encode_frames",
+    "load_content",
+    "parse_content_range",
+    "select_frames",
+]
@@ -0,0 +1,193 @@
+"""
+Document co-occurrence edges for the knowledge graph.
+
+Two documents are related when they mention the same entity. Enumerating every
+pair of documents per entity is quadratic in the entity's document count, so
+entities such as the user's own name or employer dominate the cost. Instead the
+entity×document incidence matrix ``B`` is built once and ``Bᵀ·W·B`` gives every
+doc×doc weight in a single sparse product, where ``W`` holds an IDF-style weight
+that down-weights ubiquitous entities. Only the strongest ``top_k`` edges per
+document are kept.
+
+Entities mentioned in more than ``HUB_DOC_LIMIT`` documents relate nothing in
+particular and are left out of the pairing (they still count towards each
+document's entity count). That keeps the work per entity bounded, so neither
+path is quadratic in the document count.
+
+SciPy is used when it is installed (it is in requirements.txt); otherwise an
+equivalent pure-Python pass accumulates one document row at a time so memory
+stays bounded by ``top_k``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+try:  # Optional so the module still imports where SciPy is unavailable.
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - exercised when SciPy is unavailable
+    np = None
+    sparse = None
+
+SHARED_ENTITY_LIMIT = 10
+HUB_DOC_LIMIT = 1000
+SCORE_PRECISION = 6
+
+
+def _entity_name(item: Mapping[str, Any]) -> Optional[str]:
+    return item.get("entity_name") or item.get("name") or item.get("entity_id")
+
+
+def entity_weights(doc_frequencies: Sequence[int], doc_count: int, *, idf: bool = True) -> List[float]:
+    """Smoothed IDF ``log((1 + N) / (1 + df)) + 1`` per entity, or ``1.0`` when ``idf`` is off."""
+
+    if not idf:
+        return [1.0] * len(doc_frequencies)
+    return [math.log((1 + doc_count) / (1 + df)) + 1.0 for df in doc_frequencies]
+
+
+def _incidence(entity_items: Sequence[Mapping[str, Any]]):
+    doc_ids: Set[str] = set()
+    entity_docs_raw: List[List[str]] = []
+    names: List[Optional[str]] = []
+    for item in entity_items:
+        unique = sorted(set(item.get("doc_ids") or []))
+        if not unique:
+            continue
+        doc_ids.update(unique)
+        entity_docs_raw.append(unique)
+        names.append(_entity_name(item))
+
+    ordered_docs = sorted(doc_ids)
+    position = {doc_id: index for index, doc_id in enumerate(ordered_docs)}
+    entity_docs = [[position[doc_id] for doc_id in docs] for docs in entity_docs_raw]
+    return ordered_docs, entity_docs, names
+
+
+def _rank_key(score: float, count: int, other: int) -> Tuple[float, int, int]:
+    return (round(score, SCORE_PRECISION), count, -other)
+
+
+def _python_rows(entity_docs: List[List[int]], weights: List[float], doc_count: int,
+                 top_k: Optional[int]) -> Dict[Tuple[int, int], Tuple[int, float]]:
+    doc_entities: List[List[int]] = [[] for _ in range(doc_count)]
+    for entity, docs in enumerate(entity_docs):
+        for doc in docs:
+            doc_entities[doc].append(entity)
+
+    edges: Dict[Tuple[int, int], Tuple[int, float]] = {}
+    for doc in range(doc_count):
+        counts: Dict[int, int] = defaultdict(int)
+        scores: Dict[int, float] = defaultdict(float)
+        for entity in doc_entities[doc]:
+            weight = weights[entity]
+            for other in entity_docs[entity]:
+                if other != doc:
+                    counts[other] += 1
+                    scores[other] += weight
+        if top_k is None:
+            selected = [other for other in counts if other > doc]
+        else:
+            selected = heapq.nlargest(top_k, counts, key=lambda other: _rank_key(scores[other], counts[other], other))
+        for other in selected:
+            edges[(min(doc, other), max(doc, other))] = (counts[other], scores[other])
+    return edges
+
+
+def _sparse_rows(entity_docs: List[List[int]], weights: List[float], doc_count: int,
+                 top_k: Optional[int]) -> Dict[Tuple[int, int], Tuple[int, float]]:
+    rows = [entity for entity, docs in enumerate(entity_docs) for _ in docs]
+    cols = [doc for docs in entity_docs for doc in docs]
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows)), (np.asarray(rows), np.asarray(cols))),
+        shape=(len(entity_docs), doc_count),
+    )
+    weighted = sparse.diags(np.asarray(weights)) @ incidence
+    counts = (incidence.T @ incidence).tocsr()
+    scores = (incidence.T @ weighted).tocsr()
+    counts.sort_indices()
+    scores.sort_indices()
+
+    edges: Dict[Tuple[int, int], Tuple[int, float]] = {}
+    for doc in range(doc_count):
+        start, end = counts.indptr[doc], counts.indptr[doc + 1]
+        others = counts.indices[start:end]
+        row_counts = counts.data[start:end]
+        row_scores = scores.data[scores.indptr[doc]:scores.indptr[doc + 1]]
+        mask = others != doc
+        others, row_counts, row_scores = others[mask], row_counts[mask], row_scores[mask]
+        if top_k is None:
+            chosen = np.nonzero(others > doc)[0]
+        else:
+            # lexsort sorts ascending by the last key first: score, then count, then lowest doc index.
+            order = np.lexsort((others, -row_counts, -np.round(row_scores, SCORE_PRECISION)))
+            chosen = order[:top_k]
+        for index in chosen:
+            other = int(others[index])
+            edges[(min(doc, other), max(doc, other))] = (int(row_counts[index]), float(row_scores[index]))
+    return edges
+
+
+def cooccurrence_edges(entity_items: Sequence[Mapping[str, Any]], *, top_k: Optional[int] = None,
+                       idf: bool = False, shared_entity_limit: int = SHARED_ENTITY_LIMIT,
+                       hub_doc_limit: Optional[int] = HUB_DOC_LIMIT) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Return ``(relationships, doc_entity_counts)`` for a user's ``ENTITY#`` items.
+
+    ``weight`` on each relationship is the number of shared entities and
+    ``score`` the IDF-weighted sum (equal to ``weight`` when ``idf`` is off).
+    With ``top_k`` an edge survives when it is among the ``top_k`` strongest
+    edges of either endpoint. ``shared_entities`` lists at most
+    ``shared_entity_limit`` names, most distinctive first. Entities in more
+    than ``hub_doc_limit`` documents do not relate documents.
+    """
+
+    doc_ids, entity_docs, names = _incidence(entity_items)
+    doc_count = len(doc_ids)
+    doc_frequencies = [len(docs) for docs in entity_docs]
+    weights = entity_weights(doc_frequencies, doc_count, idf=idf)
+
+    touch_counts: Dict[str, int] = {}
+    for docs in entity_docs:
+        for doc in docs:
+            touch_counts[doc_ids[doc]] = touch_counts.get(doc_ids[doc], 0) + 1
+
+    pairing = [docs if hub_doc_limit is None or len(docs) <= hub_doc_limit else [] for docs in entity_docs]
+    if sparse is not None and doc_count:
+        edges = _sparse_rows(pairing, weights, doc_count, top_k)
+    else:
+        edges = _python_rows(pairing, weights, doc_count, top_k)
+
+    # Shared entity names are resolved only for surviving edges.
+    doc_entities: List[Set[int]] = [set() for _ in range(doc_count)]
+    for entity, docs in enumerate(pairing):
+        for doc in docs:
+            doc_entities[doc].add(entity)
+
+    relationships: List[Dict[str, Any]] = []
+    for (source, target), (count, score) in edges.items():
+        shared = sorted(doc_entities[source] & doc_entities[target], key=lambda entity: (-weights[entity], entity))
+        shared_names: List[str] = []
+        for entity in shared:
+            name = names[entity]
+            if name and name not in shared_names:
+                shared_names.append(name)
+            if len(shared_names) >= shared_entity_limit:
+                break
+        relationships.append({
+            "source": doc_ids[source],
+            "target": doc_ids[target],
+            "weight": count,
+            "score": round(score, 4),
+            "shared_entities": shared_names,
+        })
+
+    relationships.sort(key=lambda rel: (-rel["score"], -rel["weight"], f"{rel['source']}->{rel['target']}"))
+    return relationships, touch_counts
+
+
+__all__ = ["HUB_DOC_LIMIT", "SHARED_ENTITY_LIMIT", "cooccurrence_edges", "entity_weights"]
@@ -18,21 +18,46 @@ import boto3
 
 import requests
 from boto3.dynamodb.conditions import Key
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from botocore.exceptions import ClientError
+from langchain_openai import ChatOpenAI
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.tools import Tool
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from agents import DEFAULT_RESEARCH_SYSTEM_PROMPT, build_langgraph_agent, web_search
+from chunking import StructuredChunker
 from config import get_settings, make_cors_headers
+from embeddings import backend_from_settings
+from content_index import chunk_hash, chunk_vector_id, diff_chunks, fingerprint_bytes, fingerprint_text, hash_index_sk
+from content_store import ContentStore, content_attributes, load_content, parse_content_range
+from direct_upload import (
+    abort_multipart_upload,
+    complete_multipart_upload,
+    parse_file_size,
+    parse_upload_key,
+    start_multipart_upload,
+    stream_object_text,
+    upload_key,
+)
+from document_deletion import start_deletion_job
+from graph_snapshot import GraphSnapshot, GraphSnapshotStore, etag_matches
+from jobs import create_job, document_stage_reporter, format_job, get_job, mark_document_failed, update_job
+from highlights import highlight_pages
+from keyword_matcher import KeywordMatcher
 from knowledge_graph import (
-    compute_doc_relationships,
     entities_to_document_payload,
     format_document_entities,
     format_entity_detail,
     format_user_entities,
-    run_entity_extraction,
+    run_chunked_entity_extraction,
 )
+from llm_cache import LlmResultCache
+from near_duplicates import SignatureStore, find_near_duplicates, match_existing, ref_vector_id
+from pdf_text_cache import PdfTextCache, extract_text as cached_pdf_text
+from retrieval import Route, fan_out_query
+from subgraph import neighborhood
+from summarization import find_sections, parse_section_request, summarize_document
+from vector_store import IndexGroup, PineconeIndex
 
 # Environment
 settings = get_settings()
@@ -43,7 +68,15 @@ PINECONE_INDEX_HOST = settings.pinecone_index_host
 DOC_TABLE = settings.doc_table
 MEDIA_BUCKET = settings.media_bucket
 MEDIA_QUEUE_URL = settings.media_queue_url
+JOBS_QUEUE_URL = settings.jobs_queue_url
+CONTENT_BUCKET = settings.content_bucket or MEDIA_BUCKET
+INLINE_CONTENT_LIMIT = 50000
 WIKI_MAX_SECTIONS = 12
+WIKI_OUTLINE_SECTIONS = 8
+GRAPH_EDGES_PER_DOC = 25
+# Queued uploads return the text of the first pages so the client can show it while ingestion runs.
+PREVIEW_PAGES = 3
+PREVIEW_CHARS = 8000
 
 # Ensure Pinecone cache can write inside Lambda /tmp filesystem
 os.environ["HOME"] = "/tmp"
@@ -61,7 +94,25 @@ sqs = boto3.client('sqs')
 
 # LangChain setup
 llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1, openai_api_key=OPENAI_API_KEY)
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key=OPENAI_API_KEY)
+embedding_backend = backend_from_settings(settings)
+
+pinecone_index = PineconeIndex(PINECONE_INDEX_HOST, PINECONE_API_KEY)
+# Media segments are embedded by Nova and stored apart from the text chunks;
+# queries are embedded once per space and searched side by side.
+media_index = PineconeIndex(settings.media_index_host, PINECONE_API_KEY, namespace=settings.media_namespace)
+vector_indexes = IndexGroup([pinecone_index, media_index])
+retrieval_routes = [Route("text", embedding_backend, pinecone_index, min_score=settings.text_min_score)]
+if settings.nova_embedding_model:
+    media_backend = (
+        embedding_backend if settings.text_embedding_backend == "nova" else backend_from_settings(settings, "nova")
+    )
+    retrieval_routes.append(Route("media", media_backend, media_index, min_score=settings.media_min_score))
+content_store = ContentStore(s3, CONTENT_BUCKET) if CONTENT_BUCKET else None
+# Without a content bucket extracted page text is only cached in this container's /tmp.
+pdf_text_cache = PdfTextCache(s3, CONTENT_BUCKET)
+signature_store = SignatureStore(dynamodb.Table(DOC_TABLE))
+# Per-chunk LLM results (entities, section summaries), keyed by content hash.
+llm_cache = LlmResultCache(s3, CONTENT_BUCKET)
 
 # Pinecone REST helpers
 def pinecone_request(path, payload):
@@ -95,19 +146,19 @@ def pinecone_upsert(vectors):
         pinecone_request("/vectors/upsert", batch)
 
 
-def pinecone_query(vector, doc_id=None, top_k=5):
-    body = {
-        "vector": vector,
-        "topK": top_k,
-        "includeMetadata": True,
-    }
-    if doc_id:
-        body["filter"] = {"doc_id": {"$eq": doc_id}}
-    data = pinecone_request("/query", body)
-    return data.get("matches", [])
+def pinecone_delete(ids):
+    if not ids:
+        return
+
+    batch_size = 1000
+    for i in range(0, len(ids), batch_size):
+        pinecone_request("/vectors/delete", {"ids": list(ids[i : i + batch_size])})
+
 
-# Text splitter
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
+# Text chunking
+chunker = StructuredChunker()
+# Only used to enumerate the positional vector ids of documents indexed before chunk manifests.
+legacy_text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -122,23 +173,36 @@ def make_headers(content_type='application/json', request_headers=None):
         settings,
         request_headers=request_headers,
         content_type=content_type,
+        allow_methods='GET,POST,DELETE,OPTIONS',
         add_origin_header=True,
     )
 
 # MCP-style Tools
+def _format_passage(match):
+    metadata = match.get("metadata") or {}
+    if match.get("route") == "media":
+        span = ""
+        if metadata.get("start_seconds") is not None:
+            span = f" ({float(metadata['start_seconds']):.0f}s-{float(metadata.get('end_seconds') or 0):.0f}s)"
+        return (
+            f"Media match: segment {metadata.get('segment', 0)} of {metadata.get('media_type') or 'media'} "
+            f"document {metadata.get('doc_id')}{span}"
+        )
+    return metadata.get("text") or ""
+
+
 def pinecone_retrieve(query: str, doc_id: str = None) -> str:
-    """Retrieve relevant document chunks from Pinecone vector database"""
+    """Retrieve relevant text chunks and media segments from Pinecone"""
     try:
-        query_embedding = embeddings.embed_query(query)
-        results = pinecone_query(query_embedding, doc_id=doc_id, top_k=5)
+        metadata_filter = {"doc_id": {"$eq": doc_id}} if doc_id else None
+        results = fan_out_query(query, retrieval_routes, top_k=5, metadata_filter=metadata_filter)
 
         if not results:
             return "No relevant passages found in documents."
 
         passages = []
         for idx, match in enumerate(results):
-            metadata = match.get("metadata") or {}
-            text = metadata.get("text") or ""
+            text = _format_passage(match)
             if not text:
                 continue
             passages.append(f"[{idx + 1}] {text}")
@@ -171,36 +235,550 @@ RESEARCH_SYSTEM_PROMPT = DEFAULT_RESEARCH_SYSTEM_PROMPT
 
 research_agent = build_langgraph_agent(llm, RESEARCH_SYSTEM_PROMPT, tools)
 
-def extract_pdf_text(content):
-    """Extract text from PDF content"""
+def extract_pdf_text(content, max_pages=None, max_chars=None):
+    """Extract text from PDF content, optionally only the first ``max_pages`` pages / ``max_chars`` characters
+
+    Page text is served from, and added to, the per-file page cache.
+    """
     try:
-        import PyPDF2
-        import io
-        pdf_file = io.BytesIO(content.encode('latin-1') if isinstance(content, str) else content)
-        reader = PyPDF2.PdfReader(pdf_file)
-        return "\n".join([page.extract_text() for page in reader.pages])
+        return cached_pdf_text(content, cache=pdf_text_cache, max_pages=max_pages, max_chars=max_chars)
     except Exception as e:
         print(f"⚠️ PDF extraction failed: {e}")
         return content
 
-def generate_summary(text, doc_name):
-    """Generate document summary using LLM"""
+def _upload_preview(content, binary_payload, is_pdf):
+    """Text of the first pages of an upload, returned while the ingestion job runs"""
+    if is_pdf:
+        payload = binary_payload if binary_payload is not None else content
+        preview = extract_pdf_text(payload, max_pages=PREVIEW_PAGES, max_chars=PREVIEW_CHARS)
+        # extract_pdf_text hands the payload back when the PDF cannot be parsed.
+        return preview if preview is not payload else ''
+    if binary_payload is not None:
+        return binary_payload[:PREVIEW_CHARS * 4].decode('utf-8', errors='ignore')[:PREVIEW_CHARS]
+    return content[:PREVIEW_CHARS]
+
+def generate_summary(text, doc_name, spans=None):
+    """Summarize the whole document section by section; returns ``(summary, section_summaries)``."""
     try:
-        prompt = f"Summarize this document in 3-5 sentences:\n\n{text[:8000]}"
-        response = llm.invoke(prompt)
-        return response.content
+        chunks = spans if spans is not None else list(chunker.chunk_text(text))
+        result = summarize_document(text, chunks, llm, cache=llm_cache, max_workers=settings.llm_concurrency)
+        return result.summary or f"Document {doc_name} uploaded successfully.", result.sections
     except Exception as e:
         print(f"⚠️ Summary generation failed: {e}")
-        return f"Document {doc_name} uploaded successfully."
+    return f"Document {doc_name} uploaded successfully.", []
+
+
+def _answer_section_request(user_id, doc_id, target):
+    """Answer "summarize section X" from the section summaries stored at ingest, without a model call."""
+    try:
+        item = dynamodb.Table(DOC_TABLE).get_item(Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'}).get('Item')
+    except Exception as lookup_error:  # noqa: BLE001
+        print(f"⚠️ Section summary lookup failed: {lookup_error}")
+        return None
+    sections = [section for section in find_sections((item or {}).get('sections') or [], target)
+                if section.get('summary')]
+    if not sections:
+        return None
+    response_text = "\n\n".join(f"**{section['title']}**\n\n{section['summary']}" for section in sections)
+    citations = [{'tool': 'section_summary', 'result': _section_citation(section)} for section in sections]
+    return response_text, citations
+
+
+def _section_citation(section):
+    """A section's title, with its page range when ingestion knew the page boundaries."""
+    if section.get('page_start') is None or section.get('page_end') is None:
+        return section['title']
+    return f"{section['title']} (pages {int(section['page_start']) + 1}-{int(section['page_end']) + 1})"
+
+
+def _sync_document_vectors(doc_id, filename, user_id, chunks, existing_item=None, spans=None,
+                           duplicate_spans=None, reuse_vectors=None):
+    """Embed and upsert only new chunks, then drop vectors for chunks that disappeared.
+
+    ``spans`` optionally carries the ``chunking.Chunk`` for each chunk so vectors
+    record where in the document their text came from; ``duplicate_spans`` maps a
+    chunk index to the near-duplicate copies collapsed into it. ``reuse_vectors``
+    maps a chunk index to the id of an existing near-duplicate vector whose values
+    are copied instead of calling the embedding model.
+    """
+    previous_manifest = existing_item.get('chunk_hashes') if existing_item else None
+    chunk_diff = diff_chunks(chunks, previous_manifest)
+    print(
+        f"🧮 Chunk diff: {len(chunk_diff.added)} new, {len(chunk_diff.unchanged)} unchanged, "
+        f"{len(chunk_diff.removed)} removed",
+        flush=True,
+    )
+
+    if chunk_diff.added:
+        print("🔧 Preparing Pinecone payload", flush=True)
+        values_by_idx = {}
+        reuse_vectors = reuse_vectors or {}
+        wanted = {idx: reuse_vectors[idx] for idx, _, _ in chunk_diff.added if idx in reuse_vectors}
+        if wanted:
+            try:
+                fetched = pinecone_index.fetch(sorted(set(wanted.values())))
+            except Exception as fetch_error:  # noqa: BLE001
+                print(f"⚠️ Could not fetch near-duplicate vectors, embedding instead: {fetch_error}")
+                fetched = {}
+            values_by_idx = {idx: fetched[vector_id] for idx, vector_id in wanted.items() if vector_id in fetched}
+            print(f"🪞 Reusing {len(values_by_idx)} vectors of near-duplicate chunks", flush=True)
+
+        to_embed = [(idx, text) for idx, _, text in chunk_diff.added if idx not in values_by_idx]
+        if to_embed:
+            try:
+                embeddings_list = embedding_backend.embed_documents([text for _, text in to_embed])
+            except Exception as embed_error:
+                print(f"❌ Embedding error: {embed_error!r}")
+                traceback.print_exc()
+                raise
+            values_by_idx.update(zip((idx for idx, _ in to_embed), embeddings_list))
+
+        print("📌 Upserting embeddings to Pinecone", flush=True)
+        # Text chunked as a single page carries no page numbers worth recording.
+        paged = bool(spans) and any(span.page_end for span in spans)
+        vectors = []
+        for idx, digest, chunk in chunk_diff.added:
+            vector = values_by_idx[idx]
+            metadata = {
+                "doc_id": doc_id,
+                "doc_name": filename,
+                "chunk": idx,
+                "chunk_hash": digest,
+                "text": chunk,
+                "user_id": user_id,
+            }
+            if spans:
+                span = spans[idx]
+                metadata.update({"start": span.start, "end": span.end})
+                if paged:
+                    metadata["page"] = span.page_start
+                if span.heading:
+                    metadata["heading"] = span.heading
+            if duplicate_spans and duplicate_spans.get(idx):
+                metadata["duplicate_spans"] = [f"{copy.start}-{copy.end}" for copy in duplicate_spans[idx]]
+            vectors.append({"id": chunk_vector_id(doc_id, digest), "values": vector, "metadata": metadata})
+
+        try:
+            pinecone_upsert(vectors)
+        except Exception as pinecone_error:
+            print(f"❌ Pinecone upsert error: {pinecone_error!r}")
+            traceback.print_exc()
+            raise
+        print("✅ Vectorized and stored in Pinecone")
+
+    stale_ids = [chunk_vector_id(doc_id, digest) for digest in chunk_diff.removed]
+    if existing_item and previous_manifest is None:
+        current_ids = {chunk_vector_id(doc_id, digest) for digest in chunk_diff.manifest}
+        stale_ids.extend(vector_id for vector_id in _legacy_vector_ids(doc_id, existing_item)
+                         if vector_id not in current_ids)
+    if stale_ids:
+        pinecone_delete(stale_ids)
+        print(f"🧹 Deleted {len(stale_ids)} stale vectors", flush=True)
+
+    return chunk_diff
+
+
+
+def _legacy_vector_ids(doc_id, existing_item):
+    """Positional ``{doc_id}-{idx}`` ids of a document indexed before chunk manifests existed.
+
+    They are listed by prefix, since the stored ``content`` is truncated (or
+    offloaded) and re-splitting it misses the tail. Indexes that cannot list
+    ids fall back to re-splitting whatever content is stored.
+    """
+    try:
+        return [
+            vector_id
+            for page in pinecone_index.list_ids(f"{doc_id}-")
+            for vector_id in page
+            if vector_id[len(doc_id) + 1:].isdigit()
+        ]
+    except Exception as list_error:  # noqa: BLE001
+        print(f"⚠️ Listing legacy vectors of {doc_id} failed, re-splitting stored content: {list_error}")
+    legacy_chunks = legacy_text_splitter.split_text(existing_item.get('content') or '')
+    return [f"{doc_id}-{idx}" for idx in range(len(legacy_chunks))]
+
+
+def _candidate_signatures(user_id, doc_id, signatures):
+    """Signatures of the user's other documents that may match ``signatures``, or ``None``."""
+    try:
+        return signature_store.candidates(user_id, signatures, exclude_doc_id=doc_id)
+    except Exception as signature_error:  # noqa: BLE001
+        print(f"⚠️ Chunk signature load failed: {signature_error}")
+        return None
+
+
+def _find_duplicate_document(table, user_id, hash_sks, exclude_doc_id=None):
+    """Return the DOC# item already indexed under any of the given HASH# keys."""
+    for hash_sk in hash_sks:
+        entry_resp = table.get_item(Key={'pk': f'USER#{user_id}', 'sk': hash_sk})
+        entry = entry_resp.get('Item') if isinstance(entry_resp, dict) else None
+        if not entry or not entry.get('doc_id') or entry['doc_id'] == exclude_doc_id:
+            continue
+        doc_resp = table.get_item(Key={'pk': f'USER#{user_id}', 'sk': f"DOC#{entry['doc_id']}"})
+        doc_item = doc_resp.get('Item') if isinstance(doc_resp, dict) else None
+        # Index rows can outlive a failed or deleted document; only link to live ones.
+        if doc_item and doc_item.get('processing_status') in ('ready', 'processing', 'queued'):
+            return doc_item
+    return None
+
+
+def _record_content_hashes(table, user_id, doc_id, hash_sks):
+    now_iso = datetime.now().isoformat()
+    for hash_sk in hash_sks:
+        table.put_item(Item={
+            'pk': f'USER#{user_id}',
+            'sk': hash_sk,
+            'doc_id': doc_id,
+            'created_at': now_iso,
+        })
+
+
+def _duplicate_upload_response(headers, doc_item):
+    doc_id = doc_item.get('doc_id')
+    print(f"🪞 Duplicate upload linked to {doc_id}", flush=True)
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'message': 'Document already uploaded',
+            'doc_id': doc_id,
+            'duplicate_of': doc_id,
+            'processing_status': doc_item.get('processing_status'),
+            'artifact': {
+                'summary': doc_item.get('summary', ''),
+                'questions': doc_item.get('questions', []),
+                'highlights': doc_item.get('highlights', []),
+                'entities': doc_item.get('entities', []),
+            }
+        }, cls=DecimalEncoder)
+    }
+
+
+def _ingest_text_document(user_id, doc_id, filename, media_type, content, *, existing_item=None,
+                          hash_sks=(), check_duplicates=True, report=None):
+    """
+    Run the text/PDF pipeline: chunk diff + embeddings, summary, highlights and entities.
+
+    Returns ``(outcome, result)`` where outcome is ``'empty'``, ``'duplicate'`` (result is
+    the existing DOC# item), ``'unchanged'`` or ``'ready'`` (result is the artifact).
+    ``report`` is called with each stage name so async jobs can surface progress.
+    """
+    report = report or (lambda stage: None)
+    if not content:
+        return 'empty', None
+
+    hash_sks = list(hash_sks)
+    hash_sks.append(hash_index_sk('TEXT', fingerprint_text(content)))
+    if check_duplicates:
+        duplicate = _find_duplicate_document(dynamodb.Table(DOC_TABLE), user_id, hash_sks, exclude_doc_id=doc_id)
+        if duplicate:
+            return 'duplicate', duplicate
+
+    report('embedding')
+    spans = list(chunker.chunk_text(content))
+    print(f"✂️  Split into {len(spans)} chunks")
+
+    # Near-duplicate chunks (repeated headers, footers, signatures) collapse into
+    # their first occurrence; chunks matching the user's other documents reuse
+    # those vectors instead of a new embedding.
+    near = find_near_duplicates([span.text for span in spans])
+    candidates = _candidate_signatures(user_id, doc_id, [near.signatures[idx] for idx in near.kept])
+    if candidates is not None:
+        match_existing(near, candidates)
+    position = {idx: pos for pos, idx in enumerate(near.kept)}
+    kept_spans = [spans[idx] for idx in near.kept]
+    chunks = [span.text for span in kept_spans]
+    duplicate_spans = defaultdict(list)
+    for idx, canonical in near.collapsed.items():
+        duplicate_spans[position[canonical]].append(spans[idx])
+    reuse_vectors = {position[idx]: ref_vector_id(ref) for idx, ref in near.existing.items()}
+    if near.collapsed or near.existing:
+        print(f"🪞 {len(near.collapsed)} near-duplicate chunks collapsed, "
+              f"{len(near.existing)} match existing chunks", flush=True)
+
+    chunk_diff = _sync_document_vectors(doc_id, filename, user_id, chunks, existing_item, spans=kept_spans,
+                                        duplicate_spans=duplicate_spans, reuse_vectors=reuse_vectors)
+
+    # Only rows written by a completed ingest carry a chunk manifest and artifacts.
+    if existing_item and existing_item.get('chunk_hashes') is not None \
+            and not chunk_diff.added and not chunk_diff.removed:
+        # Chunk hashes ignore whitespace, so still persist the text the editor sent.
+        refreshed_item = {key: value for key, value in existing_item.items() if key != 'content'}
+        refreshed_item.update(content_attributes(content_store, user_id, doc_id, content, inline_limit=INLINE_CONTENT_LIMIT))
+        refreshed_item.update({
+            'filename': filename,
+            'processing_status': 'ready',
+            'updated_at': datetime.now().isoformat(),
+        })
+        for transient_key in ('processing_stage', 'last_error', 'upload_key', 'upload_id', 'previous_status'):
+            refreshed_item.pop(transient_key, None)
+        dynamodb.Table(DOC_TABLE).put_item(Item=refreshed_item)
+        print("♻️  No chunk changes; reusing stored artifacts", flush=True)
+        return 'unchanged', {
+            'summary': existing_item.get('summary', ''),
+            'questions': existing_item.get('questions', []),
+            'highlights': existing_item.get('highlights', []),
+        }
+
+    report('summarizing')
+    print("🧠 Generating summary", flush=True)
+    summary, section_summaries = generate_summary(content, filename, spans=kept_spans)
+    print("🧠 Summary generated", flush=True)
+
+    # One pass yields the highlights and the lexicon counts sentiment is scored from.
+    highlighter = highlight_pages([content], LEXICON_MATCHER, HIGHLIGHT_KINDS)
+    doc_highlights = highlighter.highlights()
+    sentiment_score, emotion = _estimate_sentiment(content, counts=highlighter.counts)
+    print(f"🖍️ Generated {len(doc_highlights)} highlights", flush=True)
+
+    report('entities')
+    print("🕸️ Extracting entities for knowledge graph", flush=True)
+    doc_entities = []
+    try:
+        extracted_entities = run_chunked_entity_extraction(chunks, llm, cache=llm_cache,
+                                                           max_workers=settings.llm_concurrency)
+        entity_payload = entities_to_document_payload(extracted_entities)
+        doc_entities = _prepare_doc_entities(entity_payload)
+        print(f"🕸️ Identified {len(doc_entities)} entities", flush=True)
+    except Exception as entity_error:  # noqa: BLE001
+        print(f"⚠️ Entity extraction failed: {entity_error}")
+        doc_entities = []
+
+    questions = [
+        f"What are the main topics in {filename}?",
+        "Can you summarize the key findings?",
+        "What are the most important points?"
+    ]
+
+    report('storing')
+    docs_table = dynamodb.Table(DOC_TABLE)
+    now_iso = datetime.now().isoformat()
+    print("🗄️  Writing document metadata to DynamoDB", flush=True)
+    docs_table.put_item(Item={
+        'pk': f'USER#{user_id}',
+        'sk': f'DOC#{doc_id}',
+        'doc_id': doc_id,
+        'filename': filename,
+        'media_type': media_type,
+        **content_attributes(content_store, user_id, doc_id, content, inline_limit=INLINE_CONTENT_LIMIT),
+        'word_count': len(_tokenize(content)),
+        'sentiment_score': Decimal(str(sentiment_score)),
+        'emotion': emotion,
+        'summary': summary,
+        'sections': section_summaries,
+        'questions': questions,
+        'highlights': doc_highlights,
+        'processing_status': 'ready',
+        'created_at': (existing_item or {}).get('created_at') or now_iso,
+        'updated_at': now_iso,
+        'entities': doc_entities,
+        'knowledge_graph_state': 'indexed' if doc_entities else 'no_entities',
+        'chunk_hashes': chunk_diff.manifest,
+        'chunk_count': len(chunk_diff.manifest),
+        'content_hashes': hash_sks,
+    })
+    print("🗄️  DynamoDB write complete", flush=True)
+
+    try:
+        _record_content_hashes(docs_table, user_id, doc_id, hash_sks)
+        for stale_sk in set((existing_item or {}).get('content_hashes') or []) - set(hash_sks):
+            docs_table.delete_item(Key={'pk': f'USER#{user_id}', 'sk': stale_sk})
+    except Exception as hash_error:  # noqa: BLE001
+        print(f"⚠️ Content hash index write failed: {hash_error}")
+
+    try:
+        signatures = {chunk_hash(chunks[pos]): near.signatures[idx] for pos, idx in enumerate(near.kept)}
+        signature_store.replace_document(user_id, doc_id, signatures)
+    except Exception as signature_error:  # noqa: BLE001
+        print(f"⚠️ Chunk signature write failed: {signature_error}")
+
+    try:
+        _upsert_knowledge_graph(docs_table, user_id, doc_id, doc_entities, doc_meta={
+            'title': filename,
+            'summary': summary,
+            'created_at': (existing_item or {}).get('created_at') or now_iso,
+            'updated_at': now_iso,
+            'sentiment_score': sentiment_score,
+            'emotion': emotion,
+            'word_count': len(_tokenize(content)),
+        })
+    except Exception as kg_error:  # noqa: BLE001
+        print(f"⚠️ Knowledge graph persistence failed: {kg_error}")
+
+    return 'ready', {
+        'summary': summary,
+        'questions': questions,
+        'highlights': doc_highlights,
+    }
+
+
+def _enqueue_ingestion(user_id, doc_id, filename, media_type, raw_bytes, *, is_pdf, existing_item,
+                       hash_sks, check_duplicates):
+    """Store the raw upload in S3, mark the document queued and hand it to the jobs worker."""
+    s3_key = f"uploads/{user_id}/{doc_id}/{filename}"
+    s3.put_object(Bucket=MEDIA_BUCKET, Key=s3_key, Body=raw_bytes, ContentType=media_type)
+    print(f"☁️  Stored upload in S3 at {s3_key}")
+
+    docs_table = dynamodb.Table(DOC_TABLE)
+    job = create_job(docs_table, user_id, 'ingest_document', doc_id=doc_id)
+    now_iso = datetime.now().isoformat()
+    if existing_item:
+        # Re-saves keep the current row (and its chunk manifest) visible until the worker finishes.
+        docs_table.update_item(
+            Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'},
+            UpdateExpression='SET processing_status = :queued, processing_stage = :queued, ingest_job_id = :job, updated_at = :ts',
+            ExpressionAttributeValues={':queued': 'queued', ':job': job['job_id'], ':ts': now_iso},
+        )
+    else:
+        docs_table.put_item(Item={
+            'pk': f'USER#{user_id}',
+            'sk': f'DOC#{doc_id}',
+            'doc_id': doc_id,
+            'filename': filename,
+            'media_type': media_type,
+            'processing_status': 'queued',
+            'processing_stage': 'queued',
+            'ingest_job_id': job['job_id'],
+            'created_at': now_iso,
+            'content_hashes': hash_sks,
+        })
+        _record_content_hashes(docs_table, user_id, doc_id, hash_sks)
+
+    message = {
+        'job_type': 'ingest_document',
+        'job_id': job['job_id'],
+        'user_id': user_id,
+        'doc_id': doc_id,
+        'filename': filename,
+        'media_type': media_type,
+        'is_pdf': is_pdf,
+        'bucket': MEDIA_BUCKET,
+        'key': s3_key,
+        'hash_sks': hash_sks,
+        'check_duplicates': check_duplicates,
+    }
+    sqs.send_message(QueueUrl=JOBS_QUEUE_URL, MessageBody=json.dumps(message))
+    print(f"📬 Enqueued ingestion job {job['job_id']} for {doc_id}")
+    return job
+
+
+def run_ingestion_job(job):
+    """Process a queued ``ingest_document`` job; raises so SQS retries failed records."""
+    user_id = job['user_id']
+    doc_id = job['doc_id']
+    job_id = job['job_id']
+    docs_table = dynamodb.Table(DOC_TABLE)
+
+    doc_resp = docs_table.get_item(Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'})
+    doc_item = doc_resp.get('Item') if isinstance(doc_resp, dict) else None
+    if not doc_item or doc_item.get('processing_status') == 'deleting':
+        print(f"⚠️ Document {doc_id} no longer exists; dropping ingestion job {job_id}")
+        update_job(docs_table, user_id, job_id, status='cancelled', stage='cancelled')
+        return
+
+    report = document_stage_reporter(docs_table, user_id, job_id, doc_id)
+    try:
+        report('extracting')
+        content, raw_digest = stream_object_text(
+            s3, job['bucket'], job['key'], is_pdf=bool(job.get('is_pdf')), extract_pdf=extract_pdf_text,
+        )
+
+        outcome, result = _ingest_text_document(
+            user_id, doc_id, job.get('filename') or doc_item.get('filename'),
+            job.get('media_type') or doc_item.get('media_type'), content,
+            existing_item=doc_item,
+            hash_sks=job.get('hash_sks') or [hash_index_sk('RAW', raw_digest)],
+            check_duplicates=job.get('check_duplicates', True),
+            report=report,
+        )
+    except Exception as exc:
+        mark_document_failed(docs_table, user_id, doc_id, str(exc))
+        update_job(docs_table, user_id, job_id, status='failed', error=str(exc))
+        raise
+
+    if outcome in ('empty', 'duplicate'):
+        error = 'Unable to process document content' if outcome == 'empty' \
+            else f"Duplicate of {result.get('doc_id')}"
+        mark_document_failed(docs_table, user_id, doc_id, error)
+        update_job(docs_table, user_id, job_id, status='failed', stage=outcome, error=error)
+        return
+
+    update_job(docs_table, user_id, job_id, status='completed', stage='completed')
+    print(f"✅ Ingestion job {job_id} finished ({outcome})")
+
+
+def _classify_upload(filename, media_type=None):
+    """Return ``(media_type, is_text_like, is_pdf)`` for an uploaded file."""
+    extension = os.path.splitext(filename)[1].lower()
+    guessed_type, _ = mimetypes.guess_type(filename)
+    media_type = media_type or guessed_type or 'application/octet-stream'
+    is_text_like = media_type.startswith('text/') or extension in {'.txt', '.md', '.markdown', '.csv'}
+    is_pdf = extension == '.pdf' or media_type == 'application/pdf'
+    return media_type, is_text_like, is_pdf
+
+
+def run_upload_ingestion(bucket, key):
+    """Ingest an object that finished a direct multipart upload (S3 ObjectCreated event)."""
+    parsed = parse_upload_key(key)
+    if not parsed:
+        print(f"⚠️ Ignoring S3 object outside the direct upload prefix: {key}")
+        return
+    user_id, doc_id, filename = parsed
+
+    docs_table = dynamodb.Table(DOC_TABLE)
+    doc_resp = docs_table.get_item(Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'})
+    doc_item = doc_resp.get('Item') if isinstance(doc_resp, dict) else None
+    if not doc_item or doc_item.get('upload_key') != key \
+            or doc_item.get('processing_status') not in ('uploading', 'queued', 'failed'):
+        # Redelivered events and superseded uploads must not re-run ingestion.
+        print(f"⚠️ No pending upload for {key}; skipping")
+        return
+
+    media_type, is_text_like, is_pdf = _classify_upload(filename, doc_item.get('media_type'))
+    if not (is_text_like or is_pdf):
+        if not MEDIA_QUEUE_URL:
+            raise RuntimeError('Media processing not configured')
+        docs_table.update_item(
+            Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'},
+            UpdateExpression='SET processing_status = :processing, updated_at = :ts',
+            ExpressionAttributeValues={':processing': 'processing', ':ts': datetime.now().isoformat()},
+        )
+        sqs.send_message(QueueUrl=MEDIA_QUEUE_URL, MessageBody=json.dumps({
+            'job_id': doc_item.get('ingest_job_id') or f"media_{uuid.uuid4().hex[:12]}",
+            'user_id': user_id,
+            'doc_id': doc_id,
+            'bucket': bucket,
+            'key': key,
+            'media_type': media_type,
+            'metadata': doc_item.get('upload_metadata') or {},
+            'segments': [],
+        }))
+        print(f"📬 Enqueued media processing job for {doc_id}")
+        return
+
+    run_ingestion_job({
+        'job_type': 'ingest_document',
+        'job_id': doc_item['ingest_job_id'],
+        'user_id': user_id,
+        'doc_id': doc_id,
+        'filename': filename,
+        'media_type': media_type,
+        'is_pdf': is_pdf,
+        'bucket': bucket,
+        'key': key,
+        'check_duplicates': doc_item.get('check_duplicates', True),
+    })
 
 
-SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
 HIGHLIGHT_KEYWORDS = {
     "action": {"review", "schedule", "follow-up", "deadline", "email", "meet", "deliver", "plan", "todo", "decide"},
     "date": {"today", "tomorrow", "week", "month", "quarter", "january", "february", "march", "april", "may", "june",
              "july", "august", "september", "october", "november", "december", "monday", "tuesday", "wednesday",
-             "thursday", "friday", "saturday", "sunday", "deadline", "due", "by "},
+             "thursday", "friday", "saturday", "sunday", "deadline", "due", "by"},
 }
+# Highlight kind for sentences hitting each HIGHLIGHT_KEYWORDS category, in priority order.
+HIGHLIGHT_KINDS = {"action": "action", "date": "important"}
 
 POSITIVE_WORDS = {
     "accomplished", "amazing", "awesome", "calm", "confident", "excited", "grateful", "great", "happy", "hopeful",
@@ -222,84 +800,23 @@ STOPWORDS = {
     "was", "were", "been", "being", "after", "before", "when", "while", "over", "under", "again", "today", "yesterday",
     "tomorrow", "project", "tasks", "task", "note", "notes",
 }
+# Every lexicon in one matcher, so a single pass over a document yields the
+# highlight, sentiment and emotion hits together with their offsets.
+LEXICON_MATCHER = KeywordMatcher({
+    **HIGHLIGHT_KEYWORDS,
+    "positive": POSITIVE_WORDS,
+    "negative": NEGATIVE_WORDS,
+    **EMOTION_KEYWORDS,
+})
 
 ANALYTICS_TTL_HOURS = 6
 
 
 def generate_highlights(text: str, max_count: int = 12) -> list[dict]:
     """Generate structured highlight snippets from document text without additional LLM calls."""
-    if not text:
-        return []
-
-    normalized = text.replace("\r\n", "\n").strip()
-    if not normalized:
-        return []
-
-    segments = SENTENCE_SPLIT_RE.split(normalized)
-    highlights = []
-    cursor = 0
-    max_length = len(normalized)
-
-    for segment in segments:
-        raw = segment.strip()
-        if not raw:
-            cursor += len(segment) + 1
-            continue
-
-        start_idx = normalized.find(segment, cursor)
-        if start_idx == -1:
-            start_idx = cursor
-        cursor = start_idx + len(segment)
-
-        length = len(raw)
-        if length < 40 or length > 320:
-            continue
-
-        lower = raw.lower()
-        keyword_hits = {kind for kind, keywords in HIGHLIGHT_KEYWORDS.items()
-                        if any(keyword in lower for keyword in keywords)}
-        kind = "key"
-        if "action" in keyword_hits:
-            kind = "action"
-        elif "date" in keyword_hits:
-            kind = "important"
-
-        density_score = min(1.0, length / 180)
-        punctuation_bonus = 0.25 if ":" in raw or ";" in raw else 0.0
-        keyword_bonus = min(0.35, len(keyword_hits) * 0.2)
-        capital_bonus = 0.1 if raw[:1].isupper() else 0.0
-        score = density_score + punctuation_bonus + keyword_bonus + capital_bonus
-
-        context_start = max(0, start_idx - 80)
-        context_end = min(max_length, start_idx + length + 80)
-        context_snippet = normalized[context_start:context_end].strip()
-
-        highlights.append({
-            "id": f"hl-{uuid.uuid4().hex[:8]}",
-            "text": raw,
-            "kind": kind,
-            "offset": start_idx,
-            "length": length,
-            "score": round(score, 4),
-            "context": context_snippet,
-        })
-
-    if not highlights:
+    if not text or not text.strip():
         return []
-
-    highlights.sort(key=lambda h: h["score"], reverse=True)
-    seen = set()
-    deduped = []
-    for highlight in highlights:
-        key = highlight["text"].lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(highlight)
-        if len(deduped) >= max_count:
-            break
-
-    return deduped
+    return highlight_pages([text], LEXICON_MATCHER, HIGHLIGHT_KINDS, max_count=max_count).highlights()
 
 
 def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
@@ -324,28 +841,27 @@ def _extract_topics(item: dict) -> list[str]:
         if name and isinstance(name, str):
             topics.append(name.strip())
     if not topics:
-        summary = item.get("summary") or item.get("content") or ""
+        summary = item.get("summary") or item.get("content") or item.get("content_preview") or ""
         counts = Counter(_tokenize(summary))
         topics = [word.title() for word, _ in counts.most_common(5)]
     return topics[:5]
 
 
-def _estimate_sentiment(text: str) -> tuple[float, str]:
+def _estimate_sentiment(text: str, counts: Optional[Counter] = None) -> tuple[float, str]:
+    """Lexicon sentiment score and dominant emotion; ``counts`` are precomputed ``LEXICON_MATCHER`` category hits."""
     if not text:
         return 0.0, "neutral"
-    lowered = text.lower()
-    tokens = _tokenize(lowered)
-    if not tokens:
-        return 0.0, "neutral"
-    pos_hits = sum(1 for token in tokens if token in POSITIVE_WORDS)
-    neg_hits = sum(1 for token in tokens if token in NEGATIVE_WORDS)
+    if counts is None:
+        counts = LEXICON_MATCHER.category_counts(text)
+    pos_hits = counts["positive"]
+    neg_hits = counts["negative"]
     score = (pos_hits - neg_hits) / max(1, pos_hits + neg_hits)
     if pos_hits == neg_hits == 0:
         score = 0.0
     dominant_emotion = "neutral"
     max_emotion_hits = 0
-    for emotion, keywords in EMOTION_KEYWORDS.items():
-        hits = sum(1 for token in tokens if token in keywords)
+    for emotion in EMOTION_KEYWORDS:
+        hits = counts[emotion]
         if hits > max_emotion_hits:
             max_emotion_hits = hits
             dominant_emotion = emotion
@@ -354,6 +870,15 @@ def _estimate_sentiment(text: str) -> tuple[float, str]:
     return round(score, 4), dominant_emotion
 
 
+def _document_text_stats(item: dict) -> tuple[float, str, int]:
+    """Sentiment, emotion and word count, preferring the values stored at ingest time."""
+    if item.get('sentiment_score') is not None and item.get('word_count') is not None:
+        return float(item['sentiment_score']), item.get('emotion') or 'neutral', int(item['word_count'])
+    content = item.get('content') or item.get('content_preview') or item.get('summary') or ''
+    sentiment, emotion = _estimate_sentiment(content)
+    return sentiment, emotion, len(_tokenize(content))
+
+
 def _moving_average(series: Sequence[float], window: int = 7) -> list[Optional[float]]:
     results: list[Optional[float]] = []
     values: list[float] = []
@@ -417,7 +942,67 @@ def _prepare_doc_entities(raw_entities):
     return doc_entities
 
 
-def _upsert_knowledge_graph(table, user_id, doc_id, doc_entities):
+def _query_all_items(table, **kwargs):
+    while True:
+        response = table.query(**kwargs)
+        yield from response.get('Items', [])
+        if not response.get('LastEvaluatedKey'):
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _graph_store(table):
+    return GraphSnapshotStore(table, s3=s3, bucket=CONTENT_BUCKET)
+
+
+def _schedule_graph_layout(graph_store, user_id):
+    """Lay the graph out in the jobs worker; without a jobs queue (local dev) do it inline."""
+    if JOBS_QUEUE_URL:
+        sqs.send_message(QueueUrl=JOBS_QUEUE_URL,
+                         MessageBody=json.dumps({'job_type': 'refresh_graph_layout', 'user_id': user_id}))
+    else:
+        graph_store.refresh_layout(user_id)
+
+
+def _graph_doc_metadata(doc):
+    """Snapshot metadata for a DOC# row (recency is derived when the graph is served)."""
+    sentiment_score, emotion, word_count = _document_text_stats(doc)
+    return {
+        'title': doc.get('filename') or doc.get('doc_id'),
+        'summary': doc.get('summary') or '',
+        'created_at': doc.get('created_at'),
+        'updated_at': doc.get('updated_at'),
+        'sentiment_score': sentiment_score,
+        'emotion': emotion,
+        'word_count': word_count,
+    }
+
+
+def _build_graph_snapshot(table, user_id):
+    """Full rebuild used when a user has no snapshot yet (or a refresh is forced)."""
+    entity_items = list(_query_all_items(
+        table,
+        KeyConditionExpression=Key('pk').eq(f'USER#{user_id}') & Key('sk').begins_with('ENTITY#'),
+    ))
+    doc_ids = sorted({doc_id for item in entity_items for doc_id in item.get('doc_ids', []) or []})
+    doc_items = _fetch_document_metadata(table, user_id, doc_ids) if doc_ids else []
+    doc_metadata = {doc['doc_id']: _graph_doc_metadata(doc) for doc in doc_items if doc.get('doc_id')}
+    return GraphSnapshot.build(entity_items, doc_metadata, edges_per_doc=GRAPH_EDGES_PER_DOC)
+
+
+def _ensure_graph_snapshot(graph_store, table, user_id, refresh=False):
+    """Return ``(row, snapshot)``; ``snapshot`` is only set when it had to be (re)built."""
+    row = None if refresh else graph_store.read(user_id)
+    if row is not None:
+        return row, None
+    snapshot = _build_graph_snapshot(table, user_id)
+    row = graph_store.replace(user_id, snapshot)
+    if row is not None:
+        _schedule_graph_layout(graph_store, user_id)
+    return row, snapshot
+
+
+def _upsert_knowledge_graph(table, user_id, doc_id, doc_entities, doc_meta=None):
     """Persist entity aggregates and document edges for the knowledge graph."""
     if not doc_entities:
         return
@@ -468,6 +1053,11 @@ def _upsert_knowledge_graph(table, user_id, doc_id, doc_entities):
             'updated_at': now_iso,
         })
 
+    # Only the edges touching this document change; the rest of the snapshot is reused.
+    graph_store = _graph_store(table)
+    if graph_store.update(user_id, lambda snapshot: snapshot.apply_document(doc_id, doc_meta, doc_entities)):
+        _schedule_graph_layout(graph_store, user_id)
+
 
 def _list_user_entities(table, user_id):
     resp = table.query(
@@ -550,9 +1140,7 @@ def _compute_temporal_analytics(table, user_id: str, force: bool = False):
         for topic in _extract_topics(item):
             monthly_topics_counter[month_key][topic] += 1
 
-        content = item.get('content') or item.get('summary') or ''
-        sentiment, emotion = _estimate_sentiment(content)
-        word_count = len(_tokenize(content))
+        sentiment, emotion, word_count = _document_text_stats(item)
         day_key = created_at.replace(hour=0, minute=0, second=0, microsecond=0)
         stats = daily_stats.setdefault(day_key, {"sentiments": [], "emotions": Counter(), "words": 0, "entries": 0})
         stats["sentiments"].append(sentiment)
@@ -704,7 +1292,7 @@ def _generate_wiki_sections(user_id: str, entity_id: Optional[str], docs_table):
     now_iso = datetime.now().astimezone(tz=None).isoformat()
     overview_content = []
     for doc in documents[:3]:
-        summary = doc.get('summary') or (doc.get('content') or '')[:400]
+        summary = doc.get('summary') or (doc.get('content') or doc.get('content_preview') or '')[:400]
         filename = doc.get('filename') or doc.get('doc_id')
         overview_content.append(f"- **{filename}**: {summary}")
     if not overview_content:
@@ -717,6 +1305,22 @@ def _generate_wiki_sections(user_id: str, entity_id: Optional[str], docs_table):
             'last_modified': now_iso,
         }
     ]
+    # Section summaries stored at ingest outline the linked documents without new model calls.
+    outline_lines = []
+    for doc in documents[:3]:
+        doc_sections = [section for section in doc.get('sections') or [] if section.get('summary')]
+        if len(doc_sections) < 2:
+            continue
+        filename = doc.get('filename') or doc.get('doc_id')
+        outline_lines.extend(f"- **{filename} › {section.get('title')}**: {section['summary']}"
+                             for section in doc_sections[:WIKI_OUTLINE_SECTIONS])
+    if outline_lines:
+        sections.append({
+            'id': 'outline',
+            'title': 'Document Outline',
+            'content': "\n".join(outline_lines),
+            'last_modified': now_iso,
+        })
     if topics:
         latest_topics = topics[-2:] if len(topics) >= 2 else topics
         topic_lines = []
@@ -835,7 +1439,7 @@ def lambda_handler(event, context):
             docs_table = dynamodb.Table(DOC_TABLE)
             response_item = docs_table.get_item(Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'})
             item = response_item.get('Item') if isinstance(response_item, dict) else None
-            if not item:
+            if not item or item.get('processing_status') == 'deleting':
                 return {
                     'statusCode': 404,
                     'headers': headers,
@@ -847,23 +1451,99 @@ def lambda_handler(event, context):
                 'filename': item.get('filename') or item.get('doc_id'),
                 'summary': item.get('summary', ''),
                 'questions': item.get('questions', []),
-                'content': item.get('content', ''),
+                'content_preview': item.get('content_preview') or (item.get('content') or '')[:2000],
+                'content_size': item.get('content_size', len(item.get('content') or '')),
                 'media_type': item.get('media_type'),
                 'entities': item.get('entities', []),
                 'highlights': item.get('highlights', []),
                 'processing_status': item.get('processing_status'),
+                'processing_stage': item.get('processing_stage'),
+                'last_error': item.get('last_error'),
+                'ingest_job_id': item.get('ingest_job_id'),
                 'created_at': item.get('created_at'),
                 'updated_at': item.get('updated_at'),
             }
             if 'chat_history' in item:
                 payload['chat_history'] = item.get('chat_history') or []
 
+            include = {part.strip() for part in (query_params.get('include') or '').split(',') if part.strip()}
+            if 'content' in include or 'content' in item:
+                # Full text lives in S3 for new documents; only fetch the frames that were asked for.
+                try:
+                    offset, length = parse_content_range(query_params.get('offset'), query_params.get('length'))
+                except ValueError as err:
+                    return {
+                        'statusCode': 400,
+                        'headers': headers,
+                        'body': json.dumps({'error': str(err)})
+                    }
+                payload['content'] = load_content(content_store, item, offset=offset, length=length)
+
             return {
                 'statusCode': 200,
                 'headers': headers,
                 'body': json.dumps(payload, cls=DecimalEncoder)
             }
 
+        if path.startswith('/dev/documents/') and method == 'DELETE':
+            user_id = query_params.get('user_id') or query_params.get('userId')
+            if not user_id:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Missing user_id'})
+                }
+
+            doc_id = path.rstrip('/').split('/')[-1]
+            docs_table = dynamodb.Table(DOC_TABLE)
+            job = start_deletion_job(
+                docs_table,
+                vector_indexes,
+                user_id,
+                doc_id,
+                sqs_client=sqs,
+                queue_url=JOBS_QUEUE_URL,
+                content_store=content_store,
+                graph_store=_graph_store(docs_table),
+                signature_store=signature_store,
+            )
+            if not job:
+                return {
+                    'statusCode': 404,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Document not found'})
+                }
+
+            return {
+                'statusCode': 202 if job.get('status') == 'queued' else 200,
+                'headers': headers,
+                'body': json.dumps({'doc_id': doc_id, 'job': format_job(job)}, cls=DecimalEncoder)
+            }
+
+        if path.startswith('/dev/jobs/') and method == 'GET':
+            user_id = query_params.get('user_id') or query_params.get('userId')
+            if not user_id:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Missing user_id'})
+                }
+
+            job_id = path.rstrip('/').split('/')[-1]
+            job = get_job(dynamodb.Table(DOC_TABLE), user_id, job_id)
+            if not job:
+                return {
+                    'statusCode': 404,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Job not found'})
+                }
+
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps(format_job(job), cls=DecimalEncoder)
+            }
+
         if path == '/dev/knowledge-graph/entities' and method == 'GET':
             user_id = query_params.get('user_id') or query_params.get('userId')
             if not user_id:
@@ -874,51 +1554,30 @@ def lambda_handler(event, context):
                 }
 
             docs_table = dynamodb.Table(DOC_TABLE)
+            graph_store = _graph_store(docs_table)
             try:
-                entity_resp = docs_table.query(
-                    KeyConditionExpression=Key('pk').eq(f'USER#{user_id}') & Key('sk').begins_with('ENTITY#')
+                row, snapshot = _ensure_graph_snapshot(
+                    graph_store, docs_table, user_id, refresh=query_params.get('refresh') == 'true'
                 )
-                entity_items = entity_resp.get('Items', [])
-                entities = format_user_entities(entity_items)
-                doc_relationships, doc_touch_counts = compute_doc_relationships(entity_items)
-                doc_ids = set()
-                for item in entity_items:
-                    for doc_id in item.get('doc_ids', []) or []:
-                        doc_ids.add(doc_id)
-                for rel in doc_relationships:
-                    doc_ids.add(rel['source'])
-                    doc_ids.add(rel['target'])
-                doc_items = _fetch_document_metadata(docs_table, user_id, list(doc_ids)) if doc_ids else []
-                doc_metadata = {}
-                now = datetime.now().astimezone(tz=None)
-                for doc in doc_items:
-                    doc_id = doc.get('doc_id')
-                    if not doc_id:
-                        continue
-                    updated_at = doc.get('updated_at') or doc.get('created_at')
-                    updated_dt = _parse_datetime(updated_at)
-                    recency_score = 0.3
-                    if updated_dt:
-                        age_days = max(0, (now - updated_dt).total_seconds() / (60 * 60 * 24))
-                        recency_score = max(0.0, 1 - min(age_days, 150) / 150)
-                    content_source = doc.get('content') or doc.get('summary') or ''
-                    sentiment_score, emotion = _estimate_sentiment(content_source)
-                    doc_metadata[doc_id] = {
-                        'title': doc.get('filename') or doc_id,
-                        'summary': doc.get('summary') or '',
-                        'created_at': doc.get('created_at'),
-                        'updated_at': doc.get('updated_at'),
-                        'recency_score': recency_score,
-                        'sentiment_score': sentiment_score,
-                        'emotion': emotion,
-                        'word_count': len(_tokenize(content_source)),
-                        'entity_count': doc_touch_counts.get(doc_id, 0),
-                    }
+
+                etag = row.get('etag') if row else None
+                graph_headers = {**headers, 'Cache-Control': 'private, no-cache'}
+                if etag:
+                    graph_headers['ETag'] = etag
+                if_none_match = (request_headers or {}).get('if-none-match') or (request_headers or {}).get('If-None-Match')
+                if etag_matches(if_none_match, etag):
+                    return {'statusCode': 304, 'headers': graph_headers, 'body': ''}
+
+                if snapshot is None:
+                    snapshot = graph_store.decode(row)
+                try:
+                    edges_per_doc = max(1, int(query_params.get('edges_per_doc') or GRAPH_EDGES_PER_DOC))
+                except ValueError:
+                    edges_per_doc = GRAPH_EDGES_PER_DOC
                 payload = {
                     'user_id': user_id,
-                    'entities': entities,
-                    'doc_relationships': doc_relationships,
-                    'doc_metadata': doc_metadata,
+                    **snapshot.payload(edges_per_doc=edges_per_doc, idf=query_params.get('idf') != 'false'),
+                    'version': int(row['version']) if row else None,
                 }
             except Exception as graph_error:  # noqa: BLE001
                 print(f"⚠️ Knowledge graph list failed: {graph_error}")
@@ -930,10 +1589,65 @@ def lambda_handler(event, context):
 
             return {
                 'statusCode': 200,
-                'headers': headers,
+                'headers': graph_headers,
                 'body': json.dumps(payload, cls=DecimalEncoder)
             }
 
+        if path == '/dev/knowledge-graph/subgraph' and method == 'GET':
+            user_id = query_params.get('user_id') or query_params.get('userId')
+            entity_id = query_params.get('entity_id') or query_params.get('entityId')
+            doc_id = query_params.get('doc_id') or query_params.get('docId')
+            if not user_id or not (entity_id or doc_id):
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Missing user_id and entity_id or doc_id'})
+                }
+
+            focal_kind, focal_id = ('ENTITY', entity_id) if entity_id else ('DOC', doc_id)
+            docs_table = dynamodb.Table(DOC_TABLE)
+            graph_store = _graph_store(docs_table)
+            try:
+                depth = int(query_params.get('depth') or 1)
+                limit = int(query_params.get('limit') or 10)
+
+                def _lookup(nodes):
+                    return graph_store.read_adjacency_batch(user_id, nodes)
+
+                subgraph = neighborhood(_lookup, focal_kind, focal_id, depth=depth, limit=limit,
+                                        cursor=query_params.get('cursor'))
+                if subgraph is None and graph_store.read(user_id) is None:
+                    # First graph request for this user: building the snapshot writes the index.
+                    _ensure_graph_snapshot(graph_store, docs_table, user_id)
+                    subgraph = neighborhood(_lookup, focal_kind, focal_id, depth=depth, limit=limit,
+                                            cursor=query_params.get('cursor'))
+            except ValueError as param_error:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': str(param_error)})
+                }
+            except Exception as graph_error:  # noqa: BLE001
+                print(f"⚠️ Knowledge graph subgraph failed: {graph_error}")
+                return {
+                    'statusCode': 500,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Failed to load subgraph'})
+                }
+
+            if subgraph is None:
+                return {
+                    'statusCode': 404,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Node not found in knowledge graph'})
+                }
+
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({'user_id': user_id, **subgraph}, cls=DecimalEncoder)
+            }
+
         if path.startswith('/dev/knowledge-graph/entities/') and method == 'GET':
             user_id = query_params.get('user_id') or query_params.get('userId')
             if not user_id:
@@ -1174,6 +1888,149 @@ def lambda_handler(event, context):
             }
 
         # Upload endpoint
+        if path == '/dev/uploads' and method == 'POST':
+            body = json.loads(event.get('body') or '{}')
+            user_id = body.get('user_id', 'guest_dev')
+            filename = body.get('filename')
+            try:
+                file_size = parse_file_size(body.get('size'))
+            except ValueError:
+                file_size = 0
+
+            if not isinstance(filename, str) or not filename or '/' in filename or file_size <= 0:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'filename and a positive size are required'})
+                }
+            if not MEDIA_BUCKET:
+                return {
+                    'statusCode': 500,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Direct uploads not configured'})
+                }
+
+            media_type, _, _ = _classify_upload(filename, body.get('media_type'))
+            doc_id = body.get('doc_id') or f"doc_{int(datetime.now().timestamp())}"
+            key = upload_key(user_id, doc_id, filename)
+            plan = start_multipart_upload(s3, MEDIA_BUCKET, key, content_type=media_type, file_size=file_size)
+
+            docs_table = dynamodb.Table(DOC_TABLE)
+            job = create_job(docs_table, user_id, 'ingest_document', doc_id=doc_id)
+            now_iso = datetime.now().isoformat()
+            upload_fields = {
+                'processing_status': 'uploading',
+                'upload_key': key,
+                'upload_id': plan['upload_id'],
+                'ingest_job_id': job['job_id'],
+                'check_duplicates': not body.get('doc_id') and body.get('allow_duplicate') is not True,
+                'upload_metadata': body.get('metadata') or {},
+                'updated_at': now_iso,
+            }
+            existing_resp = docs_table.get_item(Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'})
+            existing_item = existing_resp.get('Item') if isinstance(existing_resp, dict) else None
+            if existing_item:
+                upload_fields['previous_status'] = existing_item.get('processing_status')
+                names = {f'#{field}': field for field in upload_fields}
+                docs_table.update_item(
+                    Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'},
+                    UpdateExpression='SET ' + ', '.join(f'#{field} = :{field}' for field in upload_fields),
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues={f':{field}': value for field, value in upload_fields.items()},
+                )
+            else:
+                docs_table.put_item(Item={
+                    'pk': f'USER#{user_id}',
+                    'sk': f'DOC#{doc_id}',
+                    'doc_id': doc_id,
+                    'filename': filename,
+                    'media_type': media_type,
+                    'size_bytes': file_size,
+                    'created_at': now_iso,
+                    **upload_fields,
+                })
+            print(f"🪣 Started multipart upload for {doc_id} ({len(plan['parts'])} parts)")
+
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({
+                    'doc_id': doc_id,
+                    'job_id': job['job_id'],
+                    'upload_id': plan['upload_id'],
+                    'key': key,
+                    'part_size': plan['part_size'],
+                    'parts': plan['parts'],
+                    'expires_in': plan['expires_in'],
+                })
+            }
+
+        if path in ('/dev/uploads/complete', '/dev/uploads/abort') and method == 'POST':
+            body = json.loads(event.get('body') or '{}')
+            user_id = body.get('user_id', 'guest_dev')
+            doc_id = body.get('doc_id')
+            docs_table = dynamodb.Table(DOC_TABLE)
+            doc_key = {'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'}
+            doc_resp = docs_table.get_item(Key=doc_key) if doc_id else {}
+            doc_item = doc_resp.get('Item') if isinstance(doc_resp, dict) else None
+            if not doc_item or doc_item.get('processing_status') != 'uploading' \
+                    or doc_item.get('upload_id') != body.get('upload_id'):
+                return {
+                    'statusCode': 404,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Upload not found'})
+                }
+
+            if path.endswith('/abort'):
+                abort_multipart_upload(s3, MEDIA_BUCKET, doc_item['upload_key'], doc_item['upload_id'])
+                update_job(docs_table, user_id, doc_item['ingest_job_id'], status='cancelled', stage='cancelled')
+                if doc_item.get('previous_status'):
+                    docs_table.update_item(
+                        Key=doc_key,
+                        UpdateExpression='SET processing_status = :status, updated_at = :ts',
+                        ExpressionAttributeValues={':status': doc_item['previous_status'], ':ts': datetime.now().isoformat()},
+                    )
+                else:
+                    docs_table.delete_item(Key=doc_key)
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({'doc_id': doc_id, 'processing_status': 'aborted'})
+                }
+
+            try:
+                complete_multipart_upload(s3, MEDIA_BUCKET, doc_item['upload_key'], doc_item['upload_id'],
+                                          body.get('parts') or [])
+            except (KeyError, TypeError, ValueError) as parts_error:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': f'Invalid parts: {parts_error}'})
+                }
+            # The S3 ObjectCreated event may already have started ingestion; only advance 'uploading'.
+            try:
+                docs_table.update_item(
+                    Key=doc_key,
+                    UpdateExpression='SET processing_status = :queued, updated_at = :ts',
+                    ConditionExpression='processing_status = :uploading',
+                    ExpressionAttributeValues={':queued': 'queued', ':uploading': 'uploading',
+                                               ':ts': datetime.now().isoformat()},
+                )
+            except ClientError as status_error:
+                if status_error.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                    raise
+            print(f"📦 Completed multipart upload for {doc_id}")
+
+            return {
+                'statusCode': 202,
+                'headers': headers,
+                'body': json.dumps({
+                    'doc_id': doc_id,
+                    'job_id': doc_item.get('ingest_job_id'),
+                    'processing_status': 'queued',
+                })
+            }
+
         if path in ('/dev/upload', '/upload') and method == 'POST':
             body = json.loads(event['body'])
             user_id = body.get('user_id', 'guest_dev')
@@ -1196,15 +2053,15 @@ def lambda_handler(event, context):
                     'body': json.dumps({'error': 'Missing content'})
                 }
 
-            doc_id = f"doc_{int(datetime.now().timestamp())}"
+            doc_id = body.get('doc_id') or f"doc_{int(datetime.now().timestamp())}"
             print(f"📄 Processing: {filename}")
 
-            extension = os.path.splitext(filename)[1].lower()
-            guessed_type, _ = mimetypes.guess_type(filename)
-            media_type = media_type or guessed_type or 'application/octet-stream'
+            existing_item = None
+            if body.get('doc_id'):
+                existing_resp = dynamodb.Table(DOC_TABLE).get_item(Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'})
+                existing_item = existing_resp.get('Item') if isinstance(existing_resp, dict) else None
 
-            is_text_like = media_type.startswith('text/') or extension in {'.txt', '.md', '.markdown', '.csv'}
-            is_pdf = extension == '.pdf' or media_type == 'application/pdf'
+            media_type, is_text_like, is_pdf = _classify_upload(filename, media_type)
 
             binary_payload: Optional[bytes] = None
 
@@ -1218,6 +2075,19 @@ def lambda_handler(event, context):
                         'body': json.dumps({'error': 'Invalid base64 payload'})
                     }
 
+            async_requested = body.get('async') is True or query_params.get('async') in ('1', 'true')
+
+            # Edits of an existing document go through chunk diffing instead of dedupe.
+            check_duplicates = not body.get('doc_id') and body.get('allow_duplicate') is not True
+            hash_sks = [hash_index_sk(
+                'RAW',
+                fingerprint_bytes(binary_payload if binary_payload is not None else content.encode('utf-8')),
+            )]
+            if check_duplicates:
+                duplicate = _find_duplicate_document(dynamodb.Table(DOC_TABLE), user_id, hash_sks)
+                if duplicate:
+                    return _duplicate_upload_response(headers, duplicate)
+
             if binary_payload and not (is_text_like or is_pdf):
                 if not MEDIA_BUCKET or not MEDIA_QUEUE_URL:
                     return {
@@ -1243,10 +2113,12 @@ def lambda_handler(event, context):
                     'filename': filename,
                     'media_type': media_type,
                     'processing_status': 'processing',
-                    'created_at': datetime.now().isoformat()
+                    'created_at': datetime.now().isoformat(),
+                    'content_hashes': hash_sks,
                 })
 
                 job_payload = {
+                    'job_id': f"media_{uuid.uuid4().hex[:12]}",
                     'user_id': user_id,
                     'doc_id': doc_id,
                     'bucket': MEDIA_BUCKET,
@@ -1257,6 +2129,7 @@ def lambda_handler(event, context):
                 }
                 sqs.send_message(QueueUrl=MEDIA_QUEUE_URL, MessageBody=json.dumps(job_payload))
                 print(f"📬 Enqueued media processing job for {doc_id}")
+                _record_content_hashes(docs_table, user_id, doc_id, hash_sks)
 
                 return {
                     'statusCode': 202,
@@ -1268,6 +2141,29 @@ def lambda_handler(event, context):
                     })
                 }
 
+            if async_requested and MEDIA_BUCKET and JOBS_QUEUE_URL:
+                preview = _upload_preview(content, binary_payload, is_pdf)
+                job = _enqueue_ingestion(
+                    user_id, doc_id, filename, media_type,
+                    binary_payload if binary_payload is not None
+                    else content.encode('latin-1', errors='replace') if is_pdf else content.encode('utf-8'),
+                    is_pdf=is_pdf,
+                    existing_item=existing_item,
+                    hash_sks=hash_sks,
+                    check_duplicates=check_duplicates,
+                )
+                return {
+                    'statusCode': 202,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'message': 'Document queued for processing',
+                        'doc_id': doc_id,
+                        'job_id': job['job_id'],
+                        'processing_status': 'queued',
+                        'preview': preview,
+                    })
+                }
+
             if binary_payload and (is_text_like or is_pdf):
                 if is_pdf:
                     content = extract_pdf_text(binary_payload)
@@ -1277,111 +2173,31 @@ def lambda_handler(event, context):
             if is_pdf and not binary_payload:
                 content = extract_pdf_text(content)
 
-            if not content:
+            outcome, result = _ingest_text_document(
+                user_id, doc_id, filename, media_type, content,
+                existing_item=existing_item,
+                hash_sks=hash_sks,
+                check_duplicates=check_duplicates,
+            )
+            if outcome == 'empty':
                 return {
                     'statusCode': 400,
                     'headers': headers,
                     'body': json.dumps({'error': 'Unable to process document content'})
                 }
-
-            chunks = text_splitter.split_text(content)
-            print(f"✂️  Split into {len(chunks)} chunks")
-
-            print("🔧 Preparing Pinecone payload", flush=True)
-            try:
-                embeddings_list = embeddings.embed_documents(chunks)
-            except Exception as embed_error:
-                print(f"❌ Embedding error: {embed_error!r}")
-                traceback.print_exc()
-                raise
-
-            print("📌 Upserting embeddings to Pinecone", flush=True)
-            vectors = []
-            for idx, (chunk, vector) in enumerate(zip(chunks, embeddings_list)):
-                vectors.append(
-                    {
-                        "id": f"{doc_id}-{idx}",
-                        "values": vector,
-                        "metadata": {
-                            "doc_id": doc_id,
-                            "doc_name": filename,
-                            "chunk": idx,
-                            "text": chunk,
-                            "user_id": user_id,
-                        },
-                    }
-                )
-
-            try:
-                pinecone_upsert(vectors)
-            except Exception as pinecone_error:
-                print(f"❌ Pinecone upsert error: {pinecone_error!r}")
-                traceback.print_exc()
-                raise
-            print("✅ Vectorized and stored in Pinecone")
-
-            print("🧠 Generating summary", flush=True)
-            summary = generate_summary(content, filename)
-            print("🧠 Summary generated", flush=True)
-
-            doc_highlights = generate_highlights(content)
-            print(f"🖍️ Generated {len(doc_highlights)} highlights", flush=True)
-
-            print("🕸️ Extracting entities for knowledge graph", flush=True)
-            doc_entities = []
-            try:
-                extracted_entities = run_entity_extraction(content, llm)
-                entity_payload = entities_to_document_payload(extracted_entities)
-                doc_entities = _prepare_doc_entities(entity_payload)
-                print(f"🕸️ Identified {len(doc_entities)} entities", flush=True)
-            except Exception as entity_error:  # noqa: BLE001
-                print(f"⚠️ Entity extraction failed: {entity_error}")
-                doc_entities = []
-
-            questions = [
-                f"What are the main topics in {filename}?",
-                "Can you summarize the key findings?",
-                "What are the most important points?"
-            ]
-
-            docs_table = dynamodb.Table(DOC_TABLE)
-            print("🗄️  Writing document metadata to DynamoDB", flush=True)
-            docs_table.put_item(Item={
-                'pk': f'USER#{user_id}',
-                'sk': f'DOC#{doc_id}',
-                'doc_id': doc_id,
-                'filename': filename,
-                'media_type': media_type,
-                'content': content[:50000],
-                'summary': summary,
-                'questions': questions,
-                'highlights': doc_highlights,
-                'processing_status': 'ready',
-                'created_at': datetime.now().isoformat(),
-                'entities': doc_entities,
-                'knowledge_graph_state': 'indexed' if doc_entities else 'no_entities',
-            })
-            print("🗄️  DynamoDB write complete", flush=True)
-
-            try:
-                _upsert_knowledge_graph(docs_table, user_id, doc_id, doc_entities)
-            except Exception as kg_error:  # noqa: BLE001
-                print(f"⚠️ Knowledge graph persistence failed: {kg_error}")
+            if outcome == 'duplicate':
+                return _duplicate_upload_response(headers, result)
 
             return {
                 'statusCode': 200,
                 'headers': headers,
                 'body': json.dumps({
-                    'message': 'Document uploaded',
+                    'message': 'Document unchanged' if outcome == 'unchanged' else 'Document uploaded',
                     'doc_id': doc_id,
-                    'artifact': {
-                        'summary': summary,
-                        'questions': questions,
-                        'highlights': doc_highlights,
-                    }
-                })
+                    'artifact': result,
+                }, cls=DecimalEncoder)
             }
-        
+
         # Chat endpoint with LangChain agent
         if path == '/dev/chat' and method == 'POST':
             body = json.loads(event['body'])
@@ -1396,6 +2212,19 @@ def lambda_handler(event, context):
                 }
             
             print(f"💬 Query: {query[:100]}")
+
+            # "Summarize section X" is answered from the stored section summaries.
+            section_target = parse_section_request(query) if doc_id else None
+            chat_user_id = body.get('user_id') or query_params.get('user_id')
+            if section_target and chat_user_id:
+                answer = _answer_section_request(chat_user_id, doc_id, section_target)
+                if answer:
+                    response_text, citations = answer
+                    return {
+                        'statusCode': 200,
+                        'headers': headers,
+                        'body': json.dumps({'response': response_text, 'citations': citations, 'tool_traces': []})
+                    }
             
             # Modify pinecone_retrieve to use doc_id if provided
             original_func = tools[0].func
@@ -1517,9 +2346,10 @@ def lambda_handler(event, context):
                 'summary': item.get('summary', ''),
                 'questions': item.get('questions', []),
                 'created_at': item.get('created_at'),
+                'content_size': item.get('content_size', len(item.get('content') or '')),
                 'entities': item.get('entities', []),
                 'knowledge_graph_state': item.get('knowledge_graph_state', 'unknown'),
-            } for item in resp.get('Items', [])]
+            } for item in resp.get('Items', []) if item.get('processing_status') != 'deleting']
             
             return {'statusCode': 200, 'headers': headers, 'body': json.dumps({'documents': documents}, cls=DecimalEncoder)}
         
@@ -10,13 +10,14 @@ from decimal import Decimal
 
 import requests
 
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_openai import ChatOpenAI
 from langchain.agents import initialize_agent, AgentType
 from langchain.tools import Tool
 
 from agents import web_search
+from chunking import StructuredChunker
 from config import get_settings, make_cors_headers
+from embeddings import backend_from_settings
 
 # Environment
 settings = get_settings()
@@ -35,7 +36,7 @@ dynamodb = boto3.resource('dynamodb')
 
 # LangChain setup
 llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1, openai_api_key=OPENAI_API_KEY)
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key=OPENAI_API_KEY)
+embedding_backend = backend_from_settings(settings)
 
 # Pinecone HTTP helpers (works with legacy API key)
 def pinecone_request(path, payload):
@@ -74,7 +75,7 @@ def pinecone_query(vector, doc_id=None, top_k=5):
     return data.get("matches", [])
 
 # Text splitter
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
+text_splitter = StructuredChunker()
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -97,7 +98,7 @@ def make_headers(content_type='application/json', request_headers=None):
 def pinecone_retrieve(query: str, doc_id: str = None) -> str:
     """Retrieve relevant document chunks from Pinecone vector database"""
     try:
-        query_embedding = embeddings.embed_query(query)
+        query_embedding = embedding_backend.embed_query(query)
         results = pinecone_query(query_embedding, doc_id=doc_id, top_k=5)
 
         if not results:
@@ -117,7 +118,7 @@ def pinecone_retrieve(query: str, doc_id: str = None) -> str:
 def past_entries_search(query: str, user_id: str = "guest") -> str:
     """Search user's past journal entries"""
     try:
-        query_embedding = embeddings.embed_query(query)
+        query_embedding = embedding_backend.embed_query(query)
         # Search Pinecone with user_id filter for journals
         body = {
             "vector": query_embedding,
@@ -259,7 +260,7 @@ def lambda_handler(event, context):
             for offset in range(0, len(limited_chunks), batch_size):
                 batch = limited_chunks[offset:offset + batch_size]
                 try:
-                    batch_embeddings = embeddings.embed_documents(batch)
+                    batch_embeddings = embedding_backend.embed_documents(batch)
                 except Exception as embedding_error:
                     print(f"❌ Embedding batch failed: {embedding_error}")
                     continue
@@ -428,7 +429,7 @@ def lambda_handler(event, context):
             # Vectorize and store in Pinecone
             try:
                 chunks = text_splitter.split_text(content)
-                chunk_embeddings = embeddings.embed_documents(chunks[:10])  # Limit to 10 chunks
+                chunk_embeddings = embedding_backend.embed_documents(chunks[:10])  # Limit to 10 chunks
                 
                 vectors = []
                 for idx, (chunk, embedding) in enumerate(zip(chunks[:10], chunk_embeddings)):
@@ -0,0 +1,178 @@
+"""
+Presigned multipart uploads straight to S3.
+
+Clients ask for an upload plan, PUT each part to its presigned URL and then
+report the part ETags so the upload can be completed. Part sizing follows the
+S3 limits encoded in ``s3transfer.utils.ChunksizeAdjuster`` so large files never
+exceed the 10,000 part ceiling. Completed objects land under ``direct-uploads/``
+where an S3 event notification hands them to the jobs worker, which reads them
+back in a streaming fashion.
+"""
+
+from __future__ import annotations
+
+import codecs
+import hashlib
+import math
+import tempfile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote_plus
+
+from s3transfer.utils import ChunksizeAdjuster
+
+DIRECT_UPLOAD_PREFIX = "direct-uploads"
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+UPLOAD_URL_TTL_SECONDS = 3600
+STREAM_CHUNK_BYTES = 1024 * 1024
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+
+def upload_key(user_id: str, doc_id: str, filename: str) -> str:
+    return f"{DIRECT_UPLOAD_PREFIX}/{user_id}/{doc_id}/{filename}"
+
+
+def parse_upload_key(key: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Return ``(user_id, doc_id, filename)`` for a direct-upload key.
+
+    ``key`` must already be decoded (``iter_s3_events`` does that); decoding it
+    again would turn ``a+b.pdf`` into ``a b.pdf``.
+    """
+
+    parts = key.split("/", 3)
+    if len(parts) != 4 or parts[0] != DIRECT_UPLOAD_PREFIX or not all(parts[1:]):
+        return None
+    return parts[1], parts[2], parts[3]
+
+
+def parse_file_size(value: Any) -> int:
+    """A client-reported byte size (missing means 0); ``ValueError`` unless it is a non-negative integer."""
+
+    if value is None or value == "":
+        return 0
+    if isinstance(value, bool):
+        raise ValueError("size must be an integer")
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("size must be an integer") from None
+    if size < 0:
+        raise ValueError("size must not be negative")
+    return size
+
+
+def plan_parts(file_size: int, preferred_part_size: int = DEFAULT_PART_SIZE) -> List[Tuple[int, int, int]]:
+    """Split ``file_size`` bytes into ``(part_number, byte_start, byte_end)`` ranges (``byte_end`` exclusive)."""
+
+    if file_size <= 0:
+        raise ValueError("file_size must be positive")
+    part_size = ChunksizeAdjuster().adjust_chunksize(preferred_part_size, file_size)
+    part_count = max(1, int(math.ceil(file_size / float(part_size))))
+    return [
+        (number, (number - 1) * part_size, min(number * part_size, file_size))
+        for number in range(1, part_count + 1)
+    ]
+
+
+def start_multipart_upload(s3_client, bucket: str, key: str, *, content_type: str, file_size: int,
+                           metadata: Optional[Dict[str, str]] = None,
+                           expires_in: int = UPLOAD_URL_TTL_SECONDS) -> Dict[str, Any]:
+    """Create the multipart upload and presign a PUT URL for every part."""
+
+    kwargs: Dict[str, Any] = {"Bucket": bucket, "Key": key, "ContentType": content_type}
+    if metadata:
+        kwargs["Metadata"] = metadata
+    upload_id = s3_client.create_multipart_upload(**kwargs)["UploadId"]
+
+    parts = []
+    for part_number, byte_start, byte_end in plan_parts(file_size):
+        url = s3_client.generate_presigned_url(
+            "upload_part",
+            Params={"Bucket": bucket, "Key": key, "UploadId": upload_id, "PartNumber": part_number},
+            ExpiresIn=expires_in,
+        )
+        parts.append({"part_number": part_number, "byte_start": byte_start, "byte_end": byte_end, "url": url})
+
+    return {"upload_id": upload_id, "key": key, "part_size": parts[0]["byte_end"], "parts": parts,
+            "expires_in": expires_in}
+
+
+def complete_multipart_upload(s3_client, bucket: str, key: str, upload_id: str,
+                              parts: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Complete an upload from the ``{part_number, etag}`` pairs the client reported."""
+
+    completed = sorted(
+        ({"PartNumber": int(part["part_number"]), "ETag": str(part["etag"])} for part in parts),
+        key=lambda part: part["PartNumber"],
+    )
+    if not completed:
+        raise ValueError("No parts to complete")
+    return s3_client.complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={"Parts": completed},
+    )
+
+
+def abort_multipart_upload(s3_client, bucket: str, key: str, upload_id: str) -> None:
+    s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+
+
+def iter_s3_events(body: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """Yield ``{bucket, key, size}`` for each ObjectCreated record of an S3 notification."""
+
+    for record in body.get("Records") or []:
+        if record.get("eventSource") != "aws:s3" or not str(record.get("eventName", "")).startswith("ObjectCreated"):
+            continue
+        s3_info = record.get("s3") or {}
+        obj = s3_info.get("object") or {}
+        yield {
+            "bucket": (s3_info.get("bucket") or {}).get("name"),
+            "key": unquote_plus(obj.get("key", "")),
+            "size": obj.get("size"),
+        }
+
+
+def stream_object_text(s3_client, bucket: str, key: str, *, is_pdf: bool,
+                       extract_pdf: Callable[[Any], str]) -> Tuple[str, str]:
+    """
+    Read an uploaded object without holding its raw bytes in memory.
+
+    Text is decoded incrementally chunk by chunk; PDFs are spooled to a temporary
+    file (in memory up to ``SPOOL_MAX_BYTES``, then ``/tmp``) because the parser
+    needs a seekable stream. Returns ``(text, sha256_hex_of_raw_bytes)``.
+    """
+
+    digest = hashlib.sha256()
+    body = s3_client.get_object(Bucket=bucket, Key=key)["Body"]
+
+    if is_pdf:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=tempfile.gettempdir()) as spool:
+            for chunk in body.iter_chunks(STREAM_CHUNK_BYTES):
+                digest.update(chunk)
+                spool.write(chunk)
+            spool.seek(0)
+            return extract_pdf(spool), digest.hexdigest()
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    pieces: List[str] = []
+    for chunk in body.iter_chunks(STREAM_CHUNK_BYTES):
+        digest.update(chunk)
+        pieces.append(decoder.decode(chunk))
+    pieces.append(decoder.decode(b"", final=True))
+    return "".join(pieces), digest.hexdigest()
+
+
+__all__ = [
+    "DIRECT_UPLOAD_PREFIX",
+    "abort_multipart_upload",
+    "complete_multipart_upload",
+    "iter_s3_events",
+    "parse_file_size",
+    "parse_upload_key",
+    "plan_parts",
+    "start_multipart_upload",
+    "stream_object_text",
+    "upload_key",
+]
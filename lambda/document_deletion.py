@@ -0,0 +1,255 @@
+"""
+Cascading document deletion across DynamoDB and Pinecone.
+
+A document owns more than its ``DOC#`` row: chunk vectors named
+``{doc_id}-...``, the ``DOC#{doc_id}`` entity edge partition, a reference in
+every ``ENTITY#`` aggregate that mentions it, the user's graph snapshot, the
+``HASH#`` rows used for duplicate detection and the full text in the content
+store. The helpers here remove all of them in bulk and report progress after
+each stage so a job row can be polled by the client.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from content_index import chunk_vector_id
+from jobs import create_job, get_job, update_job
+
+ProgressCallback = Callable[[str, Dict[str, int]], None]
+
+ENTITY_UPDATE_ATTEMPTS = 3
+
+
+def _now_iso() -> str:
+    return datetime.now(tz=timezone.utc).isoformat()
+
+
+def _is_condition_failure(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def _query_all(table, **kwargs) -> Iterable[Dict[str, Any]]:
+    while True:
+        response = table.query(**kwargs)
+        for item in response.get("Items", []):
+            yield item
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def list_documents(table, user_id: str) -> Iterable[Dict[str, Any]]:
+    """
+    The user's ``DOC#`` rows, without documents that are being deleted.
+
+    The ``USER#`` partition also holds job, idempotency, hash and graph rows,
+    several of which carry a ``doc_id``; they must never be listed as documents.
+    """
+
+    key_condition = Key("pk").eq(f"USER#{user_id}") & Key("sk").begins_with("DOC#")
+    for item in _query_all(table, KeyConditionExpression=key_condition):
+        if item.get("processing_status") != "deleting":
+            yield item
+
+
+def _delete_vectors(index, user_id: str, doc_id: str, doc_item: Dict[str, Any], progress: Dict[str, int],
+                    report: ProgressCallback) -> None:
+    deleted: Set[str] = set()
+
+    digests = list(doc_item.get("chunk_hashes") or []) + list(doc_item.get("vector_hashes") or [])
+    known_ids = [chunk_vector_id(doc_id, digest) for digest in digests]
+    if known_ids:
+        index.delete_ids(known_ids)
+        deleted.update(known_ids)
+        progress["vectors_deleted"] = len(deleted)
+        report("vectors", progress)
+
+    try:
+        for page in index.list_ids(f"{doc_id}-"):
+            pending = [vector_id for vector_id in page if vector_id not in deleted]
+            if pending:
+                index.delete_ids(pending)
+                deleted.update(pending)
+            progress["vectors_deleted"] = len(deleted)
+            report("vectors", progress)
+    except RuntimeError as list_error:
+        # Pod-based indexes cannot list ids; fall back to a metadata-filter delete.
+        print(f"⚠️ Vector listing unavailable ({list_error}); deleting by metadata filter")
+        index.delete_by_filter({"doc_id": {"$eq": doc_id}, "user_id": {"$eq": user_id}})
+
+
+def _delete_edge_partition(table, doc_id: str, progress: Dict[str, int]) -> Set[str]:
+    entity_ids: Set[str] = set()
+    with table.batch_writer() as batch:
+        for item in _query_all(
+            table,
+            KeyConditionExpression=Key("pk").eq(f"DOC#{doc_id}") & Key("sk").begins_with("ENTITY#"),
+            ProjectionExpression="pk, sk, entity_id",
+        ):
+            entity_ids.add(item.get("entity_id") or item["sk"].replace("ENTITY#", "", 1))
+            batch.delete_item(Key={"pk": item["pk"], "sk": item["sk"]})
+            progress["edges_deleted"] += 1
+    return entity_ids
+
+
+def detach_entity(table, user_id: str, entity_id: str, doc_id: str) -> Optional[str]:
+    """
+    Remove ``doc_id`` from an entity aggregate.
+
+    Uses ``updated_at`` as an optimistic lock so a concurrent ingest touching the
+    same entity is never overwritten. Returns ``"updated"``, ``"removed"`` (no
+    documents left) or ``None`` when the entity did not reference the document.
+    """
+
+    key = {"pk": f"USER#{user_id}", "sk": f"ENTITY#{entity_id}"}
+    for _ in range(ENTITY_UPDATE_ATTEMPTS):
+        response = table.get_item(Key=key)
+        item = response.get("Item") if isinstance(response, dict) else None
+        doc_ids = list(item.get("doc_ids") or []) if item else []
+        if doc_id not in doc_ids:
+            return None
+
+        remaining = [existing for existing in doc_ids if existing != doc_id]
+        previous_ts = item.get("updated_at")
+        try:
+            if remaining:
+                table.update_item(
+                    Key=key,
+                    UpdateExpression="SET doc_ids = :ids, doc_count = :count, updated_at = :ts",
+                    ConditionExpression="updated_at = :prev",
+                    ExpressionAttributeValues={
+                        ":ids": remaining,
+                        ":count": Decimal(len(remaining)),
+                        ":ts": _now_iso(),
+                        ":prev": previous_ts,
+                    },
+                )
+                return "updated"
+            table.delete_item(
+                Key=key,
+                ConditionExpression="updated_at = :prev",
+                ExpressionAttributeValues={":prev": previous_ts},
+            )
+            return "removed"
+        except ClientError as error:
+            if not _is_condition_failure(error):
+                raise
+    raise RuntimeError(f"Entity {entity_id} kept changing while detaching {doc_id}")
+
+
+def delete_document_cascade(table, index, user_id: str, doc_id: str,
+                            report: Optional[ProgressCallback] = None, content_store=None,
+                            graph_store=None, signature_store=None) -> Dict[str, int]:
+    """Delete a document and everything derived from it, reporting after each stage."""
+
+    report = report or (lambda stage, progress: None)
+    progress = {
+        "vectors_deleted": 0,
+        "edges_deleted": 0,
+        "entities_updated": 0,
+        "entities_removed": 0,
+        "hash_rows_deleted": 0,
+    }
+
+    doc_key = {"pk": f"USER#{user_id}", "sk": f"DOC#{doc_id}"}
+    doc_response = table.get_item(Key=doc_key)
+    doc_item = (doc_response.get("Item") if isinstance(doc_response, dict) else None) or {}
+
+    report("vectors", progress)
+    _delete_vectors(index, user_id, doc_id, doc_item, progress, report)
+
+    report("edges", progress)
+    entity_ids = _delete_edge_partition(table, doc_id, progress)
+    entity_ids.update(entity.get("entity_id") for entity in doc_item.get("entities") or [] if entity.get("entity_id"))
+
+    report("entities", progress)
+    for entity_id in sorted(entity_ids):
+        outcome = detach_entity(table, user_id, entity_id, doc_id)
+        if outcome == "updated":
+            progress["entities_updated"] += 1
+        elif outcome == "removed":
+            progress["entities_removed"] += 1
+    if graph_store is not None:
+        graph_store.update(user_id, lambda snapshot: snapshot.remove_document(doc_id))
+    if signature_store is not None:
+        signature_store.remove_document(user_id, doc_id)
+
+    report("document", progress)
+    for hash_sk in doc_item.get("content_hashes") or []:
+        table.delete_item(Key={"pk": f"USER#{user_id}", "sk": hash_sk})
+        progress["hash_rows_deleted"] += 1
+    if content_store is not None:
+        content_store.delete(doc_item)
+    # The DOC# row goes last so a failed job can be retried with the chunk manifest intact.
+    table.delete_item(Key=doc_key)
+
+    report("completed", progress)
+    return progress
+
+
+def run_deletion_job(table, index, job: Dict[str, Any], content_store=None, graph_store=None,
+                     signature_store=None) -> Dict[str, int]:
+    """Execute a queued ``delete_document`` job, mirroring progress onto its JOB# row."""
+
+    user_id = job["user_id"]
+    job_id = job["job_id"]
+    doc_id = job["doc_id"]
+
+    def _report(stage: str, progress: Dict[str, int]) -> None:
+        update_job(table, user_id, job_id, status="running", stage=stage, progress=dict(progress))
+
+    try:
+        progress = delete_document_cascade(table, index, user_id, doc_id, report=_report,
+                                           content_store=content_store, graph_store=graph_store,
+                                           signature_store=signature_store)
+    except Exception as exc:
+        update_job(table, user_id, job_id, status="failed", error=str(exc))
+        raise
+
+    update_job(table, user_id, job_id, status="completed", stage="completed", progress=progress)
+    return progress
+
+
+def start_deletion_job(table, index, user_id: str, doc_id: str, *, sqs_client=None,
+                       queue_url: Optional[str] = None, content_store=None,
+                       graph_store=None, signature_store=None) -> Optional[Dict[str, Any]]:
+    """
+    Hide the document immediately and schedule the cascade.
+
+    With a queue configured the job runs in the jobs worker and the queued job row
+    is returned; otherwise the cascade runs inline. Returns ``None`` when the
+    document does not exist.
+    """
+
+    try:
+        table.update_item(
+            Key={"pk": f"USER#{user_id}", "sk": f"DOC#{doc_id}"},
+            UpdateExpression="SET processing_status = :deleting, updated_at = :ts",
+            ConditionExpression="attribute_exists(pk)",
+            ExpressionAttributeValues={":deleting": "deleting", ":ts": _now_iso()},
+        )
+    except ClientError as error:
+        if _is_condition_failure(error):
+            return None
+        raise
+
+    job = create_job(table, user_id, "delete_document", doc_id=doc_id)
+    message = {"job_type": "delete_document", "job_id": job["job_id"], "user_id": user_id, "doc_id": doc_id}
+    if sqs_client is not None and queue_url:
+        sqs_client.send_message(QueueUrl=queue_url, MessageBody=json.dumps(message))
+        return job
+
+    run_deletion_job(table, index, message, content_store=content_store, graph_store=graph_store,
+                     signature_store=signature_store)
+    return get_job(table, user_id, job["job_id"]) or job
+
+
+__all__ = ["delete_document_cascade", "detach_entity", "list_documents", "run_deletion_job", "start_deletion_job"]
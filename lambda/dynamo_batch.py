@@ -0,0 +1,56 @@
+"""
+Batched DynamoDB reads for the single-table layout.
+
+``BatchGetItem`` takes at most 100 keys per call and may hand back part of a
+request as ``UnprocessedKeys`` when the table is throttled; this loops over
+both so callers can ask for any number of rows in one go.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+BATCH_GET_LIMIT = 100
+BATCH_GET_ATTEMPTS = 5
+
+
+def _get_batch(table, keys: List[Mapping[str, Any]], projection: Optional[str]) -> List[Dict[str, Any]]:
+    request: Dict[str, Any] = {"Keys": keys}
+    if projection:
+        request["ProjectionExpression"] = projection
+    pending = {table.name: request}
+    items: List[Dict[str, Any]] = []
+    for attempt in range(BATCH_GET_ATTEMPTS):
+        response = table.meta.client.batch_get_item(RequestItems=pending)
+        items.extend(response.get("Responses", {}).get(table.name, []))
+        pending = response.get("UnprocessedKeys") or {}
+        if not pending:
+            return items
+        time.sleep(0.05 * 2 ** attempt)
+    raise RuntimeError(f"BatchGetItem on {table.name} kept returning unprocessed keys")
+
+
+def batch_get_items(table, keys: Iterable[Mapping[str, Any]], *, projection: Optional[str] = None,
+                    max_workers: int = 1) -> List[Dict[str, Any]]:
+    """
+    Fetch the items stored under ``keys`` (``{"pk", "sk"}`` dicts) from ``table``.
+
+    Missing items are simply absent from the result, which is unordered.
+    ``projection`` must include the key attributes if the caller needs to map
+    items back to their keys. With ``max_workers`` above one, up to that many
+    100-key batches are in flight at once.
+    """
+
+    keys = list(keys)
+    batches = [keys[start:start + BATCH_GET_LIMIT] for start in range(0, len(keys), BATCH_GET_LIMIT)]
+    if len(batches) <= 1 or max_workers <= 1:
+        results = [_get_batch(table, batch, projection) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            results = list(executor.map(lambda batch: _get_batch(table, batch, projection), batches))
+    return [item for items in results for item in items]
+
+
+__all__ = ["BATCH_GET_LIMIT", "batch_get_items"]
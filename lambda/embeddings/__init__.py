@@ -1,9 +1,29 @@
 """Embedding backends used by DocumentGPT."""
 
-from .nova import NovaEmbeddingClient, NovaEmbeddingRequest, NovaEmbeddingResponse
+from .base import BackendLimits, EmbeddingBackend
+from .batching import embed_in_batches, pack_batches
+from .local import HashingEmbeddingBackend
+from .nova import NovaEmbeddingClient, NovaEmbeddingRequest, NovaEmbeddingResponse, NovaTextEmbeddingBackend
+from .openai_backend import OpenAIEmbeddingBackend
+from .registry import available_backends, backend_from_settings, get_backend, register_backend
+from .segments import DEFAULT_WINDOW_SECONDS, MediaSegment, plan_segments
 
 __all__ = [
+    "BackendLimits",
+    "DEFAULT_WINDOW_SECONDS",
+    "EmbeddingBackend",
+    "HashingEmbeddingBackend",
+    "MediaSegment",
     "NovaEmbeddingClient",
     "NovaEmbeddingRequest",
     "NovaEmbeddingResponse",
+    "NovaTextEmbeddingBackend",
+    "OpenAIEmbeddingBackend",
+    "available_backends",
+    "backend_from_settings",
+    "embed_in_batches",
+    "get_backend",
+    "pack_batches",
+    "plan_segments",
+    "register_backend",
 ]
@@ -0,0 +1,48 @@
+"""Common interface implemented by every embedding backend."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class BackendLimits:
+    """Provider limits the shared batcher packs requests against."""
+
+    dimensions: int
+    max_batch_size: int
+    max_tokens_per_input: int
+    max_tokens_per_batch: Optional[int] = None
+    max_concurrency: int = 1
+    tokenizer: Optional[str] = None
+
+
+class EmbeddingBackend(ABC):
+    """
+    A text embedding provider.
+
+    Subclasses implement ``embed_batch`` for a single provider request that is
+    already within ``limits``; ``embed_documents`` routes through the shared
+    batcher so callers can pass any number of inputs.
+    """
+
+    name: str = ""
+    modality: str = "text"
+    limits: BackendLimits
+
+    @abstractmethod
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed one provider-sized batch, preserving input order."""
+
+    def embed_documents(self, texts: Sequence[str]) -> List[List[float]]:
+        from .batching import embed_in_batches
+
+        return embed_in_batches(self, texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+__all__ = ["BackendLimits", "EmbeddingBackend"]
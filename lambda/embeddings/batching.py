@@ -0,0 +1,104 @@
+"""Pack embedding inputs into as few provider requests as each backend allows."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+from .base import BackendLimits, EmbeddingBackend
+
+try:  # exact token counts when tiktoken is installed
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=4)
+def _encoding(name: str):
+    return tiktoken.get_encoding(name)
+
+
+def estimate_tokens(text: str, tokenizer: Optional[str] = None) -> int:
+    if tokenizer and tiktoken is not None:
+        return len(_encoding(tokenizer).encode(text, disallowed_special=()))
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, tokenizer: Optional[str] = None) -> str:
+    """Trim ``text`` so it fits in a single input; providers reject oversized inputs outright."""
+
+    if tokenizer and tiktoken is not None:
+        encoding = _encoding(tokenizer)
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    return text[: max_tokens * CHARS_PER_TOKEN]
+
+
+def pack_batches(token_counts: Sequence[int], limits: BackendLimits) -> List[List[int]]:
+    """
+    Group input indexes into batches using first-fit decreasing.
+
+    Every batch respects ``max_batch_size`` and ``max_tokens_per_batch``; sorting
+    by size first keeps large inputs from stranding capacity, so the number of
+    requests stays close to the minimum.
+    """
+
+    order = sorted(range(len(token_counts)), key=lambda idx: token_counts[idx], reverse=True)
+    batches: List[List[int]] = []
+    batch_tokens: List[int] = []
+    token_budget = limits.max_tokens_per_batch
+
+    for idx in order:
+        tokens = token_counts[idx]
+        for slot, members in enumerate(batches):
+            if len(members) >= limits.max_batch_size:
+                continue
+            if token_budget is not None and batch_tokens[slot] + tokens > token_budget:
+                continue
+            members.append(idx)
+            batch_tokens[slot] += tokens
+            break
+        else:
+            batches.append([idx])
+            batch_tokens.append(tokens)
+
+    for members in batches:
+        members.sort()
+    batches.sort(key=lambda members: members[0])
+    return batches
+
+
+def embed_in_batches(backend: EmbeddingBackend, texts: Sequence[str]) -> List[List[float]]:
+    """Embed ``texts`` with ``backend`` using packed batches and its declared concurrency."""
+
+    if not texts:
+        return []
+
+    limits = backend.limits
+    prepared = [truncate_to_tokens(text, limits.max_tokens_per_input, limits.tokenizer) for text in texts]
+    token_counts = [min(estimate_tokens(text, limits.tokenizer), limits.max_tokens_per_input) for text in prepared]
+    batches = pack_batches(token_counts, limits)
+
+    def _run(members: List[int]) -> List[List[float]]:
+        vectors = backend.embed_batch([prepared[idx] for idx in members])
+        if len(vectors) != len(members):
+            raise RuntimeError(f"{backend.name} returned {len(vectors)} vectors for {len(members)} inputs")
+        return vectors
+
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    if len(batches) == 1 or limits.max_concurrency <= 1:
+        batch_vectors = [_run(members) for members in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(limits.max_concurrency, len(batches))) as executor:
+            batch_vectors = list(executor.map(_run, batches))
+
+    for members, vectors in zip(batches, batch_vectors):
+        for idx, vector in zip(members, vectors):
+            results[idx] = vector
+    return results  # type: ignore[return-value]
+
+
+__all__ = ["embed_in_batches", "estimate_tokens", "pack_batches", "truncate_to_tokens"]
@@ -0,0 +1,50 @@
+"""Deterministic CPU-only hashing embeddings for offline benchmarks and tests."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+from typing import List, Sequence
+
+from .base import BackendLimits, EmbeddingBackend
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Signed feature hashing over word unigrams and bigrams, L2-normalised.
+
+    No network, no model weights and identical output on every machine, so
+    retrieval and batching benchmarks are reproducible. Quality is only good
+    enough for lexical similarity.
+    """
+
+    name = "local"
+
+    def __init__(self, *, dimensions: int = 384) -> None:
+        self.limits = BackendLimits(
+            dimensions=dimensions,
+            max_batch_size=4096,
+            max_tokens_per_input=100_000,
+            max_concurrency=1,
+        )
+
+    def _embed_one(self, text: str) -> List[float]:
+        dims = self.limits.dimensions
+        vector = [0.0] * dims
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{left} {right}" for left, right in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % dims
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+__all__ = ["HashingEmbeddingBackend"]
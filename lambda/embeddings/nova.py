@@ -4,11 +4,15 @@ from __future__ import annotations
 
 import base64
 import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import boto3
 
+from .base import BackendLimits, EmbeddingBackend
+from .segments import MediaSegment
+
 
 @dataclass(frozen=True)
 class NovaEmbeddingRequest:
@@ -78,6 +82,95 @@ class NovaEmbeddingClient:
             body["metadata"] = request.metadata
         body["input"]["source"] = request.s3_uri
 
+        return self._to_response(request, self._invoke(body))
+
+    def embed_text(self, text: str, *, dimensions: Optional[int] = None) -> List[float]:
+        """Embed a single text input into the same space as Nova media embeddings."""
+
+        body: Dict[str, Any] = {"input": {"mediaType": "text/plain", "text": text}}
+        if dimensions:
+            body["embeddingDimension"] = dimensions
+        vectors = self._invoke(body).get("embeddings") or []
+        if not vectors:
+            raise RuntimeError("Nova returned no text embedding")
+        return vectors[0]
+
+    def embed_segment(
+        self,
+        request: NovaEmbeddingRequest,
+        segment: MediaSegment,
+        payload: Optional[bytes] = None,
+    ) -> NovaEmbeddingResponse:
+        """Embed one segment by reference to ``request.s3_uri``, or the whole object from its bytes."""
+
+        if payload is not None and not segment.is_whole_object:
+            raise ValueError("Inline payloads must carry the whole object; embed time ranges by reference")
+        body: Dict[str, Any] = {
+            "input": {
+                "mediaType": request.media_type,
+                "source": request.s3_uri,
+                "segment": segment.describe(),
+            }
+        }
+        if payload is not None:
+            body["input"]["data"] = base64.b64encode(payload).decode("utf-8")
+            if request.segments:
+                # The whole object is sent once; let the model split it at the caller's time ranges.
+                body["input"]["segments"] = list(request.segments)
+        if request.metadata:
+            body["metadata"] = request.metadata
+        return self._to_response(request, self._invoke(body))
+
+    def embed_segments(
+        self,
+        request: NovaEmbeddingRequest,
+        segments: Sequence[MediaSegment],
+        *,
+        s3_client=None,
+        bucket: Optional[str] = None,
+        key: Optional[str] = None,
+        by_reference: bool = False,
+        max_workers: int = 4,
+    ) -> Iterator[Tuple[MediaSegment, NovaEmbeddingResponse]]:
+        """
+        Embed ``segments`` concurrently and yield each result as soon as it is ready.
+
+        With ``by_reference`` each worker sends the S3 URI and its time range, so the
+        object is never downloaded. Without it the only valid plan is a single
+        whole-object segment: a byte slice of a compressed container is not
+        decodable on its own, so time ranges cannot be sent inline. Results arrive
+        in completion order, not segment order.
+        """
+
+        if not by_reference:
+            if s3_client is None or not bucket or not key:
+                raise ValueError("Inline embedding needs an S3 client, bucket and key")
+            if len(segments) != 1 or not segments[0].is_whole_object:
+                raise ValueError("Time-sliced segments must be embedded by reference")
+
+        def _run(segment: MediaSegment) -> Tuple[MediaSegment, NovaEmbeddingResponse]:
+            payload = None
+            if not by_reference:
+                payload = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+            return segment, self.embed_segment(request, segment, payload)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            pending = set()
+            remaining = iter(segments)
+            # Keep the pool saturated without queueing every segment up front.
+            for segment in remaining:
+                pending.add(executor.submit(_run, segment))
+                if len(pending) >= max_workers:
+                    break
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                    next_segment = next(remaining, None)
+                    if next_segment is not None:
+                        pending.add(executor.submit(_run, next_segment))
+
+    def _invoke(self, body: Dict[str, Any]) -> Dict[str, Any]:
         response = self._client.invoke_model(
             modelId=self.model_id,
             contentType="application/json",
@@ -94,7 +187,9 @@ class NovaEmbeddingClient:
             decoded = json.loads(raw_payload.decode("utf-8"))
         else:
             decoded = json.loads(str(raw_payload))
+        return decoded
 
+    def _to_response(self, request: NovaEmbeddingRequest, decoded: Dict[str, Any]) -> NovaEmbeddingResponse:
         vectors = decoded.get("embeddings") or decoded.get("vectors") or []
         if not isinstance(vectors, list):
             raise RuntimeError("Nova response did not contain embeddings list")
@@ -113,4 +208,33 @@ class NovaEmbeddingClient:
         )
 
 
-__all__ = ["NovaEmbeddingClient", "NovaEmbeddingRequest", "NovaEmbeddingResponse"]
+class NovaTextEmbeddingBackend(EmbeddingBackend):
+    """Text queries and chunks embedded with Nova so they can be compared against media vectors."""
+
+    name = "nova"
+    modality = "multimodal"
+
+    def __init__(
+        self,
+        *,
+        client: Optional[NovaEmbeddingClient] = None,
+        region: Optional[str] = None,
+        model_id: Optional[str] = None,
+        role_arn: Optional[str] = None,
+        dimensions: int = 1024,
+        max_concurrency: int = 8,
+    ) -> None:
+        self._client = client or NovaEmbeddingClient(region=region, model_id=model_id, role_arn=role_arn)
+        # invoke_model takes one input per call, so throughput comes from concurrency.
+        self.limits = BackendLimits(
+            dimensions=dimensions,
+            max_batch_size=1,
+            max_tokens_per_input=8192,
+            max_concurrency=max_concurrency,
+        )
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._client.embed_text(text, dimensions=self.limits.dimensions) for text in texts]
+
+
+__all__ = ["NovaEmbeddingClient", "NovaEmbeddingRequest", "NovaEmbeddingResponse", "NovaTextEmbeddingBackend"]
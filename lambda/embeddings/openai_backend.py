@@ -0,0 +1,49 @@
+"""OpenAI text embeddings (``text-embedding-3-*``)."""
+
+from __future__ import annotations
+
+from typing import List, Sequence
+
+from .base import BackendLimits, EmbeddingBackend
+
+_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """Calls the OpenAI embeddings endpoint; the SDK client is created on first use."""
+
+    name = "openai"
+
+    def __init__(self, *, api_key: str, model: str = "text-embedding-3-small",
+                 max_concurrency: int = 4, client=None) -> None:
+        if not api_key and client is None:
+            raise ValueError("OpenAIEmbeddingBackend requires an API key")
+        self.model = model
+        self._api_key = api_key
+        self._client = client
+        self.limits = BackendLimits(
+            dimensions=_DIMENSIONS.get(model, 1536),
+            max_batch_size=2048,
+            max_tokens_per_input=8191,
+            max_tokens_per_batch=300_000,
+            max_concurrency=max_concurrency,
+            tokenizer="cl100k_base",
+        )
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=self._api_key)
+        return self._client
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        response = self._get_client().embeddings.create(model=self.model, input=list(texts))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+__all__ = ["OpenAIEmbeddingBackend"]
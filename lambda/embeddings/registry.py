@@ -0,0 +1,74 @@
+"""Name-based lookup of embedding backends."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List
+
+from .base import EmbeddingBackend
+
+BackendFactory = Callable[..., EmbeddingBackend]
+
+_REGISTRY: Dict[str, BackendFactory] = {}
+
+
+def register_backend(name: str, factory: BackendFactory) -> None:
+    """Register (or replace) the factory used to build backend ``name``."""
+
+    _REGISTRY[name] = factory
+
+
+def available_backends() -> List[str]:
+    return sorted(_REGISTRY)
+
+
+def get_backend(name: str, **options: Any) -> EmbeddingBackend:
+    """Build backend ``name``; options are passed straight to its factory."""
+
+    try:
+        factory = _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend '{name}' (available: {', '.join(available_backends())})") from None
+    return factory(**options)
+
+
+def _openai_factory(**options: Any) -> EmbeddingBackend:
+    from .openai_backend import OpenAIEmbeddingBackend
+
+    return OpenAIEmbeddingBackend(**options)
+
+
+def _nova_factory(**options: Any) -> EmbeddingBackend:
+    from .nova import NovaTextEmbeddingBackend
+
+    return NovaTextEmbeddingBackend(**options)
+
+
+def _local_factory(**options: Any) -> EmbeddingBackend:
+    from .local import HashingEmbeddingBackend
+
+    return HashingEmbeddingBackend(**options)
+
+
+def backend_from_settings(settings: Any, name: str | None = None) -> EmbeddingBackend:
+    """Build the configured text backend from a ``config.Settings`` instance."""
+
+    name = name or settings.text_embedding_backend
+    if name == "openai":
+        options: Dict[str, Any] = {"api_key": settings.openai_api_key, "model": settings.text_embedding_model}
+    elif name == "nova":
+        options = {
+            "region": settings.bedrock_region or "us-east-1",
+            "model_id": settings.nova_embedding_model or "amazon.nova-embed-v1",
+            "role_arn": settings.nova_access_role_arn,
+        }
+    else:
+        options = {}
+    return get_backend(name, **options)
+
+
+register_backend("openai", _openai_factory)
+register_backend("nova", _nova_factory)
+register_backend("local", _local_factory)
+
+
+__all__ = ["available_backends", "backend_from_settings", "get_backend", "register_backend"]
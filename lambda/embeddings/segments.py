@@ -0,0 +1,83 @@
+"""
+Segment planning for long audio/video assets embedded with Nova.
+
+Segments are time ranges only. A byte range of a compressed MP4/MP3 has no
+container header and does not start on a frame boundary, so it cannot be
+decoded on its own; time-sliced segments are therefore always embedded by
+reference (S3 URI plus time range) and inline payloads always carry the whole
+object.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+DEFAULT_WINDOW_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class MediaSegment:
+    """One unit of embedding work: a time range of the object, or the whole object."""
+
+    index: int
+    start_seconds: Optional[float] = None
+    end_seconds: Optional[float] = None
+
+    @property
+    def is_whole_object(self) -> bool:
+        return self.start_seconds is None
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON-friendly description sent to Bedrock and used for deterministic vector ids."""
+
+        description: Dict[str, Any] = {"index": self.index}
+        if self.start_seconds is not None:
+            description["startSeconds"] = self.start_seconds
+            description["endSeconds"] = self.end_seconds
+        return description
+
+
+def _seconds(segment: Mapping[str, Any], *names: str) -> Optional[float]:
+    for name in names:
+        if segment.get(name) is not None:
+            return float(segment[name])
+    return None
+
+
+def plan_segments(
+    *,
+    segments: Optional[Sequence[Mapping[str, Any]]] = None,
+    duration_seconds: Optional[float] = None,
+    window_seconds: Optional[float] = None,
+) -> List[MediaSegment]:
+    """
+    Turn caller supplied time ranges (or fixed windows) into ``MediaSegment`` work items.
+
+    Without explicit segments the object is split into ``window_seconds``
+    windows when its duration is known, otherwise it is a single whole-object
+    segment.
+    """
+
+    if segments:
+        return [
+            MediaSegment(
+                index=index,
+                start_seconds=_seconds(segment, "start_seconds", "startSeconds", "start"),
+                end_seconds=_seconds(segment, "end_seconds", "endSeconds", "end"),
+            )
+            for index, segment in enumerate(segments)
+        ]
+
+    if duration_seconds and window_seconds:
+        window_count = max(1, int(-(-duration_seconds // window_seconds)))
+        return [
+            MediaSegment(index=i, start_seconds=i * window_seconds,
+                         end_seconds=min(duration_seconds, (i + 1) * window_seconds))
+            for i in range(window_count)
+        ]
+
+    return [MediaSegment(index=0)]
+
+
+__all__ = ["DEFAULT_WINDOW_SECONDS", "MediaSegment", "plan_segments"]
@@ -0,0 +1,202 @@
+"""
+Server-side force-directed layout for the knowledge-graph view.
+
+Positions are computed with a Fruchterman–Reingold pass in the unit square and
+cached with the graph snapshot, so clients can render immediately instead of
+running a simulation on load. Layouts are warm-started: existing nodes keep
+their previous coordinates, new nodes start at the centroid of their placed
+neighbours, and when only a small part of the graph changed just those nodes
+and their neighbours are allowed to move. That keeps positions stable between
+snapshots and makes each update proportional to the change.
+
+NumPy ships in requirements.txt (with SciPy, for the co-occurrence engine), so
+the vectorised pass is the one that runs. The pure-Python fallback only exists
+for environments without it; it is limited to small graphs and otherwise only
+places new nodes. Layouts are computed by the jobs worker after a snapshot
+changes (see ``GraphSnapshotStore.refresh_layout``), never while saving one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+try:  # In requirements.txt; optional only so the module imports without it.
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is unavailable
+    np = None
+
+Position = List[float]
+Edge = Tuple[str, str, float]
+
+COLD_ITERATIONS = 100
+WARM_ITERATIONS = 40
+COLD_TEMPERATURE = 0.1
+WARM_TEMPERATURE = 0.02
+# Above this share of changed nodes the whole graph is relaxed again.
+FULL_RELAYOUT_FRACTION = 0.2
+MARGIN = 0.02
+ROW_CHUNK = 512
+PYTHON_MAX_NODES = 200
+NUMPY_MAX_NODES = 5000
+
+
+def _seed_position(node_id: str) -> Position:
+    digest = hashlib.sha1(node_id.encode("utf-8")).digest()
+    return [0.1 + 0.8 * digest[0] / 255.0, 0.1 + 0.8 * digest[1] / 255.0]
+
+
+def _clamp(value: float) -> float:
+    return min(1.0 - MARGIN, max(MARGIN, value))
+
+
+def initial_positions(nodes: Sequence[str], neighbours: Mapping[str, Set[str]],
+                      previous: Mapping[str, Sequence[float]]) -> Dict[str, Position]:
+    """Keep previous coordinates; put new nodes next to the centroid of their placed neighbours."""
+
+    positions = {node: [float(previous[node][0]), float(previous[node][1])] for node in nodes if node in previous}
+    for node in nodes:
+        if node in positions:
+            continue
+        placed = [positions[other] for other in neighbours.get(node, ()) if other in positions]
+        jitter = _seed_position(node)
+        if placed:
+            positions[node] = [
+                _clamp(sum(pos[0] for pos in placed) / len(placed) + (jitter[0] - 0.5) * 0.05),
+                _clamp(sum(pos[1] for pos in placed) / len(placed) + (jitter[1] - 0.5) * 0.05),
+            ]
+        else:
+            positions[node] = jitter
+    return positions
+
+
+def _relax_numpy(order: List[str], positions: Dict[str, Position], edges: Sequence[Edge], movable: List[str],
+                 iterations: int, temperature: float) -> None:
+    index = {node: i for i, node in enumerate(order)}
+    count = len(order)
+    x = np.array([positions[node][0] for node in order], dtype=float)
+    y = np.array([positions[node][1] for node in order], dtype=float)
+    moving = np.array([index[node] for node in movable], dtype=int)
+    src = np.array([index[a] for a, _, _ in edges], dtype=int)
+    dst = np.array([index[b] for _, b, _ in edges], dtype=int)
+    weight = np.array([w for _, _, w in edges], dtype=float)
+    k = math.sqrt(1.0 / count)
+    k2 = k * k
+
+    for step in range(iterations):
+        disp_x = np.zeros(len(moving))
+        disp_y = np.zeros(len(moving))
+        for start in range(0, len(moving), ROW_CHUNK):
+            rows = moving[start : start + ROW_CHUNK]
+            dx = x[rows][:, None] - x[None, :]
+            dy = y[rows][:, None] - y[None, :]
+            force = dx * dx
+            force += dy * dy
+            np.maximum(force, 1e-8, out=force)
+            np.divide(k2, force, out=force)
+            disp_x[start : start + len(rows)] += (dx * force).sum(axis=1)
+            disp_y[start : start + len(rows)] += (dy * force).sum(axis=1)
+        if len(src):
+            ex = x[src] - x[dst]
+            ey = y[src] - y[dst]
+            factor = np.sqrt(np.maximum(ex * ex + ey * ey, 1e-8)) * weight / k
+            pull_x = np.bincount(dst, ex * factor, minlength=count) - np.bincount(src, ex * factor, minlength=count)
+            pull_y = np.bincount(dst, ey * factor, minlength=count) - np.bincount(src, ey * factor, minlength=count)
+            disp_x += pull_x[moving]
+            disp_y += pull_y[moving]
+        limit = temperature * (1 - step / iterations)
+        length = np.maximum(np.sqrt(disp_x * disp_x + disp_y * disp_y), 1e-9)
+        scale = np.minimum(length, limit) / length
+        x[moving] = np.clip(x[moving] + disp_x * scale, MARGIN, 1.0 - MARGIN)
+        y[moving] = np.clip(y[moving] + disp_y * scale, MARGIN, 1.0 - MARGIN)
+
+    for node, i in index.items():
+        positions[node] = [float(x[i]), float(y[i])]
+
+
+def _relax_python(order: List[str], positions: Dict[str, Position], edges: Sequence[Edge], movable: List[str],
+                  iterations: int, temperature: float) -> None:
+    k2 = 1.0 / len(order)
+    k = math.sqrt(k2)
+    moving = set(movable)
+    for step in range(iterations):
+        disp = {node: [0.0, 0.0] for node in movable}
+        for node in movable:
+            x, y = positions[node]
+            for other in order:
+                if other == node:
+                    continue
+                dx, dy = x - positions[other][0], y - positions[other][1]
+                dist2 = max(dx * dx + dy * dy, 1e-8)
+                disp[node][0] += dx * k2 / dist2
+                disp[node][1] += dy * k2 / dist2
+        for a, b, w in edges:
+            if a not in moving and b not in moving:
+                continue
+            dx, dy = positions[a][0] - positions[b][0], positions[a][1] - positions[b][1]
+            factor = math.sqrt(max(dx * dx + dy * dy, 1e-8)) * w / k
+            if a in moving:
+                disp[a][0] -= dx * factor
+                disp[a][1] -= dy * factor
+            if b in moving:
+                disp[b][0] += dx * factor
+                disp[b][1] += dy * factor
+        limit = temperature * (1 - step / iterations)
+        for node in movable:
+            dx, dy = disp[node]
+            length = max(math.sqrt(dx * dx + dy * dy), 1e-9)
+            scale = min(length, limit) / length
+            positions[node] = [_clamp(positions[node][0] + dx * scale), _clamp(positions[node][1] + dy * scale)]
+
+
+def force_layout(nodes: Iterable[str], edges: Iterable[Edge], *,
+                 previous: Optional[Mapping[str, Sequence[float]]] = None,
+                 changed: Optional[Iterable[str]] = None) -> Dict[str, Position]:
+    """
+    Lay ``nodes`` out in the unit square; returns ``{node: [x, y]}`` rounded to 4 places.
+
+    With a ``previous`` layout only ``changed`` nodes (plus nodes missing from
+    ``previous``) and their neighbours are relaxed, at a low temperature. A cold
+    start, or a change touching more than ``FULL_RELAYOUT_FRACTION`` of the graph,
+    relaxes every node.
+    """
+
+    order = list(dict.fromkeys(nodes))
+    if not order:
+        return {}
+    present = set(order)
+    edge_list = [(a, b, float(w)) for a, b, w in edges if a in present and b in present and a != b]
+    neighbours: Dict[str, Set[str]] = {}
+    for a, b, _ in edge_list:
+        neighbours.setdefault(a, set()).add(b)
+        neighbours.setdefault(b, set()).add(a)
+
+    previous = {node: pos for node, pos in (previous or {}).items() if node in present}
+    positions = initial_positions(order, neighbours, previous)
+
+    touched = {node for node in (changed or ()) if node in present} | (present - set(previous))
+    if previous and len(touched) <= FULL_RELAYOUT_FRACTION * len(order):
+        movable_set = set(touched)
+        for node in touched:
+            movable_set.update(neighbours.get(node, ()))
+        movable = [node for node in order if node in movable_set]
+        iterations, temperature = WARM_ITERATIONS, WARM_TEMPERATURE
+    else:
+        movable = order
+        iterations, temperature = (WARM_ITERATIONS * 2, COLD_TEMPERATURE / 2) if previous else (
+            COLD_ITERATIONS, COLD_TEMPERATURE)
+
+    if movable:
+        if np is not None and len(order) <= NUMPY_MAX_NODES:
+            _relax_numpy(order, positions, edge_list, movable, iterations, temperature)
+        elif len(order) <= PYTHON_MAX_NODES:
+            _relax_python(order, positions, edge_list, movable, iterations, temperature)
+        else:
+            print(f"⚠️ Skipping layout relaxation for {len(order)} nodes "
+                  f"({'NumPy is not installed' if np is None else 'graph too large'})")
+
+    return {node: [round(pos[0], 4), round(pos[1], 4)] for node, pos in positions.items()}
+
+
+__all__ = ["force_layout", "initial_positions"]
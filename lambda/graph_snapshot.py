@@ -0,0 +1,643 @@
+"""
+Materialised knowledge-graph snapshots.
+
+Serving the graph used to mean querying every ``ENTITY#`` row, recomputing all
+document relationships and loading every document. Instead a compact snapshot
+(entity memberships, document metadata and the retained doc↔doc edges) is kept
+per user and maintained incrementally: adding or removing a document updates the
+memberships in place and recomputes the retained edges in memory, because the
+IDF weights of every pair move with the document count. Snapshots are stored as gzip'd
+JSON on a ``GRAPH#SNAPSHOT`` row (spilling to S3 when too large for DynamoDB)
+under a version number used both for optimistic locking and as the HTTP ETag.
+Every save rewrites the ``GRAPH#ADJ#`` adjacency rows of the nodes that
+changed, which neighbourhood queries read
+(one ``BatchGetItem`` per ring) without loading the snapshot. The nodes still
+waiting for their rows are kept in the snapshot itself until the rows are
+written, so a failed adjacency write is retried by the next save. The cached
+layout is refreshed separately (by the jobs worker) from the nodes that changed
+since it was last computed.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import heapq
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from botocore.exceptions import ClientError
+
+from cooccurrence import cooccurrence_edges
+from dynamo_batch import batch_get_items
+from graph_layout import force_layout
+from knowledge_graph import format_user_entities
+
+SNAPSHOT_SK = "GRAPH#SNAPSHOT"
+ADJACENCY_SK_PREFIX = "GRAPH#ADJ#"
+SNAPSHOT_PREFIX = "graph-snapshots"
+SNAPSHOT_SCHEMA = 1
+DEFAULT_EDGES_PER_DOC = 25
+# DynamoDB items top out at 400 KB; leave room for the other attributes.
+INLINE_SNAPSHOT_BYTES = 350_000
+SNAPSHOT_UPDATE_ATTEMPTS = 3
+RECENCY_WINDOW_DAYS = 150
+# Keep entity adjacency rows well inside the DynamoDB item limit for hub entities.
+ENTITY_ADJACENCY_LIMIT = 1000
+
+EdgeValue = Tuple[int, float, List[str]]
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _rank(edge: EdgeValue, other: str) -> Tuple[float, int, str]:
+    weight, score, _ = edge
+    return (round(score, 6), weight, other)
+
+
+def _ranked_row(neighbours: Optional[Mapping[str, EdgeValue]]) -> List[Tuple[str, int]]:
+    """A doc's neighbours strongest first with their shared-entity counts, as its adjacency row orders them."""
+
+    neighbours = neighbours or {}
+    ranked = sorted(neighbours, key=lambda other: _rank(neighbours[other], other), reverse=True)
+    return [(other, neighbours[other][0]) for other in ranked]
+
+
+def recency_score(updated_at: Optional[str], now: Optional[datetime] = None) -> float:
+    """1.0 for a document touched today, decaying linearly to 0 over ``RECENCY_WINDOW_DAYS``."""
+
+    if not updated_at:
+        return 0.3
+    try:
+        updated = datetime.fromisoformat(str(updated_at).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.3
+    if updated.tzinfo is None:
+        updated = updated.astimezone()
+    now = now or datetime.now(tz=timezone.utc)
+    age_days = max(0.0, (now - updated).total_seconds() / 86400)
+    return max(0.0, 1 - min(age_days, RECENCY_WINDOW_DAYS) / RECENCY_WINDOW_DAYS)
+
+
+@dataclass
+class GraphSnapshot:
+    """In-memory graph: entity rows, document metadata and a symmetric doc adjacency map."""
+
+    entities: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    docs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    adjacency: Dict[str, Dict[str, EdgeValue]] = field(default_factory=dict)
+    edges_per_doc: int = DEFAULT_EDGES_PER_DOC
+    layout: Dict[str, List[float]] = field(default_factory=dict)
+    extras: Dict[str, Any] = field(default_factory=dict)
+    # Nodes whose adjacency rows must be rewritten on the next save.
+    dirty_docs: Set[str] = field(default_factory=set, repr=False)
+    dirty_entities: Set[str] = field(default_factory=set, repr=False)
+    # Layout node ids changed since the layout was last refreshed.
+    layout_pending: Set[str] = field(default_factory=set, repr=False)
+
+    # -- construction -----------------------------------------------------
+
+    @classmethod
+    def build(cls, entity_items: Sequence[Mapping[str, Any]], doc_metadata: Mapping[str, Mapping[str, Any]],
+              *, edges_per_doc: int = DEFAULT_EDGES_PER_DOC) -> "GraphSnapshot":
+        """Full rebuild from ``ENTITY#`` rows and per-document metadata."""
+
+        snapshot = cls(edges_per_doc=edges_per_doc)
+        for item in entity_items:
+            record = snapshot._entity_record(item)
+            if record["doc_ids"]:
+                snapshot.entities[record["entity_id"]] = record
+        for doc_id, meta in doc_metadata.items():
+            snapshot.docs[doc_id] = _plain(dict(meta))
+        for record in snapshot.entities.values():
+            for doc_id in record["doc_ids"]:
+                snapshot.docs.setdefault(doc_id, {})
+        snapshot.dirty_docs.update(snapshot.docs)
+        snapshot.dirty_entities.update(snapshot.entities)
+
+        relationships, _ = cooccurrence_edges(list(snapshot.entities.values()), top_k=edges_per_doc, idf=True)
+        for rel in relationships:
+            snapshot._set_edge(rel["source"], rel["target"], (rel["weight"], rel["score"], rel["shared_entities"]))
+        return snapshot
+
+    @staticmethod
+    def _entity_record(item: Mapping[str, Any]) -> Dict[str, Any]:
+        entity_id = item.get("entity_id") or str(item.get("sk", "")).replace("ENTITY#", "", 1)
+        doc_ids = sorted(set(item.get("doc_ids") or []))
+        return {
+            "entity_id": entity_id,
+            "entity_name": item.get("entity_name") or item.get("name"),
+            "entity_type": item.get("entity_type") or item.get("type"),
+            "doc_ids": doc_ids,
+            "doc_count": len(doc_ids),
+            "salience": _plain(item.get("salience", 0.0)),
+            "mentions": list(item.get("mentions") or [])[:10],
+            "updated_at": item.get("updated_at"),
+        }
+
+    # -- edge bookkeeping -------------------------------------------------
+
+    def _set_edge(self, source: str, target: str, value: EdgeValue) -> None:
+        if (self.adjacency.get(source) or {}).get(target) == value:
+            return
+        self.adjacency.setdefault(source, {})[target] = value
+        self.adjacency.setdefault(target, {})[source] = value
+        self.dirty_docs.update((source, target))
+
+    def doc_entities(self, doc_id: str) -> List[str]:
+        return [entity_id for entity_id, record in self.entities.items() if doc_id in record["doc_ids"]]
+
+    def _reconcile_edges(self) -> None:
+        """
+        Recompute the retained edges from the entity memberships, exactly as ``build`` does.
+
+        IDF weights depend on the document count and on every entity's document
+        frequency, so a single ingest rescores (and can re-rank) pairs it does
+        not touch. One in-memory sparse product over the snapshot's memberships
+        (see ``cooccurrence``) is cheap next to decoding the snapshot itself.
+        Only documents whose ranked neighbours or shared-entity counts changed
+        are marked dirty, so the adjacency rows rewritten per save stay
+        proportional to the change rather than to the library; the scores on
+        the other rows are brought up to date when they are next rewritten.
+        """
+
+        relationships, _ = cooccurrence_edges(list(self.entities.values()), top_k=self.edges_per_doc, idf=True)
+        fresh: Dict[str, Dict[str, EdgeValue]] = {}
+        for rel in relationships:
+            value = (rel["weight"], rel["score"], rel["shared_entities"])
+            fresh.setdefault(rel["source"], {})[rel["target"]] = value
+            fresh.setdefault(rel["target"], {})[rel["source"]] = value
+        for doc_id in set(self.adjacency) | set(fresh):
+            if _ranked_row(self.adjacency.get(doc_id)) != _ranked_row(fresh.get(doc_id)):
+                self.dirty_docs.add(doc_id)
+        self.adjacency = fresh
+
+    # -- incremental maintenance -----------------------------------------
+
+    def apply_document(self, doc_id: str, doc_meta: Optional[Mapping[str, Any]],
+                       doc_entities: Iterable[Mapping[str, Any]]) -> None:
+        """
+        Add (or refresh) a document the way ``_upsert_knowledge_graph`` persists it.
+
+        Entity memberships are only ever added, mirroring the ``ENTITY#`` rows.
+        The edges are reconciled whenever the memberships (or the entity names
+        they list) change; a metadata-only refresh such as a rename leaves them alone.
+        """
+
+        edges_stale = False
+        self.docs[doc_id] = {**self.docs.get(doc_id, {}), **_plain(dict(doc_meta or {}))}
+        for entity in doc_entities:
+            entity_id = entity["entity_id"]
+            record = self.entities.get(entity_id) or self._entity_record({"entity_id": entity_id})
+            if doc_id not in record["doc_ids"]:
+                record["doc_ids"] = sorted(record["doc_ids"] + [doc_id])
+                record["doc_count"] = len(record["doc_ids"])
+                edges_stale = True
+            name = entity.get("name") or record.get("entity_name")
+            edges_stale = edges_stale or name != record.get("entity_name")
+            record["entity_name"] = name
+            record["entity_type"] = entity.get("type") or record.get("entity_type")
+            record["salience"] = _plain(entity.get("salience", record.get("salience", 0.0)))
+            record.setdefault("doc_salience", {})[doc_id] = record["salience"]
+            for mention in entity.get("mentions") or []:
+                if mention and mention not in record["mentions"] and len(record["mentions"]) < 10:
+                    record["mentions"].append(mention)
+            record["updated_at"] = (doc_meta or {}).get("updated_at") or record.get("updated_at")
+            self.entities[entity_id] = record
+            self.dirty_entities.add(entity_id)
+        self.dirty_docs.add(doc_id)
+        if edges_stale:
+            self._reconcile_edges()
+
+    def remove_document(self, doc_id: str) -> None:
+        """
+        Forget a deleted document.
+
+        The edges are reconciled afterwards, so its neighbours pick up the
+        next-best edges it had crowded out and the remaining pairs are rescored.
+        """
+
+        self.docs.pop(doc_id, None)
+        self.dirty_docs.add(doc_id)
+        for entity_id in self.doc_entities(doc_id):
+            record = self.entities[entity_id]
+            record["doc_ids"] = [existing for existing in record["doc_ids"] if existing != doc_id]
+            record["doc_count"] = len(record["doc_ids"])
+            record.get("doc_salience", {}).pop(doc_id, None)
+            self.dirty_entities.add(entity_id)
+            if not record["doc_ids"]:
+                del self.entities[entity_id]
+        self._reconcile_edges()
+
+    # -- serving ----------------------------------------------------------
+
+    def relationships(self, *, edges_per_doc: Optional[int] = None, idf: bool = True) -> List[Dict[str, Any]]:
+        limit = min(edges_per_doc or self.edges_per_doc, self.edges_per_doc)
+        keep: Set[Tuple[str, str]] = set()
+        for doc_id, neighbours in self.adjacency.items():
+            key = (lambda other: _rank(neighbours[other], other)) if idf else (
+                lambda other: (neighbours[other][0], other)
+            )
+            for other in heapq.nlargest(limit, neighbours, key=key):
+                keep.add((min(doc_id, other), max(doc_id, other)))
+
+        relationships = []
+        for source, target in keep:
+            weight, score, shared = self.adjacency[source][target]
+            relationships.append({
+                "source": source,
+                "target": target,
+                "weight": weight,
+                "score": score if idf else float(weight),
+                "shared_entities": list(shared),
+            })
+        relationships.sort(key=lambda rel: (-rel["score"], -rel["weight"], f"{rel['source']}->{rel['target']}"))
+        return relationships
+
+    def payload(self, *, edges_per_doc: Optional[int] = None, idf: bool = True,
+                now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Response body of ``/dev/knowledge-graph/entities`` (minus ``user_id``)."""
+
+        touch_counts: Dict[str, int] = {}
+        for record in self.entities.values():
+            for doc_id in record["doc_ids"]:
+                touch_counts[doc_id] = touch_counts.get(doc_id, 0) + 1
+        doc_metadata = {}
+        for doc_id, meta in self.docs.items():
+            if not meta:
+                continue
+            doc_metadata[doc_id] = {
+                "title": meta.get("title") or doc_id,
+                "summary": meta.get("summary") or "",
+                "created_at": meta.get("created_at"),
+                "updated_at": meta.get("updated_at"),
+                "recency_score": recency_score(meta.get("updated_at") or meta.get("created_at"), now),
+                "sentiment_score": meta.get("sentiment_score", 0.0),
+                "emotion": meta.get("emotion") or "neutral",
+                "word_count": meta.get("word_count", 0),
+                "entity_count": touch_counts.get(doc_id, 0),
+            }
+        return {
+            "entities": format_user_entities(list(self.entities.values())),
+            "doc_relationships": self.relationships(edges_per_doc=edges_per_doc, idf=idf),
+            "doc_metadata": doc_metadata,
+            "layout": self.layout,
+        }
+
+    # -- adjacency index --------------------------------------------------
+
+    def _salience(self, entity_id: str, doc_id: str) -> float:
+        record = self.entities[entity_id]
+        return float((record.get("doc_salience") or {}).get(doc_id, record.get("salience") or 0.0))
+
+    def _title(self, doc_id: str) -> str:
+        return (self.docs.get(doc_id) or {}).get("title") or doc_id
+
+    def adjacency_rows(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Adjacency entries for every dirty node, keyed by node id.
+
+        A ``None`` entry means the node no longer exists and its row should be
+        deleted. Neighbour lists are pre-sorted strongest first and hold ids and
+        edge strengths only; a node's label lives on its own row, so renaming a
+        document rewrites one row rather than every neighbour's.
+        """
+
+        doc_index: Dict[str, List[str]] = {}
+        if self.dirty_docs:
+            for entity_id, record in self.entities.items():
+                for doc_id in record["doc_ids"]:
+                    if doc_id in self.dirty_docs:
+                        doc_index.setdefault(doc_id, []).append(entity_id)
+
+        doc_rows: Dict[str, Any] = {}
+        for doc_id in self.dirty_docs:
+            if doc_id not in self.docs:
+                doc_rows[doc_id] = None
+                continue
+            neighbours = self.adjacency.get(doc_id) or {}
+            ranked_docs = sorted(neighbours, key=lambda other: _rank(neighbours[other], other), reverse=True)
+            ranked_entities = sorted(
+                doc_index.get(doc_id, []), key=lambda entity_id: (-self._salience(entity_id, doc_id), entity_id)
+            )
+            doc_rows[doc_id] = {
+                "title": self._title(doc_id),
+                "docs": [[other, neighbours[other][0], neighbours[other][1]] for other in ranked_docs],
+                "entities": [[entity_id, self._salience(entity_id, doc_id)] for entity_id in ranked_entities],
+            }
+
+        entity_rows: Dict[str, Any] = {}
+        for entity_id in self.dirty_entities:
+            record = self.entities.get(entity_id)
+            if record is None:
+                entity_rows[entity_id] = None
+                continue
+            ranked = sorted(record["doc_ids"], key=lambda doc_id: (-self._salience(entity_id, doc_id), doc_id))
+            entity_rows[entity_id] = {
+                "name": record.get("entity_name"),
+                "type": record.get("entity_type"),
+                "doc_count": len(record["doc_ids"]),
+                "docs": [[doc_id, self._salience(entity_id, doc_id)] for doc_id in ranked[:ENTITY_ADJACENCY_LIMIT]],
+            }
+        return doc_rows, entity_rows
+
+    # -- layout -----------------------------------------------------------
+
+    def mark_layout_pending(self) -> None:
+        """Queue the currently dirty nodes for the next ``refresh_layout``."""
+
+        self.layout_pending.update(f"doc:{doc_id}" for doc_id in self.dirty_docs)
+        self.layout_pending.update(f"entity:{entity_id}" for entity_id in self.dirty_entities)
+
+    def refresh_layout(self) -> None:
+        """Update cached node positions (``entity:<id>`` / ``doc:<id>``, as the graph view names them)."""
+
+        nodes = [f"entity:{entity_id}" for entity_id in sorted(self.entities)]
+        nodes += [f"doc:{doc_id}" for doc_id in sorted(self.docs)]
+        edges = [
+            (f"entity:{entity_id}", f"doc:{doc_id}", 1.0)
+            for entity_id, record in self.entities.items()
+            for doc_id in record["doc_ids"]
+        ]
+        for source, neighbours in self.adjacency.items():
+            for target, (weight, _, _) in neighbours.items():
+                if source < target:
+                    edges.append((f"doc:{source}", f"doc:{target}", min(2.0, 0.5 + 0.25 * weight)))
+        self.mark_layout_pending()
+        self.layout = force_layout(nodes, edges, previous=self.layout, changed=self.layout_pending)
+        self.layout_pending.clear()
+
+    # -- serialisation ----------------------------------------------------
+
+    def to_json(self) -> Dict[str, Any]:
+        edges = []
+        for source, neighbours in self.adjacency.items():
+            for target, (weight, score, shared) in neighbours.items():
+                if source < target:
+                    edges.append([source, target, weight, score, shared])
+        edges.sort()
+        return {
+            "schema": SNAPSHOT_SCHEMA,
+            "edges_per_doc": self.edges_per_doc,
+            "entities": self.entities,
+            "docs": self.docs,
+            "edges": edges,
+            "layout": self.layout,
+            "dirty_docs": sorted(self.dirty_docs),
+            "dirty_entities": sorted(self.dirty_entities),
+            "layout_pending": sorted(self.layout_pending),
+            **self.extras,
+        }
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> "GraphSnapshot":
+        known = {"schema", "edges_per_doc", "entities", "docs", "edges", "layout", "dirty_docs", "dirty_entities",
+                 "layout_pending"}
+        snapshot = cls(
+            entities=dict(data.get("entities") or {}),
+            docs=dict(data.get("docs") or {}),
+            edges_per_doc=int(data.get("edges_per_doc") or DEFAULT_EDGES_PER_DOC),
+            layout=dict(data.get("layout") or {}),
+            extras={key: value for key, value in data.items() if key not in known},
+        )
+        for source, target, weight, score, shared in data.get("edges") or []:
+            snapshot._set_edge(source, target, (int(weight), float(score), list(shared)))
+        snapshot.dirty_docs = set(data.get("dirty_docs") or [])
+        snapshot.dirty_entities = set(data.get("dirty_entities") or [])
+        snapshot.layout_pending = set(data.get("layout_pending") or [])
+        return snapshot
+
+    def encode(self) -> bytes:
+        body = json.dumps(self.to_json(), separators=(",", ":"), sort_keys=True, default=str)
+        return gzip.compress(body.encode("utf-8"), mtime=0)
+
+    @classmethod
+    def decode(cls, blob: bytes) -> "GraphSnapshot":
+        return cls.from_json(json.loads(gzip.decompress(blob).decode("utf-8")))
+
+
+def etag_for(version: int, blob: bytes) -> str:
+    return f'"{version}-{hashlib.sha256(blob).hexdigest()[:16]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """RFC 7232 weak comparison against an ``If-None-Match`` header value."""
+
+    if not if_none_match or not etag:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.replace("W/", "", 1) == etag for value in candidates)
+
+
+class GraphSnapshotStore:
+    """Reads and writes versioned snapshots on the user's ``GRAPH#SNAPSHOT`` row."""
+
+    def __init__(self, table, *, s3=None, bucket: Optional[str] = None, prefix: str = SNAPSHOT_PREFIX,
+                 inline_limit: int = INLINE_SNAPSHOT_BYTES) -> None:
+        self.table = table
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.inline_limit = inline_limit
+
+    def _key(self, user_id: str) -> Dict[str, str]:
+        return {"pk": f"USER#{user_id}", "sk": SNAPSHOT_SK}
+
+    def read(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """The raw snapshot row (``version``, ``etag`` and payload or S3 pointer), if any."""
+
+        response = self.table.get_item(Key=self._key(user_id))
+        return response.get("Item") if isinstance(response, dict) else None
+
+    def decode(self, row: Mapping[str, Any]) -> GraphSnapshot:
+        """
+        Load the snapshot stored on ``row``.
+
+        Its dirty nodes are kept only while the row is flagged
+        ``adjacency_pending``, i.e. when the save that stored it did not get to
+        write their adjacency rows.
+        """
+
+        if row.get("s3_key"):
+            blob = self.s3.get_object(Bucket=self.bucket, Key=row["s3_key"])["Body"].read()
+        else:
+            payload = row["payload"]
+            blob = bytes(getattr(payload, "value", payload))
+        snapshot = GraphSnapshot.decode(blob)
+        if not row.get("adjacency_pending"):
+            snapshot.dirty_docs.clear()
+            snapshot.dirty_entities.clear()
+        return snapshot
+
+    def save(self, user_id: str, snapshot: GraphSnapshot,
+             expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Write ``snapshot`` as the next version; ``None`` if someone else wrote first.
+
+        ``expected_version`` of ``None`` only succeeds when no snapshot exists.
+        """
+
+        snapshot.mark_layout_pending()
+        blob = snapshot.encode()
+        version = (expected_version or 0) + 1
+        row: Dict[str, Any] = {
+            **self._key(user_id),
+            "version": version,
+            "etag": etag_for(version, blob),
+            "edge_count": sum(len(neighbours) for neighbours in snapshot.adjacency.values()) // 2,
+            "doc_count": len(snapshot.docs),
+            "updated_at": datetime.now(tz=timezone.utc).isoformat(),
+        }
+        if snapshot.dirty_docs or snapshot.dirty_entities:
+            row["adjacency_pending"] = True
+        if len(blob) > self.inline_limit and self.s3 is not None and self.bucket:
+            # Unique per attempt: a writer that loses the version race must not
+            # overwrite, or then delete, the object the winner's row points at.
+            row["s3_key"] = f"{self.prefix}/{user_id}/{version}-{uuid.uuid4().hex}.json.gz"
+            self.s3.put_object(Bucket=self.bucket, Key=row["s3_key"], Body=blob,
+                               ContentType="application/json", ContentEncoding="gzip")
+        else:
+            row["payload"] = blob
+
+        if expected_version is None:
+            condition = {"ConditionExpression": "attribute_not_exists(pk)"}
+        else:
+            condition = {"ConditionExpression": "version = :prev",
+                         "ExpressionAttributeValues": {":prev": expected_version}}
+        try:
+            self.table.put_item(Item=row, **condition)
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            if row.get("s3_key"):
+                self.s3.delete_object(Bucket=self.bucket, Key=row["s3_key"])
+            return None
+        if row.pop("adjacency_pending", False):
+            self._write_adjacency(user_id, snapshot, version)
+            self._clear_pending(user_id, version)
+        return row
+
+    def _clear_pending(self, user_id: str, version: int) -> None:
+        try:
+            self.table.update_item(
+                Key=self._key(user_id),
+                UpdateExpression="REMOVE adjacency_pending",
+                ConditionExpression="version = :version",
+                ExpressionAttributeValues={":version": version},
+            )
+        except ClientError as error:
+            # A newer save already took over (and rewrote) the pending rows.
+            if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+
+    def _write_adjacency(self, user_id: str, snapshot: GraphSnapshot, version: int) -> None:
+        doc_rows, entity_rows = snapshot.adjacency_rows()
+        with self.table.batch_writer() as batch:
+            for kind, rows in (("DOC", doc_rows), ("ENTITY", entity_rows)):
+                for node_id, entry in rows.items():
+                    key = {"pk": f"USER#{user_id}", "sk": f"{ADJACENCY_SK_PREFIX}{kind}#{node_id}"}
+                    if entry is None:
+                        batch.delete_item(Key=key)
+                    else:
+                        batch.put_item(Item={**key, "node_id": node_id, "version": version,
+                                             "payload": json.dumps(entry, separators=(",", ":"), default=str)})
+        snapshot.dirty_docs.clear()
+        snapshot.dirty_entities.clear()
+
+    def read_adjacency(self, user_id: str, kind: str, node_id: str) -> Optional[Dict[str, Any]]:
+        """Adjacency entry of one ``DOC`` or ``ENTITY`` node, or ``None`` if it is not indexed."""
+
+        response = self.table.get_item(
+            Key={"pk": f"USER#{user_id}", "sk": f"{ADJACENCY_SK_PREFIX}{kind}#{node_id}"}
+        )
+        item = response.get("Item") if isinstance(response, dict) else None
+        return json.loads(item["payload"]) if item else None
+
+    def read_adjacency_batch(self, user_id: str,
+                             nodes: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Adjacency entries of many ``(kind, node_id)`` nodes via ``BatchGetItem``; unindexed nodes are absent."""
+
+        wanted = {f"{ADJACENCY_SK_PREFIX}{kind}#{node_id}": (kind, node_id) for kind, node_id in nodes}
+        items = batch_get_items(self.table, [{"pk": f"USER#{user_id}", "sk": sk} for sk in wanted],
+                                projection="sk, payload")
+        return {wanted[item["sk"]]: json.loads(item["payload"]) for item in items}
+
+    def update(self, user_id: str, mutate: Callable[[GraphSnapshot], None]) -> Optional[Dict[str, Any]]:
+        """
+        Apply ``mutate`` to the stored snapshot under optimistic locking.
+
+        Returns ``None`` without writing when the user has no snapshot yet; the
+        next read builds one from scratch. ``mutate`` may return ``False`` to
+        leave the stored snapshot (and its version) untouched.
+        """
+
+        for _ in range(SNAPSHOT_UPDATE_ATTEMPTS):
+            row = self.read(user_id)
+            if row is None:
+                return None
+            snapshot = self.decode(row)
+            if mutate(snapshot) is False:
+                return row
+            saved = self.save(user_id, snapshot, expected_version=int(row["version"]))
+            if saved is not None:
+                self._discard_spill(row, saved)
+                return saved
+        raise RuntimeError(f"Graph snapshot for {user_id} kept changing")
+
+    def refresh_layout(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Recompute the cached layout if nodes changed since it was last laid out (a jobs-worker task)."""
+
+        def _relayout(snapshot: GraphSnapshot) -> bool:
+            if not snapshot.layout_pending and (snapshot.layout or not snapshot.docs):
+                return False
+            snapshot.refresh_layout()
+            return True
+
+        return self.update(user_id, _relayout)
+
+    def rename_document(self, user_id: str, doc_id: str, title: str) -> Optional[Dict[str, Any]]:
+        """Record a new title for ``doc_id`` if the user's snapshot knows the document."""
+
+        def _rename(snapshot: GraphSnapshot) -> bool:
+            if doc_id not in snapshot.docs or snapshot.docs[doc_id].get("title") == title:
+                return False
+            snapshot.apply_document(doc_id, {"title": title}, [])
+            return True
+
+        return self.update(user_id, _rename)
+
+    def replace(self, user_id: str, snapshot: GraphSnapshot) -> Optional[Dict[str, Any]]:
+        """Save a rebuilt ``snapshot`` over whatever is stored; ``None`` if someone else wrote first."""
+
+        previous = self.read(user_id)
+        saved = self.save(user_id, snapshot, expected_version=int(previous["version"]) if previous else None)
+        if saved is not None and previous is not None:
+            self._discard_spill(previous, saved)
+        return saved
+
+    def _discard_spill(self, previous: Mapping[str, Any], saved: Mapping[str, Any]) -> None:
+        if previous.get("s3_key") and previous["s3_key"] != saved.get("s3_key"):
+            self.s3.delete_object(Bucket=self.bucket, Key=previous["s3_key"])
+
+
+__all__ = [
+    "ADJACENCY_SK_PREFIX",
+    "DEFAULT_EDGES_PER_DOC",
+    "GraphSnapshot",
+    "GraphSnapshotStore",
+    "etag_for",
+    "etag_matches",
+    "recency_score",
+]
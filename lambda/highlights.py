@@ -0,0 +1,233 @@
+"""
+Streaming top-k highlight extraction.
+
+``generate_highlights`` used to split the whole document into a list of
+sentences, locate each one with ``str.find``, build a candidate dict (with a
+fresh uuid) for every sentence of highlight length, sort all of them and only
+then dedupe down to a dozen. For long documents that allocated far more than it
+kept.
+
+``StreamingHighlighter`` consumes the document as a stream of pages (or
+sentences), finds sentence boundaries and keyword hits incrementally, and keeps
+only a bounded min-heap of the best ``max_count`` candidates plus the dedupe
+keys of those candidates. Ids are assigned to the survivors when the results
+are read. Apart from the page being consumed, memory does not grow with the
+document: a few hundred characters of look-behind and look-ahead for the
+context snippets, the pending keyword matches and the heap.
+
+Deduplicating against the heap alone is exact: the heap's minimum only rises,
+so a candidate that was evicted can never outrank a later duplicate that makes
+it into the heap.
+
+Offsets refer to the pages joined with ``separator``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+import uuid
+from collections import Counter, deque
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from keyword_matcher import KeywordMatch, KeywordMatcher
+
+DEFAULT_MAX_HIGHLIGHTS = 12
+MIN_HIGHLIGHT_CHARS = 40
+MAX_HIGHLIGHT_CHARS = 320
+CONTEXT_CHARS = 80
+
+# Whitespace after sentence punctuation, once the next sentence has started.
+_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+(?=\S)")
+
+_Rank = Tuple[float, int]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char in "_'-"
+
+
+class StreamingHighlighter:
+    """Keeps the top ``max_count`` distinct highlight sentences of a text stream."""
+
+    def __init__(self, matcher: KeywordMatcher, kinds: Mapping[str, str], *,
+                 max_count: int = DEFAULT_MAX_HIGHLIGHTS, separator: str = "\n") -> None:
+        """
+        ``kinds`` maps keyword categories to highlight kinds in priority order; a
+        sentence takes the kind of its first matching category, otherwise "key".
+        """
+        if max_count < 1:
+            raise ValueError("max_count must be positive")
+        self.matcher = matcher
+        self.kinds = dict(kinds)
+        self.max_count = max_count
+        self.separator = separator
+        # Keyword hits per category over the whole stream, for lexicon scoring.
+        self.counts: Counter = Counter()
+        self._heap: List[Tuple[_Rank, str, dict]] = []
+        self._entries: Dict[str, Tuple[_Rank, str, dict]] = {}
+        self._sequence = 0
+        self._buffer = ""
+        self._base = 0  # stream offset of ``_buffer[0]``
+        self._started = False
+        self._closed = False
+        # Start of the current sentence in the buffer, or None while skipping a
+        # sentence that is already too long to be a highlight.
+        self._start: Optional[int] = 0
+        self._search = 0  # where to look for the next sentence boundary
+        self._scanned = 0  # keyword matching has covered the buffer up to here
+        self._matches: Deque[KeywordMatch] = deque()
+
+    def feed(self, text: str) -> None:
+        if self._closed:
+            raise ValueError("StreamingHighlighter is closed")
+        if self._started:
+            text = self.separator + text
+        self._started = True
+        self._compact()
+        self._buffer += text
+        self._advance(final=False)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._advance(final=True)
+
+    def highlights(self) -> List[dict]:
+        """The surviving highlights, best first, each with a newly assigned id."""
+
+        self.close()
+        ranked = sorted(self._heap, key=lambda entry: (-entry[0][0], -entry[0][1]))
+        return [{"id": f"hl-{uuid.uuid4().hex[:8]}", **candidate} for _, _, candidate in ranked]
+
+    def _compact(self) -> None:
+        anchor = self._search if self._start is None else self._start
+        while self._matches and self._matches[0].start < self._base + anchor:
+            self._matches.popleft()
+        cut = max(0, min(anchor, self._scanned) - CONTEXT_CHARS)
+        if not cut:
+            return
+        self._buffer = self._buffer[cut:]
+        self._base += cut
+        self._search -= cut
+        self._scanned -= cut
+        if self._start is not None:
+            self._start -= cut
+
+    def _scan_keywords(self, final: bool) -> None:
+        buffer = self._buffer
+        end = len(buffer)
+        if not final:
+            # Hold back a trailing partial word until the next page completes it.
+            while end > self._scanned and _is_word_char(buffer[end - 1]):
+                end -= 1
+        if end <= self._scanned:
+            return
+        for match in self.matcher.finditer(buffer, self._scanned, end):
+            self.counts.update(match.categories)
+            if any(category in self.kinds for category in match.categories):
+                self._matches.append(KeywordMatch(self._base + match.start, self._base + match.end,
+                                                  match.keyword, match.categories))
+        self._scanned = end
+
+    def _advance(self, final: bool) -> None:
+        self._scan_keywords(final)
+        buffer = self._buffer
+        while True:
+            boundary = _BOUNDARY_RE.search(buffer, self._search)
+            if boundary is None:
+                break
+            if self._start is not None:
+                if not final and len(buffer) < boundary.start() + CONTEXT_CHARS:
+                    # Wait for the context that follows the sentence.
+                    self._search = boundary.start()
+                    return
+                self._consider(self._start, boundary.start())
+            self._start = self._search = boundary.end()
+
+        end = len(buffer)
+        while end > self._search and buffer[end - 1].isspace():
+            end -= 1
+        if final:
+            if self._start is not None:
+                self._consider(self._start, end)
+            self._matches.clear()
+            return
+        # The trailing whitespace may still turn out to be a sentence boundary.
+        self._search = end
+        if self._start is not None:
+            while self._start < end and buffer[self._start].isspace():
+                self._start += 1
+            if end - self._start > MAX_HIGHLIGHT_CHARS:
+                self._start = None
+
+    def _consider(self, start: int, end: int) -> None:
+        buffer = self._buffer
+        while start < end and buffer[start].isspace():
+            start += 1
+        offset = self._base + start
+        hits = set()
+        while self._matches and self._matches[0].start < self._base + end:
+            match = self._matches.popleft()
+            if match.start >= offset and match.end <= self._base + end:
+                hits.update(category for category in match.categories if category in self.kinds)
+
+        length = end - start
+        if length < MIN_HIGHLIGHT_CHARS or length > MAX_HIGHLIGHT_CHARS:
+            return
+        raw = buffer[start:end]
+        kind = next((kind for category, kind in self.kinds.items() if category in hits), "key")
+        density_score = min(1.0, length / 180)
+        punctuation_bonus = 0.25 if ":" in raw or ";" in raw else 0.0
+        keyword_bonus = min(0.35, len(hits) * 0.2)
+        capital_bonus = 0.1 if raw[:1].isupper() else 0.0
+        score = round(density_score + punctuation_bonus + keyword_bonus + capital_bonus, 4)
+
+        # Ties go to the earlier sentence.
+        self._sequence += 1
+        rank = (score, -self._sequence)
+        key = raw.lower()
+        existing = self._entries.get(key)
+        if existing is not None:
+            if rank <= existing[0]:
+                return
+            self._heap.remove(existing)
+            heapq.heapify(self._heap)
+        elif len(self._heap) >= self.max_count:
+            if rank <= self._heap[0][0]:
+                return
+            del self._entries[heapq.heappop(self._heap)[1]]
+
+        context_start = max(0, start - CONTEXT_CHARS)
+        context_end = min(len(buffer), end + CONTEXT_CHARS)
+        entry = (rank, key, {
+            "text": raw,
+            "kind": kind,
+            "offset": offset,
+            "length": length,
+            "score": score,
+            "context": buffer[context_start:context_end].strip(),
+        })
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+
+def highlight_pages(pages: Iterable[str], matcher: KeywordMatcher, kinds: Mapping[str, str], *,
+                    max_count: int = DEFAULT_MAX_HIGHLIGHTS, separator: str = "\n") -> StreamingHighlighter:
+    """Run a ``StreamingHighlighter`` over ``pages`` and return it closed."""
+
+    highlighter = StreamingHighlighter(matcher, kinds, max_count=max_count, separator=separator)
+    for page in pages:
+        highlighter.feed(page)
+    highlighter.close()
+    return highlighter
+
+
+__all__ = [
+    "CONTEXT_CHARS",
+    "DEFAULT_MAX_HIGHLIGHTS",
+    "MAX_HIGHLIGHT_CHARS",
+    "MIN_HIGHLIGHT_CHARS",
+    "StreamingHighlighter",
+    "highlight_pages",
+]
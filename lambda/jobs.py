@@ -0,0 +1,218 @@
+"""Background job records stored alongside documents in the DynamoDB table."""
+
+from __future__ import annotations
+
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+
+def _now_iso() -> str:
+    return datetime.now(tz=timezone.utc).isoformat()
+
+
+def job_key(user_id: str, job_id: str) -> Dict[str, str]:
+    return {"pk": f"USER#{user_id}", "sk": f"JOB#{job_id}"}
+
+
+def create_job(table, user_id: str, job_type: str, **attributes: Any) -> Dict[str, Any]:
+    """Persist a queued job row and return it."""
+
+    now_iso = _now_iso()
+    job_id = f"job_{uuid.uuid4().hex[:12]}"
+    item = {
+        **job_key(user_id, job_id),
+        "job_id": job_id,
+        "job_type": job_type,
+        "user_id": user_id,
+        "status": "queued",
+        "stage": "queued",
+        "progress": {},
+        "created_at": now_iso,
+        "updated_at": now_iso,
+        **attributes,
+    }
+    table.put_item(Item=item)
+    return item
+
+
+def update_job(table, user_id: str, job_id: str, *, status: Optional[str] = None, stage: Optional[str] = None,
+               progress: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+    """Record job progress; only the supplied fields are touched."""
+
+    expressions = ["updated_at = :ts"]
+    values: Dict[str, Any] = {":ts": _now_iso()}
+    names: Dict[str, str] = {}
+    if status is not None:
+        expressions.append("#status = :status")
+        names["#status"] = "status"
+        values[":status"] = status
+    if stage is not None:
+        expressions.append("stage = :stage")
+        values[":stage"] = stage
+    if progress is not None:
+        expressions.append("progress = :progress")
+        values[":progress"] = progress
+    if error is not None:
+        expressions.append("last_error = :error")
+        values[":error"] = error[:512]
+
+    kwargs: Dict[str, Any] = {
+        "Key": job_key(user_id, job_id),
+        "UpdateExpression": "SET " + ", ".join(expressions),
+        "ExpressionAttributeValues": values,
+    }
+    if names:
+        kwargs["ExpressionAttributeNames"] = names
+    table.update_item(**kwargs)
+
+
+def _document_key(user_id: str, doc_id: str) -> Dict[str, str]:
+    return {"pk": f"USER#{user_id}", "sk": f"DOC#{doc_id}"}
+
+
+def document_stage_reporter(table, user_id: str, job_id: str, doc_id: str) -> Callable[[str], None]:
+    """
+    Return a callback that mirrors ingestion stages onto the JOB# and DOC# rows.
+
+    The DOC# update is conditional so a document deleted mid-ingest is never
+    resurrected; the resulting ``ConditionalCheckFailedException`` aborts the job.
+    """
+
+    def _report(stage: str) -> None:
+        update_job(table, user_id, job_id, status="running", stage=stage)
+        table.update_item(
+            Key=_document_key(user_id, doc_id),
+            UpdateExpression="SET processing_status = :processing, processing_stage = :stage, updated_at = :ts",
+            ConditionExpression="attribute_exists(pk) AND processing_status <> :deleting",
+            ExpressionAttributeValues={
+                ":processing": "processing",
+                ":stage": stage,
+                ":ts": _now_iso(),
+                ":deleting": "deleting",
+            },
+        )
+
+    return _report
+
+
+def mark_document_failed(table, user_id: str, doc_id: str, error: str) -> None:
+    """Flag a document whose background processing failed, unless it is being deleted."""
+
+    try:
+        table.update_item(
+            Key=_document_key(user_id, doc_id),
+            UpdateExpression="SET processing_status = :failed, last_error = :error, updated_at = :ts",
+            ConditionExpression="attribute_exists(pk) AND processing_status <> :deleting",
+            ExpressionAttributeValues={
+                ":failed": "failed",
+                ":error": error[:512],
+                ":ts": _now_iso(),
+                ":deleting": "deleting",
+            },
+        )
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+
+
+IDEMPOTENCY_TTL_SECONDS = 7 * 24 * 3600
+# The documents table expires rows on this attribute (scripts/setup-nova-infrastructure.sh).
+TTL_ATTRIBUTE = "ttl"
+
+
+class JobAlreadyRunning(RuntimeError):
+    """Another worker holds the lease for this job; the message should be retried later."""
+
+
+def _idempotency_key(user_id: str, key: str) -> Dict[str, str]:
+    return {"pk": f"USER#{user_id}", "sk": f"IDEMPOTENCY#{key}"}
+
+
+def claim_idempotency_key(table, user_id: str, key: str, *, lease_seconds: int = 900) -> str:
+    """
+    Take the lease for a unit of work before doing anything expensive.
+
+    Returns ``"claimed"`` when the caller should run the job, ``"completed"`` when a
+    previous delivery already finished it and ``"running"`` while another worker
+    holds an unexpired lease.
+    """
+
+    now = int(time.time())
+    try:
+        table.put_item(
+            Item={
+                **_idempotency_key(user_id, key),
+                "status": "running",
+                "lease_expires_at": now + lease_seconds,
+                TTL_ATTRIBUTE: now + IDEMPOTENCY_TTL_SECONDS,
+                "updated_at": _now_iso(),
+            },
+            ConditionExpression="attribute_not_exists(pk) OR (#status <> :completed AND lease_expires_at < :now)",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={":completed": "completed", ":now": now},
+        )
+        return "claimed"
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+
+    response = table.get_item(Key=_idempotency_key(user_id, key))
+    item = response.get("Item") if isinstance(response, dict) else None
+    return "completed" if item and item.get("status") == "completed" else "running"
+
+
+def complete_idempotency_key(table, user_id: str, key: str, **attributes: Any) -> None:
+    now = int(time.time())
+    table.put_item(Item={
+        **_idempotency_key(user_id, key),
+        "status": "completed",
+        "lease_expires_at": now,
+        TTL_ATTRIBUTE: now + IDEMPOTENCY_TTL_SECONDS,
+        "updated_at": _now_iso(),
+        **attributes,
+    })
+
+
+def release_idempotency_key(table, user_id: str, key: str) -> None:
+    """Drop the lease after a failure so the redelivered message can run straight away."""
+
+    table.delete_item(Key=_idempotency_key(user_id, key))
+
+
+def get_job(table, user_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+    response = table.get_item(Key=job_key(user_id, job_id))
+    return response.get("Item") if isinstance(response, dict) else None
+
+
+def format_job(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": item.get("job_id"),
+        "job_type": item.get("job_type"),
+        "doc_id": item.get("doc_id"),
+        "status": item.get("status"),
+        "stage": item.get("stage"),
+        "progress": item.get("progress") or {},
+        "last_error": item.get("last_error"),
+        "created_at": item.get("created_at"),
+        "updated_at": item.get("updated_at"),
+    }
+
+
+__all__ = [
+    "JobAlreadyRunning",
+    "TTL_ATTRIBUTE",
+    "claim_idempotency_key",
+    "complete_idempotency_key",
+    "create_job",
+    "document_stage_reporter",
+    "format_job",
+    "get_job",
+    "job_key",
+    "mark_document_failed",
+    "release_idempotency_key",
+    "update_job",
+]
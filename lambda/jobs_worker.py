@@ -0,0 +1,107 @@
+"""Asynchronous document job worker for DocumentGPT."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List
+
+import boto3
+
+from config import get_settings
+from content_store import ContentStore
+from direct_upload import iter_s3_events
+from document_deletion import run_deletion_job
+from graph_snapshot import GraphSnapshotStore
+from near_duplicates import SignatureStore
+from vector_store import IndexGroup, PineconeIndex
+
+settings = get_settings()
+
+dynamodb = boto3.resource("dynamodb")
+s3_client = boto3.client("s3")
+docs_table = dynamodb.Table(settings.doc_table)
+vector_indexes = IndexGroup([
+    PineconeIndex(settings.pinecone_index_host, settings.pinecone_api_key),
+    PineconeIndex(settings.media_index_host, settings.pinecone_api_key, namespace=settings.media_namespace),
+])
+CONTENT_BUCKET = settings.content_bucket or settings.media_bucket
+content_store = ContentStore(s3_client, CONTENT_BUCKET) if CONTENT_BUCKET else None
+graph_store = GraphSnapshotStore(docs_table, s3=s3_client, bucket=CONTENT_BUCKET)
+signature_store = SignatureStore(docs_table)
+
+
+def _delete_document(job: Dict[str, Any]) -> None:
+    progress = run_deletion_job(docs_table, vector_indexes, job, content_store=content_store,
+                                graph_store=graph_store, signature_store=signature_store)
+    print(f"🗑️ Deleted {job.get('doc_id')}: {progress}")
+    graph_store.refresh_layout(job["user_id"])
+
+
+def _refresh_graph_layout(job: Dict[str, Any]) -> None:
+    # Queued after graph snapshot saves so layouts never run on the request path.
+    graph_store.refresh_layout(job["user_id"])
+
+
+def _ingest_document(job: Dict[str, Any]) -> None:
+    # The ingestion pipeline pulls in LangChain; only load it for ingestion jobs.
+    from dev_handler import run_ingestion_job
+
+    run_ingestion_job(job)
+
+
+def _ingest_upload(job: Dict[str, Any]) -> None:
+    from dev_handler import run_upload_ingestion
+
+    run_upload_ingestion(job["bucket"], job["key"])
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "delete_document": _delete_document,
+    "ingest_document": _ingest_document,
+    "ingest_upload": _ingest_upload,
+    "refresh_graph_layout": _refresh_graph_layout,
+}
+
+
+def _jobs_from_record(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Decode an SQS job message or an S3 notification (direct or delivered through SQS)."""
+
+    if record.get("eventSource") == "aws:s3":
+        notification = {"Records": [record]}
+    else:
+        notification = json.loads(record.get("body") or "{}")
+        if "Records" not in notification:
+            return [notification]
+    return [{"job_type": "ingest_upload", **upload} for upload in iter_s3_events(notification)]
+
+
+def lambda_handler(event, context):
+    """Entry point for SQS jobs and S3 upload notifications; reports partial batch failures."""
+
+    records: List[Dict[str, Any]] = event.get("Records", [])
+    print(f"🧵 Processing {len(records)} document jobs")
+    failures: List[Dict[str, str]] = []
+    for record in records:
+        try:
+            jobs = _jobs_from_record(record)
+        except json.JSONDecodeError:
+            print(f"⚠️ Invalid job payload: {record.get('body')}")
+            continue
+
+        for job in jobs:
+            handler = JOB_HANDLERS.get(job.get("job_type"))
+            if handler is None:
+                print(f"⚠️ Unknown job type: {job.get('job_type')}")
+                continue
+
+            try:
+                handler(job)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                print(f"❌ Job {job.get('job_id') or job.get('key')} failed: {exc}")
+                if not record.get("messageId"):
+                    # Direct S3 invocations are retried by Lambda itself.
+                    raise
+                failures.append({"itemIdentifier": record.get("messageId")})
+                break
+
+    return {"batchItemFailures": failures}
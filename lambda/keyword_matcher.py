@@ -0,0 +1,157 @@
+"""
+Single-pass multi-lexicon keyword matching.
+
+Highlight classification used to run ``any(keyword in sentence)`` for every
+sentence and every ``HIGHLIGHT_KEYWORDS`` category, and sentiment and emotion
+scoring tokenized the document again and looked every token up in seven
+separate sets. ``KeywordMatcher`` compiles all lexicons into one matcher once,
+at import, and finds every keyword of every category in one left-to-right pass
+over the text, reporting the offsets of each match so callers can attribute hits
+to sentences or use them as highlight anchors.
+
+Keywords match whole words only (a keyword is not matched inside a longer word
+such as "maybe" or "weekend"), case-insensitively. Because every match starts at
+a word start, the Aho-Corasick failure transitions are never needed: the
+automaton reduces to a walk of the keyword trie from each word start. The trie
+is compiled into a prefix-factored regular expression so that walk runs in the
+``re`` engine rather than a Python loop, which is several times faster for the
+same linear pass.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+# Characters that continue a word: a keyword must not touch one on either side.
+_WORD_CHARS = r"[\w'-]"
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """One keyword occurrence; ``start``/``end`` index the scanned text."""
+
+    start: int
+    end: int
+    keyword: str
+    categories: Tuple[str, ...]
+
+
+@dataclass
+class KeywordScan:
+    """Every keyword match of a text, in order, with per-category hit counts."""
+
+    matches: List[KeywordMatch] = field(default_factory=list)
+    counts: Counter = field(default_factory=Counter)
+    _starts: List[int] = field(default_factory=list, repr=False)
+
+    def add(self, match: KeywordMatch) -> None:
+        self.matches.append(match)
+        self._starts.append(match.start)
+        self.counts.update(match.categories)
+
+    def between(self, start: int, end: int) -> List[KeywordMatch]:
+        """Matches lying entirely within ``[start, end)``."""
+
+        found = []
+        for index in range(bisect_left(self._starts, start), len(self.matches)):
+            match = self.matches[index]
+            if match.start >= end:
+                break
+            if match.end <= end:
+                found.append(match)
+        return found
+
+    def categories_between(self, start: int, end: int) -> Set[str]:
+        return {category for match in self.between(start, end) for category in match.categories}
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Prefix-factored alternation of ``keywords`` (longest alternatives first)."""
+
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A keyword ends here and longer ones continue: the greedy optional
+            # tries the longer keywords first and backs off to this one.
+            body = (body if len(branches) > 1 else "(?:" + body + ")") + "?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Finds whole-word, case-insensitive occurrences of categorized keywords."""
+
+    def __init__(self, lexicons: Mapping[str, Iterable[str]]) -> None:
+        categories: Dict[str, List[str]] = {}
+        for category, keywords in lexicons.items():
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if keyword and category not in categories.setdefault(keyword, []):
+                    categories[keyword].append(category)
+        if not categories:
+            raise ValueError("KeywordMatcher requires at least one keyword")
+        self.categories: Tuple[str, ...] = tuple(lexicons)
+        self._keyword_categories: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(found) for keyword, found in categories.items()
+        }
+        pattern = f"(?<!{_WORD_CHARS}){_trie_pattern(categories)}(?!{_WORD_CHARS})"
+        self._pattern = re.compile(pattern)
+        self._pattern_ignorecase = re.compile(pattern, re.IGNORECASE)
+
+    def keyword_categories(self, keyword: str) -> Tuple[str, ...]:
+        return self._keyword_categories.get(keyword.strip().lower(), ())
+
+    def finditer(self, text: str, start: int = 0, end: Optional[int] = None) -> Iterator[KeywordMatch]:
+        """Yield matches within ``text[start:end]`` in order; offsets index ``text``."""
+
+        end = len(text) if end is None else min(end, len(text))
+        # One character of leading context so a keyword cut by ``start`` is not matched.
+        lead = max(start - 1, 0)
+        window = text[lead:end]
+        haystack = window.lower()
+        pattern = self._pattern
+        if len(haystack) != len(window):
+            # A few characters lower-case to longer strings; match the original
+            # text case-insensitively so offsets stay exact.
+            haystack, pattern = window, self._pattern_ignorecase
+        for found in pattern.finditer(haystack, start - lead):
+            keyword = found.group().lower()
+            categories = self._keyword_categories.get(keyword)
+            if categories:
+                yield KeywordMatch(lead + found.start(), lead + found.end(), keyword, categories)
+
+    def scan(self, text: str) -> KeywordScan:
+        """All matches of ``text`` and the hit count of every category, in one pass."""
+
+        result = KeywordScan()
+        for match in self.finditer(text):
+            result.add(match)
+        return result
+
+    def category_counts(self, text: str, start: int = 0, end: Optional[int] = None) -> Counter:
+        counts: Counter = Counter()
+        for match in self.finditer(text, start, end):
+            counts.update(match.categories)
+        return counts
+
+
+__all__ = [
+    "KeywordMatch",
+    "KeywordMatcher",
+    "KeywordScan",
+]
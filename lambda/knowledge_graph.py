@@ -9,12 +9,17 @@ responsible for wiring in the real model and persistence layer.
 from __future__ import annotations
 
 import json
+import math
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from decimal import Decimal
-from itertools import combinations
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
+from content_index import chunk_hash
+from cooccurrence import cooccurrence_edges
+from llm_cache import cache_namespace
+
 ALLOWED_ENTITY_TYPES = {
     "PERSON",
     "ORG",
@@ -106,26 +111,33 @@ def _extract_json_block(raw_text: str) -> str | None:
     return raw_text[start : end + 1]
 
 
-def parse_entity_payload(raw_text: str) -> List[dict]:
+def parse_entity_payload(raw_text: str, *, strict: bool = False) -> List[dict]:
     """
     Parse an LLM response into a list of entity dictionaries.
 
     The model may return explanatory text around the JSON; we defensively strip
-    to the outer-most braces before decoding.
+    to the outer-most braces before decoding. Output that holds no entity list
+    yields ``[]``, or raises ``ValueError`` when ``strict`` so callers can tell
+    it apart from a genuine ``{"entities": []}``.
     """
 
+    def _unparseable(reason: str) -> List[dict]:
+        if strict:
+            raise ValueError(f"unparseable entity payload: {reason}")
+        return []
+
     json_block = _extract_json_block(raw_text)
     if not json_block:
-        return []
+        return _unparseable("no JSON object")
 
     try:
         parsed = json.loads(json_block)
-    except json.JSONDecodeError:
-        return []
+    except json.JSONDecodeError as error:
+        return _unparseable(str(error))
 
-    entities = parsed.get("entities") or parsed.get("Entities")
+    entities = parsed.get("entities", parsed.get("Entities")) if isinstance(parsed, dict) else None
     if not isinstance(entities, list):
-        return []
+        return _unparseable("no entities list")
     return [entity for entity in entities if isinstance(entity, dict)]
 
 
@@ -217,15 +229,16 @@ Rules:
 """
 
 
-def run_entity_extraction(text: str, llm, *, max_chars: int = 6000) -> List[Entity]:
-    """
-    Execute the extraction prompt against the supplied language model.
-    """
+ENTITY_WINDOW_CHARS = 6000
+MAX_ENTITY_WINDOWS = 16
+DEFAULT_ENTITY_CONCURRENCY = 8
+MAX_DOCUMENT_ENTITIES = 25
+# A window also closes after a chunk whose hash is divisible by this, so window
+# boundaries follow content and an edit only changes the windows around it.
+WINDOW_BREAK_EVERY = 4
 
-    snippet = (text or "")[:max_chars]
-    if not snippet.strip():
-        return []
 
+def _extract_raw_entities(snippet: str, llm, *, strict: bool = False) -> List[dict]:
     messages = [
         {"role": "system", "content": ENTITY_EXTRACTION_PROMPT},
         {
@@ -236,8 +249,134 @@ def run_entity_extraction(text: str, llm, *, max_chars: int = 6000) -> List[Enti
 
     response = llm.invoke(messages, max_tokens=600)
     raw_text = getattr(response, "content", "")
-    raw_entities = parse_entity_payload(raw_text)
-    return consolidate_entities(raw_entities)
+    return parse_entity_payload(raw_text, strict=strict)
+
+
+def run_entity_extraction(text: str, llm, *, max_chars: int = ENTITY_WINDOW_CHARS) -> List[Entity]:
+    """
+    Execute the extraction prompt against the supplied language model.
+    """
+
+    snippet = (text or "")[:max_chars]
+    if not snippet.strip():
+        return []
+
+    return consolidate_entities(_extract_raw_entities(snippet, llm))
+
+
+def group_chunks(chunks: Sequence[str], max_chars: int = ENTITY_WINDOW_CHARS) -> List[str]:
+    """Join consecutive chunks into extraction windows of at most ``max_chars`` (a longer chunk stands alone)."""
+
+    windows: List[str] = []
+    current: List[str] = []
+    size = 0
+    for chunk in chunks:
+        if not chunk.strip():
+            continue
+        if current and size + len(chunk) > max_chars:
+            windows.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(chunk)
+        size += len(chunk) + 2
+        if int(chunk_hash(chunk), 16) % WINDOW_BREAK_EVERY == 0:
+            windows.append("\n\n".join(current))
+            current, size = [], 0
+    if current:
+        windows.append("\n\n".join(current))
+    return windows
+
+
+def sample_evenly(count: int, limit: Optional[int]) -> List[int]:
+    """``limit`` indexes spread evenly over ``range(count)``, always including the first and last."""
+
+    if limit is None or count <= limit:
+        return list(range(count))
+    if limit <= 1:
+        return [0][:limit]
+    return sorted({round(step * (count - 1) / (limit - 1)) for step in range(limit)})
+
+
+def reduce_chunk_entities(chunk_results: Sequence[Sequence[dict]], *,
+                          max_entities: Optional[int] = MAX_DOCUMENT_ENTITIES) -> List[Entity]:
+    """
+    Merge per-chunk extractions with ``consolidate_entities``, weighting salience by frequency.
+
+    An entity keeps its highest per-chunk salience scaled by
+    ``(1 + ln n) / (1 + ln n_max)``, where ``n`` is the number of chunks it was
+    extracted from and ``n_max`` that of the most frequent entity, so the
+    entities a document keeps returning to outrank one-off mentions. A single
+    chunk is left unweighted.
+    """
+
+    frequency: Dict[str, int] = {}
+    for raw_entities in chunk_results:
+        ids = {entity.entity_id for entity in map(_normalise_entity, raw_entities) if entity}
+        for entity_id in ids:
+            frequency[entity_id] = frequency.get(entity_id, 0) + 1
+
+    entities = consolidate_entities([raw for raw_entities in chunk_results for raw in raw_entities])
+    if not entities:
+        return []
+    top_frequency = max(frequency.values())
+    weighted = [
+        Entity(
+            entity_id=entity.entity_id,
+            name=entity.name,
+            type=entity.type,
+            salience=round(entity.salience * (1 + math.log(frequency[entity.entity_id]))
+                           / (1 + math.log(top_frequency)), 4),
+            mentions=entity.mentions,
+        )
+        for entity in entities
+    ]
+    weighted.sort(key=lambda entity: (-entity.salience, entity.name))
+    return weighted[:max_entities] if max_entities else weighted
+
+
+def run_chunked_entity_extraction(chunks: Sequence[str], llm, *, cache=None,
+                                  max_workers: int = DEFAULT_ENTITY_CONCURRENCY,
+                                  max_windows: Optional[int] = MAX_ENTITY_WINDOWS,
+                                  window_chars: int = ENTITY_WINDOW_CHARS) -> List[Entity]:
+    """
+    Map-reduce ``ENTITY_EXTRACTION_PROMPT`` over a whole document.
+
+    ``chunks`` are grouped into windows of ``window_chars`` (the excerpt size a
+    single call used to see); when there are more than ``max_windows`` (``None``
+    for no limit) an evenly spread sample is extracted. Windows are extracted
+    concurrently, at most ``max_workers`` at a time, so coverage of the whole
+    document costs about one model latency per ``max_workers`` windows.
+    ``cache`` (an ``LlmResultCache``) holds each window's raw extraction under
+    the window's hash; a window that fails, or whose output does not parse, is
+    logged and skipped without being cached so it is retried next time.
+    """
+
+    windows = group_chunks(chunks, window_chars)
+    selected = [windows[idx] for idx in sample_evenly(len(windows), max_windows)]
+    if not selected:
+        return []
+    namespace = cache_namespace("entities", ENTITY_EXTRACTION_PROMPT, str(getattr(llm, "model_name", "")))
+
+    def _extract(window: str) -> List[dict]:
+        digest = chunk_hash(window)
+        if cache is not None:
+            cached = cache.get(namespace, digest)
+            if cached is not None:
+                return cached
+        try:
+            raw_entities = _extract_raw_entities(window, llm, strict=True)
+        except Exception as error:  # noqa: BLE001 - one failed window must not lose the rest
+            print(f"⚠️ Entity extraction failed for window {digest}: {error}")
+            return []
+        if cache is not None:
+            cache.put(namespace, digest, raw_entities)
+        return raw_entities
+
+    if len(selected) == 1 or max_workers <= 1:
+        results = [_extract(window) for window in selected]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(selected))) as executor:
+            results = list(executor.map(_extract, selected))
+    return reduce_chunk_entities(results)
 
 
 def entities_to_document_payload(entities: Iterable[Entity]) -> List[dict]:
@@ -352,45 +491,13 @@ def format_entity_detail(entity_item: Dict, document_items: Sequence[Dict]) -> D
     }
 
 
-def compute_doc_relationships(entity_items: Sequence[Dict]) -> Tuple[List[Dict], Dict[str, int]]:
-    """Build document-to-document relationship summaries from raw entity items."""
-
-    relationship_map: Dict[Tuple[str, str], Dict[str, object]] = {}
-    doc_touch_counts: Dict[str, int] = {}
-
-    for item in entity_items:
-        doc_ids = item.get("doc_ids") or []
-        if not doc_ids:
-            continue
-
-        unique_doc_ids = sorted(set(doc_ids))
-        if not unique_doc_ids:
-            continue
-
-        for doc_id in unique_doc_ids:
-            doc_touch_counts[doc_id] = doc_touch_counts.get(doc_id, 0) + 1
+def compute_doc_relationships(entity_items: Sequence[Dict], *, top_k: Optional[int] = None,
+                              idf: bool = False) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Build document-to-document relationship summaries from raw entity items.
 
-        if len(unique_doc_ids) < 2:
-            continue
+    See ``cooccurrence.cooccurrence_edges``; ``top_k`` bounds the edges kept per
+    document and ``idf`` ranks them with ubiquitous entities down-weighted.
+    """
 
-        entity_name = item.get("entity_name") or item.get("name") or item.get("entity_id")
-        for source_id, target_id in combinations(unique_doc_ids, 2):
-            key = (source_id, target_id)
-            entry = relationship_map.setdefault(
-                key,
-                {
-                    "source": source_id,
-                    "target": target_id,
-                    "weight": 0,
-                    "shared_entities": [],
-                },
-            )
-            entry["weight"] = int(entry.get("weight", 0)) + 1
-            if entity_name and entity_name not in entry["shared_entities"]:
-                entry["shared_entities"].append(entity_name)
-
-    relationships = sorted(
-        relationship_map.values(),
-        key=lambda rel: (-int(rel["weight"]), f"{rel['source']}->{rel['target']}")
-    )
-    return relationships, doc_touch_counts
+    return cooccurrence_edges(entity_items, top_k=top_k, idf=idf)
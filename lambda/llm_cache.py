@@ -0,0 +1,99 @@
+"""
+Content-addressed cache of LLM results.
+
+Map-reduce extraction and hierarchical summarization call the model once per
+chunk or section. Most of those inputs are unchanged when a document is
+reprocessed (a retry, a re-index, a small edit, the same file uploaded twice),
+so each result is cached under the hash of its input. The namespace of an
+entry includes a digest of the prompt and model (``cache_namespace``), so
+editing a prompt or switching models starts a new cache instead of serving
+stale answers.
+
+Entries are small JSON documents in S3, fronted by a bounded in-process LRU so
+a warm Lambda container skips the GET. Cache failures are logged and treated as
+misses; they never fail the caller.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+CACHE_PREFIX = "llm-cache"
+MEMORY_ENTRIES = 2048
+
+_MISSING = object()
+
+
+def cache_namespace(kind: str, *parts: str) -> str:
+    """``kind`` plus a short digest of everything that shapes the result (prompt text, model)."""
+
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:12]
+    return f"{kind}-{digest}"
+
+
+class LlmResultCache:
+    """JSON results keyed by ``(namespace, input digest)`` in S3 (optional) and memory."""
+
+    def __init__(self, s3_client=None, bucket: Optional[str] = None, *, prefix: str = CACHE_PREFIX,
+                 memory_entries: int = MEMORY_ENTRIES) -> None:
+        self._s3 = s3_client if bucket else None
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        # Map phases read and write from worker threads.
+        self._lock = threading.Lock()
+
+    def object_key(self, namespace: str, digest: str) -> str:
+        return f"{self.prefix}/{namespace}/{digest[:2]}/{digest}.json"
+
+    def _remember(self, key: Tuple[str, str], value: Any) -> None:
+        if self.memory_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, namespace: str, digest: str) -> Optional[Any]:
+        key = (namespace, digest)
+        with self._lock:
+            value = self._memory.get(key, _MISSING)
+            if value is not _MISSING:
+                self._memory.move_to_end(key)
+                return value
+        if self._s3 is None:
+            return None
+        try:
+            body = self._s3.get_object(Bucket=self.bucket, Key=self.object_key(namespace, digest))["Body"].read()
+            value = json.loads(body.decode("utf-8"))["value"]
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404", "NotFound"):
+                print(f"⚠️ LLM cache read failed: {error}")
+            return None
+        except (ValueError, KeyError, UnicodeDecodeError) as error:
+            print(f"⚠️ Ignoring unreadable LLM cache entry {namespace}/{digest}: {error}")
+            return None
+        self._remember(key, value)
+        return value
+
+    def put(self, namespace: str, digest: str, value: Any) -> None:
+        self._remember((namespace, digest), value)
+        if self._s3 is None:
+            return
+        body = json.dumps({"value": value}, separators=(",", ":")).encode("utf-8")
+        try:
+            self._s3.put_object(Bucket=self.bucket, Key=self.object_key(namespace, digest), Body=body,
+                                ContentType="application/json")
+        except ClientError as error:
+            print(f"⚠️ LLM cache write failed: {error}")
+
+
+__all__ = ["CACHE_PREFIX", "LlmResultCache", "cache_namespace"]
@@ -2,28 +2,43 @@
 
 from __future__ import annotations
 
-import json
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, List
-from uuid import uuid4
+from typing import Any, Dict, List, Optional
 
 import boto3
-import requests
 from botocore.exceptions import ClientError
 
 from config import get_settings
-from embeddings import NovaEmbeddingClient, NovaEmbeddingRequest
+from content_index import chunk_vector_id, job_fingerprint, segment_hash
+from embeddings import DEFAULT_WINDOW_SECONDS, NovaEmbeddingClient, NovaEmbeddingRequest, plan_segments
+from jobs import (
+    JobAlreadyRunning,
+    claim_idempotency_key,
+    complete_idempotency_key,
+    release_idempotency_key,
+)
+from sqs_batch import DeadlineExceeded, JobDeadline, process_batch
+from vector_store import PineconeIndex
 
 settings = get_settings()
 
 DOC_TABLE_NAME = settings.doc_table
 PINECONE_API_KEY = settings.pinecone_api_key
-PINECONE_INDEX_HOST = settings.pinecone_index_host
+MEDIA_INDEX_HOST = settings.media_index_host
+MEDIA_NAMESPACE = settings.media_namespace
 PINECONE_INDEX_NAME = settings.pinecone_index or "documentgpt-dev"
 BEDROCK_REGION = settings.bedrock_region or "us-east-1"
 NOVA_MODEL_ID = settings.nova_embedding_model or "amazon.nova-embed-v1"
 NOVA_ACCESS_ROLE_ARN = settings.nova_access_role_arn
+MAX_CONCURRENT_JOBS = settings.media_worker_concurrency
+SEGMENT_CONCURRENCY = settings.nova_segment_concurrency
+NOVA_BY_REFERENCE = settings.nova_by_reference
+# Objects above this are always embedded by reference, whatever the job or NOVA_BY_REFERENCE asks for.
+INLINE_MEDIA_MAX_BYTES = settings.nova_inline_max_bytes
+# Leave room for a Bedrock call to complete before the invocation times out.
+MIN_EMBED_SECONDS = 20.0
+JOB_LEASE_SECONDS = 900
 
 s3_client = boto3.client("s3")
 dynamodb = boto3.resource("dynamodb")
@@ -36,56 +51,82 @@ nova_client = NovaEmbeddingClient(
 )
 
 
-def pinecone_request(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-    if not PINECONE_INDEX_HOST:
-        raise RuntimeError("PINECONE_INDEX_HOST not configured for media worker")
+# Nova vectors are not comparable with the text index's embeddings, so media
+# segments live in their own index/namespace and are searched with a Nova query.
+media_index = PineconeIndex(MEDIA_INDEX_HOST, PINECONE_API_KEY, namespace=MEDIA_NAMESPACE)
 
-    url = f"https://{PINECONE_INDEX_HOST}{path}"
-    headers = {
-        "Content-Type": "application/json",
-        "Api-Key": PINECONE_API_KEY,
-    }
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-    except requests.RequestException as request_error:
-        raise RuntimeError(f"Pinecone request failed: {request_error}") from request_error
 
-    if not response.ok:
-        raise RuntimeError(
-            f"Pinecone request failed ({response.status_code}): {response.text[:300]}"
-        )
-    return response.json()
+def lambda_handler(event, context):
+    """Entry point for SQS-triggered media processing."""
+
+    records: List[Dict[str, Any]] = event.get("Records", [])
+    print(f"🧵 Processing {len(records)} media tasks ({MAX_CONCURRENT_JOBS} at a time)")
+    return process_batch(
+        records,
+        _process_job,
+        context=context,
+        max_workers=MAX_CONCURRENT_JOBS,
+        on_failure=_handle_job_failure,
+    )
 
 
-def pinecone_upsert(vectors: List[Dict[str, Any]]) -> None:
-    if not vectors:
+def _handle_job_failure(job: Dict[str, Any], error: Exception) -> None:
+    if isinstance(error, (DeadlineExceeded, JobAlreadyRunning)):
+        # Redelivery will pick it up with a fresh time budget; the document is still processing.
         return
+    _mark_document_failed(job, str(error))
 
-    batch_size = 100
-    for i in range(0, len(vectors), batch_size):
-        pinecone_request("/vectors/upsert", {"vectors": vectors[i : i + batch_size]})
 
+def _process_job(job: Dict[str, Any], deadline: Optional[JobDeadline] = None) -> None:
+    """Claim the job's idempotency record, then embed; redeliveries of finished jobs stop here."""
 
-def lambda_handler(event, context):
-    """Entry point for SQS-triggered media processing."""
+    user_id = job["user_id"]
+    idempotency_key = job_fingerprint(job)
+    claim = claim_idempotency_key(docs_table, user_id, idempotency_key, lease_seconds=JOB_LEASE_SECONDS)
+    if claim == "completed":
+        print(f"♻️  Job {idempotency_key} for doc={job.get('doc_id')} already processed; skipping")
+        return
+    if claim == "running":
+        raise JobAlreadyRunning(f"Job {idempotency_key} is being processed by another worker")
 
-    records: List[Dict[str, Any]] = event.get("Records", [])
-    print(f"🧵 Processing {len(records)} media tasks")
-    for record in records:
-        try:
-            job = json.loads(record.get("body") or "{}")
-        except json.JSONDecodeError:
-            print(f"⚠️ Invalid job payload: {record.get('body')}")
-            continue
-
-        try:
-            _process_job(job)
-        except Exception as exc:  # pragma: no cover - defensive logging
-            print(f"❌ Media processing failed for job {job}: {exc}")
-            _mark_document_failed(job, str(exc))
-
-
-def _process_job(job: Dict[str, Any]) -> None:
+    try:
+        vector_count = _embed_media(job, deadline or JobDeadline(None))
+    except Exception:
+        release_idempotency_key(docs_table, user_id, idempotency_key)
+        raise
+    # No doc_id here: rows in the USER# partition that carry one look like documents to careless queries.
+    complete_idempotency_key(docs_table, user_id, idempotency_key, vector_count=Decimal(vector_count))
+
+
+def _object_size(bucket: str, key: str) -> Optional[int]:
+    try:
+        return int(s3_client.head_object(Bucket=bucket, Key=key)["ContentLength"])
+    except (ClientError, KeyError, TypeError, ValueError) as error:
+        print(f"⚠️ Could not size s3://{bucket}/{key}: {error}")
+        return None
+
+
+def _embed_by_reference(job: Dict[str, Any]) -> bool:
+    """
+    Whether Nova reads the object from S3 itself rather than receiving its bytes.
+
+    By reference is the default, so long recordings are never downloaded into
+    the worker. Inline embedding (``by_reference`` false on the job or
+    ``NOVA_BY_REFERENCE=false``) downloads the whole object into memory and
+    sends it in one request, so it is only honoured for objects of at most
+    ``INLINE_MEDIA_MAX_BYTES``.
+    """
+
+    if bool(job.get("by_reference", NOVA_BY_REFERENCE)):
+        return True
+    size = _object_size(job["bucket"], job["key"])
+    if size is not None and size <= INLINE_MEDIA_MAX_BYTES:
+        return False
+    print(f"⚠️ {job['key']} is too large to embed inline ({size} bytes); embedding by reference")
+    return True
+
+
+def _embed_media(job: Dict[str, Any], deadline: JobDeadline) -> int:
     user_id = job["user_id"]
     doc_id = job["doc_id"]
     bucket = job["bucket"]
@@ -94,10 +135,22 @@ def _process_job(job: Dict[str, Any]) -> None:
     metadata = job.get("metadata") or {}
     segments = job.get("segments") or []
 
-    print(f"🎬 Embedding media for doc={doc_id} type={media_type}")
-
-    obj = s3_client.get_object(Bucket=bucket, Key=key)
-    payload = obj["Body"].read()
+    by_reference = _embed_by_reference(job)
+    duration = metadata.get("duration_seconds")
+
+    print(f"🎬 Embedding media for doc={doc_id} type={media_type} by_reference={by_reference}")
+
+    deadline.check("media planning", MIN_EMBED_SECONDS)
+    if media_type.startswith("image/") or not by_reference:
+        # Images cannot be split, and byte slices of audio/video are not decodable on their own,
+        # so anything sent inline is embedded whole in one request.
+        planned = plan_segments()
+    else:
+        planned = plan_segments(
+            segments=segments,
+            duration_seconds=float(duration) if duration else None,
+            window_seconds=DEFAULT_WINDOW_SECONDS if duration else None,
+        )
 
     request = NovaEmbeddingRequest(
         user_id=user_id,
@@ -106,47 +159,73 @@ def _process_job(job: Dict[str, Any]) -> None:
         s3_uri=f"s3://{bucket}/{key}",
         segments=segments,
         metadata=metadata,
-        payload=payload,
     )
 
-    response = nova_client.embed(request)
-
-    if not response.vectors:
+    vector_hashes: List[str] = []
+    completed_segments = 0
+    for segment, response in nova_client.embed_segments(
+        request,
+        planned,
+        s3_client=s3_client,
+        bucket=bucket,
+        key=key,
+        by_reference=by_reference,
+        max_workers=SEGMENT_CONCURRENCY,
+    ):
+        upserts = []
+        for position, vector in enumerate(response.vectors):
+            # Same document + segment always maps to the same id, so retries overwrite instead of duplicating.
+            digest = segment_hash(position, segment.describe())
+            vector_hashes.append(digest)
+            upserts.append(
+                {
+                    "id": chunk_vector_id(doc_id, digest),
+                    "values": vector,
+                    "metadata": {
+                        "doc_id": doc_id,
+                        "user_id": user_id,
+                        "media_type": media_type,
+                        "segment": segment.index,
+                        **({"start_seconds": segment.start_seconds, "end_seconds": segment.end_seconds}
+                           if segment.start_seconds is not None else {}),
+                        **(response.metadata or {}),
+                    },
+                }
+            )
+        # Upsert as each segment lands so vectors never pile up in memory.
+        media_index.upsert(upserts)
+        completed_segments += 1
+        if completed_segments < len(planned):
+            deadline.check("remaining segments", MIN_EMBED_SECONDS)
+
+    if not vector_hashes:
         raise RuntimeError("Nova returned no embeddings")
-
-    upserts = []
-    for idx, vector in enumerate(response.vectors):
-        vector_id = f"{doc_id}-{uuid4().hex[:8]}-{idx}"
-        vector_metadata = {
-            "doc_id": doc_id,
-            "user_id": user_id,
-            "media_type": media_type,
-            **(response.metadata or {}),
-        }
-        upserts.append(
-            {
-                "id": vector_id,
-                "values": vector,
-                "metadata": vector_metadata,
-            }
-        )
-
-    pinecone_upsert(upserts)
-    print(f"📌 Upserted {len(upserts)} embeddings for {doc_id}")
+    print(f"📌 Upserted {len(vector_hashes)} embeddings across {len(planned)} segments for {doc_id}")
+
+    doc_key = {"pk": f"USER#{user_id}", "sk": f"DOC#{doc_id}"}
+    previous = docs_table.get_item(Key=doc_key, ProjectionExpression="vector_hashes").get("Item") or {}
+    stale_ids = [
+        chunk_vector_id(doc_id, digest)
+        for digest in previous.get("vector_hashes") or []
+        if digest not in set(vector_hashes)
+    ]
+    if stale_ids:
+        media_index.delete_ids(stale_ids)
+        print(f"🧹 Deleted {len(stale_ids)} stale media vectors for {doc_id}")
 
     docs_table.update_item(
-        Key={"pk": f"USER#{user_id}", "sk": f"DOC#{doc_id}"},
+        Key=doc_key,
         UpdateExpression=(
-            "SET processing_status = :ready, embedding_count = if_not_exists(embedding_count, :zero) + :count, "
-            "updated_at = :ts"
+            "SET processing_status = :ready, embedding_count = :count, vector_hashes = :hashes, updated_at = :ts"
         ),
         ExpressionAttributeValues={
             ":ready": "ready",
-            ":zero": Decimal(0),
-            ":count": Decimal(len(upserts)),
+            ":count": Decimal(len(vector_hashes)),
+            ":hashes": vector_hashes,
             ":ts": datetime.now(tz=timezone.utc).isoformat(),
         },
     )
+    return len(vector_hashes)
 
 
 def _mark_document_failed(job: Dict[str, Any], message: str) -> None:
@@ -0,0 +1,390 @@
+"""
+MinHash/LSH detection of near-duplicate chunks.
+
+Contracts, reports and exported email threads repeat boilerplate, headers and
+signatures on every page. Exact repeats already collapse onto one chunk hash in
+``content_index.diff_chunks``, but a footer with a different page number or a
+signature with a different date did not, so every copy cost an embedding call
+and a vector and retrieval returned several copies of the same passage.
+
+Each chunk gets a one-permutation MinHash signature over its word shingles.
+Signatures are split into bands and hashed into LSH buckets, so candidates are found
+without comparing every chunk with every other; candidates are confirmed by the
+Jaccard similarity estimated from the full signatures.
+
+Within a document, near-duplicates collapse into the first occurrence, which
+keeps the offsets of every copy. Against the user's other documents, a match
+lets ingestion reuse the stored vector instead of paying for a new embedding.
+Signatures of indexed chunks are kept in the documents table (``SignatureStore``):
+one row per document plus one row per LSH bucket listing the documents with a
+chunk in it, so an ingest reads only the documents that share a bucket with it
+and concurrent ingests never overwrite each other's entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from botocore.exceptions import ClientError
+
+from content_index import chunk_vector_id
+from dynamo_batch import batch_get_items
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_WORDS = 3
+DEFAULT_THRESHOLD = 0.7
+SIGNATURE_SK_PREFIX = "SIGNATURES#"
+BUCKET_SK_PREFIX = "LSH#"
+SIGNATURE_SCHEMA = 2
+# 512 bytes per packed signature keeps a document's row well inside the 400 KB item limit.
+MAX_DOC_SIGNATURES = 500
+# Boilerplate buckets can list many documents; only the closest ones are loaded.
+MAX_CANDIDATE_DOCS = 50
+# Every stored bucket costs a write per ingest and a read per lookup, so the
+# persisted index uses half the in-memory bands (the same first 8 bands of 4
+# slots): pairs at Jaccard 0.7 still meet in a bucket ~89% of the time, at 0.8
+# ~98%, and candidates are confirmed on the full signatures in memory.
+STORE_BANDS = 8
+STORE_ROWS = NUM_PERM // BANDS
+DEFAULT_SIGNATURE_CONCURRENCY = 16
+
+_SLOT_BITS = (NUM_PERM - 1).bit_length()
+_EMPTY = (1 << 64) - 1
+_WORD_RE = re.compile(r"\w+")
+
+Signature = Tuple[int, ...]
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_WORDS) -> Set[int]:
+    """Stable 64-bit hashes of the lower-cased word ``size``-grams of ``text``."""
+
+    words = _WORD_RE.findall(text.lower())
+    grams = {" ".join(words[i : i + size]) for i in range(max(len(words) - size + 1, 1))} if words else set()
+    return {int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little") for gram in grams}
+
+
+def minhash_signature(text: str) -> Signature:
+    """
+    One-permutation MinHash signature of ``text``'s shingles.
+
+    Each shingle hash picks a slot with its low bits and competes for that
+    slot's minimum with the rest, so a signature costs one pass over the
+    shingles instead of one per slot. Empty slots borrow from the next filled
+    slot (offset by the distance) so that sparse texts still compare slot by
+    slot.
+    """
+
+    slots = [_EMPTY] * NUM_PERM
+    for value in shingle_hashes(text):
+        slot = value & (NUM_PERM - 1)
+        rest = value >> _SLOT_BITS
+        if rest < slots[slot]:
+            slots[slot] = rest
+    if all(value == _EMPTY for value in slots):
+        return tuple(slots)
+    signature = list(slots)
+    for slot in range(NUM_PERM):
+        distance = 1
+        while signature[slot] == _EMPTY:
+            borrowed = slots[(slot + distance) % NUM_PERM]
+            if borrowed != _EMPTY:
+                signature[slot] = borrowed + distance * (1 << 58)
+            distance += 1
+    return tuple(signature)
+
+
+def estimate_jaccard(first: Sequence[int], second: Sequence[int]) -> float:
+    """Fraction of matching signature slots, an unbiased estimate of shingle Jaccard similarity."""
+
+    if not first or len(first) != len(second):
+        return 0.0
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+def band_keys(signature: Sequence[int], bands: int = BANDS, rows: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    ``(band, bucket)`` pairs; two signatures sharing any pair are candidate duplicates.
+
+    ``rows`` slots go into each band (by default the signature split evenly),
+    so fewer, narrower bands cover only a prefix of the signature.
+    """
+
+    rows = rows or len(signature) // bands
+    keys = []
+    for band in range(bands):
+        # Stored in DynamoDB, so the bucket must not depend on the interpreter's ``hash``.
+        packed = array("Q", signature[band * rows : (band + 1) * rows]).tobytes()
+        keys.append((band, int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), "big")))
+    return keys
+
+
+class LshIndex:
+    """In-memory LSH index from chunk references to MinHash signatures."""
+
+    def __init__(self, bands: int = BANDS) -> None:
+        self.bands = bands
+        self.signatures: Dict[str, Signature] = {}
+        self._buckets: Dict[Tuple[int, int], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def add(self, ref: str, signature: Sequence[int]) -> None:
+        signature = tuple(signature)
+        if ref in self.signatures:
+            self.remove([ref])
+        self.signatures[ref] = signature
+        for key in band_keys(signature, self.bands):
+            self._buckets.setdefault(key, []).append(ref)
+
+    def remove(self, refs: Iterable[str]) -> None:
+        for ref in list(refs):
+            signature = self.signatures.pop(ref, None)
+            if signature is None:
+                continue
+            for key in band_keys(signature, self.bands):
+                bucket = self._buckets.get(key)
+                if bucket and ref in bucket:
+                    bucket.remove(ref)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def remove_prefix(self, prefix: str) -> None:
+        self.remove([ref for ref in self.signatures if ref.startswith(prefix)])
+
+    def query(self, signature: Sequence[int], threshold: float = DEFAULT_THRESHOLD,
+              exclude_prefix: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Return the most similar indexed ``(ref, similarity)`` at or above ``threshold``."""
+
+        best: Optional[Tuple[str, float]] = None
+        seen = set()
+        for key in band_keys(signature, self.bands):
+            for ref in self._buckets.get(key, ()):
+                if ref in seen or (exclude_prefix and ref.startswith(exclude_prefix)):
+                    continue
+                seen.add(ref)
+                similarity = estimate_jaccard(signature, self.signatures[ref])
+                if similarity >= threshold and (best is None or similarity > best[1]):
+                    best = (ref, similarity)
+        return best
+
+
+@dataclass
+class NearDuplicates:
+    """Outcome of near-duplicate detection over one document's chunks."""
+
+    signatures: List[Signature]
+    # Indexes of the chunks to embed; every other chunk maps to one of them.
+    kept: List[int] = field(default_factory=list)
+    # duplicate chunk index -> index of the kept chunk it collapses into
+    collapsed: Dict[int, int] = field(default_factory=dict)
+    # kept chunk index -> ``ref`` of the user's existing chunk it matches
+    existing: Dict[int, str] = field(default_factory=dict)
+
+
+def find_near_duplicates(chunks: Sequence[str], existing: Optional[LshIndex] = None, *,
+                         threshold: float = DEFAULT_THRESHOLD,
+                         exclude_prefix: Optional[str] = None) -> NearDuplicates:
+    """
+    Collapse near-duplicate chunks of one document and match the rest against ``existing``.
+
+    ``exclude_prefix`` hides the document's own entries (from a previous save)
+    from the ``existing`` lookup.
+    """
+
+    result = NearDuplicates(signatures=[minhash_signature(chunk) for chunk in chunks])
+    local = LshIndex()
+    for idx, signature in enumerate(result.signatures):
+        match = local.query(signature, threshold)
+        if match is not None:
+            result.collapsed[idx] = int(match[0])
+            continue
+        local.add(str(idx), signature)
+        result.kept.append(idx)
+    if existing is not None:
+        match_existing(result, existing, threshold=threshold, exclude_prefix=exclude_prefix)
+    return result
+
+
+def match_existing(result: NearDuplicates, existing: LshIndex, *, threshold: float = DEFAULT_THRESHOLD,
+                   exclude_prefix: Optional[str] = None) -> NearDuplicates:
+    """Fill ``result.existing`` for the kept chunks that match an entry of ``existing``."""
+
+    for idx in result.kept:
+        external = existing.query(result.signatures[idx], threshold, exclude_prefix=exclude_prefix)
+        if external is not None:
+            result.existing[idx] = external[0]
+    return result
+
+
+def signature_ref(doc_id: str, digest: str) -> str:
+    """Reference stored for an indexed chunk; it maps onto ``chunk_vector_id(doc_id, digest)``."""
+
+    return f"{doc_id}#{digest}"
+
+
+def ref_vector_id(ref: str) -> str:
+    """Vector id of the chunk a ``signature_ref`` points at."""
+
+    doc_id, _, digest = ref.rpartition("#")
+    return chunk_vector_id(doc_id, digest)
+
+
+def _pack(signature: Sequence[int]) -> bytes:
+    return array("Q", signature).tobytes()
+
+
+def _unpack(blob: Any) -> Signature:
+    signatures = array("Q")
+    signatures.frombytes(bytes(getattr(blob, "value", blob)))
+    return tuple(signatures)
+
+
+class SignatureStore:
+    """
+    Per-user MinHash signatures of indexed chunks in the documents table.
+
+    ``SIGNATURES#<doc_id>`` rows hold a document's packed signatures and
+    ``LSH#<band>#<bucket>`` rows the set of documents with a chunk in that
+    bucket. Bucket sets are changed with ``ADD``/``DELETE`` updates, which
+    DynamoDB applies atomically, so there is no shared object to overwrite.
+    Only buckets a save adds or drops are written, up to ``max_workers`` at a
+    time, and bucket rows are read in concurrent batches.
+    """
+
+    def __init__(self, table, *, max_doc_signatures: int = MAX_DOC_SIGNATURES,
+                 max_candidate_docs: int = MAX_CANDIDATE_DOCS,
+                 max_workers: int = DEFAULT_SIGNATURE_CONCURRENCY) -> None:
+        self.table = table
+        self.max_doc_signatures = max_doc_signatures
+        self.max_candidate_docs = max_candidate_docs
+        self.max_workers = max_workers
+
+    @staticmethod
+    def _doc_key(user_id: str, doc_id: str) -> Dict[str, str]:
+        return {"pk": f"USER#{user_id}", "sk": f"{SIGNATURE_SK_PREFIX}{doc_id}"}
+
+    @staticmethod
+    def _bucket_sk(band: int, bucket: int) -> str:
+        return f"{BUCKET_SK_PREFIX}{band}#{bucket:016x}"
+
+    def _buckets(self, signatures: Iterable[Sequence[int]]) -> Set[str]:
+        return {
+            self._bucket_sk(band, bucket)
+            for signature in signatures
+            for band, bucket in band_keys(signature, STORE_BANDS, rows=STORE_ROWS)
+        }
+
+    def _read_document(self, user_id: str, doc_id: str) -> Dict[str, Signature]:
+        response = self.table.get_item(Key=self._doc_key(user_id, doc_id))
+        item = response.get("Item") if isinstance(response, dict) else None
+        return self._signatures_of(item) if item else {}
+
+    @staticmethod
+    def _signatures_of(item: Mapping[str, Any]) -> Dict[str, Signature]:
+        if item.get("schema") != SIGNATURE_SCHEMA or item.get("num_perm") != NUM_PERM:
+            return {}
+        return {digest: _unpack(blob) for digest, blob in (item.get("signatures") or {}).items()}
+
+    def candidates(self, user_id: str, signatures: Iterable[Sequence[int]],
+                   exclude_doc_id: Optional[str] = None) -> LshIndex:
+        """
+        An ``LshIndex`` of the user's documents that share an LSH bucket with ``signatures``.
+
+        Only the ``max_candidate_docs`` documents sharing the most buckets are loaded.
+        """
+
+        shared: Dict[str, int] = {}
+        bucket_keys = [{"pk": f"USER#{user_id}", "sk": sk} for sk in sorted(self._buckets(signatures))]
+        for item in batch_get_items(self.table, bucket_keys, projection="doc_ids", max_workers=self.max_workers):
+            for doc_id in item.get("doc_ids") or ():
+                if doc_id != exclude_doc_id:
+                    shared[doc_id] = shared.get(doc_id, 0) + 1
+        closest = sorted(shared, key=lambda doc_id: (-shared[doc_id], doc_id))[: self.max_candidate_docs]
+
+        index = LshIndex()
+        doc_keys = [self._doc_key(user_id, doc_id) for doc_id in closest]
+        for item in batch_get_items(self.table, doc_keys):
+            doc_id = item["sk"][len(SIGNATURE_SK_PREFIX):]
+            for digest, signature in self._signatures_of(item).items():
+                index.add(signature_ref(doc_id, digest), signature)
+        return index
+
+    def replace_document(self, user_id: str, doc_id: str, signatures: Dict[str, Sequence[int]]) -> None:
+        """Swap the entries of ``doc_id`` for ``{chunk_digest: signature}`` (at most ``max_doc_signatures``)."""
+
+        kept = {digest: tuple(signature) for digest, signature in list(signatures.items())[: self.max_doc_signatures]}
+        stored = self._read_document(user_id, doc_id)
+        if kept == stored:
+            return  # an unchanged re-save writes nothing
+        previous = self._buckets(stored.values())
+        current = self._buckets(kept.values())
+
+        # Buckets first: a bucket naming a document without a signatures row is skipped by readers.
+        self._update_buckets(user_id, current - previous, "ADD", doc_id)
+        if kept:
+            self.table.put_item(Item={
+                **self._doc_key(user_id, doc_id),
+                "schema": SIGNATURE_SCHEMA,
+                "num_perm": NUM_PERM,
+                "signatures": {digest: _pack(signature) for digest, signature in kept.items()},
+            })
+        else:
+            self.table.delete_item(Key=self._doc_key(user_id, doc_id))
+        self._update_buckets(user_id, previous - current, "DELETE", doc_id)
+
+    def _update_buckets(self, user_id: str, sks: Set[str], action: str, doc_id: str) -> None:
+        ordered = sorted(sks)
+        if len(ordered) <= 1 or self.max_workers <= 1:
+            for sk in ordered:
+                self._update_bucket(user_id, sk, action, doc_id)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(ordered))) as executor:
+            # list() re-raises the first failed update.
+            list(executor.map(lambda sk: self._update_bucket(user_id, sk, action, doc_id), ordered))
+
+    def _update_bucket(self, user_id: str, sk: str, action: str, doc_id: str) -> None:
+        key = {"pk": f"USER#{user_id}", "sk": sk}
+        response = self.table.update_item(
+            Key=key,
+            UpdateExpression=f"{action} doc_ids :doc",
+            ExpressionAttributeValues={":doc": {doc_id}},
+            ReturnValues="UPDATED_NEW",
+        )
+        if action == "DELETE" and not (response.get("Attributes") or {}).get("doc_ids"):
+            # DynamoDB drops an emptied set; drop the bucket row with it unless a writer just refilled it.
+            try:
+                self.table.delete_item(Key=key, ConditionExpression="attribute_not_exists(doc_ids)")
+            except ClientError as error:
+                if error.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                    raise
+
+    def remove_document(self, user_id: str, doc_id: str) -> None:
+        self.replace_document(user_id, doc_id, {})
+
+
+__all__ = [
+    "BANDS",
+    "DEFAULT_THRESHOLD",
+    "LshIndex",
+    "MAX_CANDIDATE_DOCS",
+    "MAX_DOC_SIGNATURES",
+    "NUM_PERM",
+    "NearDuplicates",
+    "STORE_BANDS",
+    "SignatureStore",
+    "band_keys",
+    "estimate_jaccard",
+    "find_near_duplicates",
+    "match_existing",
+    "minhash_signature",
+    "ref_vector_id",
+    "shingle_hashes",
+    "signature_ref",
+]
@@ -0,0 +1,288 @@
+"""
+Per-page cache of text extracted from PDFs.
+
+Retries, re-indexing jobs and the same file uploaded by several users all used
+to run every page through PyPDF2 again. Extracted page text is now cached per
+``(sha256 of the file, page index, extractor version)``: one compressed JSON
+document per file holds the text of every page extracted so far and, once a
+full pass has been made, the page count. Documents live in S3 under a prefix
+that includes the extractor version, so upgrading the extractor simply starts a
+new cache, and are mirrored to a local directory under ``/tmp`` so a warm
+Lambda container does not even need the GET. The local tier is capped at
+``LOCAL_CACHE_MAX_BYTES``; the least recently used files are evicted first.
+
+A partial extraction (a preview of the first pages, a character budget) caches
+the pages it did extract; later requests only decode the pages still missing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+from botocore.exceptions import ClientError
+
+from content_store import compress, decompress, default_encoding
+
+# Bump whenever a change to the vendored PyPDF2 can change extracted text.
+EXTRACTOR_VERSION = "pypdf2-3.0.1-scan1"
+CACHE_PREFIX = "pdf-text"
+LOCAL_CACHE_DIR = os.path.join(tempfile.gettempdir(), "pdf-text")
+# Lambda's /tmp defaults to 512 MB and is shared with every other spill.
+LOCAL_CACHE_MAX_BYTES = 128 * 1024 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+PdfSource = Union[bytes, bytearray, str, BinaryIO]
+
+
+def _encoding_of(body: bytes) -> str:
+    return "gzip" if body[:2] == _GZIP_MAGIC else "zstd"
+
+
+def _is_missing(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("NoSuchKey", "404", "NotFound")
+
+
+class PdfTextCache:
+    """Reads and writes cached page text in S3 (optional) and a local directory."""
+
+    def __init__(self, s3_client=None, bucket: Optional[str] = None, *, prefix: str = CACHE_PREFIX,
+                 local_dir: Optional[str] = LOCAL_CACHE_DIR, local_max_bytes: int = LOCAL_CACHE_MAX_BYTES,
+                 extractor_version: str = EXTRACTOR_VERSION) -> None:
+        self._s3 = s3_client if bucket else None
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.local_dir = local_dir
+        self.local_max_bytes = local_max_bytes
+        self.extractor_version = extractor_version
+
+    def object_key(self, digest: str) -> str:
+        return f"{self.prefix}/{self.extractor_version}/{digest[:2]}/{digest}.json"
+
+    def _local_path(self, digest: str) -> Optional[str]:
+        if not self.local_dir:
+            return None
+        return os.path.join(self.local_dir, self.extractor_version, f"{digest}.json")
+
+    def _decode(self, body: bytes, digest: str) -> Optional[Dict[str, Any]]:
+        entry = json.loads(decompress(body, _encoding_of(body)).decode("utf-8"))
+        if entry.get("sha256") != digest or entry.get("version") != self.extractor_version:
+            return None
+        return entry
+
+    def _read_local(self, digest: str) -> Optional[bytes]:
+        path = self._local_path(digest)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as handle:
+                body = handle.read()
+            os.utime(path)  # the modification time orders LRU eviction
+            return body
+        except OSError:
+            return None
+
+    def _write_local(self, digest: str, body: bytes) -> None:
+        path = self._local_path(digest)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file.
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(body)
+            os.replace(tmp_path, path)
+        except OSError as error:
+            print(f"⚠️ PDF text cache local write failed: {error}")
+            return
+        self._evict_local()
+
+    def _evict_local(self) -> None:
+        """Delete least recently used files (any extractor version) until the tier fits its cap."""
+
+        files = []
+        for root, _, names in os.walk(self.local_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.local_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def load(self, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        Return ``{"pages": {index: text}, "page_count": int | None}`` for ``digest``.
+
+        The local tier is checked first; an S3 hit is copied to it.
+        """
+
+        body = self._read_local(digest)
+        from_s3 = False
+        if body is None and self._s3 is not None:
+            try:
+                body = self._s3.get_object(Bucket=self.bucket, Key=self.object_key(digest))["Body"].read()
+                from_s3 = True
+            except ClientError as error:
+                if not _is_missing(error):
+                    print(f"⚠️ PDF text cache read failed: {error}")
+                return None
+        if body is None:
+            return None
+
+        try:
+            entry = self._decode(body, digest)
+        except Exception as error:  # corrupt body, or zstd written where zstandard is missing
+            print(f"⚠️ Ignoring unreadable PDF text cache entry {digest}: {error}")
+            return None
+        if entry is None:
+            return None
+        if from_s3:
+            self._write_local(digest, body)
+        return {
+            "pages": {int(index): text for index, text in (entry.get("pages") or {}).items()},
+            "page_count": entry.get("page_count"),
+        }
+
+    def store(self, digest: str, pages: Dict[int, str], page_count: Optional[int] = None) -> None:
+        """Write the complete set of known ``pages`` for ``digest`` to both tiers."""
+
+        entry = {
+            "version": self.extractor_version,
+            "sha256": digest,
+            "page_count": page_count,
+            "pages": {str(index): text for index, text in sorted(pages.items())},
+        }
+        encoding = default_encoding()
+        body = compress(json.dumps(entry, ensure_ascii=False).encode("utf-8"), encoding)
+        self._write_local(digest, body)
+        if self._s3 is None:
+            return
+        try:
+            self._s3.put_object(
+                Bucket=self.bucket,
+                Key=self.object_key(digest),
+                Body=body,
+                ContentType="application/json",
+                Metadata={"content-encoding-frames": encoding},
+            )
+        except ClientError as error:
+            print(f"⚠️ PDF text cache write failed: {error}")
+
+
+def _pdf_file(source: PdfSource) -> Union[bytes, BinaryIO]:
+    if isinstance(source, str):
+        return source.encode("latin-1")
+    if isinstance(source, bytearray):
+        return bytes(source)
+    return source
+
+
+def sha256_of(pdf_file: Union[bytes, BinaryIO]) -> str:
+    """SHA-256 of raw PDF bytes or of a seekable file, which is rewound afterwards."""
+
+    if isinstance(pdf_file, bytes):
+        return hashlib.sha256(pdf_file).hexdigest()
+    digest = hashlib.sha256()
+    start = pdf_file.tell()
+    for chunk in iter(lambda: pdf_file.read(HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    pdf_file.seek(start)
+    return digest.hexdigest()
+
+
+def extract_text(source: PdfSource, *, cache: Optional[PdfTextCache] = None, digest: Optional[str] = None,
+                 max_pages: Optional[int] = None, max_chars: Optional[int] = None, separator: str = "\n") -> str:
+    """
+    Extract text from the first ``max_pages`` pages of a PDF, using ``cache`` for known pages.
+
+    ``source`` may be raw bytes, a latin-1 string or a seekable binary file.
+    Budget semantics match ``PdfReader.extract_text_range``: extraction stops
+    once ``max_chars`` characters have been produced and the result is
+    truncated to ``max_chars``. The PDF is only parsed when a requested page is
+    not cached. ``digest`` skips hashing when the caller already has it.
+    """
+
+    pdf_file = _pdf_file(source)
+    entry = None
+    if cache is not None:
+        digest = digest or sha256_of(pdf_file)
+        entry = cache.load(digest)
+    pages: Dict[int, str] = dict(entry["pages"]) if entry else {}
+    known_count = entry["page_count"] if entry else None
+    page_count = known_count
+
+    stop = max_pages
+    if page_count is not None:
+        stop = page_count if stop is None else min(stop, page_count)
+
+    parts = []
+    length = 0
+    index = 0
+    extracted = False
+    pages_iter = None
+
+    def _page_text(position: int) -> Optional[str]:
+        nonlocal pages_iter, extracted
+        if position in pages and pages_iter is None:
+            return pages[position]
+        if pages_iter is None:
+            from PyPDF2 import PdfReader
+
+            reader = PdfReader(pdf_file if hasattr(pdf_file, "read") else io.BytesIO(pdf_file))
+            pages_iter = reader.iter_pages(position, stop)
+        page = next(pages_iter, None)
+        if page is None:
+            return None
+        if position not in pages:
+            pages[position] = page.extract_text()
+            extracted = True
+        return pages[position]
+
+    while stop is None or index < stop:
+        page_text = _page_text(index)
+        if page_text is None:
+            # The page tree ended before ``stop``: the page count is now known.
+            page_count = index
+            break
+        if parts:
+            parts.append(separator)
+            length += len(separator)
+        parts.append(page_text)
+        length += len(page_text)
+        index += 1
+        if max_chars is not None and length >= max_chars:
+            break
+
+    if cache is not None and (extracted or page_count != known_count):
+        cache.store(digest, pages, page_count)
+
+    text = "".join(parts)
+    return text if max_chars is None else text[:max_chars]
+
+
+__all__ = [
+    "CACHE_PREFIX",
+    "EXTRACTOR_VERSION",
+    "LOCAL_CACHE_DIR",
+    "LOCAL_CACHE_MAX_BYTES",
+    "PdfTextCache",
+    "extract_text",
+    "sha256_of",
+]
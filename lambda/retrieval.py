@@ -0,0 +1,97 @@
+"""
+Query-time fan-out across embedding spaces.
+
+Text chunks (OpenAI ``text-embedding-3-small``) and media segments (Nova) live
+in different vector spaces, so each is stored in its own index or namespace and
+searched with a query embedded by the matching backend. Routes are searched in
+parallel and merged on raw similarity. Raw cosine scores from different models
+sit in different ranges, so each route has a ``min_score`` below which its
+matches are noise, and a match ranks by how far above that floor it is.
+Rescaling each route to its own best hit would make a route's weak lone match
+tie the best match of every other route.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from embeddings import EmbeddingBackend
+from vector_store import PineconeIndex
+
+
+@dataclass(frozen=True)
+class Route:
+    """One searchable vector space: the backend that embeds queries for it and where it is stored."""
+
+    name: str
+    backend: EmbeddingBackend
+    index: PineconeIndex
+    weight: float = 1.0
+    # Raw similarity at or below which this model's matches are unrelated to the query.
+    min_score: float = 0.0
+
+
+def calibrate_score(score: float, min_score: float) -> float:
+    """Position of a raw cosine ``score`` between the route's floor (0.0) and a perfect match (1.0)."""
+
+    if min_score >= 1.0:
+        return 0.0
+    return max(0.0, (score - min_score) / (1.0 - min_score))
+
+
+def merge_route_results(results: Dict[str, List[Dict[str, Any]]], routes: Sequence[Route],
+                        top_k: int) -> List[Dict[str, Any]]:
+    """Merge per-route matches by calibrated, weighted score, dropping matches at or below a route's floor."""
+
+    by_name = {route.name: route for route in routes}
+    merged: Dict[str, Dict[str, Any]] = {}
+    for route_name, matches in results.items():
+        route = by_name.get(route_name)
+        min_score = route.min_score if route else 0.0
+        weight = route.weight if route else 1.0
+        for match in matches:
+            raw = float(match.get("score") or 0.0)
+            if raw <= min_score:
+                continue
+            scored = {
+                **match,
+                "route": route_name,
+                "raw_score": match.get("score"),
+                "score": calibrate_score(raw, min_score) * weight,
+            }
+            existing = merged.get(match.get("id"))
+            if existing is None or scored["score"] > existing["score"]:
+                merged[match.get("id")] = scored
+    ranked = sorted(merged.values(), key=lambda match: (match["score"], match.get("raw_score") or 0.0), reverse=True)
+    return ranked[:top_k]
+
+
+def fan_out_query(query: str, routes: Sequence[Route], *, top_k: int = 5,
+                  metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Embed ``query`` for every route and search them concurrently.
+
+    A failing route is logged and skipped so one unavailable modality never
+    blocks the others.
+    """
+
+    def _search(route: Route) -> List[Dict[str, Any]]:
+        vector = route.backend.embed_query(query)
+        return route.index.query(vector, top_k=top_k, metadata_filter=metadata_filter)
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    if not routes:
+        return []
+    with ThreadPoolExecutor(max_workers=len(routes)) as executor:
+        futures = {route.name: executor.submit(_search, route) for route in routes}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as route_error:  # noqa: BLE001
+                print(f"⚠️ Retrieval route {name} failed: {route_error}")
+    return merge_route_results(results, routes, top_k)
+
+
+__all__ = ["Route", "calibrate_score", "fan_out_query", "merge_route_results"]
@@ -3,7 +3,7 @@ import urllib3
 import os
 import boto3
 import base64
-import io
+import mimetypes
 from datetime import datetime, timedelta
 from decimal import Decimal
 from jose import jwt, JWTError
@@ -13,6 +13,19 @@ except:
     PyPDF2 = None
 
 from config import get_settings, make_cors_headers
+from content_index import document_content_hash
+from content_store import ContentStore, content_attributes, load_content, parse_content_range
+from direct_upload import (
+    DEFAULT_PART_SIZE,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    parse_file_size,
+    start_multipart_upload,
+)
+from document_deletion import list_documents, start_deletion_job
+from graph_snapshot import GraphSnapshotStore
+from pdf_text_cache import PdfTextCache, extract_text as cached_pdf_text
+from vector_store import IndexGroup, PineconeIndex
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -27,7 +40,16 @@ DOC_TABLE = settings.doc_table
 dynamodb = boto3.resource('dynamodb')
 secretsmanager = boto3.client('secretsmanager')
 s3 = boto3.client('s3')
+sqs = boto3.client('sqs')
 ses = boto3.client('ses', region_name='us-east-1')
+vector_indexes = IndexGroup([
+    PineconeIndex(settings.pinecone_index_host, settings.pinecone_api_key),
+    PineconeIndex(settings.media_index_host, settings.pinecone_api_key, namespace=settings.media_namespace),
+])
+content_store = ContentStore(s3, settings.content_bucket) if settings.content_bucket else None
+pdf_text_cache = PdfTextCache(s3, settings.content_bucket)
+INLINE_CONTENT_LIMIT = 120000
+UPLOAD_BUCKET = 'documentgpt-website-prod'
 
 OPENAI_API_KEY_SECRET_NAME = os.environ.get('OPENAI_API_KEY_SECRET_NAME')
 if OPENAI_API_KEY_SECRET_NAME:
@@ -268,8 +290,7 @@ def lambda_handler(event, context):
                     obj = s3.get_object(Bucket='documentgpt-website-prod', Key=s3_key)
                     pdf_bytes = obj['Body'].read()
                     if PyPDF2:
-                        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
-                        content = ''.join([page.extract_text() for page in pdf_reader.pages])
+                        content = cached_pdf_text(pdf_bytes, cache=pdf_text_cache, separator='')
                     else:
                         content = pdf_bytes.decode('utf-8', errors='ignore')
                 except Exception as e:
@@ -415,24 +436,59 @@ def lambda_handler(event, context):
         elif path == '/documents' and method == 'GET':
             # user_id comes from verified token
             docs_table = dynamodb.Table(DOC_TABLE)
-            response = docs_table.query(
-                KeyConditionExpression='pk = :pk',
-                ExpressionAttributeValues={':pk': f'USER#{user_id}'}
-            )
+            # Full text for S3-backed documents is only fetched when the client asks for it.
+            include = (event.get('queryStringParameters') or {}).get('include') or ''
+            include_content = 'content' in include.split(',')
             documents = [{
                 'doc_id': item.get('doc_id'),
                 'filename': item.get('filename'),
                 'created_at': item.get('created_at'),
                 'updated_at': item.get('updated_at'),
-                'content': item.get('content', ''),
+                'content': load_content(content_store, item) if include_content or 'content' in item else '',
+                'content_preview': item.get('content_preview') or item.get('content', '')[:2000],
+                'content_size': item.get('content_size', len(item.get('content', ''))),
                 'isPdf': item.get('isPdf', False),
                 'chat_history': item.get('chat_history', [])
-            } for item in response.get('Items', [])]
+            } for item in list_documents(docs_table, user_id)]
             documents.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
             return {
                 'statusCode': 200,
                 'headers': headers,
-                'body': json.dumps({'documents': documents})
+                'body': json.dumps({'documents': documents}, cls=DecimalEncoder)
+            }
+        
+        elif path.startswith('/documents/') and method == 'GET':
+            # Full text of one document, fetched when it is opened rather than with the list.
+            doc_id = path.rstrip('/').split('/')[-1]
+            query_params = event.get('queryStringParameters') or {}
+            try:
+                offset, length = parse_content_range(query_params.get('offset'), query_params.get('length'))
+            except ValueError as err:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': str(err)})
+                }
+            docs_table = dynamodb.Table(DOC_TABLE)
+            item = docs_table.get_item(Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'}).get('Item')
+            if not item or item.get('processing_status') == 'deleting':
+                return {
+                    'statusCode': 404,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Document not found'})
+                }
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({
+                    'doc_id': item.get('doc_id') or doc_id,
+                    'filename': item.get('filename'),
+                    'created_at': item.get('created_at'),
+                    'updated_at': item.get('updated_at'),
+                    'content': load_content(content_store, item, offset=offset, length=length),
+                    'content_size': item.get('content_size', len(item.get('content', ''))),
+                    'isPdf': item.get('isPdf', False),
+                }, cls=DecimalEncoder)
             }
         
         elif path == '/documents' and method == 'POST':
@@ -452,56 +508,160 @@ def lambda_handler(event, context):
                 }
             
             docs_table = dynamodb.Table(DOC_TABLE)
-            docs_table.put_item(
-                Item={
-                    'pk': f'USER#{user_id}',
-                    'sk': f'DOC#{doc_id}',
-                    'doc_id': doc_id,
-                    'filename': name,
-                    'content': content[:120000],
-                    'isPdf': isPdf,
-                    'chat_history': chat_history[:50],
-                    'created_at': datetime.now().isoformat(),
-                    'updated_at': datetime.now().isoformat()
-                }
-            )
+            key = {'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'}
+            content_hash = document_content_hash(content)
+            now_iso = datetime.now().isoformat()
+            existing = docs_table.get_item(
+                Key=key,
+                ProjectionExpression='content_hash, created_at, filename'
+            ).get('Item')
+
+            content_changed = not existing or existing.get('content_hash') != content_hash
+            if not content_changed:
+                # Editor autosaves often only touch the chat history; skip rewriting the body.
+                docs_table.update_item(
+                    Key=key,
+                    UpdateExpression='SET filename = :name, isPdf = :isPdf, chat_history = :history, updated_at = :ts',
+                    ExpressionAttributeValues={
+                        ':name': name,
+                        ':isPdf': isPdf,
+                        ':history': chat_history[:50],
+                        ':ts': now_iso
+                    }
+                )
+            else:
+                docs_table.put_item(
+                    Item={
+                        **key,
+                        'doc_id': doc_id,
+                        'filename': name,
+                        **content_attributes(content_store, user_id, doc_id, content,
+                                             inline_limit=INLINE_CONTENT_LIMIT),
+                        'content_hash': content_hash,
+                        'isPdf': isPdf,
+                        'chat_history': chat_history[:50],
+                        'created_at': (existing or {}).get('created_at') or now_iso,
+                        'updated_at': now_iso
+                    }
+                )
+
+            if existing and name and existing.get('filename') != name:
+                # The knowledge graph labels documents from its snapshot; keep the title current.
+                try:
+                    GraphSnapshotStore(docs_table, s3=s3, bucket=settings.content_bucket).rename_document(
+                        user_id, doc_id, name)
+                except Exception as graph_error:
+                    print(f"⚠️ Failed to rename {doc_id} in the knowledge graph: {graph_error}")
+
             return {
                 'statusCode': 200,
                 'headers': headers,
-                'body': json.dumps({'message': 'Document saved', 'doc_id': doc_id})
+                'body': json.dumps({'message': 'Document saved', 'doc_id': doc_id, 'content_changed': content_changed})
             }
         
         elif path.startswith('/documents/') and method == 'DELETE':
             doc_id = path.split('/')[-1]
             # user_id comes from verified token
             docs_table = dynamodb.Table(DOC_TABLE)
-            docs_table.delete_item(Key={'pk': f'USER#{user_id}', 'sk': f'DOC#{doc_id}'})
+            # Vectors, entity edges and aggregates are cleaned up by the deletion job.
+            job = start_deletion_job(
+                docs_table,
+                vector_indexes,
+                user_id,
+                doc_id,
+                sqs_client=sqs,
+                queue_url=settings.jobs_queue_url,
+                content_store=content_store,
+                graph_store=GraphSnapshotStore(docs_table, s3=s3, bucket=settings.content_bucket),
+            )
+            if not job:
+                return {
+                    'statusCode': 404,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Document not found'})
+                }
             return {
-                'statusCode': 200,
+                'statusCode': 202 if job.get('status') == 'queued' else 200,
                 'headers': headers,
-                'body': json.dumps({'message': 'Document deleted'})
+                'body': json.dumps({
+                    'message': 'Document deletion started' if job.get('status') == 'queued' else 'Document deleted',
+                    'job_id': job.get('job_id'),
+                    'status': job.get('status')
+                })
             }
         
         elif path == '/upload-url' and method == 'POST':
             body = json.loads(event['body'])
             # user_id comes from verified token
             filename = body.get('filename')
-            
-            # Generate presigned URL for S3 upload
+            try:
+                file_size = parse_file_size(body.get('size'))
+            except ValueError as err:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': str(err)})
+                }
+            if not isinstance(filename, str) or not filename or '/' in filename:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'A filename without slashes is required'})
+                }
+            content_type = body.get('content_type') or mimetypes.guess_type(filename)[0] or 'application/pdf'
             key = f"uploads/{user_id}/{filename}"
+
+            if file_size > DEFAULT_PART_SIZE:
+                # Large files go straight to S3 in parts instead of a single PUT.
+                plan = start_multipart_upload(
+                    s3, UPLOAD_BUCKET, key, content_type=content_type, file_size=file_size, expires_in=900
+                )
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': json.dumps({'s3_key': key, 'multipart': True, **plan})
+                }
+
+            # Generate presigned URL for S3 upload
             url = s3.generate_presigned_url(
                 'put_object',
                 Params={
-                    'Bucket': 'documentgpt-website-prod',
+                    'Bucket': UPLOAD_BUCKET,
                     'Key': key,
-                    'ContentType': 'application/pdf'
+                    'ContentType': content_type
                 },
                 ExpiresIn=300
             )
             return {
                 'statusCode': 200,
                 'headers': headers,
-                'body': json.dumps({'upload_url': url, 's3_key': key})
+                'body': json.dumps({'upload_url': url, 's3_key': key, 'multipart': False})
+            }
+
+        elif path == '/upload-url/complete' and method == 'POST':
+            body = json.loads(event['body'])
+            key = body.get('s3_key') or ''
+            if not key.startswith(f"uploads/{user_id}/") or not body.get('upload_id'):
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Invalid upload'})
+                }
+            if body.get('abort'):
+                abort_multipart_upload(s3, UPLOAD_BUCKET, key, body['upload_id'])
+            else:
+                try:
+                    complete_multipart_upload(s3, UPLOAD_BUCKET, key, body['upload_id'], body.get('parts') or [])
+                except (KeyError, TypeError, ValueError) as parts_error:
+                    return {
+                        'statusCode': 400,
+                        'headers': headers,
+                        'body': json.dumps({'error': f'Invalid parts: {parts_error}'})
+                    }
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({'s3_key': key, 'status': 'aborted' if body.get('abort') else 'completed'})
             }
         
         else:
@@ -1077,7 +1237,7 @@ def save_document(user_id, filename, content):
             'sk': f"DOC#{doc_id}",
             'doc_id': doc_id,
             'filename': filename,
-            'content': content[:120000],  # Limit to ~20K words
+            **content_attributes(content_store, user_id, doc_id, content, inline_limit=INLINE_CONTENT_LIMIT),
             'created_at': datetime.now().isoformat()
         }
     )
@@ -0,0 +1,111 @@
+"""
+Bounded concurrent processing for SQS-triggered Lambda batches.
+
+Each record runs on a small thread pool with a deadline derived from the
+remaining Lambda time, and the result is an SQS partial batch response so only
+the messages that failed (or ran out of time) are redelivered.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_SAFETY_MARGIN_MS = 10_000
+DEFAULT_MAX_WORKERS = 4
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised by a job that will not finish before the invocation times out."""
+
+
+class JobDeadline:
+    """Monotonic deadline shared by every job in one invocation."""
+
+    def __init__(self, expires_at: Optional[float]) -> None:
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_context(cls, context, safety_margin_ms: int = DEFAULT_SAFETY_MARGIN_MS) -> "JobDeadline":
+        get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+        if get_remaining is None:
+            return cls(None)
+        budget_ms = max(0, get_remaining() - safety_margin_ms)
+        return cls(time.monotonic() + budget_ms / 1000.0)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or ``None`` when there is no deadline (local runs, tests)."""
+
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, stage: str, minimum_seconds: float = 0.0) -> None:
+        """Raise ``DeadlineExceeded`` if fewer than ``minimum_seconds`` remain before ``stage``."""
+
+        remaining = self.remaining()
+        if remaining is not None and remaining <= minimum_seconds:
+            raise DeadlineExceeded(f"Not enough time left for {stage} ({remaining:.1f}s)")
+
+
+JobHandler = Callable[[Dict[str, Any], JobDeadline], None]
+FailureHook = Callable[[Dict[str, Any], Exception], None]
+
+
+def process_batch(records: List[Dict[str, Any]], handler: JobHandler, *, context=None,
+                  max_workers: int = DEFAULT_MAX_WORKERS,
+                  safety_margin_ms: int = DEFAULT_SAFETY_MARGIN_MS,
+                  on_failure: Optional[FailureHook] = None) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Run ``handler(job, deadline)`` for every SQS record and build ``batchItemFailures``.
+
+    Undecodable bodies are logged and dropped (retrying cannot fix them). Jobs that
+    raise, or have not finished when the deadline passes, are reported as failures;
+    ``on_failure`` is only called for jobs that raised.
+    """
+
+    deadline = JobDeadline.from_context(context, safety_margin_ms)
+    failures: List[Dict[str, str]] = []
+    pending: Dict[Future, Dict[str, Any]] = {}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(records) or 1)))
+    try:
+        for record in records:
+            try:
+                job = json.loads(record.get("body") or "{}")
+            except json.JSONDecodeError:
+                print(f"⚠️ Invalid job payload: {record.get('body')}")
+                continue
+            pending[executor.submit(handler, job, deadline)] = {"record": record, "job": job}
+
+        while pending:
+            done, _ = wait(list(pending), timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                entry = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    continue
+                print(f"❌ Job for message {entry['record'].get('messageId')} failed: {error}")
+                failures.append({"itemIdentifier": entry["record"].get("messageId")})
+                if on_failure is not None:
+                    try:
+                        on_failure(entry["job"], error)
+                    except Exception as hook_error:  # pragma: no cover - defensive logging
+                        print(f"⚠️ Failure hook raised: {hook_error}")
+
+        for future, entry in pending.items():
+            # Out of time: let SQS redeliver instead of being killed mid-job.
+            future.cancel()
+            print(f"⏱️ Job for message {entry['record'].get('messageId')} did not finish before the deadline")
+            failures.append({"itemIdentifier": entry["record"].get("messageId")})
+    finally:
+        executor.shutdown(wait=False)
+
+    return {"batchItemFailures": failures}
+
+
+__all__ = ["DeadlineExceeded", "JobDeadline", "process_batch"]
@@ -0,0 +1,145 @@
+"""
+Neighbourhood queries over the knowledge-graph adjacency index.
+
+Starting from a focal document or entity the graph is expanded breadth-first,
+keeping the ``limit`` strongest neighbours of each expanded node (documents by
+edge score, entities by salience). Each ring is fetched with one batched read of
+its nodes' adjacency rows (plus one for the outermost ring, whose rows carry the
+labels), so a query touches only its neighbourhood regardless of library size.
+The focal node's neighbour lists are paged with an opaque cursor.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+MAX_DEPTH = 3
+MAX_LIMIT = 50
+MAX_NODES = 500
+
+NodeKey = Tuple[str, str]
+AdjacencyLookup = Callable[[Sequence[NodeKey]], Mapping[NodeKey, Dict[str, Any]]]
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return max(0, int(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["offset"]))
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor") from None
+
+
+def _label(kind: str, entry: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    entry = entry or {}
+    if kind == "ENTITY":
+        return {"kind": "entity", "name": entry.get("name"), "type": entry.get("type")}
+    return {"kind": "doc", "title": entry.get("title")}
+
+
+def _neighbours(kind: str, entry: Dict[str, Any]) -> List[Tuple[NodeKey, Dict[str, Any]]]:
+    """``((kind, id), edge)`` pairs for an adjacency entry, strongest first within each kind."""
+
+    if kind == "ENTITY":
+        return [
+            (("DOC", doc_id), {"kind": "mentions", "salience": salience})
+            for doc_id, salience, *_ in entry.get("docs") or []
+        ]
+    docs = [
+        (("DOC", other), {"kind": "related", "weight": weight, "score": score})
+        for other, weight, score, *_ in entry.get("docs") or []
+    ]
+    entities = [
+        (("ENTITY", entity_id), {"kind": "mentions", "salience": salience})
+        for entity_id, salience, *_ in entry.get("entities") or []
+    ]
+    return docs + entities
+
+
+def _page(kind: str, entry: Dict[str, Any], offset: int, limit: int):
+    """Take ``limit`` neighbours of each kind starting at ``offset``; returns ``(pairs, has_more)``."""
+
+    if kind == "ENTITY":
+        groups = [_neighbours(kind, entry)]
+    else:
+        pairs = _neighbours(kind, entry)
+        groups = [[p for p in pairs if p[0][0] == "DOC"], [p for p in pairs if p[0][0] == "ENTITY"]]
+    selected = [pair for group in groups for pair in group[offset : offset + limit]]
+    has_more = any(len(group) > offset + limit for group in groups)
+    return selected, has_more
+
+
+def neighborhood(lookup: AdjacencyLookup, focal_kind: str, focal_id: str, *, depth: int = 1, limit: int = 10,
+                 cursor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Expand ``depth`` rings around ``(focal_kind, focal_id)``.
+
+    ``lookup(nodes)`` returns the adjacency entries of a batch of ``(kind, id)``
+    nodes, omitting nodes that are not indexed.
+
+    ``focal_kind`` is ``"DOC"`` or ``"ENTITY"``. Returns ``None`` when the focal
+    node is not in the index. ``next_cursor`` pages through the focal node's own
+    neighbours; outer rings are always the top ``limit`` of each expanded node.
+    """
+
+    depth = max(1, min(depth, MAX_DEPTH))
+    limit = max(1, min(limit, MAX_LIMIT))
+    offset = decode_cursor(cursor)
+
+    focal_key = (focal_kind, focal_id)
+    focal_entry = lookup([focal_key]).get(focal_key)
+    if focal_entry is None:
+        return None
+
+    focal_node = _label(focal_kind, focal_entry)
+    nodes: Dict[NodeKey, Dict[str, Any]] = {focal_key: {**focal_node, "id": focal_id, "depth": 0}}
+    edges: Dict[Tuple[NodeKey, NodeKey], Dict[str, Any]] = {}
+
+    entries = {focal_key: focal_entry}
+    frontier = [focal_key]
+    next_cursor = None
+    for ring in range(1, depth + 1):
+        upcoming = []
+        for node_key in frontier:
+            entry = entries.get(node_key)
+            if entry is None:
+                continue
+            if node_key == focal_key:
+                pairs, has_more = _page(focal_kind, entry, offset, limit)
+                next_cursor = encode_cursor(offset + limit) if has_more else None
+            else:
+                pairs, _ = _page(node_key[0], entry, 0, limit)
+            for neighbour_key, edge in pairs:
+                edge_key = tuple(sorted((node_key, neighbour_key)))
+                if edge_key not in edges:
+                    source, target = (node_key, neighbour_key) if node_key[0] <= neighbour_key[0] else (
+                        neighbour_key, node_key)
+                    edges[edge_key] = {"source": source[1], "target": target[1], **edge}
+                if neighbour_key not in nodes:
+                    if len(nodes) >= MAX_NODES:
+                        continue
+                    nodes[neighbour_key] = {"id": neighbour_key[1], "depth": ring}
+                    upcoming.append(neighbour_key)
+        # The new ring's rows label its nodes and, below ``depth``, are expanded next.
+        entries = dict(lookup(upcoming)) if upcoming else {}
+        for node_key in upcoming:
+            nodes[node_key] = {**_label(node_key[0], entries.get(node_key)), **nodes[node_key]}
+        frontier = upcoming
+
+    edges = {key: edge for key, edge in edges.items() if key[0] in nodes and key[1] in nodes}
+    return {
+        "focal": {"kind": focal_node["kind"], "id": focal_id},
+        "depth": depth,
+        "nodes": list(nodes.values()),
+        "edges": list(edges.values()),
+        "next_cursor": next_cursor,
+    }
+
+
+__all__ = ["MAX_DEPTH", "MAX_LIMIT", "MAX_NODES", "decode_cursor", "encode_cursor", "neighborhood"]
@@ -0,0 +1,289 @@
+"""
+Hierarchical summarization of long documents.
+
+``generate_summary`` used to send ``text[:8000]`` to the model, so the summary of
+a long document described its first few pages. One long-context call over the
+whole text would be slow and expensive. Documents are now split into sections
+along the chunker's headings, the sections are summarized concurrently, and the
+section summaries are merged (in groups of ``MERGE_FANOUT``, level by level
+for very long documents) into the document summary. A document that fits in
+one section still costs a single call with the original prompt.
+
+The section summaries are returned in a persistable form so they can be stored
+with the document: wiki pages and "summarize section X" chats reuse them
+without new model calls (``parse_section_request``, ``find_sections``). Every
+call is cached by the hash of its input (``llm_cache``), so reprocessing an
+unchanged or lightly edited document only summarizes what changed.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from chunking import Chunk
+from content_index import chunk_hash
+from llm_cache import cache_namespace
+
+SECTION_CHARS = 8000
+MAX_SECTIONS = 48
+# Hard cap on the text sent for one section of an extremely long document.
+MAX_SECTION_CHARS = 120_000
+# Sections shorter than this share a model call with the next section.
+MIN_SECTION_FILL = 0.25
+MERGE_FANOUT = 12
+DEFAULT_SUMMARY_CONCURRENCY = 8
+
+DOCUMENT_SUMMARY_PROMPT = "Summarize this document in 3-5 sentences:\n\n{text}"
+SECTION_SUMMARY_PROMPT = (
+    "Summarize this section of a longer document in 2-3 sentences. Keep the names, figures and dates that "
+    "matter; do not mention that it is a section.\n\n{text}"
+)
+MERGE_SUMMARY_PROMPT = (
+    "Below are summaries of consecutive parts of one document, in order. Write a summary of the whole "
+    "document in 3-5 sentences.\n\n{text}"
+)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_NUMBER_RE = re.compile(r"(?:\d+(?:\.\d+)*|[ivxlc]+)", re.IGNORECASE)
+_SECTION_REQUEST_RES = (
+    re.compile(r"\bsummar(?:y|i[sz]e)\b.*?\b(?:section|chapter|part)\s+[\"'“]?(?P<target>[^\"'”?!]+?)[\"'”]?"
+               r"(?:\s+(?:of|in|from)\s+(?:the|this|my)\b[^?!]*)?\s*[?.!]*$", re.IGNORECASE | re.DOTALL),
+    re.compile(r"\bsummar(?:y|i[sz]e)\b\s+(?:of\s+)?(?:the\s+)?[\"'“]?(?P<target>[^\"'”?!]+?)[\"'”]?"
+               r"\s+(?:section|chapter)\b", re.IGNORECASE),
+)
+
+
+@dataclass(frozen=True)
+class Section:
+    """A run of consecutive chunks summarized together."""
+
+    section_id: str
+    title: str
+    headings: Tuple[str, ...]
+    start: int
+    end: int
+    page_start: int
+    page_end: int
+    text: str
+
+
+@dataclass
+class DocumentSummary:
+    summary: str
+    # Persistable section records: id, title, headings, offsets, summary and,
+    # when the chunks carried page boundaries, pages.
+    sections: List[dict] = field(default_factory=list)
+
+
+def build_sections(text: str, chunks: Sequence[Chunk], *, section_chars: int = SECTION_CHARS,
+                   max_sections: int = MAX_SECTIONS) -> List[Section]:
+    """
+    Group ``chunks`` (in document order) into sections of about ``section_chars``.
+
+    A new heading starts a new section unless the current one is still short.
+    The budget doubles until there are at most ``max_sections`` sections.
+    """
+
+    if not chunks:
+        return []
+    budget = max(section_chars, math.ceil((chunks[-1].end - chunks[0].start) / max_sections))
+    while True:
+        groups: List[List[Chunk]] = []
+        for chunk in chunks:
+            current = groups[-1] if groups else None
+            if current is not None:
+                size = current[-1].end - current[0].start
+                new_heading = chunk.heading is not None and chunk.heading != current[-1].heading
+                if chunk.end - current[0].start <= budget and not (new_heading and size >= budget * MIN_SECTION_FILL):
+                    current.append(chunk)
+                    continue
+            groups.append([chunk])
+        if len(groups) <= max_sections:
+            break
+        budget *= 2
+
+    sections: List[Section] = []
+    previous_heading: Optional[str] = None
+    for index, group in enumerate(groups, start=1):
+        headings = tuple(dict.fromkeys(chunk.heading for chunk in group if chunk.heading))
+        if not headings:
+            title = f"Part {index}"
+        elif headings[0] == previous_heading:
+            title = f"{headings[0]} (continued)"
+        else:
+            title = headings[0]
+        previous_heading = group[-1].heading
+        sections.append(Section(
+            section_id=f"s{index}",
+            title=title,
+            headings=headings,
+            start=group[0].start,
+            end=group[-1].end,
+            page_start=group[0].page_start,
+            page_end=group[-1].page_end,
+            text=text[group[0].start:group[-1].end][:MAX_SECTION_CHARS],
+        ))
+    return sections
+
+
+def _map(func: Callable, items: Sequence, max_workers: int) -> List:
+    if len(items) <= 1 or max_workers <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+class _CachedPrompt:
+    """One prompt template run through the model, with results cached by input hash."""
+
+    def __init__(self, template: str, llm, cache=None) -> None:
+        self.template = template
+        self.llm = llm
+        self.cache = cache
+        self.namespace = cache_namespace("summary", template, str(getattr(llm, "model_name", "")))
+
+    def __call__(self, text: str) -> str:
+        digest = chunk_hash(text)
+        if self.cache is not None:
+            cached = self.cache.get(self.namespace, digest)
+            if cached is not None:
+                return cached
+        response = self.llm.invoke(self.template.format(text=text))
+        summary = (getattr(response, "content", "") or "").strip()
+        if summary and self.cache is not None:
+            self.cache.put(self.namespace, digest, summary)
+        return summary
+
+
+def summarize_document(text: str, chunks: Sequence[Chunk], llm, *, cache=None,
+                       max_workers: int = DEFAULT_SUMMARY_CONCURRENCY,
+                       section_chars: int = SECTION_CHARS) -> DocumentSummary:
+    """
+    Summarize ``text`` (chunked as ``chunks``) section by section, then merge.
+
+    A section whose call fails is logged and left without a summary, and a
+    merge that fails is logged and replaced by the summaries it would have
+    merged, so the section summaries are never lost to a late error. Only when
+    no section could be summarized does the error propagate.
+    """
+
+    sections = build_sections(text, chunks, section_chars=section_chars)
+    # Text chunked as a single page has no page boundaries worth citing.
+    paged = any(chunk.page_end for chunk in chunks)
+    if len(sections) <= 1:
+        summary = _CachedPrompt(DOCUMENT_SUMMARY_PROMPT, llm, cache)(text[:section_chars])
+        return DocumentSummary(summary, [_section_record(section, summary, paged) for section in sections])
+
+    summarize_section = _CachedPrompt(SECTION_SUMMARY_PROMPT, llm, cache)
+
+    def _summarize(section: Section) -> str:
+        try:
+            return summarize_section(section.text)
+        except Exception as error:  # noqa: BLE001 - the other sections still summarize the document
+            print(f"⚠️ Section summary failed for {section.section_id}: {error}")
+            return ""
+
+    summaries = _map(_summarize, sections, max_workers)
+    level = [summary for summary in summaries if summary]
+    if not level:
+        raise RuntimeError("No section of the document could be summarized")
+
+    merge_summaries = _CachedPrompt(MERGE_SUMMARY_PROMPT, llm, cache)
+
+    def _merge(group: List[str]) -> str:
+        joined = "\n\n".join(group)
+        if len(group) == 1:
+            return joined
+        try:
+            return merge_summaries(joined) or joined
+        except Exception as error:  # noqa: BLE001 - fall back to the unmerged summaries
+            print(f"⚠️ Summary merge failed: {error}")
+            return joined
+
+    while len(level) > 1:
+        groups = [level[index:index + MERGE_FANOUT] for index in range(0, len(level), MERGE_FANOUT)]
+        level = _map(_merge, groups, max_workers)
+    return DocumentSummary(level[0], [_section_record(section, summary, paged)
+                                      for section, summary in zip(sections, summaries)])
+
+
+def _section_record(section: Section, summary: str, paged: bool) -> dict:
+    record = {
+        "id": section.section_id,
+        "title": section.title,
+        "headings": list(section.headings),
+        "start": section.start,
+        "end": section.end,
+        "summary": summary,
+    }
+    if paged:
+        record.update(page_start=section.page_start, page_end=section.page_end)
+    return record
+
+
+def parse_section_request(query: str) -> Optional[str]:
+    """The section named by a "summarize section X" style request, if ``query`` is one."""
+
+    query = (query or "").strip()
+    if len(query) > 200:
+        return None
+    for pattern in _SECTION_REQUEST_RES:
+        match = pattern.search(query)
+        if match:
+            target = match.group("target").strip(" .:")
+            if target:
+                return target
+    return None
+
+
+def find_sections(sections: Sequence[Dict], target: str) -> List[Dict]:
+    """
+    Stored section records matching ``target``, in document order.
+
+    A number ("2", "3.1", "IV") matches headings carrying that number (and
+    their subsections), then falls back to the section's position. Otherwise the headings sharing the
+    most words with ``target`` (at least half of them) win; a section split
+    into several parts returns every part.
+    """
+
+    target = target.strip().lower()
+    if not target or not sections:
+        return []
+
+    def names(section: Dict) -> List[str]:
+        return [name.lower() for name in [section.get("title") or "", *(section.get("headings") or [])] if name]
+
+    if _NUMBER_RE.fullmatch(target):
+        # "2" also matches its subsections ("2.1 ..."), but not "20" or "2b".
+        numbered = re.compile(rf"^(?:(?:section|chapter|part)\s+)?{re.escape(target)}(?![\da-z])")
+        found = [section for section in sections if any(numbered.match(name) for name in names(section))]
+        if found:
+            return found
+        if target.isdigit() and 1 <= int(target) <= len(sections):
+            return [sections[int(target) - 1]]
+
+    wanted = set(_WORD_RE.findall(target))
+    if not wanted:
+        return []
+    scores = [max((len(wanted & set(_WORD_RE.findall(name))) / len(wanted) for name in names(section)), default=0.0)
+              for section in sections]
+    best = max(scores)
+    if best < 0.5:
+        return []
+    return [section for section, score in zip(sections, scores) if score == best]
+
+
+__all__ = [
+    "DocumentSummary",
+    "MERGE_FANOUT",
+    "SECTION_CHARS",
+    "Section",
+    "build_sections",
+    "find_sections",
+    "parse_section_request",
+    "summarize_document",
+]
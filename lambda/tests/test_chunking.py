@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from chunking import StructuredChunker, approximate_token_count, is_heading  # noqa: E402
+
+
+def _words(text):
+    return len(text.split())
+
+
+def _chunker(max_tokens, **kwargs):
+    return StructuredChunker(max_tokens, count_tokens=_words, **kwargs)
+
+
+def _sentences(count, prefix="Sentence"):
+    return " ".join(f"{prefix} number {index} has six words." for index in range(count))
+
+
+def test_chunks_respect_the_token_budget_and_keep_sentences_whole():
+    text = _sentences(20)
+
+    chunks = list(_chunker(20, overlap_sentences=0).chunk_text(text))
+
+    assert all(chunk.tokens <= 20 for chunk in chunks)
+    assert [chunk.tokens for chunk in chunks] == [18] * 6 + [12]
+    assert all(chunk.text.endswith("words.") for chunk in chunks)
+
+
+def test_overlap_repeats_trailing_sentences():
+    chunks = list(_chunker(18, overlap_sentences=1).chunk_text(_sentences(6)))
+
+    assert chunks[0].text.endswith("number 2 has six words.")
+    assert chunks[1].text.startswith("Sentence number 2 has")
+    assert chunks[1].start == chunks[0].start + chunks[0].text.index("Sentence number 2")
+
+
+def test_headings_open_new_chunks_and_are_carried():
+    text = "1. INTRODUCTION\n" + _sentences(4) + "\n\n2. Methods\n" + _sentences(4, "Method")
+
+    chunks = list(_chunker(100).chunk_text(text))
+
+    assert [chunk.heading for chunk in chunks] == ["1. INTRODUCTION", "2. Methods"]
+    assert chunks[1].text.startswith("2. Methods\n\nMethod number 0")
+    # Sections do not overlap.
+    assert "Sentence" not in chunks[1].text
+
+
+def test_short_sections_share_a_chunk():
+    text = "SUMMARY\nShort one.\n\nDETAILS\n" + _sentences(3)
+
+    chunks = list(_chunker(100).chunk_text(text))
+
+    assert len(chunks) == 1
+    assert chunks[0].text.startswith("SUMMARY\n\nShort one.\n\nDETAILS")
+
+
+def test_paragraphs_are_not_split_when_the_chunk_is_mostly_full():
+    first = _sentences(3)
+    second = _sentences(3, "Other")
+
+    chunks = list(_chunker(24, overlap_sentences=0).chunk_text(first + "\n\n" + second))
+
+    assert [chunk.text for chunk in chunks] == [first, second]
+
+
+def test_offsets_span_pages_of_the_stream():
+    pages = ["First page text here.", "Second page\ntext here."]
+    source = "\n".join(pages)
+
+    chunks = list(_chunker(4, overlap_sentences=0).chunk_pages(iter(pages)))
+
+    assert [(chunk.page_start, chunk.page_end) for chunk in chunks] == [(0, 0), (1, 1)]
+    assert [source[chunk.start:chunk.end] for chunk in chunks] == pages
+    assert chunks[1].text == "Second page text here."
+
+
+def test_sentences_over_budget_are_split_on_whitespace():
+    text = " ".join(f"w{index}" for index in range(25))
+
+    chunks = list(_chunker(10, overlap_sentences=0).chunk_text(text))
+
+    assert [chunk.tokens for chunk in chunks] == [10, 10, 5]
+    assert " ".join(chunk.text for chunk in chunks) == text
+
+
+def test_heading_detection_and_token_approximation():
+    assert is_heading("2.1 Directory layout")
+    assert is_heading("## Results")
+    assert is_heading("TERMS AND CONDITIONS")
+    assert not is_heading("This sentence ends with a period.")
+    assert not is_heading("lower case line")
+    assert approximate_token_count("Tokenization, approximately!") == 6
+
+
+def test_invalid_configuration_is_rejected():
+    with pytest.raises(ValueError):
+        StructuredChunker(0)
+    with pytest.raises(ValueError):
+        StructuredChunker(10, overlap_sentences=-1)
@@ -35,6 +35,15 @@ class SettingsTests(unittest.TestCase):
             "DEFAULT_MODEL_ID": "gpt-4.1",
             "MEDIA_BUCKET": "docgpt-media-dev",
             "MEDIA_QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/123456789012/docgpt-media-queue",
+            "JOBS_QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/123456789012/docgpt-jobs-queue",
+            "CONTENT_BUCKET": "docgpt-content-dev",
+            "MEDIA_WORKER_CONCURRENCY": "8",
+            "NOVA_SEGMENT_CONCURRENCY": "6",
+            "LLM_CONCURRENCY": "12",
+            "NOVA_BY_REFERENCE": "true",
+            "TEXT_EMBEDDING_BACKEND": "local",
+            "MEDIA_PINECONE_INDEX_HOST": "media-index.svc.pinecone.io",
+            "MEDIA_MIN_SCORE": "0.05",
         }
 
         with mock.patch.dict(os.environ, env, clear=True):
@@ -54,6 +63,26 @@ class SettingsTests(unittest.TestCase):
         self.assertEqual(settings.default_model_id, "gpt-4.1")
         self.assertEqual(settings.media_bucket, "docgpt-media-dev")
         self.assertEqual(settings.media_queue_url, "https://sqs.us-east-1.amazonaws.com/123456789012/docgpt-media-queue")
+        self.assertEqual(settings.jobs_queue_url, "https://sqs.us-east-1.amazonaws.com/123456789012/docgpt-jobs-queue")
+        self.assertEqual(settings.content_bucket, "docgpt-content-dev")
+        self.assertEqual(settings.media_worker_concurrency, 8)
+        self.assertEqual(settings.nova_segment_concurrency, 6)
+        self.assertEqual(settings.llm_concurrency, 12)
+        self.assertTrue(settings.nova_by_reference)
+        self.assertEqual(settings.nova_inline_max_bytes, 10 * 1024 * 1024)
+        self.assertEqual(settings.text_embedding_backend, "local")
+        self.assertEqual(settings.text_embedding_model, "text-embedding-3-small")
+        self.assertEqual(settings.media_index_host, "media-index.svc.pinecone.io")
+        self.assertEqual(settings.media_namespace, "media")
+        self.assertEqual(settings.text_min_score, 0.2)
+        self.assertEqual(settings.media_min_score, 0.05)
+
+    def test_media_is_embedded_by_reference_by_default(self) -> None:
+        with mock.patch.dict(os.environ, REQUIRED_ENV, clear=True):
+            get_settings.cache_clear()
+            settings = get_settings()
+
+        self.assertTrue(settings.nova_by_reference)
 
     def test_get_settings_requires_openai_api_key(self) -> None:
         env = {
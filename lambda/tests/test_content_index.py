@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from content_index import (  # noqa: E402
+    chunk_hash,
+    chunk_vector_id,
+    diff_chunks,
+    document_content_hash,
+    fingerprint_bytes,
+    fingerprint_text,
+    hash_index_sk,
+    job_fingerprint,
+    segment_hash,
+)
+
+
+def test_chunk_hash_ignores_whitespace_only_edits():
+    assert chunk_hash("Quarterly plan:\n  ship the graph") == chunk_hash("Quarterly plan: ship the graph")
+    assert chunk_hash("Quarterly plan") != chunk_hash("Quarterly plans")
+
+
+def test_diff_chunks_first_save_embeds_everything():
+    chunks = ["Intro paragraph", "Body paragraph", "Closing paragraph"]
+    diff = diff_chunks(chunks, None)
+
+    assert [idx for idx, _, _ in diff.added] == [0, 1, 2]
+    assert diff.unchanged == []
+    assert diff.removed == []
+    assert diff.manifest == [chunk_hash(chunk) for chunk in chunks]
+
+
+def test_diff_chunks_only_reembeds_changed_paragraph():
+    previous = diff_chunks(["Intro", "Body v1", "Closing"], None).manifest
+    diff = diff_chunks(["Intro", "Body v2", "Closing"], previous)
+
+    assert [text for _, _, text in diff.added] == ["Body v2"]
+    assert diff.removed == [chunk_hash("Body v1")]
+    assert set(diff.unchanged) == {chunk_hash("Intro"), chunk_hash("Closing")}
+
+
+def test_diff_chunks_collapses_exact_repeats():
+    diff = diff_chunks(["Footer", "Body", "Footer"], None)
+
+    assert len(diff.manifest) == 2
+    assert [text for _, _, text in diff.added] == ["Footer", "Body"]
+
+
+def test_chunk_vector_id_is_deterministic():
+    digest = chunk_hash("Body")
+    assert chunk_vector_id("doc_1", digest) == f"doc_1-{digest}"
+
+
+def test_document_content_hash_sees_whitespace_and_edits_past_the_inline_limit():
+    body = "Paragraph one.\n\n" + "x" * 130_000
+
+    assert document_content_hash(body) == document_content_hash(body)
+    assert document_content_hash(body) != document_content_hash(body.replace("\n\n", "\n"))
+    assert document_content_hash(body) != document_content_hash(body + "y")
+    assert document_content_hash(body) == fingerprint_bytes(body.encode("utf-8"))
+
+
+def test_fingerprint_text_matches_reexported_documents():
+    original = "Board Minutes\n\nQ3 revenue grew 12%."
+    reexported = "  board minutes  q3 revenue grew 12%.\r\n"
+    assert fingerprint_text(original) == fingerprint_text(reexported)
+    assert fingerprint_bytes(original.encode()) != fingerprint_bytes(reexported.encode())
+
+
+def test_hash_index_sk_namespaces_kinds():
+    digest = fingerprint_bytes(b"%PDF-1.7")
+    assert hash_index_sk("raw", digest) == f"HASH#RAW#{digest}"
+    assert hash_index_sk("TEXT", digest).startswith("HASH#TEXT#")
+
+
+def test_segment_hash_is_deterministic_per_position_and_segment():
+    segment = {"start": 0, "end": 30}
+
+    assert segment_hash(0, segment) == segment_hash(0, {"end": 30, "start": 0})
+    assert segment_hash(0, segment) != segment_hash(1, segment)
+    assert segment_hash(2) == segment_hash(2, None)
+
+
+def test_job_fingerprint_prefers_explicit_job_id():
+    job = {"user_id": "u1", "doc_id": "doc_1", "bucket": "b", "key": "k", "media_type": "image/png"}
+
+    assert job_fingerprint({**job, "job_id": "media_1"}) == "media_1"
+    assert job_fingerprint(job) == job_fingerprint(dict(reversed(list(job.items()))))
+    assert job_fingerprint(job) != job_fingerprint({**job, "key": "other"})
@@ -0,0 +1,78 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from content_store import (  # noqa: E402
+    ContentStore,
+    content_attributes,
+    encode_frames,
+    load_content,
+    parse_content_range,
+    select_frames,
+)
+
+
+class StubS3:
+    def __init__(self):
+        self.objects = {}
+        self.ranges = []
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key, Range=None):
+        body = self.objects[(Bucket, Key)]
+        if Range:
+            self.ranges.append(Range)
+            start, end = (int(part) for part in Range.replace("bytes=", "").split("-"))
+            body = body[start : end + 1]
+        return {"Body": io.BytesIO(body)}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+def test_encode_frames_splits_text_into_independent_frames():
+    body, frames = encode_frames("abcdefghij", encoding="gzip", frame_chars=4)
+
+    assert [frame[0] for frame in frames] == [0, 4, 8]
+    assert frames[-1][2] == len(body)
+    assert select_frames(frames, 5, 2) == [frames[1]]
+    assert select_frames(frames, 3, 2) == frames[:2]
+
+
+def test_content_store_round_trip_uses_single_ranged_get():
+    s3 = StubS3()
+    store = ContentStore(s3, "bucket", frame_chars=8)
+    text = "The quick brown fox jumps over the lazy dog. " * 3
+
+    item = store.put("u1", "doc_1", text)
+
+    assert len(item["content_frames"]) == 17
+    assert store.load(item) == text
+    assert store.load(item, offset=10, length=20) == text[10:30]
+    assert len(s3.ranges) == 2
+    assert item["content_size"] == len(text)
+    assert item["content_preview"] == text
+
+    store.delete(item)
+    assert not s3.objects
+
+
+def test_content_attributes_fall_back_to_inline_content():
+    attributes = content_attributes(None, "u1", "doc_1", "x" * 20, inline_limit=5)
+
+    assert attributes == {"content": "xxxxx"}
+    assert load_content(None, {"content": "hello world"}, offset=6, length=5) == "world"
+
+
+def test_parse_content_range_rejects_malformed_values():
+    assert parse_content_range(None, None) == (0, None)
+    assert parse_content_range("10", "5") == (10, 5)
+    for offset, length in (("abc", None), (None, "1e3"), ("-1", None), (None, "-5")):
+        with pytest.raises(ValueError):
+            parse_content_range(offset, length)
@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import cooccurrence  # noqa: E402
+from cooccurrence import cooccurrence_edges  # noqa: E402
+
+
+def _hub_items(doc_count=6):
+    docs = [f"doc-{index}" for index in range(doc_count)]
+    return [
+        {"entity_id": "me", "entity_name": "Me", "doc_ids": docs},
+        {"entity_id": "acme", "entity_name": "Acme", "doc_ids": docs},
+        {"entity_id": "rare", "entity_name": "Rare Project", "doc_ids": ["doc-0", "doc-1"]},
+    ]
+
+
+@pytest.fixture(params=["python", "sparse"])
+def engine(request, monkeypatch):
+    if request.param == "sparse":
+        if cooccurrence.sparse is None:
+            pytest.skip("SciPy not installed")
+    else:
+        monkeypatch.setattr(cooccurrence, "sparse", None)
+    return request.param
+
+
+def test_top_k_bounds_edges_per_document(engine):
+    relationships, counts = cooccurrence_edges(_hub_items(), top_k=1)
+
+    degree = {}
+    for rel in relationships:
+        degree[rel["source"]] = degree.get(rel["source"], 0) + 1
+        degree[rel["target"]] = degree.get(rel["target"], 0) + 1
+    # Each document contributes one edge; an edge may be the pick of both endpoints.
+    assert len(relationships) <= 6
+    assert all(value >= 1 for value in degree.values())
+    assert counts["doc-0"] == 3 and counts["doc-5"] == 2
+
+
+def test_idf_ranks_distinctive_entities_above_ubiquitous_ones(engine):
+    relationships, _ = cooccurrence_edges(_hub_items(), idf=True)
+
+    top = relationships[0]
+    assert (top["source"], top["target"]) == ("doc-0", "doc-1")
+    assert top["weight"] == 3
+    assert top["shared_entities"][0] == "Rare Project"
+    others = [rel for rel in relationships if rel is not top]
+    assert all(rel["score"] < top["score"] for rel in others)
+
+
+def test_without_top_k_every_pair_is_returned(engine):
+    relationships, _ = cooccurrence_edges(_hub_items(4))
+
+    assert len(relationships) == 6
+    assert relationships[0]["weight"] == 3
+    assert relationships[0]["score"] == 3.0
+
+
+def test_hub_entities_do_not_relate_documents(engine, monkeypatch):
+    visits = []
+    original = cooccurrence._python_rows
+    monkeypatch.setattr(cooccurrence, "_python_rows", lambda entity_docs, *args: visits.append(
+        sum(len(docs) for docs in entity_docs)) or original(entity_docs, *args))
+
+    relationships, counts = cooccurrence_edges(_hub_items(6), top_k=2, idf=True, hub_doc_limit=3)
+
+    assert [(rel["source"], rel["target"]) for rel in relationships] == [("doc-0", "doc-1")]
+    assert relationships[0]["shared_entities"] == ["Rare Project"]
+    assert counts["doc-0"] == 3 and counts["doc-5"] == 2
+    if engine == "python":
+        assert visits == [2]
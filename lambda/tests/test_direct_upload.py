@@ -0,0 +1,121 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from direct_upload import (  # noqa: E402
+    complete_multipart_upload,
+    iter_s3_events,
+    parse_file_size,
+    parse_upload_key,
+    plan_parts,
+    start_multipart_upload,
+    stream_object_text,
+    upload_key,
+)
+
+MB = 1024 * 1024
+
+
+class StreamingBody(io.BytesIO):
+    def iter_chunks(self, chunk_size):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class StubS3:
+    def __init__(self, objects=None):
+        self.objects = objects or {}
+        self.completed = None
+
+    def create_multipart_upload(self, **kwargs):
+        return {"UploadId": "upload-1"}
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://s3.example/{Params['Key']}?part={Params['PartNumber']}"
+
+    def complete_multipart_upload(self, **kwargs):
+        self.completed = kwargs
+        return {}
+
+    def get_object(self, Bucket, Key):
+        return {"Body": StreamingBody(self.objects[Key])}
+
+
+def test_plan_parts_respects_minimum_and_max_part_count():
+    assert plan_parts(3 * MB) == [(1, 0, 3 * MB)]
+
+    parts = plan_parts(100 * 1024 * MB)
+    assert len(parts) <= 10000
+    assert parts[-1][2] == 100 * 1024 * MB
+    assert all(end - start >= 5 * MB for _, start, end in parts[:-1])
+
+    with pytest.raises(ValueError):
+        plan_parts(0)
+
+
+def test_start_and_complete_multipart_upload():
+    s3 = StubS3()
+    key = upload_key("u1", "doc_1", "talk.mp4")
+
+    plan = start_multipart_upload(s3, "bucket", key, content_type="video/mp4", file_size=20 * MB)
+    assert plan["upload_id"] == "upload-1"
+    assert [part["part_number"] for part in plan["parts"]] == [1, 2, 3]
+
+    complete_multipart_upload(s3, "bucket", key, "upload-1", [{"part_number": 2, "etag": "b"}, {"part_number": 1, "etag": "a"}])
+    assert s3.completed["MultipartUpload"]["Parts"] == [{"PartNumber": 1, "ETag": "a"}, {"PartNumber": 2, "ETag": "b"}]
+
+
+def test_s3_events_map_back_to_documents():
+    body = json.loads(json.dumps({"Records": [
+        {"eventSource": "aws:s3", "eventName": "ObjectCreated:CompleteMultipartUpload",
+         "s3": {"bucket": {"name": "bucket"}, "object": {"key": "direct-uploads/u1/doc_1/My+Notes.txt", "size": 5}}},
+        {"eventSource": "aws:s3", "eventName": "ObjectRemoved:Delete",
+         "s3": {"bucket": {"name": "bucket"}, "object": {"key": "direct-uploads/u1/doc_2/x.txt"}}},
+    ]}))
+
+    events = list(iter_s3_events(body))
+    assert events == [{"bucket": "bucket", "key": "direct-uploads/u1/doc_1/My Notes.txt", "size": 5}]
+    assert parse_upload_key(events[0]["key"]) == ("u1", "doc_1", "My Notes.txt")
+    assert parse_upload_key("uploads/u1/doc_1/x.txt") is None
+
+
+def test_s3_event_keys_are_decoded_exactly_once():
+    records = [{"eventSource": "aws:s3", "eventName": "ObjectCreated:Put",
+                "s3": {"bucket": {"name": "bucket"}, "object": {"key": f"direct-uploads/u1/doc_1/{name}"}}}
+               for name in ("a%2Bb.pdf", "100%2525.pdf")]
+
+    keys = [event["key"] for event in iter_s3_events({"Records": records})]
+
+    assert keys == ["direct-uploads/u1/doc_1/a+b.pdf", "direct-uploads/u1/doc_1/100%25.pdf"]
+    assert [parse_upload_key(key)[2] for key in keys] == ["a+b.pdf", "100%25.pdf"]
+
+
+def test_parse_file_size_rejects_malformed_sizes():
+    assert parse_file_size(None) == 0
+    assert parse_file_size("2048") == 2048
+    for value in ("abc", -1, True, {"size": 1}):
+        with pytest.raises(ValueError):
+            parse_file_size(value)
+
+
+def test_stream_object_text_decodes_across_chunk_boundaries(monkeypatch):
+    import direct_upload
+
+    monkeypatch.setattr(direct_upload, "STREAM_CHUNK_BYTES", 3)
+    raw = "naïve café – résumé".encode("utf-8")
+    s3 = StubS3({"k": raw})
+
+    text, digest = stream_object_text(s3, "bucket", "k", is_pdf=False, extract_pdf=None)
+    assert text == "naïve café – résumé"
+    assert len(digest) == 64
+
+    pdf_text, _ = stream_object_text(s3, "bucket", "k", is_pdf=True, extract_pdf=lambda stream: stream.read().decode("utf-8"))
+    assert pdf_text == text
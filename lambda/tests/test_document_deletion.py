@@ -0,0 +1,175 @@
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from content_index import chunk_hash, chunk_vector_id  # noqa: E402
+from document_deletion import (  # noqa: E402
+    delete_document_cascade,
+    detach_entity,
+    list_documents,
+    run_deletion_job,
+    start_deletion_job,
+)
+from jobs import create_job  # noqa: E402
+
+
+class StubTable:
+    """In-memory stand-in for the handful of DynamoDB calls the cascade makes."""
+
+    def __init__(self, items=()):
+        self.items = {(item["pk"], item["sk"]): dict(item) for item in items}
+        self.fail_conditions = 0
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get((Key["pk"], Key["sk"]))
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.items[(Item["pk"], Item["sk"])] = dict(Item)
+
+    def _check_condition(self, key, kwargs):
+        condition = kwargs.get("ConditionExpression")
+        if condition == "updated_at = :prev":
+            current = self.items.get(key, {}).get("updated_at")
+            if self.fail_conditions or current != kwargs["ExpressionAttributeValues"][":prev"]:
+                self.fail_conditions = max(0, self.fail_conditions - 1)
+                raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, **kwargs):
+        key = (Key["pk"], Key["sk"])
+        self._check_condition(key, {"ExpressionAttributeValues": ExpressionAttributeValues, **kwargs})
+        item = self.items.setdefault(key, dict(Key))
+        names = kwargs.get("ExpressionAttributeNames", {})
+        for assignment in UpdateExpression.replace("SET ", "", 1).split(", "):
+            field, placeholder = [part.strip() for part in assignment.split("=")]
+            item[names.get(field, field)] = ExpressionAttributeValues[placeholder]
+
+    def delete_item(self, Key, **kwargs):
+        key = (Key["pk"], Key["sk"])
+        self._check_condition(key, kwargs)
+        self.items.pop(key, None)
+
+    def query(self, KeyConditionExpression, **kwargs):
+        values = KeyConditionExpression.get_expression()["values"]
+        pk = values[0].get_expression()["values"][1]
+        prefix = values[1].get_expression()["values"][1]
+        return {"Items": [dict(item) for (item_pk, item_sk), item in self.items.items()
+                          if item_pk == pk and item_sk.startswith(prefix)]}
+
+    @contextmanager
+    def batch_writer(self):
+        yield self
+
+
+class StubIndex:
+    def __init__(self, ids, listable=True):
+        self.ids = set(ids)
+        self.listable = listable
+        self.filters = []
+
+    def delete_ids(self, ids):
+        self.ids.difference_update(ids)
+        return len(ids)
+
+    def list_ids(self, prefix):
+        if not self.listable:
+            raise RuntimeError("Pinecone request failed (404)")
+        matching = sorted(vector_id for vector_id in self.ids if vector_id.startswith(prefix))
+        for i in range(0, len(matching), 2):
+            yield matching[i : i + 2]
+
+    def delete_by_filter(self, metadata_filter):
+        self.filters.append(metadata_filter)
+
+
+def _seed(doc_id="doc_1"):
+    digest = chunk_hash("Body")
+    table = StubTable([
+        {
+            "pk": "USER#u1", "sk": f"DOC#{doc_id}", "doc_id": doc_id,
+            "chunk_hashes": [digest], "content_hashes": ["HASH#RAW#abc"],
+            "entities": [{"entity_id": "project-atlas"}],
+        },
+        {"pk": "USER#u1", "sk": "HASH#RAW#abc", "doc_id": doc_id},
+        {"pk": f"DOC#{doc_id}", "sk": "ENTITY#project-atlas", "entity_id": "project-atlas"},
+        {"pk": f"DOC#{doc_id}", "sk": "ENTITY#person-ada", "entity_id": "person-ada"},
+        {"pk": "USER#u1", "sk": "ENTITY#project-atlas", "doc_ids": [doc_id, "doc_2"], "updated_at": "t0"},
+        {"pk": "USER#u1", "sk": "ENTITY#person-ada", "doc_ids": [doc_id], "updated_at": "t0"},
+    ])
+    index = StubIndex({chunk_vector_id(doc_id, digest), f"{doc_id}-0", f"{doc_id}-1", f"{doc_id}-2", "doc_10-0", "doc_2-0"})
+    return table, index
+
+
+def test_delete_document_cascade_removes_every_artifact():
+    table, index = _seed()
+    stages = []
+
+    progress = delete_document_cascade(table, index, "u1", "doc_1", report=lambda stage, _: stages.append(stage))
+
+    assert index.ids == {"doc_10-0", "doc_2-0"}
+    assert progress["vectors_deleted"] == 4
+    assert progress["edges_deleted"] == 2
+    assert progress["entities_updated"] == 1
+    assert progress["entities_removed"] == 1
+    assert progress["hash_rows_deleted"] == 1
+    assert table.items[("USER#u1", "ENTITY#project-atlas")]["doc_ids"] == ["doc_2"]
+    assert ("USER#u1", "ENTITY#person-ada") not in table.items
+    assert ("USER#u1", "DOC#doc_1") not in table.items
+    assert not any(pk == "DOC#doc_1" for pk, _ in table.items)
+    assert stages[0] == "vectors" and stages[-1] == "completed"
+
+
+def test_delete_document_cascade_falls_back_to_metadata_filter():
+    table, index = _seed()
+    index.listable = False
+
+    delete_document_cascade(table, index, "u1", "doc_1")
+
+    assert index.filters == [{"doc_id": {"$eq": "doc_1"}, "user_id": {"$eq": "u1"}}]
+
+
+def test_detach_entity_retries_on_concurrent_update():
+    table, _ = _seed()
+    table.fail_conditions = 1
+
+    assert detach_entity(table, "u1", "project-atlas", "doc_1") == "updated"
+    assert detach_entity(table, "u1", "project-atlas", "doc_1") is None
+
+
+def test_detach_entity_gives_up_after_repeated_conflicts():
+    table, _ = _seed()
+    table.fail_conditions = 10
+
+    with pytest.raises(RuntimeError):
+        detach_entity(table, "u1", "project-atlas", "doc_1")
+
+
+def test_run_deletion_job_records_progress_on_job_row():
+    table, index = _seed()
+    job = create_job(table, "u1", "delete_document", doc_id="doc_1")
+
+    run_deletion_job(table, index, {"job_id": job["job_id"], "user_id": "u1", "doc_id": "doc_1"})
+
+    job_row = table.items[("USER#u1", f"JOB#{job['job_id']}")]
+    assert job_row["status"] == "completed"
+    assert job_row["progress"]["edges_deleted"] == 2
+
+
+def test_list_documents_skips_non_document_rows_and_deletions():
+    table, index = _seed()
+    table.put_item({"pk": "USER#u1", "sk": "DOC#doc_2", "doc_id": "doc_2"})
+    table.put_item({"pk": "USER#u1", "sk": "HASH#TEXT#def", "doc_id": "doc_2"})
+    table.put_item({"pk": "USER#u1", "sk": "IDEMPOTENCY#upload-1", "status": "completed"})
+    table.put_item({"pk": "USER#u1", "sk": "GRAPH#SNAPSHOT", "nodes": []})
+    table.put_item({"pk": "USER#u1", "sk": "GRAPH#ADJ#doc_2", "neighbors": []})
+    table.put_item({"pk": "USER#u1", "sk": "DOC#doc_3", "doc_id": "doc_3", "processing_status": "deleting"})
+
+    start_deletion_job(table, index, "u1", "doc_1")
+
+    assert any(sk.startswith("JOB#") for _, sk in table.items)
+    assert [item["doc_id"] for item in list_documents(table, "u1")] == ["doc_2"]
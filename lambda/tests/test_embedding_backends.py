@@ -0,0 +1,82 @@
+import math
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from embeddings import (  # noqa: E402
+    BackendLimits,
+    EmbeddingBackend,
+    HashingEmbeddingBackend,
+    OpenAIEmbeddingBackend,
+    backend_from_settings,
+    get_backend,
+    pack_batches,
+)
+
+
+class RecordingBackend(EmbeddingBackend):
+    name = "recording"
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.batches = []
+
+    def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def test_pack_batches_respects_size_and_token_limits():
+    limits = BackendLimits(dimensions=1, max_batch_size=3, max_tokens_per_input=100, max_tokens_per_batch=10)
+
+    batches = pack_batches([6, 4, 5, 5, 1, 9], limits)
+
+    assert sorted(idx for batch in batches for idx in batch) == [0, 1, 2, 3, 4, 5]
+    assert all(len(batch) <= 3 for batch in batches)
+    assert all(sum([6, 4, 5, 5, 1, 9][idx] for idx in batch) <= 10 for batch in batches)
+    assert len(batches) == 3
+
+
+def test_embed_documents_preserves_input_order_across_batches():
+    backend = RecordingBackend(BackendLimits(dimensions=1, max_batch_size=2, max_tokens_per_input=3, max_concurrency=2))
+    texts = ["a" * 4, "b" * 40, "c" * 8, "d"]
+
+    vectors = backend.embed_documents(texts)
+
+    # The 40-char input is truncated to the 3-token (12-char) per-input limit.
+    assert vectors == [[4.0], [12.0], [8.0], [1.0]]
+    assert all(len(batch) <= 2 for batch in backend.batches)
+    assert backend.embed_query("xyz") == [3.0]
+
+
+def test_hashing_backend_is_deterministic_and_normalised():
+    backend = get_backend("local", dimensions=64)
+
+    first, second, other = backend.embed_documents(["Quarterly revenue grew", "quarterly revenue grew", "Hiking trip photos"])
+
+    assert first == second
+    assert math.isclose(sum(value * value for value in first), 1.0)
+    assert sum(a * b for a, b in zip(first, other)) < 0.99
+    assert len(first) == backend.limits.dimensions == 64
+
+
+def test_openai_backend_orders_response_by_index():
+    data = [SimpleNamespace(index=1, embedding=[2.0]), SimpleNamespace(index=0, embedding=[1.0])]
+    client = SimpleNamespace(embeddings=SimpleNamespace(create=lambda model, input: SimpleNamespace(data=data)))
+
+    backend = OpenAIEmbeddingBackend(api_key="", client=client)
+
+    assert backend.embed_batch(["a", "b"]) == [[1.0], [2.0]]
+    assert backend.limits.dimensions == 1536
+
+
+def test_registry_builds_backends_from_settings():
+    settings = SimpleNamespace(text_embedding_backend="local")
+
+    assert isinstance(backend_from_settings(settings), HashingEmbeddingBackend)
+    with pytest.raises(ValueError):
+        get_backend("missing")
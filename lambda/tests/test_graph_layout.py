@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import graph_layout  # noqa: E402
+from graph_layout import force_layout  # noqa: E402
+from graph_snapshot import GraphSnapshot  # noqa: E402
+
+
+@pytest.fixture(params=["python", "numpy"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        if graph_layout.np is None:
+            pytest.skip("NumPy not installed")
+    else:
+        monkeypatch.setattr(graph_layout, "np", None)
+    return request.param
+
+
+def _two_clusters():
+    nodes = [f"a{i}" for i in range(6)] + [f"b{i}" for i in range(6)] + ["far"]
+    edges = [(f"a{i}", f"a{j}", 1.0) for i in range(6) for j in range(i + 1, 6)]
+    edges += [(f"b{i}", f"b{j}", 1.0) for i in range(6) for j in range(i + 1, 6)]
+    return nodes, edges
+
+
+def _distance(layout, a, b):
+    return ((layout[a][0] - layout[b][0]) ** 2 + (layout[a][1] - layout[b][1]) ** 2) ** 0.5
+
+
+def test_cold_layout_is_deterministic_and_groups_connected_nodes(engine):
+    nodes, edges = _two_clusters()
+
+    layout = force_layout(nodes, edges)
+
+    assert layout == force_layout(nodes, edges)
+    assert all(0.0 <= value <= 1.0 for position in layout.values() for value in position)
+    assert _distance(layout, "a0", "a1") < _distance(layout, "a0", "b0")
+
+
+def test_warm_start_only_moves_the_changed_neighbourhood(engine):
+    nodes, edges = _two_clusters()
+    previous = force_layout(nodes, edges)
+
+    layout = force_layout(nodes + ["a6"], edges + [("a6", "a0", 1.0)], previous=previous, changed=["a6"])
+
+    assert all(layout[node] == previous[node] for node in nodes if node not in ("a0", "a6"))
+    assert _distance(layout, "a6", "a0") < _distance(layout, "a6", "b0")
+
+
+def test_snapshot_caches_layout_with_graph_view_node_ids():
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One"}, [{"entity_id": "alpha", "name": "Alpha"}])
+    snapshot.apply_document("doc-2", {"title": "Two"}, [{"entity_id": "alpha", "name": "Alpha"}])
+
+    snapshot.refresh_layout()
+    restored = GraphSnapshot.decode(snapshot.encode())
+
+    assert set(restored.layout) == {"entity:alpha", "doc:doc-1", "doc:doc-2"}
+    assert restored.payload()["layout"] == snapshot.layout
+
+
+def test_large_graphs_are_relaxed_with_numpy(monkeypatch):
+    if graph_layout.np is None:
+        pytest.skip("NumPy not installed")
+    calls = []
+    monkeypatch.setattr(graph_layout, "_relax_python", lambda *args: calls.append("python"))
+    relax_numpy = graph_layout._relax_numpy
+    monkeypatch.setattr(graph_layout, "_relax_numpy", lambda *args: calls.append("numpy") or relax_numpy(*args))
+    nodes = [f"n{i}" for i in range(graph_layout.PYTHON_MAX_NODES + 50)]
+    edges = [(nodes[i], nodes[i + 1], 1.0) for i in range(len(nodes) - 1)]
+
+    layout = force_layout(nodes, edges)
+
+    assert calls == ["numpy"]
+    assert len(layout) == len(nodes)
+
@@ -0,0 +1,338 @@
+import random
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from graph_snapshot import GraphSnapshot, GraphSnapshotStore, etag_matches  # noqa: E402
+
+
+class SnapshotTable:
+    name = "docs"
+
+    def __init__(self):
+        self.items = {}
+        self.batch_reads = []
+        self.fail_batch_writes = 0
+        self.meta = self
+        self.client = self
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get((Key["pk"], Key["sk"]))
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeValues=None):
+        key = (Item["pk"], Item["sk"])
+        current = self.items.get(key)
+        if ConditionExpression == "attribute_not_exists(pk)" and current is not None:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        if ConditionExpression == "version = :prev" and (
+            current is None or current["version"] != ExpressionAttributeValues[":prev"]
+        ):
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        self.items[key] = dict(Item)
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression, ExpressionAttributeValues):
+        current = self.items.get((Key["pk"], Key["sk"]))
+        if current is None or current["version"] != ExpressionAttributeValues[":version"]:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        assert UpdateExpression == "REMOVE adjacency_pending"
+        current.pop("adjacency_pending", None)
+
+    def delete_item(self, Key, **kwargs):
+        self.items.pop((Key["pk"], Key["sk"]), None)
+
+    @contextmanager
+    def batch_writer(self):
+        if self.fail_batch_writes:
+            self.fail_batch_writes -= 1
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "BatchWriteItem")
+        yield self
+
+    def batch_get_item(self, RequestItems):
+        keys = RequestItems[self.name]["Keys"]
+        self.batch_reads.append(len(keys))
+        # Serve one key per call so callers have to follow UnprocessedKeys.
+        first, rest = keys[0], keys[1:]
+        item = self.items.get((first["pk"], first["sk"]))
+        response = {"Responses": {self.name: [dict(item)] if item else []}}
+        if rest:
+            response["UnprocessedKeys"] = {self.name: {**RequestItems[self.name], "Keys": rest}}
+        return response
+
+
+class StubS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key):
+        body = self.objects[Key]
+
+        class _Body:
+            def read(self):
+                return body
+
+        return {"Body": _Body()}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+def _entity(entity_id, name=None):
+    return {"entity_id": entity_id, "name": name or entity_id.title(), "type": "PROJECT", "salience": 0.5}
+
+
+def _edge_weights(snapshot):
+    return {(rel["source"], rel["target"]): rel["weight"] for rel in snapshot.relationships(edges_per_doc=1000)}
+
+
+def test_incremental_apply_matches_full_rebuild():
+    random.seed(7)
+    vocabulary = [f"entity-{index}" for index in range(12)]
+    incremental = GraphSnapshot(edges_per_doc=1000)
+    memberships = {}
+    for doc_index in range(15):
+        doc_id = f"doc-{doc_index:02d}"
+        chosen = random.sample(vocabulary, random.randint(1, 4))
+        incremental.apply_document(doc_id, {"title": doc_id}, [_entity(entity_id) for entity_id in chosen])
+        for entity_id in chosen:
+            memberships.setdefault(entity_id, set()).add(doc_id)
+
+    entity_items = [
+        {"entity_id": entity_id, "entity_name": entity_id.title(), "doc_ids": sorted(doc_ids)}
+        for entity_id, doc_ids in memberships.items()
+    ]
+    rebuilt = GraphSnapshot.build(entity_items, {}, edges_per_doc=1000)
+
+    assert _edge_weights(incremental) == _edge_weights(rebuilt)
+
+
+def _ladder_memberships(doc_count):
+    """Docs ``i`` and ``j`` share ``(i + j) % doc_count`` private entities, so no row has two equal candidates."""
+
+    memberships = {}
+    for left in range(doc_count):
+        for right in range(left + 1, doc_count):
+            for index in range((left + right) % doc_count):
+                memberships[f"pair-{left}-{right}-{index}"] = {f"doc-{left}", f"doc-{right}"}
+    return memberships
+
+
+def _rebuild(memberships, edges_per_doc):
+    entity_items = [
+        {"entity_id": entity_id, "entity_name": entity_id, "doc_ids": sorted(doc_ids)}
+        for entity_id, doc_ids in memberships.items() if doc_ids
+    ]
+    return GraphSnapshot.build(entity_items, {}, edges_per_doc=edges_per_doc)
+
+
+def test_incremental_maintenance_matches_rebuild_with_a_small_top_k():
+    memberships = _ladder_memberships(7)
+    incremental = GraphSnapshot(edges_per_doc=2)
+    order = [f"doc-{index}" for index in range(7)]
+    random.Random(3).shuffle(order)
+    for doc_id in order:
+        entity_ids = [entity_id for entity_id, doc_ids in memberships.items() if doc_id in doc_ids]
+        incremental.apply_document(doc_id, {"title": doc_id}, [_entity(entity_id) for entity_id in entity_ids])
+    assert _edge_weights(incremental) == _edge_weights(_rebuild(memberships, 2))
+
+    for removed in ("doc-6", "doc-2"):
+        incremental.remove_document(removed)
+        for doc_ids in memberships.values():
+            doc_ids.discard(removed)
+        # Neighbours that lost an edge to the removed doc pick up their next-best one.
+        assert _edge_weights(incremental) == _edge_weights(_rebuild(memberships, 2))
+
+
+def test_incremental_scores_match_a_full_build():
+    rng = random.Random(11)
+    vocabulary = [f"entity-{index}" for index in range(30)]
+    incremental = GraphSnapshot(edges_per_doc=3)
+    memberships = {}
+    for doc_index in range(40):
+        doc_id = f"doc-{doc_index:02d}"
+        chosen = rng.sample(vocabulary, rng.randint(1, 5))
+        incremental.apply_document(doc_id, {"title": doc_id}, [_entity(entity_id, entity_id) for entity_id in chosen])
+        for entity_id in chosen:
+            memberships.setdefault(entity_id, set()).add(doc_id)
+    # IDF moves with every ingest, so the served edges, scores and order must all match a rebuild.
+    assert incremental.relationships() == _rebuild(memberships, 3).relationships()
+
+    for removed in ("doc-05", "doc-17", "doc-33"):
+        incremental.remove_document(removed)
+        for doc_ids in memberships.values():
+            doc_ids.discard(removed)
+        assert incremental.relationships() == _rebuild(memberships, 3).relationships()
+
+
+def test_remove_document_drops_its_edges_and_orphaned_entities():
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One"}, [_entity("alpha"), _entity("solo")])
+    snapshot.apply_document("doc-2", {"title": "Two"}, [_entity("alpha")])
+
+    snapshot.remove_document("doc-1")
+
+    assert snapshot.relationships() == []
+    assert "solo" not in snapshot.entities
+    assert snapshot.entities["alpha"]["doc_ids"] == ["doc-2"]
+
+
+def test_store_versions_snapshots_and_serves_etags():
+    table = SnapshotTable()
+    store = GraphSnapshotStore(table)
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One", "updated_at": "2025-01-01T00:00:00"}, [_entity("alpha")])
+
+    first = store.save("user-1", snapshot)
+    assert store.save("user-1", snapshot) is None  # a concurrent first build loses
+
+    second = store.update(
+        "user-1", lambda current: current.apply_document("doc-2", {"title": "Two"}, [_entity("alpha")])
+    )
+
+    assert second["version"] == first["version"] + 1
+    assert second["etag"] != first["etag"]
+    assert etag_matches(f'W/{second["etag"]}', second["etag"])
+    assert not etag_matches(first["etag"], second["etag"])
+    payload = store.decode(table.items[("USER#user-1", "GRAPH#SNAPSHOT")]).payload()
+    assert payload["doc_relationships"][0]["shared_entities"] == ["Alpha"]
+    assert payload["doc_metadata"]["doc-1"]["entity_count"] == 1
+    assert store.update("user-2", lambda current: None) is None
+
+
+def test_large_snapshots_spill_to_s3():
+    table = SnapshotTable()
+    s3 = StubS3()
+    store = GraphSnapshotStore(table, s3=s3, bucket="bucket", inline_limit=10)
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One"}, [_entity("alpha")])
+
+    row = store.save("user-1", snapshot)
+    store.update("user-1", lambda current: current.apply_document("doc-2", {}, [_entity("alpha")]))
+
+    assert "payload" not in row
+    assert list(s3.objects) == [store.read("user-1")["s3_key"]]
+    assert store.read("user-1")["s3_key"].startswith("graph-snapshots/user-1/2-")
+    assert len(store.decode(store.read("user-1")).docs) == 2
+
+    # A forced rebuild replaces the stored snapshot and its spilled object.
+    store.replace("user-1", GraphSnapshot())
+    assert list(s3.objects) == [store.read("user-1")["s3_key"]]
+    assert store.read("user-1")["s3_key"].startswith("graph-snapshots/user-1/3-")
+
+
+def test_racing_spilled_saves_keep_the_winners_object():
+    table = SnapshotTable()
+    s3 = StubS3()
+    store = GraphSnapshotStore(table, s3=s3, bucket="bucket", inline_limit=10)
+    first = GraphSnapshot()
+    first.apply_document("doc-1", {"title": "One"}, [_entity("alpha")])
+    store.save("user-1", first)
+
+    # Both writers read version 1; A commits first and B's conditional write fails.
+    row = store.read("user-1")
+    writer_a, writer_b = store.decode(row), store.decode(row)
+    writer_a.apply_document("doc-2", {"title": "Two"}, [_entity("alpha")])
+    writer_b.apply_document("doc-3", {"title": "Three"}, [_entity("alpha")])
+    assert store.save("user-1", writer_a, expected_version=1) is not None
+    objects = set(s3.objects)
+    assert store.save("user-1", writer_b, expected_version=1) is None
+    assert set(s3.objects) == objects  # the loser cleaned up only its own object
+
+    stored = store.read("user-1")
+    assert stored["s3_key"] in s3.objects
+    assert sorted(store.decode(stored).docs) == ["doc-1", "doc-2"]
+    # B's retry builds on A's snapshot.
+    store.update("user-1", lambda current: current.apply_document("doc-3", {"title": "Three"}, [_entity("alpha")]))
+    assert sorted(store.decode(store.read("user-1")).docs) == ["doc-1", "doc-2", "doc-3"]
+    assert store.read("user-1")["s3_key"] in s3.objects
+
+
+def test_saves_rewrite_only_changed_adjacency_rows():
+    table = SnapshotTable()
+    store = GraphSnapshotStore(table)
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One"}, [_entity("alpha"), _entity("solo")])
+    snapshot.apply_document("doc-2", {"title": "Two"}, [_entity("alpha")])
+    snapshot.apply_document("doc-3", {"title": "Three"}, [_entity("beta")])
+    store.save("user-1", snapshot)
+
+    store.update("user-1", lambda current: current.apply_document("doc-4", {"title": "Four"}, [_entity("alpha")]))
+
+    versions = {sk: item["version"] for (_, sk), item in table.items.items() if sk.startswith("GRAPH#ADJ#")}
+    assert versions["GRAPH#ADJ#DOC#doc-3"] == 1
+    assert versions["GRAPH#ADJ#ENTITY#beta"] == 1
+    assert versions["GRAPH#ADJ#DOC#doc-4"] == 2
+    assert versions["GRAPH#ADJ#ENTITY#alpha"] == 2
+    assert [entry[0] for entry in store.read_adjacency("user-1", "ENTITY", "alpha")["docs"]] == [
+        "doc-1", "doc-2", "doc-4",
+    ]
+
+    store.update("user-1", lambda current: current.remove_document("doc-3"))
+    assert store.read_adjacency("user-1", "DOC", "doc-3") is None
+    assert not table.items[("USER#user-1", "GRAPH#SNAPSHOT")].get("adjacency_pending")
+
+
+def test_failed_adjacency_writes_are_retried_by_the_next_save(monkeypatch):
+    monkeypatch.setattr("dynamo_batch.time.sleep", lambda seconds: None)
+    table = SnapshotTable()
+    store = GraphSnapshotStore(table)
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One"}, [_entity("alpha")])
+    store.save("user-1", snapshot)
+
+    table.fail_batch_writes = 1
+    try:
+        store.update("user-1", lambda current: current.apply_document("doc-2", {"title": "Two"}, [_entity("alpha")]))
+    except ClientError:
+        pass
+    assert table.items[("USER#user-1", "GRAPH#SNAPSHOT")]["adjacency_pending"] is True
+    assert store.read_adjacency("user-1", "DOC", "doc-2") is None
+
+    store.update("user-1", lambda current: current.apply_document("doc-3", {"title": "Three"}, [_entity("beta")]))
+    entries = store.read_adjacency_batch("user-1", [("DOC", "doc-2"), ("ENTITY", "alpha"), ("DOC", "missing")])
+    assert entries[("DOC", "doc-2")]["docs"][0][0] == "doc-1"
+    assert [doc[0] for doc in entries[("ENTITY", "alpha")]["docs"]] == ["doc-1", "doc-2"]
+    assert ("DOC", "missing") not in entries
+    assert table.batch_reads == [3, 2, 1]
+
+
+def test_renames_rewrite_only_the_renamed_document_row():
+    table = SnapshotTable()
+    store = GraphSnapshotStore(table)
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One"}, [_entity("alpha")])
+    snapshot.apply_document("doc-2", {"title": "Two"}, [_entity("alpha")])
+    first = store.save("user-1", snapshot)
+
+    assert store.rename_document("user-1", "doc-1", "One") == first  # unchanged title: no new version
+    renamed = store.rename_document("user-1", "doc-1", "Uno")
+
+    versions = {sk: item["version"] for (_, sk), item in table.items.items() if sk.startswith("GRAPH#ADJ#")}
+    assert renamed["version"] == first["version"] + 1
+    assert versions == {"GRAPH#ADJ#DOC#doc-1": 2, "GRAPH#ADJ#DOC#doc-2": 1, "GRAPH#ADJ#ENTITY#alpha": 1}
+    assert store.read_adjacency("user-1", "DOC", "doc-1")["title"] == "Uno"
+    assert store.read_adjacency("user-1", "ENTITY", "beta") is None
+
+
+def test_saves_defer_the_layout_to_refresh_layout():
+    table = SnapshotTable()
+    store = GraphSnapshotStore(table)
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One"}, [{"entity_id": "alpha", "name": "Alpha"}])
+
+    saved = store.save("user-1", snapshot)
+    assert store.decode(saved).layout == {}
+
+    laid_out = store.refresh_layout("user-1")
+    restored = store.decode(laid_out)
+    assert laid_out["version"] == saved["version"] + 1
+    assert set(restored.layout) == {"entity:alpha", "doc:doc-1"}
+    assert restored.layout_pending == set()
+    assert store.refresh_layout("user-1")["version"] == laid_out["version"]  # nothing changed since
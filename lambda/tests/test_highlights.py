@@ -0,0 +1,103 @@
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import highlights  # noqa: E402
+from highlights import StreamingHighlighter, highlight_pages  # noqa: E402
+from keyword_matcher import KeywordMatcher  # noqa: E402
+
+MATCHER = KeywordMatcher({"action": {"review", "deliver"}, "date": {"friday", "march"}, "positive": {"happy"}})
+KINDS = {"action": "action", "date": "important"}
+SENTENCES = [
+    "Please review the supplier contract before the board meeting on Friday.",
+    "The warehouse lease renewal is still waiting on the landlord's response.",
+    "Our team was happy with the outcome of the negotiation in March overall.",
+    "Short one.",
+    "The finance team will deliver the revised forecast: numbers, risks; owners.",
+]
+
+
+def _run(pages, **kwargs):
+    return highlight_pages(pages, MATCHER, KINDS, **kwargs).highlights()
+
+
+def _without_ids(found):
+    return [{key: value for key, value in highlight.items() if key != "id"} for highlight in found]
+
+
+def test_highlights_are_ranked_and_classified():
+    found = _run([" ".join(SENTENCES)])
+
+    assert [highlight["text"] for highlight in found] == [SENTENCES[4], SENTENCES[0], SENTENCES[2], SENTENCES[1]]
+    assert [highlight["kind"] for highlight in found] == ["action", "action", "important", "key"]
+    assert found[0]["score"] == 0.9667
+
+
+def test_page_streams_keep_exact_offsets():
+    pages = [SENTENCES[0] + " " + SENTENCES[1][:30], SENTENCES[1][31:] + " " + SENTENCES[2], SENTENCES[4]]
+    source = "\n".join(pages)
+
+    found = _run(pages)
+
+    by_text = {highlight["text"]: highlight for highlight in found}
+    spanning = SENTENCES[1][:30] + "\n" + SENTENCES[1][31:]
+    assert set(by_text) == {SENTENCES[0], spanning, SENTENCES[2], SENTENCES[4]}
+    for highlight in found:
+        assert source[highlight["offset"]:highlight["offset"] + highlight["length"]] == highlight["text"]
+        assert highlight["text"] in highlight["context"]
+
+
+def test_streaming_matches_single_pass_over_many_pages():
+    pages = [f"Page {index}. " + " ".join(SENTENCES) for index in range(50)]
+
+    assert _without_ids(_run(pages, max_count=3)) == _without_ids(_run(["\n".join(pages)], max_count=3))
+
+
+def test_duplicates_keep_their_best_scoring_first_occurrence():
+    found = _run([SENTENCES[1], SENTENCES[1].upper(), SENTENCES[2]])
+
+    assert [highlight["text"] for highlight in found] == [SENTENCES[2], SENTENCES[1]]
+    assert found[1]["offset"] == 0
+
+
+def test_only_survivors_get_ids(monkeypatch):
+    calls = []
+    monkeypatch.setattr(highlights.uuid, "uuid4", lambda: calls.append(1) or uuid.UUID(int=len(calls)))
+
+    found = _run([" ".join(SENTENCES)] * 40, max_count=2)
+
+    assert len(found) == len(calls) == 2
+
+
+def test_memory_is_bounded_by_the_page_not_the_document():
+    highlighter = StreamingHighlighter(MATCHER, KINDS, max_count=2)
+    for _ in range(500):
+        highlighter.feed(" ".join(SENTENCES))
+        assert len(highlighter._buffer) < 2 * len(" ".join(SENTENCES)) + 200
+        assert len(highlighter._heap) <= 2
+
+    assert highlighter.counts == {"action": 1000, "date": 1000, "positive": 500}
+
+
+def test_overlong_sentences_are_skipped_without_buffering_them():
+    highlighter = StreamingHighlighter(MATCHER, KINDS)
+    for _ in range(200):
+        highlighter.feed("an endless clause without any terminal punctuation at all")
+        assert len(highlighter._buffer) < 400
+    highlighter.feed(". " + SENTENCES[0])
+
+    assert [highlight["text"] for highlight in highlighter.highlights()] == [SENTENCES[0]]
+
+
+def test_closed_highlighters_reject_input():
+    highlighter = StreamingHighlighter(MATCHER, KINDS)
+    highlighter.close()
+
+    with pytest.raises(ValueError):
+        highlighter.feed("More text.")
+    with pytest.raises(ValueError):
+        StreamingHighlighter(MATCHER, KINDS, max_count=0)
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from jobs import (  # noqa: E402
+    TTL_ATTRIBUTE,
+    claim_idempotency_key,
+    complete_idempotency_key,
+    create_job,
+    document_stage_reporter,
+    format_job,
+    get_job,
+    mark_document_failed,
+    release_idempotency_key,
+)
+
+
+class StubTable:
+    def __init__(self, items=()):
+        self.items = {(item["pk"], item["sk"]): dict(item) for item in items}
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get((Key["pk"], Key["sk"]))
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item, **kwargs):
+        key = (Item["pk"], Item["sk"])
+        current = self.items.get(key)
+        if kwargs.get("ConditionExpression") and current is not None:
+            values = kwargs["ExpressionAttributeValues"]
+            if current.get("status") == values[":completed"] or current["lease_expires_at"] >= values[":now"]:
+                raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        self.items[key] = dict(Item)
+
+    def delete_item(self, Key):
+        self.items.pop((Key["pk"], Key["sk"]), None)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, **kwargs):
+        key = (Key["pk"], Key["sk"])
+        if "attribute_exists(pk)" in kwargs.get("ConditionExpression", ""):
+            current = self.items.get(key)
+            if current is None or current.get("processing_status") == "deleting":
+                raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        item = self.items.setdefault(key, dict(Key))
+        names = kwargs.get("ExpressionAttributeNames", {})
+        for assignment in UpdateExpression.replace("SET ", "", 1).split(", "):
+            field, placeholder = [part.strip() for part in assignment.split("=")]
+            item[names.get(field, field)] = ExpressionAttributeValues[placeholder]
+
+
+def test_stage_reporter_mirrors_progress_on_job_and_document():
+    table = StubTable([{"pk": "USER#u1", "sk": "DOC#doc_1", "processing_status": "queued"}])
+    job = create_job(table, "u1", "ingest_document", doc_id="doc_1")
+
+    report = document_stage_reporter(table, "u1", job["job_id"], "doc_1")
+    report("embedding")
+
+    doc = table.items[("USER#u1", "DOC#doc_1")]
+    assert doc["processing_status"] == "processing"
+    assert doc["processing_stage"] == "embedding"
+    assert format_job(get_job(table, "u1", job["job_id"]))["stage"] == "embedding"
+
+
+def test_mark_document_failed_leaves_deleting_documents_alone():
+    table = StubTable([
+        {"pk": "USER#u1", "sk": "DOC#doc_1", "processing_status": "processing"},
+        {"pk": "USER#u1", "sk": "DOC#doc_2", "processing_status": "deleting"},
+    ])
+
+    mark_document_failed(table, "u1", "doc_1", "boom")
+    mark_document_failed(table, "u1", "doc_2", "boom")
+    mark_document_failed(table, "u1", "doc_3", "boom")
+
+    assert table.items[("USER#u1", "DOC#doc_1")]["processing_status"] == "failed"
+    assert table.items[("USER#u1", "DOC#doc_1")]["last_error"] == "boom"
+    assert table.items[("USER#u1", "DOC#doc_2")]["processing_status"] == "deleting"
+    assert ("USER#u1", "DOC#doc_3") not in table.items
+
+
+def test_idempotency_key_skips_redelivered_jobs():
+    table = StubTable()
+
+    assert claim_idempotency_key(table, "u1", "media_1") == "claimed"
+    assert claim_idempotency_key(table, "u1", "media_1") == "running"
+
+    complete_idempotency_key(table, "u1", "media_1", vector_count=3)
+    assert claim_idempotency_key(table, "u1", "media_1") == "completed"
+    row = table.items[("USER#u1", "IDEMPOTENCY#media_1")]
+    assert row[TTL_ATTRIBUTE] > row["lease_expires_at"]
+    assert "doc_id" not in row
+
+
+def test_idempotency_key_can_be_reclaimed_after_release_or_expired_lease():
+    table = StubTable()
+
+    claim_idempotency_key(table, "u1", "media_1")
+    release_idempotency_key(table, "u1", "media_1")
+    assert claim_idempotency_key(table, "u1", "media_1") == "claimed"
+
+    assert claim_idempotency_key(table, "u1", "media_2", lease_seconds=-1) == "claimed"
+    assert claim_idempotency_key(table, "u1", "media_2") == "claimed"
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from keyword_matcher import KeywordMatcher  # noqa: E402
+
+LEXICONS = {
+    "action": {"review", "follow-up", "deadline", "plan"},
+    "date": {"may", "deadline", "march", "by "},
+    "positive": {"happy", "grateful"},
+}
+
+
+def test_matches_report_offsets_and_every_category():
+    matcher = KeywordMatcher(LEXICONS)
+    text = "Review the PLAN by March; the deadline is firm."
+
+    matches = list(matcher.finditer(text))
+
+    assert [text[match.start:match.end] for match in matches] == ["Review", "PLAN", "by", "March", "deadline"]
+    assert matches[-1].categories == ("action", "date")
+    assert matcher.scan(text).counts == {"action": 3, "date": 3}
+
+
+def test_keywords_match_whole_words_only():
+    matcher = KeywordMatcher(LEXICONS)
+
+    assert list(matcher.finditer("Maybe the planner is unhappy, nearby deadlines slip.")) == []
+    assert [match.keyword for match in matcher.finditer("Schedule a follow-up (happy).")] == ["follow-up", "happy"]
+
+
+def test_longest_keyword_sharing_a_prefix_wins():
+    matcher = KeywordMatcher({"short": {"plan"}, "long": {"planning", "plans"}})
+
+    assert [match.keyword for match in matcher.finditer("plan planning plans planned")] == ["plan", "planning", "plans"]
+
+
+def test_scan_attributes_hits_to_sentences():
+    matcher = KeywordMatcher(LEXICONS)
+    text = "We are grateful. Review it by May."
+
+    scan = matcher.scan(text)
+
+    assert scan.categories_between(0, 16) == {"positive"}
+    assert scan.categories_between(17, len(text)) == {"action", "date"}
+    assert [match.keyword for match in scan.between(17, 23)] == ["review"]
+
+
+def test_windows_do_not_match_words_cut_by_the_start():
+    matcher = KeywordMatcher(LEXICONS)
+    text = "unhappy happy"
+
+    assert [match.start for match in matcher.finditer(text, 2)] == [8]
+    assert matcher.category_counts(text, 8, 10) == {}
+
+
+def test_offsets_survive_characters_that_lowercase_to_longer_strings():
+    matcher = KeywordMatcher(LEXICONS)
+    text = "İstanbul review"
+
+    (match,) = matcher.finditer(text)
+
+    assert text[match.start:match.end] == "review"
+
+
+def test_empty_lexicons_are_rejected():
+    with pytest.raises(ValueError):
+        KeywordMatcher({"empty": set()})
@@ -1,4 +1,7 @@
+import json
 import math
+import threading
+import time
 from decimal import Decimal
 import sys
 from pathlib import Path
@@ -15,9 +18,14 @@ from knowledge_graph import (  # noqa: E402
     format_document_entities,
     format_entity_detail,
     format_user_entities,
+    group_chunks,
     parse_entity_payload,
+    reduce_chunk_entities,
+    run_chunked_entity_extraction,
     run_entity_extraction,
+    sample_evenly,
 )
+from llm_cache import LlmResultCache  # noqa: E402
 
 
 class StubLLM:
@@ -80,6 +88,123 @@ def test_run_entity_extraction_uses_llm_stub():
     assert entities[0].mentions == ["Graph DB buildout"]
 
 
+class WindowLLM:
+    """Returns the entities named on ``Entity: <name>`` lines of the excerpt, tracking concurrency."""
+
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            excerpt = messages[-1]["content"]
+            if self.fail_on and self.fail_on in excerpt:
+                raise RuntimeError("rate limited")
+            names = [line.split(":", 1)[1].strip() for line in excerpt.splitlines() if line.startswith("Entity:")]
+            payload = {"entities": [{"name": name, "type": "ORG", "salience": 0.8} for name in names]}
+
+            class _Response:
+                content = json.dumps(payload)
+
+            return _Response()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _window_chunks(names):
+    # Each chunk is large enough to fill its own window.
+    return [f"Entity: {name}\n" + "filler text " * 60 for name in names]
+
+
+def test_group_chunks_respects_the_window_budget():
+    chunks = [f"chunk {index} " + "x" * 90 for index in range(30)]
+
+    windows = group_chunks(chunks, max_chars=400)
+
+    assert all(len(window) <= 400 for window in windows)
+    assert "\n\n".join(windows) == "\n\n".join(chunks)
+    assert group_chunks(["", "  "]) == []
+
+
+def test_sample_evenly_spreads_over_the_document():
+    assert sample_evenly(5, None) == [0, 1, 2, 3, 4]
+    assert sample_evenly(100, 5) == [0, 25, 50, 74, 99]
+    assert sample_evenly(3, 1) == [0]
+
+
+def test_reduce_weights_salience_by_frequency():
+    acme = {"name": "Acme", "type": "ORG", "salience": 0.6, "mentions": ["Acme signed"]}
+    once = {"name": "Bob", "type": "PERSON", "salience": 0.9}
+
+    entities = reduce_chunk_entities([[acme], [acme, once], [dict(acme, salience=0.7)], []])
+
+    assert [entity.name for entity in entities] == ["Acme", "Bob"]
+    assert math.isclose(entities[0].salience, 0.7)
+    assert math.isclose(entities[1].salience, round(0.9 / (1 + math.log(3)), 4))
+    assert entities[0].mentions == ["Acme signed"]
+    assert reduce_chunk_entities([[once]])[0].salience == 0.9
+
+
+def test_chunked_extraction_covers_the_whole_document_concurrently():
+    names = [f"Company {index}" for index in range(12)]
+    llm = WindowLLM(delay=0.02)
+
+    entities = run_chunked_entity_extraction(_window_chunks(names), llm, max_workers=4, window_chars=700)
+
+    assert {entity.name for entity in entities} == set(names)
+    assert llm.calls == 12
+    assert 1 < llm.peak <= 4
+
+
+def test_chunked_extraction_samples_long_documents():
+    llm = WindowLLM()
+
+    entities = run_chunked_entity_extraction(_window_chunks([f"Co {index}" for index in range(40)]), llm,
+                                             max_windows=5, window_chars=700)
+
+    assert llm.calls == 5
+    assert {entity.name for entity in entities} == {"Co 0", "Co 10", "Co 20", "Co 29", "Co 39"}
+
+
+def test_chunked_extraction_reuses_cached_windows_and_skips_failures():
+    cache = LlmResultCache()
+    chunks = _window_chunks(["Acme", "Globex", "Initech"])
+
+    first = run_chunked_entity_extraction(chunks, WindowLLM(fail_on="Globex"), cache=cache, window_chars=700)
+    assert {entity.name for entity in first} == {"Acme", "Initech"}
+
+    llm = WindowLLM()
+    edited = chunks[:2] + [chunks[2] + "An edit."]
+    second = run_chunked_entity_extraction(edited, llm, cache=cache, window_chars=700)
+    # Acme is served from the cache; the failed and edited windows are extracted again.
+    assert llm.calls == 2
+    assert {entity.name for entity in second} == {"Acme", "Globex", "Initech"}
+
+
+def test_chunked_extraction_only_caches_parsed_output():
+    cache = LlmResultCache()
+    chunks = _window_chunks(["Acme"])
+
+    assert run_chunked_entity_extraction(chunks, StubLLM("Sorry, I cannot help."), cache=cache) == []
+    empty = StubLLM('{"entities": []}')
+    assert run_chunked_entity_extraction(chunks, empty, cache=cache) == []
+    assert len(empty.calls) == 1  # the unparseable reply was not cached
+
+    again = StubLLM('{"entities": []}')
+    assert run_chunked_entity_extraction(chunks, again, cache=cache) == []
+    assert again.calls == []  # "no entities" is a real answer and is reused
+
+
 @pytest.mark.parametrize(
     "entities",
     [
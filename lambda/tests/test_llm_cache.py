@@ -0,0 +1,62 @@
+import io
+import sys
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from llm_cache import LlmResultCache, cache_namespace  # noqa: E402
+
+
+class StubS3:
+    def __init__(self):
+        self.objects = {}
+        self.gets = 0
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+def test_results_are_shared_through_s3_and_served_from_memory():
+    s3 = StubS3()
+    LlmResultCache(s3, "bucket").put("entities-abc", "f00d", [{"name": "Acme"}])
+
+    reader = LlmResultCache(s3, "bucket")
+    assert reader.get("entities-abc", "f00d") == [{"name": "Acme"}]
+    assert reader.get("entities-abc", "f00d") == [{"name": "Acme"}]
+    assert s3.gets == 1
+    assert reader.get("entities-abc", "beef") is None
+    assert ("bucket", "llm-cache/entities-abc/f0/f00d.json") in s3.objects
+
+
+def test_memory_tier_is_bounded():
+    cache = LlmResultCache(memory_entries=2)
+    for digest in ("a1", "b2", "c3"):
+        cache.put("ns", digest, digest)
+
+    assert cache.get("ns", "a1") is None
+    assert cache.get("ns", "c3") == "c3"
+
+
+def test_unreadable_entries_are_misses():
+    s3 = StubS3()
+    cache = LlmResultCache(s3, "bucket")
+    s3.objects[("bucket", cache.object_key("ns", "dead"))] = b"not json"
+
+    assert cache.get("ns", "dead") is None
+
+
+def test_namespace_changes_with_the_prompt_and_model():
+    first = cache_namespace("summary", "Summarize this.", "gpt-4o-mini")
+
+    assert first.startswith("summary-")
+    assert first == cache_namespace("summary", "Summarize this.", "gpt-4o-mini")
+    assert first != cache_namespace("summary", "Summarize this briefly.", "gpt-4o-mini")
+    assert first != cache_namespace("summary", "Summarize this.", "gpt-4o")
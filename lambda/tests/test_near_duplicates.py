@@ -0,0 +1,155 @@
+import sys
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from content_index import chunk_vector_id  # noqa: E402
+from near_duplicates import (  # noqa: E402
+    STORE_BANDS,
+    LshIndex,
+    SignatureStore,
+    estimate_jaccard,
+    find_near_duplicates,
+    match_existing,
+    minhash_signature,
+    ref_vector_id,
+    signature_ref,
+)
+
+FOOTER = ("CONFIDENTIAL. Acme Corporation, all rights reserved. Page {page} of 12. Do not distribute "
+          "this document without written permission from the Acme legal department.")
+BODY = ("The supplier shall deliver the goods within thirty days of the purchase order and bears the "
+        "risk of loss until the goods are accepted at the buyer's warehouse.")
+
+
+class StubTable:
+    name = "docs"
+
+    def __init__(self):
+        self.items = {}
+        self.batch_keys = 0
+        self.writes = 0
+        self.meta = self
+        self.client = self
+
+    def get_item(self, Key):
+        item = self.items.get((Key["pk"], Key["sk"]))
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.writes += 1
+        self.items[(Item["pk"], Item["sk"])] = dict(Item)
+
+    def delete_item(self, Key, ConditionExpression=None):
+        item = self.items.get((Key["pk"], Key["sk"]))
+        if ConditionExpression == "attribute_not_exists(doc_ids)" and item and item.get("doc_ids"):
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "DeleteItem")
+        self.items.pop((Key["pk"], Key["sk"]), None)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, ReturnValues):
+        self.writes += 1
+        action, attribute, _ = UpdateExpression.split()
+        item = self.items.setdefault((Key["pk"], Key["sk"]), dict(Key))
+        values = set(item.get(attribute) or ()) | ExpressionAttributeValues[":doc"] if action == "ADD" else (
+            set(item.get(attribute) or ()) - ExpressionAttributeValues[":doc"])
+        if values:
+            item[attribute] = values
+        else:
+            item.pop(attribute, None)  # DynamoDB never stores an empty set
+        return {"Attributes": {attribute: values} if values else {}}
+
+    def batch_get_item(self, RequestItems):
+        keys = RequestItems[self.name]["Keys"]
+        self.batch_keys += len(keys)
+        found = [self.items.get((key["pk"], key["sk"])) for key in keys]
+        return {"Responses": {self.name: [dict(item) for item in found if item]}}
+
+
+def test_signatures_estimate_similarity():
+    first = minhash_signature(FOOTER.format(page=3))
+
+    assert minhash_signature(FOOTER.format(page=3)) == first
+    assert estimate_jaccard(first, minhash_signature(FOOTER.format(page=4))) >= 0.7
+    assert estimate_jaccard(first, minhash_signature(BODY)) < 0.2
+
+
+def test_near_duplicates_collapse_into_first_occurrence():
+    chunks = [FOOTER.format(page=1), BODY, FOOTER.format(page=2), FOOTER.format(page=3)]
+
+    result = find_near_duplicates(chunks)
+
+    assert result.kept == [0, 1]
+    assert result.collapsed == {2: 0, 3: 0}
+    assert result.existing == {}
+
+
+def test_chunks_match_the_users_other_documents_but_not_their_own():
+    existing = LshIndex()
+    existing.add(signature_ref("doc_a", "f00"), minhash_signature(FOOTER.format(page=9)))
+    existing.add(signature_ref("doc_b", "b0d"), minhash_signature(BODY))
+
+    result = find_near_duplicates([BODY, FOOTER.format(page=1)], existing, exclude_prefix=signature_ref("doc_b", ""))
+
+    assert result.existing == {1: "doc_a#f00"}
+    assert ref_vector_id(result.existing[1]) == chunk_vector_id("doc_a", "f00")
+
+
+def test_signature_store_round_trip_and_document_removal():
+    table = StubTable()
+    store = SignatureStore(table)
+    assert len(store.candidates("u1", [minhash_signature(BODY)])) == 0
+
+    store.replace_document("u1", "doc_a", {"f00": minhash_signature(FOOTER.format(page=1))})
+    store.replace_document("u1", "doc_b", {"b0d": minhash_signature(BODY)})
+    candidates = store.candidates("u1", [minhash_signature(FOOTER.format(page=5))])
+    assert set(candidates.signatures) == {"doc_a#f00"}  # doc_b shares no bucket and is never read
+    assert candidates.query(minhash_signature(FOOTER.format(page=5)))[0] == "doc_a#f00"
+    assert len(store.candidates("u1", [minhash_signature(BODY)], exclude_doc_id="doc_b")) == 0
+
+    store.remove_document("u1", "doc_a")
+    assert set(store.candidates("u1", [minhash_signature(FOOTER.format(page=1))]).signatures) == set()
+    assert {sk for _, sk in table.items if sk.startswith("LSH#")} == store._buckets([minhash_signature(BODY)])
+
+
+def test_saves_write_only_the_buckets_that_change():
+    table = StubTable()
+    store = SignatureStore(table, max_workers=4)
+    footer, body = minhash_signature(FOOTER.format(page=1)), minhash_signature(BODY)
+
+    store.replace_document("u1", "doc_a", {"f00": footer})
+    assert table.writes == 1 + len(store._buckets([footer])) <= 1 + STORE_BANDS
+
+    table.writes = 0
+    store.replace_document("u1", "doc_a", {"f00": footer})
+    assert table.writes == 0  # unchanged re-save
+
+    store.replace_document("u1", "doc_a", {"f00": footer, "b0d": body})
+    assert table.writes == 1 + len(store._buckets([body]) - store._buckets([footer]))
+
+
+def test_candidates_are_capped_to_the_closest_documents():
+    table = StubTable()
+    store = SignatureStore(table, max_candidate_docs=2)
+    store.replace_document("u1", "exact", {"e": minhash_signature(FOOTER.format(page=1))})
+    for page in (2, 3, 4):
+        store.replace_document("u1", f"near-{page}", {"n": minhash_signature(FOOTER.format(page=page))})
+
+    probe = minhash_signature(FOOTER.format(page=1))
+    candidates = store.candidates("u1", [probe])
+
+    assert len({ref.split("#")[0] for ref in candidates.signatures}) == 2
+    assert "exact#e" in candidates.signatures
+    result = match_existing(find_near_duplicates([FOOTER.format(page=1)]), candidates)
+    assert result.existing == {0: "exact#e"}
+
+
+def test_index_removal_clears_buckets():
+    index = LshIndex()
+    signature = minhash_signature(BODY)
+    index.add("doc#1", signature)
+    index.remove_prefix("doc#")
+
+    assert index.query(signature) is None
+    assert index._buckets == {}
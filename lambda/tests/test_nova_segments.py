@@ -0,0 +1,101 @@
+import base64
+import io
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from embeddings import MediaSegment, NovaEmbeddingClient, NovaEmbeddingRequest, plan_segments  # noqa: E402
+
+
+class StubBedrock:
+    def __init__(self):
+        self.bodies = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def invoke_model(self, body, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        decoded = json.loads(body)
+        self.bodies.append(decoded)
+        index = decoded["input"]["segment"]["index"]
+        with self.lock:
+            self.active -= 1
+        return {"body": io.BytesIO(json.dumps({"embeddings": [[float(index)]]}).encode("utf-8"))}
+
+
+class StubSession:
+    def __init__(self, client):
+        self._client = client
+
+    def client(self, name):
+        return self._client
+
+
+class StubS3:
+    def __init__(self, data):
+        self.data = data
+        self.reads = []
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self.reads.append(kwargs)
+        return {"Body": io.BytesIO(self.data)}
+
+
+def _client(bedrock):
+    return NovaEmbeddingClient(region="us-east-1", model_id="nova", boto3_session=StubSession(bedrock))
+
+
+def _request():
+    return NovaEmbeddingRequest(user_id="u1", doc_id="doc_1", media_type="audio/mpeg", s3_uri="s3://b/k")
+
+
+def test_plan_segments_keeps_time_ranges_only():
+    planned = plan_segments(segments=[{"start": 0, "end": 10}, {"startSeconds": 50, "endSeconds": 100}])
+
+    assert planned == [MediaSegment(index=0, start_seconds=0.0, end_seconds=10.0),
+                       MediaSegment(index=1, start_seconds=50.0, end_seconds=100.0)]
+    assert [segment.end_seconds for segment in plan_segments(duration_seconds=65, window_seconds=30)] == [30, 60, 65]
+    assert plan_segments() == [MediaSegment(index=0)]
+
+
+def test_inline_embedding_sends_the_whole_object_once():
+    bedrock = StubBedrock()
+    s3 = StubS3(b"\x00\x00\x00\x18ftypmp42")
+    request = NovaEmbeddingRequest(user_id="u1", doc_id="doc_1", media_type="video/mp4", s3_uri="s3://b/k",
+                                   segments=[{"start": 0, "end": 30}])
+
+    results = list(_client(bedrock).embed_segments(request, plan_segments(), s3_client=s3, bucket="b", key="k"))
+
+    assert len(results) == 1
+    assert s3.reads == [{}]
+    assert base64.b64decode(bedrock.bodies[0]["input"]["data"]) == s3.data
+    assert bedrock.bodies[0]["input"]["segments"] == [{"start": 0, "end": 30}]
+
+
+def test_time_slices_are_never_sent_inline():
+    client = _client(StubBedrock())
+    segments = plan_segments(duration_seconds=60, window_seconds=30)
+
+    with pytest.raises(ValueError):
+        list(client.embed_segments(_request(), segments, s3_client=StubS3(b""), bucket="b", key="k"))
+    with pytest.raises(ValueError):
+        client.embed_segment(_request(), segments[0], payload=b"slice")
+
+
+def test_embed_segments_by_reference_never_downloads():
+    bedrock = StubBedrock()
+    segments = plan_segments(segments=[{"start": 0, "end": 30}, {"start": 30, "end": 60}])
+
+    results = list(_client(bedrock).embed_segments(_request(), segments, by_reference=True))
+
+    assert len(results) == 2
+    assert all("data" not in body["input"] and body["input"]["source"] == "s3://b/k" for body in bedrock.bodies)
+    assert {body["input"]["segment"]["startSeconds"] for body in bedrock.bodies} == {0.0, 30.0}
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from PyPDF2 import PdfReader  # noqa: E402
+from PyPDF2._cmap import CharMapCache  # noqa: E402
+from PyPDF2.generic import DictionaryObject, NameObject, NumberObject  # noqa: E402
+
+SAMPLE_PDF = Path(__file__).resolve().parents[2] / "web" / "pdfjs" / "compressed.tracemonkey-pldi-09.pdf"
+
+pytestmark = pytest.mark.skipif(not SAMPLE_PDF.exists(), reason="sample PDF not available")
+
+
+def _inline_font_page(font_count=1):
+    fonts = DictionaryObject()
+    for index in range(font_count):
+        font = DictionaryObject()
+        font[NameObject("/Subtype")] = NameObject("/Type1")
+        font[NameObject("/BaseFont")] = NameObject("/Helvetica")
+        font[NameObject("/FirstChar")] = NumberObject(32)
+        font[NameObject("/LastChar")] = NumberObject(32)
+        fonts[NameObject(f"/F{index}")] = font
+    resources = DictionaryObject()
+    resources[NameObject("/Font")] = fonts
+    page = DictionaryObject()
+    page[NameObject("/Resources")] = resources
+    return page
+
+
+def test_cached_extraction_matches_uncached():
+    cached = PdfReader(str(SAMPLE_PDF))
+    uncached = PdfReader(str(SAMPLE_PDF))
+    uncached._char_map_cache = None
+
+    assert [page.extract_text() for page in cached.pages] == [page.extract_text() for page in uncached.pages]
+    cache = cached._char_map_cache
+    # Every font is parsed once; later pages reuse the parsed maps.
+    assert cache.misses == len(cache)
+    assert cache.hits > cache.misses
+
+
+def test_cache_is_scoped_to_the_reader():
+    first = PdfReader(str(SAMPLE_PDF))
+    second = PdfReader(str(SAMPLE_PDF))
+    first.pages[0].extract_text()
+
+    assert len(first._char_map_cache) > 0
+    assert len(second._char_map_cache) == 0
+
+
+def test_inline_fonts_are_keyed_by_identity():
+    cache = CharMapCache()
+    page = _inline_font_page()
+    other_page = _inline_font_page()
+
+    first = cache.get("/F0", 200.0, page)
+    assert cache.get("/F0", 200.0, page) is first
+    assert cache.get("/F0", 200.0, other_page) is not first
+    assert cache.get("/F0", 100.0, page) is not first
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_cache_evicts_least_recently_used_fonts():
+    cache = CharMapCache(max_fonts=2)
+    page = _inline_font_page(font_count=3)
+
+    f0 = cache.get("/F0", 200.0, page)
+    cache.get("/F1", 200.0, page)
+    assert cache.get("/F0", 200.0, page) is f0
+    cache.get("/F2", 200.0, page)
+
+    assert len(cache) == 2
+    assert cache.get("/F0", 200.0, page) is f0
+    misses = cache.misses
+    cache.get("/F1", 200.0, page)
+    assert cache.misses == misses + 1
+
+
+def test_cache_respects_code_budget():
+    cache = CharMapCache(max_codes=0)
+    page = _inline_font_page()
+
+    first = cache.get("/F0", 200.0, page)
+
+    assert len(cache) == 0
+    assert cache.get("/F0", 200.0, page) is not first
@@ -0,0 +1,152 @@
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import PyPDF2  # noqa: E402
+from pdf_text_cache import PdfTextCache, extract_text, sha256_of  # noqa: E402
+
+
+class StubS3:
+    def __init__(self):
+        self.objects = {}
+        self.gets = 0
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+def _pdf(page_count=4):
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for index in range(page_count):
+        page, content = 4 + 2 * index, 5 + 2 * index
+        kids.append(b"%d 0 R" % page)
+        objects[page] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                         b"/Resources << /Font << /F1 3 0 R >> >> >>" % content)
+        stream = b"BT /F1 12 Tf 72 700 Td (Page %d text) Tj ET" % (index + 1)
+        objects[content] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), page_count)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, objects[number]))
+    xref = out.tell()
+    size = max(objects) + 1
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+    for number in range(1, size):
+        out.write(b"%010d 00000 n \n" % offsets[number])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref))
+    return out.getvalue()
+
+
+@pytest.fixture
+def extractions(monkeypatch):
+    """Count pages actually decoded by PyPDF2."""
+    calls = []
+    original = PyPDF2.PageObject.extract_text
+
+    def counting(page, *args, **kwargs):
+        text = original(page, *args, **kwargs)
+        calls.append(text)
+        return text
+
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", counting)
+    return calls
+
+
+def test_second_extraction_is_served_from_the_cache(tmp_path, extractions):
+    data = _pdf()
+    cache = PdfTextCache(local_dir=str(tmp_path))
+
+    first = extract_text(data, cache=cache)
+    assert first == "Page 1 text\nPage 2 text\nPage 3 text\nPage 4 text"
+    assert len(extractions) == 4
+
+    assert extract_text(io.BytesIO(data), cache=cache) == first
+    assert extract_text(data, cache=cache, separator="") == first.replace("\n", "")
+    assert len(extractions) == 4
+    assert cache.load(sha256_of(data))["page_count"] == 4
+
+
+def test_partial_extraction_only_decodes_missing_pages(tmp_path, extractions):
+    data = _pdf()
+    cache = PdfTextCache(local_dir=str(tmp_path))
+
+    assert extract_text(data, cache=cache, max_pages=2) == "Page 1 text\nPage 2 text"
+    entry = cache.load(sha256_of(data))
+    assert sorted(entry["pages"]) == [0, 1]
+    assert entry["page_count"] is None
+
+    assert extract_text(data, cache=cache, max_chars=30) == "Page 1 text\nPage 2 text\nPage 3"
+    assert extract_text(data, cache=cache).endswith("Page 4 text")
+    assert extractions == ["Page 1 text", "Page 2 text", "Page 3 text", "Page 4 text"]
+
+
+def test_s3_tier_is_shared_and_backfills_local(tmp_path, extractions):
+    data = _pdf(page_count=2)
+    s3 = StubS3()
+    writer = PdfTextCache(s3, "bucket", local_dir=str(tmp_path / "a"))
+    extract_text(data, cache=writer)
+    key = writer.object_key(sha256_of(data))
+    assert ("bucket", key) in s3.objects
+
+    other_container = PdfTextCache(s3, "bucket", local_dir=str(tmp_path / "b"))
+    assert extract_text(data, cache=other_container) == "Page 1 text\nPage 2 text"
+    assert extract_text(data, cache=other_container) == "Page 1 text\nPage 2 text"
+    assert len(extractions) == 2
+    # The first lookup of each container misses locally; the second is local.
+    assert s3.gets == 2
+
+
+def test_extractor_version_partitions_the_cache(tmp_path, extractions):
+    data = _pdf(page_count=1)
+    extract_text(data, cache=PdfTextCache(local_dir=str(tmp_path), extractor_version="v1"))
+    extract_text(data, cache=PdfTextCache(local_dir=str(tmp_path), extractor_version="v2"))
+
+    assert len(extractions) == 2
+
+
+def test_unreadable_entries_are_ignored(tmp_path, extractions):
+    data = _pdf(page_count=1)
+    cache = PdfTextCache(local_dir=str(tmp_path))
+    extract_text(data, cache=cache)
+    path = tmp_path / cache.extractor_version / f"{sha256_of(data)}.json"
+    path.write_bytes(b"not compressed")
+
+    assert extract_text(data, cache=cache) == "Page 1 text"
+    assert len(extractions) == 2
+
+
+def test_local_tier_evicts_least_recently_used_entries(tmp_path):
+    cache = PdfTextCache(local_dir=str(tmp_path))
+    digests = [f"{index:064x}" for index in range(3)]
+    cache.store(digests[0], {0: "x" * 100}, 1)
+    entry_bytes = sum(path.stat().st_size for path in tmp_path.rglob("*.json"))
+    cache.local_max_bytes = int(entry_bytes * 2.5)
+
+    cache.store(digests[1], {0: "y" * 100}, 1)
+    for path, mtime in ((digests[0], 1_000), (digests[1], 2_000)):
+        os.utime(cache._local_path(path), (mtime, mtime))
+    assert cache.load(digests[0])["pages"] == {0: "x" * 100}  # now the most recently used
+    cache.store(digests[2], {0: "z" * 100}, 1)
+
+    assert cache.load(digests[1]) is None
+    assert cache.load(digests[0]) is not None and cache.load(digests[2]) is not None
@@ -0,0 +1,116 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from PyPDF2 import PdfReader  # noqa: E402
+
+FONT = 3
+# Page tree: root (obj 2) -> [left (4): pages 6, 7] + [right (5): pages 8, 9]
+LEFT, RIGHT = 4, 5
+PAGES = [6, 7, 8, 9]
+CONTENTS = [10, 11, 12, 13]
+
+
+def _nested_pdf(indirect_kids=False):
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: (b"<< /Type /Pages /Kids [4 0 R 5 0 R] /Count 4 /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> >>"),
+        FONT: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        LEFT: b"<< /Type /Pages /Parent 2 0 R /Kids [6 0 R 7 0 R] /Count 2 >>",
+        RIGHT: b"<< /Type /Pages /Parent 2 0 R /Kids [8 0 R 9 0 R] /Count 2 >>",
+    }
+    for index, (page, content) in enumerate(zip(PAGES, CONTENTS)):
+        parent = LEFT if index < 2 else RIGHT
+        objects[page] = b"<< /Type /Page /Parent %d 0 R /Contents %d 0 R >>" % (parent, content)
+        stream = b"BT /F1 12 Tf 72 700 Td (Page %d text) Tj ET" % (index + 1)
+        objects[content] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+    if indirect_kids:
+        # Valid PDFs may store /Kids and /Count as indirect objects.
+        objects[2] = objects[2].replace(b"/Kids [4 0 R 5 0 R] /Count 4", b"/Kids 14 0 R /Count 15 0 R")
+        objects[14] = b"[4 0 R 5 0 R]"
+        objects[15] = b"4"
+        objects[LEFT] = objects[LEFT].replace(b"/Kids [6 0 R 7 0 R]", b"/Kids 16 0 R")
+        objects[16] = b"[6 0 R 7 0 R]"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, objects[number]))
+    xref = out.tell()
+    size = max(objects) + 1
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+    for number in range(1, size):
+        out.write(b"%010d 00000 n \n" % offsets[number])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref))
+    return out.getvalue()
+
+
+@pytest.fixture
+def reader():
+    return PdfReader(io.BytesIO(_nested_pdf()))
+
+
+def _resolved(reader, idnum):
+    return (0, idnum) in reader.resolved_objects
+
+
+def test_full_range_matches_page_by_page_extraction(reader):
+    expected = "\n".join(page.extract_text() for page in PdfReader(io.BytesIO(_nested_pdf())).pages)
+
+    assert reader.extract_text_range() == expected
+    assert "Page 4 text" in expected
+
+
+def test_page_range_skips_subtrees_without_flattening(reader):
+    pages = list(reader.iter_pages(2, 3))
+
+    assert len(pages) == 1
+    assert pages[0].extract_text() == "Page 3 text"
+    # The left subtree is skipped by its /Count and the last page is never reached.
+    assert reader.flattened_pages is None
+    assert not _resolved(reader, PAGES[0])
+    assert not _resolved(reader, PAGES[1])
+    assert not _resolved(reader, PAGES[3])
+    # Inherited resources are applied to lazily resolved pages.
+    assert "/Resources" in pages[0]
+
+
+def test_character_budget_stops_early_and_truncates(reader):
+    text = reader.extract_text_range(max_chars=15)
+
+    assert text == "Page 1 text\nPag"
+    assert not _resolved(reader, CONTENTS[2])
+
+
+def test_should_stop_callback_ends_after_current_page(reader):
+    seen = []
+
+    def should_stop(index, page_text):
+        seen.append(index)
+        return "Page 2" in page_text
+
+    assert reader.extract_text_range(1, should_stop=should_stop, separator=" | ") == "Page 2 text"
+    assert seen == [1]
+
+
+def test_range_uses_flattened_pages_when_available(reader):
+    assert len(reader.pages) == 4
+
+    assert reader.extract_text_range(3) == "Page 4 text"
+    assert list(reader.iter_pages(2, 2)) == []
+    with pytest.raises(ValueError):
+        list(reader.iter_pages(-1))
+
+
+def test_indirect_kids_and_count_are_resolved():
+    reader = PdfReader(io.BytesIO(_nested_pdf(indirect_kids=True)))
+
+    assert [page.extract_text() for page in reader.iter_pages(1, 3)] == ["Page 2 text", "Page 3 text"]
+    assert reader.extract_text_range() == "\n".join(page.extract_text() for page in reader.pages)
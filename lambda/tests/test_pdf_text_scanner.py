@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from PyPDF2 import PdfReader  # noqa: E402
+from PyPDF2._text_scanner import TEXT_OPERATORS, content_stream_bytes, scan_text_operations  # noqa: E402
+from PyPDF2.generic import ContentStream, DecodedStreamObject, FloatObject, NumberObject  # noqa: E402
+
+SAMPLE_PDF = Path(__file__).resolve().parents[2] / "web" / "pdfjs" / "compressed.tracemonkey-pldi-09.pdf"
+
+
+def _normalize(value):
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (int, float, NumberObject, FloatObject)):
+        return float(value)
+    return value
+
+
+def _full_parse(data):
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return [
+        (_normalize(list(operands)), operator)
+        for operands, operator in ContentStream(stream, None, "bytes").operations
+        if operator in TEXT_OPERATORS
+    ]
+
+
+def _fast_parse(data):
+    return [(_normalize(list(operands)), operator) for operands, operator in scan_text_operations(data, "bytes")]
+
+
+@pytest.mark.parametrize("data", [
+    b"BT /F1 12 Tf 72 712 Td (Hello) Tj ET",
+    b"0.5 0 0 0.5 10 20 cm q 1 0 0 RG 0 0 m 10 10 l S Q BT /F1 9.5 Tf [(A) -250 (B) 120.5 (C)] TJ ET",
+    # nesting deeper than the string pattern, escapes and line continuations
+    b"BT (a (b (c (d (e) d) c) b) a) Tj (\\(x\\) \\101\\7\\\\ \\n\\t wrap\\\nped) Tj ET",
+    b"BT <48656C6C6F> Tj <4 8 6> Tj <> Tj ET",
+    # marked content with dictionaries, names with # escapes and comments
+    b"/P <</MCID 3>> BDC % comment with ( and Tj\nBT /F#231 10 Tf (x) ' ET EMC",
+    b"BT 1 2 (quoted) \" 5 -6 TD T* 3 TL 4 Tw 110 Tz 1 0 0 1 50 50 Tm ET /Fm1 Do",
+    # inline images may contain anything, including text operators
+    b"q BI /W 4 /H 1 /BPC 8 /CS /G ID \x00(Tj)\xff EI Q BT (after) Tj ET",
+])
+def test_scanner_matches_full_parser(data):
+    assert _fast_parse(data) == _full_parse(data)
+
+
+def test_scanner_skips_non_text_operators():
+    operations = scan_text_operations(b"1 0 0 RG 0 0 m 5 5 l 10 10 20 20 re f BT (x) Tj ET", "bytes")
+
+    assert [operator for _, operator in operations] == [b"BT", b"Tj", b"ET"]
+
+
+@pytest.mark.skipif(not SAMPLE_PDF.exists(), reason="sample PDF not available")
+def test_sample_pdf_operations_and_text_match():
+    reader = PdfReader(str(SAMPLE_PDF))
+    for page in reader.pages:
+        data = content_stream_bytes(page["/Contents"])
+        assert _fast_parse(data) == _full_parse(data)
+
+    fast = [page.extract_text() for page in PdfReader(str(SAMPLE_PDF)).pages]
+    # Any operand visitor routes extraction through ContentStream.
+    full = [page.extract_text(visitor_operand_before=lambda *args: None) for page in PdfReader(str(SAMPLE_PDF)).pages]
+    assert fast == full
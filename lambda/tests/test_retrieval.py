@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from embeddings import HashingEmbeddingBackend  # noqa: E402
+from retrieval import Route, calibrate_score, fan_out_query, merge_route_results  # noqa: E402
+from vector_store import IndexGroup  # noqa: E402
+
+
+class StubIndex:
+    def __init__(self, matches=None, error=None, host="host", namespace=None):
+        self.matches = matches or []
+        self.error = error
+        self.host = host
+        self.namespace = namespace
+        self.queries = []
+        self.deleted = []
+
+    def query(self, vector, *, top_k=5, metadata_filter=None):
+        self.queries.append({"vector": vector, "top_k": top_k, "filter": metadata_filter})
+        if self.error:
+            raise self.error
+        return list(self.matches)
+
+    def delete_ids(self, ids):
+        self.deleted.extend(ids)
+        return len(ids)
+
+    def list_ids(self, prefix, *, limit=100):
+        yield [f"{prefix}{self.namespace or 'text'}"]
+
+
+def test_calibrate_score_measures_distance_above_the_route_floor():
+    assert calibrate_score(0.6, 0.2) == pytest.approx(0.5)
+    assert calibrate_score(0.1, 0.2) == 0.0
+    assert calibrate_score(1.0, 0.0) == 1.0
+
+
+def test_fan_out_query_embeds_per_route_and_merges_calibrated_scores():
+    text_index = StubIndex([{"id": "doc-1-a", "score": 0.82}, {"id": "doc-1-b", "score": 0.40}])
+    media_index = StubIndex([{"id": "doc-2-s0", "score": 0.55}, {"id": "doc-2-s1", "score": 0.08}], namespace="media")
+    routes = [
+        Route("text", HashingEmbeddingBackend(dimensions=8), text_index, min_score=0.2),
+        Route("media", HashingEmbeddingBackend(dimensions=4), media_index, min_score=0.1),
+    ]
+    doc_filter = {"doc_id": {"$eq": "doc-1"}}
+
+    results = fan_out_query("what happened?", routes, top_k=5, metadata_filter=doc_filter)
+
+    assert len(text_index.queries[0]["vector"]) == 8
+    assert len(media_index.queries[0]["vector"]) == 4
+    assert media_index.queries[0]["filter"] == doc_filter
+    # The media match below its floor is dropped; the rest rank by distance above their floors.
+    assert [match["id"] for match in results] == ["doc-1-a", "doc-2-s0", "doc-1-b"]
+    assert [match["route"] for match in results] == ["text", "media", "text"]
+    assert results[0]["raw_score"] == 0.82
+
+
+def test_weak_lone_match_ranks_below_strong_text_match():
+    routes = [
+        Route("text", HashingEmbeddingBackend(dimensions=4), StubIndex(), min_score=0.2),
+        Route("media", HashingEmbeddingBackend(dimensions=4), StubIndex(), min_score=0.1),
+    ]
+    results = {
+        "text": [{"id": "doc-1-a", "score": 0.78}, {"id": "doc-1-b", "score": 0.35}],
+        "media": [{"id": "doc-2-s0", "score": 0.14}],
+    }
+
+    ranked = merge_route_results(results, routes, top_k=3)
+
+    assert [match["id"] for match in ranked] == ["doc-1-a", "doc-1-b", "doc-2-s0"]
+    assert ranked[2]["score"] < 0.1 < ranked[0]["score"]
+
+
+def test_fan_out_query_skips_failing_route():
+    routes = [
+        Route("text", HashingEmbeddingBackend(dimensions=4), StubIndex([{"id": "a", "score": 0.5}])),
+        Route("media", HashingEmbeddingBackend(dimensions=4), StubIndex(error=RuntimeError("down"))),
+    ]
+
+    results = fan_out_query("query", routes)
+
+    assert [match["id"] for match in results] == ["a"]
+
+
+def test_index_group_fans_out_deletes_and_listing():
+    text_index = StubIndex()
+    media_index = StubIndex(namespace="media")
+    group = IndexGroup([text_index, media_index, text_index])
+
+    group.delete_ids(["doc-1-a"])
+
+    assert text_index.deleted == ["doc-1-a"]
+    assert media_index.deleted == ["doc-1-a"]
+    assert list(group.list_ids("doc-1-")) == [["doc-1-text"], ["doc-1-media"]]
@@ -0,0 +1,71 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqs_batch import DeadlineExceeded, JobDeadline, process_batch  # noqa: E402
+
+
+class FakeContext:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def _records(*jobs):
+    return [{"messageId": f"m{idx}", "body": json.dumps(job)} for idx, job in enumerate(jobs)]
+
+
+def test_process_batch_reports_only_failed_messages():
+    failed = []
+
+    def handler(job, deadline):
+        if job.get("fail"):
+            raise RuntimeError("boom")
+
+    result = process_batch(
+        _records({"id": 1}, {"id": 2, "fail": True}, {"id": 3}) + [{"messageId": "bad", "body": "{"}],
+        handler,
+        on_failure=lambda job, error: failed.append(job["id"]),
+    )
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "m1"}]}
+    assert failed == [2]
+
+
+def test_process_batch_runs_jobs_concurrently():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def handler(job, deadline):
+        barrier.wait()
+
+    assert process_batch(_records({}, {}, {}), handler, max_workers=3) == {"batchItemFailures": []}
+
+
+def test_process_batch_gives_up_on_jobs_past_the_deadline():
+    release = threading.Event()
+
+    def handler(job, deadline):
+        if job.get("slow"):
+            release.wait(2)
+
+    started = time.monotonic()
+    result = process_batch(_records({"slow": True}, {}), handler, context=FakeContext(10_200), safety_margin_ms=10_000)
+    release.set()
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "m0"}]}
+    assert time.monotonic() - started < 1.5
+
+
+def test_job_deadline_check():
+    JobDeadline(None).check("anything", 60)
+    expired = JobDeadline.from_context(FakeContext(1_000), safety_margin_ms=5_000)
+    with pytest.raises(DeadlineExceeded):
+        expired.check("embedding")
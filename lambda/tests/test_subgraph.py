@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from graph_snapshot import GraphSnapshot  # noqa: E402
+from subgraph import decode_cursor, neighborhood  # noqa: E402
+
+
+def _entity(entity_id, salience=0.5):
+    return {"entity_id": entity_id, "name": entity_id.title(), "type": "PROJECT", "salience": salience}
+
+
+@pytest.fixture
+def lookup():
+    snapshot = GraphSnapshot()
+    snapshot.apply_document("doc-1", {"title": "One"}, [_entity("alpha", 0.9), _entity("beta", 0.2)])
+    snapshot.apply_document("doc-2", {"title": "Two"}, [_entity("alpha", 0.4)])
+    snapshot.apply_document("doc-3", {"title": "Three"}, [_entity("beta", 0.7), _entity("gamma")])
+    snapshot.apply_document("doc-4", {"title": "Four"}, [_entity("gamma")])
+    doc_rows, entity_rows = snapshot.adjacency_rows()
+    reads = []
+
+    def _lookup(nodes):
+        reads.append(list(nodes))
+        rows = {key: (doc_rows if key[0] == "DOC" else entity_rows).get(key[1]) for key in nodes}
+        return {key: row for key, row in rows.items() if row is not None}
+
+    _lookup.reads = reads
+    return _lookup
+
+
+def test_entity_neighbourhood_is_ranked_by_salience(lookup):
+    result = neighborhood(lookup, "ENTITY", "alpha", depth=1, limit=1)
+
+    assert [(node["id"], node["depth"]) for node in result["nodes"]] == [("alpha", 0), ("doc-1", 1)]
+    assert result["edges"] == [{"source": "doc-1", "target": "alpha", "kind": "mentions", "salience": 0.9}]
+    assert decode_cursor(result["next_cursor"]) == 1
+
+    page_two = neighborhood(lookup, "ENTITY", "alpha", depth=1, limit=1, cursor=result["next_cursor"])
+    assert [node["id"] for node in page_two["nodes"]] == ["alpha", "doc-2"]
+    assert page_two["next_cursor"] is None
+
+
+def test_depth_two_reads_one_batch_per_ring(lookup):
+    result = neighborhood(lookup, "DOC", "doc-1", depth=2, limit=5)
+
+    ids = {node["id"]: node["depth"] for node in result["nodes"]}
+    assert ids["doc-1"] == 0
+    assert ids["alpha"] == 1 and ids["beta"] == 1 and ids["doc-2"] == 1 and ids["doc-3"] == 1
+    assert ids["gamma"] == 2 and ids["doc-4"] == 2
+    # The focal node, then each ring in a single batch; the last one only for labels.
+    assert len(lookup.reads) == 3
+    assert sorted(lookup.reads[2]) == [("DOC", "doc-4"), ("ENTITY", "gamma")]
+    titles = {node["id"]: node.get("title") for node in result["nodes"] if node["kind"] == "doc"}
+    assert titles["doc-3"] == "Three" and titles["doc-4"] == "Four"
+    names = {node["id"]: node.get("name") for node in result["nodes"] if node["kind"] == "entity"}
+    assert names["gamma"] == "Gamma"
+
+
+def test_unknown_focal_node_and_bad_cursor(lookup):
+    assert neighborhood(lookup, "DOC", "missing") is None
+    with pytest.raises(ValueError):
+        neighborhood(lookup, "DOC", "doc-1", cursor="not-a-cursor")
@@ -0,0 +1,197 @@
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import summarization  # noqa: E402
+from chunking import Chunk  # noqa: E402
+from llm_cache import LlmResultCache  # noqa: E402
+from summarization import (  # noqa: E402
+    build_sections,
+    find_sections,
+    parse_section_request,
+    summarize_document,
+)
+
+
+class SummaryLLM:
+    """Summarizes a prompt as the first word of each of its lines, tracking calls and concurrency."""
+
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail_on and self.fail_on in prompt:
+                raise RuntimeError("rate limited")
+            body = prompt.split("\n\n", 1)[1]
+            words = [line.split(".")[0].split()[0] for line in body.splitlines() if line.strip()]
+
+            class _Response:
+                content = " ".join(words)
+
+            return _Response()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _document(sections, chars=100):
+    """Text plus one chunk per ``(heading, paragraph count)``; every paragraph is ``chars`` long."""
+
+    text = ""
+    chunks = []
+    for heading, paragraphs in sections:
+        for index in range(paragraphs):
+            paragraph = f"{heading.split()[-1]}{index}".ljust(chars - 1, ".") + "\n"
+            chunks.append(Chunk(paragraph.strip(), len(text), len(text) + chars - 1, len(chunks) // 4,
+                                len(chunks) // 4, 20, heading))
+            text += paragraph
+    return text, chunks
+
+
+def test_sections_follow_headings_within_the_budget():
+    text, chunks = _document([("1. Introduction", 3), ("2. Methods", 10), ("2.1 Setup", 1)])
+
+    sections = build_sections(text, chunks, section_chars=500)
+
+    assert [section.title for section in sections] == [
+        "1. Introduction", "2. Methods", "2. Methods (continued)", "2.1 Setup"]
+    assert all(section.end - section.start <= 500 for section in sections)
+    assert sections[0].text == text[sections[0].start:sections[0].end]
+
+
+def test_short_sections_share_a_call_and_sections_are_capped():
+    text, chunks = _document([("A", 1), ("B", 1), ("C", 4)])
+    shared = build_sections(text, chunks, section_chars=1000)
+    assert len(shared) == 1
+    assert shared[0].headings == ("A", "B", "C")
+
+    text, chunks = _document([("Part", 100)])
+    capped = build_sections(text, chunks, section_chars=200, max_sections=6)
+    assert len(capped) <= 6
+    assert capped[0].end - capped[0].start > 200
+
+
+def test_short_documents_keep_the_single_call_prompt():
+    text, chunks = _document([("Intro", 2)])
+    llm = SummaryLLM()
+
+    result = summarize_document(text, chunks, llm)
+
+    assert llm.prompts == [summarization.DOCUMENT_SUMMARY_PROMPT.format(text=text[:summarization.SECTION_CHARS])]
+    assert [section["summary"] for section in result.sections] == [result.summary]
+
+
+def test_sections_are_summarized_concurrently_then_merged():
+    text, chunks = _document([(f"{index}. Topic{index}", 2) for index in range(1, 7)])
+    llm = SummaryLLM(delay=0.02)
+
+    result = summarize_document(text, chunks, llm, max_workers=4, section_chars=200)
+
+    assert [section["summary"] for section in result.sections] == [
+        f"Topic{index}0 Topic{index}1" for index in range(1, 7)]
+    assert result.summary == " ".join(f"Topic{index}0" for index in range(1, 7))
+    assert len(llm.prompts) == 7
+    assert 1 < llm.peak <= 4
+    assert result.sections[2]["id"] == "s3"
+    assert result.sections[2]["headings"] == ["3. Topic3"]
+    assert (result.sections[2]["page_start"], result.sections[2]["page_end"]) == (1, 1)
+
+
+def test_single_page_text_records_no_page_ranges():
+    text, chunks = _document([(f"{index}. Topic{index}", 2) for index in range(1, 4)])
+    chunks = [replace(chunk, page_start=0, page_end=0) for chunk in chunks]
+
+    result = summarize_document(text, chunks, SummaryLLM(), section_chars=200)
+
+    assert len(result.sections) == 3
+    assert all("page_start" not in section and "page_end" not in section for section in result.sections)
+
+
+def test_long_documents_merge_level_by_level(monkeypatch):
+    monkeypatch.setattr(summarization, "MERGE_FANOUT", 3)
+    text, chunks = _document([(f"{index}. Topic{index}", 2) for index in range(1, 8)])
+    llm = SummaryLLM()
+
+    result = summarize_document(text, chunks, llm, section_chars=200)
+
+    # 7 sections, then merges of 3 + 3 + 1 (passed through), then one of 3.
+    assert len(llm.prompts) == 7 + 2 + 1
+    assert result.summary == "Topic10 Topic40 Topic70"
+
+
+def test_reprocessing_only_summarizes_changed_sections():
+    cache = LlmResultCache()
+    text, chunks = _document([(f"{index}. Topic{index}", 2) for index in range(1, 5)])
+    summarize_document(text, chunks, SummaryLLM(), cache=cache, section_chars=200)
+
+    unchanged = SummaryLLM()
+    summarize_document(text, chunks, unchanged, cache=cache, section_chars=200)
+    assert unchanged.prompts == []
+
+    edited_text = text.replace("Topic40", "Topic4X", 1)
+    edited = SummaryLLM()
+    result = summarize_document(edited_text, chunks, edited, cache=cache, section_chars=200)
+    assert len(edited.prompts) == 2  # the edited section and the merge
+    assert result.sections[3]["summary"] == "Topic4X Topic41"
+
+
+def test_failed_sections_are_left_out_of_the_merge():
+    text, chunks = _document([(f"{index}. Topic{index}", 2) for index in range(1, 4)])
+
+    result = summarize_document(text, chunks, SummaryLLM(fail_on="Topic20"), section_chars=200)
+
+    assert [section["summary"] for section in result.sections] == ["Topic10 Topic11", "", "Topic30 Topic31"]
+    assert result.summary == "Topic10 Topic30"
+    with pytest.raises(RuntimeError):
+        summarize_document(text, chunks, SummaryLLM(fail_on="Topic"), section_chars=200)
+
+
+def test_a_failed_merge_keeps_the_section_summaries():
+    text, chunks = _document([(f"{index}. Topic{index}", 2) for index in range(1, 4)])
+
+    result = summarize_document(text, chunks, SummaryLLM(fail_on="consecutive parts"), section_chars=200)
+
+    assert [section["summary"] for section in result.sections] == [
+        f"Topic{index}0 Topic{index}1" for index in range(1, 4)]
+    assert result.summary == "\n\n".join(section["summary"] for section in result.sections)
+
+
+def test_section_requests_are_recognised():
+    assert parse_section_request("Can you summarize section 3?") == "3"
+    assert parse_section_request("Summarize the methods section") == "methods"
+    assert parse_section_request("summary of chapter IV of the report") == "IV"
+    assert parse_section_request("What does section 2 say?") is None
+    assert parse_section_request("Summarize this document") is None
+
+
+def test_find_sections_by_number_name_or_position():
+    sections = [
+        {"id": "s1", "title": "1. Introduction", "headings": ["1. Introduction"]},
+        {"id": "s2", "title": "2. Related Work", "headings": ["2. Related Work", "2.1 Tracing"]},
+        {"id": "s3", "title": "2. Related Work (continued)", "headings": ["2.2 Trees"]},
+        {"id": "s4", "title": "20. Appendix", "headings": ["20. Appendix"]},
+        {"id": "s5", "title": "Part 5", "headings": []},
+    ]
+
+    assert [section["id"] for section in find_sections(sections, "2")] == ["s2", "s3"]
+    assert [section["id"] for section in find_sections(sections, "2.2")] == ["s3"]
+    assert [section["id"] for section in find_sections(sections, "related work")] == ["s2", "s3"]
+    assert [section["id"] for section in find_sections(sections, "5")] == ["s5"]
+    assert find_sections(sections, "conclusion") == []
@@ -143,6 +143,7 @@ from dev_handler import (  # type: ignore  # noqa: E402
     _estimate_sentiment,
     _generate_predictive_insights,
     _moving_average,
+    generate_highlights,
 )
 
 
@@ -159,6 +160,20 @@ def test_estimate_sentiment_positive_negative():
     assert emotion_neg in {"fear", "sadness", "neutral"}
 
 
+def test_generate_highlights_classifies_by_whole_word_keywords():
+    text = (
+        "Please review the vendor contract and schedule the signing before Friday afternoon. "
+        "Maybe the weekend residue of the launch will settle down after a while, honestly."
+    )
+
+    highlights = {highlight["text"]: highlight for highlight in generate_highlights(text)}
+
+    first, second = text.split(". ", 1)
+    assert highlights[first + "."]["kind"] == "action"
+    assert highlights[second]["kind"] == "key"
+    assert text[highlights[second]["offset"]:].startswith("Maybe the weekend")
+
+
 def test_moving_average_basic():
     series = [1, 2, 3, 4, 5]
     result = _moving_average(series, window=3)
@@ -61,6 +61,23 @@ def test_generate_wiki_sections_includes_topics_and_insights():
     assert "Trending Topics" in titles or "Insights & Next Steps" in titles
 
 
+def test_wiki_outline_reuses_stored_section_summaries():
+    doc = _make_doc("doc-a", 0, "Annual report")
+    doc["sections"] = [
+        {"id": "s1", "title": "1. Revenue", "summary": "Revenue grew 12%."},
+        {"id": "s2", "title": "2. Costs", "summary": "Costs were flat."},
+    ]
+    table = StubTable([doc, _make_doc("doc-b", 1, "Short memo")])
+
+    sections = _generate_wiki_sections("user-123", None, table)
+
+    outline = next(section for section in sections if section["id"] == "outline")
+    assert outline["content"].splitlines() == [
+        "- **doc-a.md › 1. Revenue**: Revenue grew 12%.",
+        "- **doc-a.md › 2. Costs**: Costs were flat.",
+    ]
+
+
 def test_sanitize_sections_limits_and_truncates():
     sections = [{"id": "s1", "title": "A" * 500, "content": "B" * 20000}]
     cleaned, warnings = _sanitize_sections(sections)
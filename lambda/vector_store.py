@@ -0,0 +1,131 @@
+"""Pinecone REST helpers shared by handlers and background workers."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import requests
+
+UPSERT_BATCH_SIZE = 100
+FETCH_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1000
+
+
+class PineconeIndex:
+    """Minimal data-plane client for a single Pinecone index host."""
+
+    def __init__(self, host: str, api_key: str, *, namespace: Optional[str] = None, timeout: int = 30) -> None:
+        self.host = host
+        self.api_key = api_key
+        self.namespace = namespace
+        self.timeout = timeout
+
+    def request(self, path: str, payload: Optional[Dict[str, Any]] = None, *, method: str = "POST",
+                params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not self.host:
+            raise RuntimeError("PINECONE_INDEX_HOST not configured")
+
+        url = f"https://{self.host}{path}"
+        headers = {
+            "Content-Type": "application/json",
+            "Api-Key": self.api_key,
+        }
+        try:
+            response = requests.request(method, url, headers=headers, json=payload, params=params, timeout=self.timeout)
+        except requests.RequestException as request_error:
+            raise RuntimeError(f"Pinecone request failed: {request_error}") from request_error
+
+        if not response.ok:
+            raise RuntimeError(
+                f"Pinecone request failed ({response.status_code}): {response.text[:300]}"
+            )
+        return response.json() if response.content else {}
+
+    def _with_namespace(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.namespace:
+            payload["namespace"] = self.namespace
+        return payload
+
+    def upsert(self, vectors: Sequence[Dict[str, Any]]) -> None:
+        for i in range(0, len(vectors), UPSERT_BATCH_SIZE):
+            self.request("/vectors/upsert", self._with_namespace({"vectors": list(vectors[i : i + UPSERT_BATCH_SIZE])}))
+
+    def fetch(self, ids: Sequence[str]) -> Dict[str, List[float]]:
+        """Return ``{vector_id: values}`` for the ``ids`` that exist in the index."""
+
+        values: Dict[str, List[float]] = {}
+        for i in range(0, len(ids), FETCH_BATCH_SIZE):
+            params: Dict[str, Any] = {"ids": list(ids[i : i + FETCH_BATCH_SIZE])}
+            if self.namespace:
+                params["namespace"] = self.namespace
+            data = self.request("/vectors/fetch", method="GET", params=params)
+            for vector_id, vector in (data.get("vectors") or {}).items():
+                if vector.get("values"):
+                    values[vector_id] = vector["values"]
+        return values
+
+    def delete_ids(self, ids: Sequence[str]) -> int:
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            self.request("/vectors/delete", self._with_namespace({"ids": list(ids[i : i + DELETE_BATCH_SIZE])}))
+        return len(ids)
+
+    def delete_by_filter(self, metadata_filter: Dict[str, Any]) -> None:
+        """Metadata-filter deletes are only honoured by pod-based indexes."""
+
+        self.request("/vectors/delete", self._with_namespace({"filter": metadata_filter}))
+
+    def query(self, vector: Sequence[float], *, top_k: int = 5,
+              metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        body: Dict[str, Any] = {"vector": list(vector), "topK": top_k, "includeMetadata": True}
+        if metadata_filter:
+            body["filter"] = metadata_filter
+        return self.request("/query", self._with_namespace(body)).get("matches", [])
+
+    def list_ids(self, prefix: str, *, limit: int = 100) -> Iterator[List[str]]:
+        """Yield pages of vector ids that start with ``prefix`` (serverless indexes)."""
+
+        token: Optional[str] = None
+        while True:
+            params: Dict[str, Any] = {"prefix": prefix, "limit": limit}
+            if self.namespace:
+                params["namespace"] = self.namespace
+            if token:
+                params["paginationToken"] = token
+            data = self.request("/vectors/list", method="GET", params=params)
+            ids = [entry.get("id") for entry in data.get("vectors", []) if entry.get("id")]
+            if ids:
+                yield ids
+            token = (data.get("pagination") or {}).get("next")
+            if not token:
+                break
+
+
+class IndexGroup:
+    """
+    Fans maintenance operations out to every index/namespace a document may live in.
+
+    Text and media vectors are routed to different indexes, but deletion only
+    knows the document id, so it has to clean all of them.
+    """
+
+    def __init__(self, indexes: Sequence[PineconeIndex]) -> None:
+        unique: Dict[tuple, PineconeIndex] = {}
+        for index in indexes:
+            unique.setdefault((index.host, index.namespace), index)
+        self.indexes = list(unique.values())
+
+    def delete_ids(self, ids: Sequence[str]) -> int:
+        for index in self.indexes:
+            index.delete_ids(ids)
+        return len(ids)
+
+    def delete_by_filter(self, metadata_filter: Dict[str, Any]) -> None:
+        for index in self.indexes:
+            index.delete_by_filter(metadata_filter)
+
+    def list_ids(self, prefix: str, *, limit: int = 100) -> Iterator[List[str]]:
+        for index in self.indexes:
+            yield from index.list_ids(prefix, limit=limit)
+
+
+__all__ = ["DELETE_BATCH_SIZE", "FETCH_BATCH_SIZE", "IndexGroup", "PineconeIndex", "UPSERT_BATCH_SIZE"]
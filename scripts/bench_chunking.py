@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Benchmark the structured chunker against the fixed 1000/150 character splitter.
+
+Usage: python scripts/bench_chunking.py [file.pdf|file.txt ...] [--queries N] [--top-k K]
+
+Reports chunks per MB of extracted text, mean tokens per chunk and a retrieval
+hit rate: for N sentences sampled from each document, a query made of part of
+the sentence's words is run against the chunks with BM25, and it is a hit when
+one of the top K chunks contains the whole sentence. The tokens those top K
+chunks would add to a prompt are reported as well. Lexical retrieval stands in
+for the embedding index so the benchmark runs offline; it rewards the same
+property (the answer-bearing passage stays together in one chunk).
+
+The baseline needs langchain (or langchain-text-splitters); without it only
+the structured chunker is measured.
+"""
+import argparse
+import math
+import random
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Import the baseline before lambda/ goes on the path: its vendored pydantic-core
+# wheels are built for the Lambda runtime.
+try:
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+except ImportError:
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        RecursiveCharacterTextSplitter = None
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "lambda"))
+
+from chunking import StructuredChunker, token_counter  # noqa: E402
+from PyPDF2 import PdfReader  # noqa: E402
+
+DEFAULT_CORPUS = [ROOT / "web" / "pdfjs" / "compressed.tracemonkey-pldi-09.pdf"]
+_TERM_RE = re.compile(r"[a-z0-9]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _pages(path):
+    if path.suffix.lower() == ".pdf":
+        return [page.extract_text() for page in PdfReader(str(path)).pages]
+    return [path.read_text(encoding="utf-8", errors="ignore")]
+
+
+def _normalize(text):
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class BM25:
+    def __init__(self, docs, k1=1.2, b=0.75):
+        self.k1, self.b = k1, b
+        self.tfs = [Counter(_TERM_RE.findall(doc.lower())) for doc in docs]
+        self.lengths = [sum(tf.values()) for tf in self.tfs]
+        self.avg = sum(self.lengths) / max(len(self.lengths), 1)
+        df = Counter(term for tf in self.tfs for term in tf)
+        n = len(docs)
+        self.idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def top(self, query, k):
+        terms = _TERM_RE.findall(query.lower())
+        scores = []
+        for index, (tf, length) in enumerate(zip(self.tfs, self.lengths)):
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    norm = freq + self.k1 * (1 - self.b + self.b * length / self.avg)
+                    score += self.idf[term] * freq * (self.k1 + 1) / norm
+            scores.append((score, index))
+        return [index for _, index in sorted(scores, reverse=True)[:k]]
+
+
+def _queries(pages, count, rng):
+    sentences = [
+        _normalize(sentence)
+        for page in pages
+        for sentence in re.split(r"(?<=[.!?])\s+", page)
+        if len(_TERM_RE.findall(sentence.lower())) >= 8 and len(sentence) < 400
+    ]
+    rng.shuffle(sentences)
+    queries = []
+    for sentence in sentences[:count]:
+        words = sentence.split()
+        kept = sorted(rng.sample(range(len(words)), min(len(words), max(4, len(words) * 3 // 5))))
+        queries.append((sentence, " ".join(words[index] for index in kept)))
+    return queries
+
+
+def _evaluate(chunks, queries, top_k, count_tokens):
+    index = BM25(chunks)
+    normalized = [_normalize(chunk) for chunk in chunks]
+    hits = 0
+    context_tokens = 0
+    for sentence, query in queries:
+        top = index.top(query, top_k)
+        hits += any(sentence in normalized[position] for position in top)
+        context_tokens += sum(count_tokens(chunks[position]) for position in top)
+    return hits / max(len(queries), 1), context_tokens / max(len(queries), 1)
+
+
+def bench(path, queries_per_doc, top_k, rng):
+    pages = _pages(path)
+    text = "\n".join(pages)
+    megabytes = len(text.encode("utf-8")) / 1e6
+    count_tokens = token_counter()
+    queries = _queries(pages, queries_per_doc, rng)
+
+    rows = []
+    splitters = [("structured", lambda: [chunk.text for chunk in StructuredChunker().chunk_pages(pages)])]
+    if RecursiveCharacterTextSplitter is not None:
+        baseline = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
+        splitters.insert(0, ("recursive 1000/150", lambda: baseline.split_text(text)))
+    for name, split in splitters:
+        start = time.perf_counter()
+        chunks = split()
+        elapsed = time.perf_counter() - start
+        hit_rate, context = _evaluate(chunks, queries, top_k, count_tokens)
+        mean_tokens = sum(map(count_tokens, chunks)) / max(len(chunks), 1)
+        rows.append((name, len(chunks), len(chunks) / megabytes, mean_tokens, hit_rate, context, elapsed))
+
+    print(f"{path.name[:40]} ({len(pages)} pages, {megabytes:.2f} MB text, {len(queries)} queries)")
+    for name, count, per_mb, mean_tokens, hit_rate, context, elapsed in rows:
+        print(f"  {name:20} {count:>7} {per_mb:>10.0f} {mean_tokens:>8.0f} {hit_rate:>8.1%} {context:>10.0f} "
+              f"{elapsed * 1000:>8.1f}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("documents", nargs="*", type=Path)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if RecursiveCharacterTextSplitter is None:
+        print("langchain is not installed; measuring the structured chunker only")
+    print(f"  {'splitter':20} {'chunks':>7} {'chunks/MB':>10} {'tokens':>8} {'hit@' + str(args.top_k):>8} "
+          f"{'ctx tokens':>10} {'ms':>8}")
+    rng = random.Random(args.seed)
+    for path in args.documents or DEFAULT_CORPUS:
+        bench(path, args.queries, args.top_k, rng)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
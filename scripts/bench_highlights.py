@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark the streaming highlighter against the split/find/sort-all extractor.
+
+Usage: python scripts/bench_highlights.py [file.pdf|file.txt ...] [--copies N ...]
+
+Each document's pages are repeated N times. The baseline is the previous
+``generate_highlights``: split the whole text into sentences, ``find`` each one,
+build a candidate (with a uuid) per sentence, sort everything and dedupe. The
+streaming highlighter is fed the same pages one at a time from a generator, so
+the document is never materialized. Reports wall time and the tracemalloc peak
+of each run (the baseline's peak excludes the joined text it is given).
+"""
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "lambda"))
+
+from highlights import highlight_pages  # noqa: E402
+from keyword_matcher import KeywordMatcher  # noqa: E402
+from PyPDF2 import PdfReader  # noqa: E402
+
+DEFAULT_CORPUS = [ROOT / "web" / "pdfjs" / "compressed.tracemonkey-pldi-09.pdf"]
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+# Copied from dev_handler, which needs the Lambda dependencies to import.
+HIGHLIGHT_KEYWORDS = {
+    "action": {"review", "schedule", "follow-up", "deadline", "email", "meet", "deliver", "plan", "todo", "decide"},
+    "date": {"today", "tomorrow", "week", "month", "quarter", "january", "february", "march", "april", "may", "june",
+             "july", "august", "september", "october", "november", "december", "monday", "tuesday", "wednesday",
+             "thursday", "friday", "saturday", "sunday", "deadline", "due", "by"},
+}
+HIGHLIGHT_KINDS = {"action": "action", "date": "important"}
+
+
+def _pages(path):
+    if path.suffix.lower() == ".pdf":
+        return [page.extract_text() for page in PdfReader(str(path)).pages]
+    return [path.read_text(encoding="utf-8", errors="ignore")]
+
+
+def baseline(text, matcher, max_count=12):
+    normalized = text.replace("\r\n", "\n").strip()
+    scan = matcher.scan(normalized)
+    highlights = []
+    cursor = 0
+    for segment in SENTENCE_SPLIT_RE.split(normalized):
+        raw = segment.strip()
+        if not raw:
+            cursor += len(segment) + 1
+            continue
+        start_idx = normalized.find(segment, cursor)
+        if start_idx == -1:
+            start_idx = cursor
+        cursor = start_idx + len(segment)
+        length = len(raw)
+        if length < 40 or length > 320:
+            continue
+        hits = scan.categories_between(start_idx, start_idx + len(segment)) & HIGHLIGHT_KEYWORDS.keys()
+        kind = "action" if "action" in hits else "important" if "date" in hits else "key"
+        score = (min(1.0, length / 180) + (0.25 if ":" in raw or ";" in raw else 0.0)
+                 + min(0.35, len(hits) * 0.2) + (0.1 if raw[:1].isupper() else 0.0))
+        highlights.append({
+            "id": f"hl-{uuid.uuid4().hex[:8]}", "text": raw, "kind": kind, "offset": start_idx, "length": length,
+            "score": round(score, 4),
+            "context": normalized[max(0, start_idx - 80):start_idx + length + 80].strip(),
+        })
+    highlights.sort(key=lambda h: h["score"], reverse=True)
+    seen = set()
+    deduped = []
+    for highlight in highlights:
+        key = highlight["text"].lower()
+        if key not in seen:
+            seen.add(key)
+            deduped.append(highlight)
+            if len(deduped) >= max_count:
+                break
+    return deduped
+
+
+def _measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("documents", nargs="*", type=Path)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    matcher = KeywordMatcher(HIGHLIGHT_KEYWORDS)
+    print(f"{'document':36} {'MB':>7} {'baseline ms':>12} {'peak MB':>8} {'stream ms':>10} {'peak MB':>8}  same")
+    for path in args.documents or DEFAULT_CORPUS:
+        pages = _pages(path)
+        for copies in args.copies:
+            text = "\n".join(pages * copies)
+            base_time, base_peak, expected = _measure(lambda: baseline(text, matcher))
+            stream = lambda: highlight_pages((page for _ in range(copies) for page in pages), matcher,
+                                             HIGHLIGHT_KINDS).highlights()
+            stream_time, stream_peak, found = _measure(stream)
+            same = [{**h, "id": None} for h in expected] == [{**h, "id": None} for h in found]
+            print(f"{path.name[:36]:36} {len(text.encode('utf-8')) / 1e6:>7.2f} {base_time * 1000:>12.1f} "
+                  f"{base_peak / 1e6:>8.2f} {stream_time * 1000:>10.1f} {stream_peak / 1e6:>8.2f}  {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
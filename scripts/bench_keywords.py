@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Benchmark the single-pass lexicon matcher against the per-sentence keyword loops.
+
+Usage: python scripts/bench_keywords.py [file.pdf|file.txt ...] [--megabytes N] [--repeat R]
+
+Each document's extracted text is repeated up to N MB. The baseline is what
+ingestion did before: highlight categories via ``any(keyword in sentence)`` for
+every sentence and category, then tokenization plus one set lookup pass per
+sentiment and emotion lexicon. The matcher run scans the text once and
+attributes the hits to the same sentences. Best of R runs is reported.
+
+The lexicons are copied from dev_handler (which needs the Lambda dependencies to
+import); keep them in sync when the handler's lexicons change.
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "lambda"))
+
+from keyword_matcher import KeywordMatcher  # noqa: E402
+from PyPDF2 import PdfReader  # noqa: E402
+
+DEFAULT_CORPUS = [ROOT / "web" / "pdfjs" / "compressed.tracemonkey-pldi-09.pdf"]
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+HIGHLIGHT_KEYWORDS = {
+    "action": {"review", "schedule", "follow-up", "deadline", "email", "meet", "deliver", "plan", "todo", "decide"},
+    "date": {"today", "tomorrow", "week", "month", "quarter", "january", "february", "march", "april", "may", "june",
+             "july", "august", "september", "october", "november", "december", "monday", "tuesday", "wednesday",
+             "thursday", "friday", "saturday", "sunday", "deadline", "due", "by"},
+}
+POSITIVE_WORDS = {
+    "accomplished", "amazing", "awesome", "calm", "confident", "excited", "grateful", "great", "happy", "hopeful",
+    "optimistic", "proud", "relaxed", "renewed", "satisfied", "strong", "successful", "thrilled", "victory", "win",
+}
+NEGATIVE_WORDS = {
+    "angry", "anxious", "awful", "burnout", "concerned", "depressed", "doubt", "exhausted", "frustrated", "lost",
+    "nervous", "overwhelmed", "sad", "stressed", "tired", "uncertain", "upset", "worried",
+}
+EMOTION_KEYWORDS = {
+    "joy": {"grateful", "happy", "joy", "excited", "delighted", "pleased"},
+    "anger": {"angry", "frustrated", "mad", "irritated"},
+    "sadness": {"sad", "down", "depressed", "unhappy"},
+    "fear": {"scared", "afraid", "worried", "anxious"},
+    "surprise": {"surprised", "shocked", "amazed"},
+}
+# Mixed into the corpus so every lexicon has hits.
+JOURNAL_LINE = ("We will review the plan on Monday and I am happy and grateful, "
+                "but a little worried about the March deadline.")
+
+
+def _text(path):
+    if path.suffix.lower() == ".pdf":
+        return "\n".join(page.extract_text() for page in PdfReader(str(path)).pages)
+    return path.read_text(encoding="utf-8", errors="ignore")
+
+
+def _sentences(text):
+    cursor = 0
+    for segment in SENTENCE_SPLIT_RE.split(text):
+        start = text.find(segment, cursor)
+        cursor = start + len(segment)
+        yield start, cursor
+
+
+def baseline(text):
+    highlight_hits = 0
+    for start, end in _sentences(text):
+        lower = text[start:end].lower()
+        highlight_hits += len({kind for kind, keywords in HIGHLIGHT_KEYWORDS.items()
+                               if any(keyword in lower for keyword in keywords)})
+    tokens = re.findall(r"[A-Za-z][A-Za-z\-']+", text.lower())
+    lexicon_hits = sum(1 for token in tokens if token in POSITIVE_WORDS)
+    lexicon_hits += sum(1 for token in tokens if token in NEGATIVE_WORDS)
+    for keywords in EMOTION_KEYWORDS.values():
+        lexicon_hits += sum(1 for token in tokens if token in keywords)
+    return highlight_hits, lexicon_hits
+
+
+def single_pass(text, matcher):
+    scan = matcher.scan(text)
+    highlight_hits = sum(len(scan.categories_between(start, end) & HIGHLIGHT_KEYWORDS.keys())
+                         for start, end in _sentences(text))
+    lexicon_hits = sum(count for category, count in scan.counts.items() if category not in HIGHLIGHT_KEYWORDS)
+    return highlight_hits, lexicon_hits
+
+
+def _best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("documents", nargs="*", type=Path)
+    parser.add_argument("--megabytes", type=float, default=4.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher({**HIGHLIGHT_KEYWORDS, "positive": POSITIVE_WORDS, "negative": NEGATIVE_WORDS,
+                              **EMOTION_KEYWORDS})
+    print(f"matcher built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"{'document':40} {'MB':>6} {'loops ms':>9} {'matcher ms':>11} {'speedup':>8}  hits (loops / matcher)")
+    for path in args.documents or DEFAULT_CORPUS:
+        source = _text(path) + "\n" + JOURNAL_LINE + "\n"
+        text = source * max(1, int(args.megabytes * 1e6 // len(source.encode("utf-8"))))
+        loops, loop_hits = _best(lambda: baseline(text), args.repeat)
+        scanned, scan_hits = _best(lambda: single_pass(text, matcher), args.repeat)
+        print(f"{path.name[:40]:40} {len(text.encode('utf-8')) / 1e6:>6.2f} {loops * 1000:>9.1f} "
+              f"{scanned * 1000:>11.1f} {loops / scanned:>7.2f}x  {loop_hits} / {scan_hits}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
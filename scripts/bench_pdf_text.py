@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Benchmark PDF text extraction: full ContentStream parsing vs the text-only scanner.
+
+Usage: python scripts/bench_pdf_text.py [file.pdf ...] [--repeat N]
+
+Without arguments the sample PDF shipped with the web viewer is used. For each
+file the script checks that both paths produce identical operations and text,
+then reports the best of N runs for tokenizing alone and for extract_text().
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "lambda"))
+
+from PyPDF2 import PdfReader  # noqa: E402
+from PyPDF2._text_scanner import TEXT_OPERATORS, content_stream_bytes, scan_text_operations  # noqa: E402
+from PyPDF2.generic import ContentStream, DecodedStreamObject  # noqa: E402
+
+DEFAULT_CORPUS = [ROOT / "web" / "pdfjs" / "compressed.tracemonkey-pldi-09.pdf"]
+
+
+def _best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _normalize(value):
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (int, float)) or type(value).__name__ in ("NumberObject", "FloatObject"):
+        return float(value)
+    return value
+
+
+def _same_operations(full, fast):
+    normalize = lambda pages: [[(_normalize(list(ops)), op) for ops, op in page] for page in pages]  # noqa: E731
+    return normalize(full) == normalize(fast)
+
+
+def _full_operations(streams):
+    return [
+        [operation for operation in ContentStream(stream, None, "bytes").operations if operation[1] in TEXT_OPERATORS]
+        for stream in streams
+    ]
+
+
+def _extract(path, fast):
+    reader = PdfReader(str(path))
+    # Any operand visitor makes _extract_text fall back to ContentStream.
+    kwargs = {} if fast else {"visitor_operand_before": lambda *args: None}
+    return [page.extract_text(**kwargs) for page in reader.pages]
+
+
+def bench(path, repeat):
+    reader = PdfReader(str(path))
+    payloads = [content_stream_bytes(page["/Contents"]) for page in reader.pages if "/Contents" in page]
+    streams = []
+    for data in payloads:
+        stream = DecodedStreamObject()
+        stream.set_data(data)
+        streams.append(stream)
+
+    full_tok, full_ops = _best(lambda: _full_operations(streams), repeat)
+    fast_tok, fast_ops = _best(lambda: [scan_text_operations(data, "bytes") for data in payloads], repeat)
+    ops_equal = _same_operations(full_ops, fast_ops)
+
+    full_text_time, full_text = _best(lambda: _extract(path, fast=False), repeat)
+    fast_text_time, fast_text = _best(lambda: _extract(path, fast=True), repeat)
+
+    print(f"{path.name[:40]:40} {len(payloads):>5} {sum(map(len, payloads)) / 1024:>8.0f}K "
+          f"{full_tok * 1000:>9.1f} {fast_tok * 1000:>9.1f} {full_tok / fast_tok:>5.2f}x "
+          f"{full_text_time * 1000:>9.1f} {fast_text_time * 1000:>9.1f} {full_text_time / fast_text_time:>5.2f}x "
+          f"{'ok' if ops_equal and full_text == fast_text else 'MISMATCH'}")
+    return ops_equal and full_text == fast_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'file':40} {'pages':>5} {'content':>9} {'tok ms':>9} {'fast ms':>9} {'':>6} "
+          f"{'text ms':>9} {'fast ms':>9} {'':>6} parity")
+    results = [bench(path, args.repeat) for path in (args.pdfs or DEFAULT_CORPUS)]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
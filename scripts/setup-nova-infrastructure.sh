@@ -101,7 +101,7 @@ cat > /tmp/policy.json <<EOF
     },
     {
       "Effect": "Allow",
-      "Action": ["dynamodb:GetItem","dynamodb:UpdateItem","dynamodb:PutItem"],
+      "Action": ["dynamodb:GetItem","dynamodb:UpdateItem","dynamodb:PutItem","dynamodb:DeleteItem"],
       "Resource": ["arn:aws:dynamodb:us-east-1:$ACCOUNT_ID:table/docgpt"]
     },
     {
@@ -145,6 +145,8 @@ fi
 # Copy worker code and shared modules
 cp media_worker.py package/ 2>/dev/null || echo "⚠️  media_worker.py not found - will create placeholder"
 cp config.py package/ 2>/dev/null || true
+cp sqs_batch.py package/ 2>/dev/null || true
+cp content_index.py jobs.py vector_store.py package/ 2>/dev/null || true
 if [ -d embeddings ]; then
   cp -R embeddings package/
 fi
@@ -261,10 +263,13 @@ aws lambda update-function-configuration \
     PINECONE_API_KEY=$PINECONE_KEY,
     PINECONE_INDEX_HOST=$PINECONE_HOST,
     PINECONE_INDEX=documentgpt-dev,
+    MEDIA_PINECONE_NAMESPACE=media,
     BEDROCK_REGION=us-east-1,
     NOVA_EMBEDDING_MODEL=amazon.nova-2-multimodal-embeddings-v1:0,
     MEDIA_BUCKET=docgpt-media-dev,
-    MEDIA_QUEUE_URL=$MEDIA_QUEUE_URL
+    MEDIA_QUEUE_URL=$MEDIA_QUEUE_URL,
+    MEDIA_WORKER_CONCURRENCY=4,
+    NOVA_SEGMENT_CONCURRENCY=4
   }"
 
 echo "✅ Environment variables configured"
@@ -283,10 +288,37 @@ if [ -z "$EXISTING_MAPPING" ]; then
   aws lambda create-event-source-mapping \
     --function-name documentgpt-media-worker \
     --event-source-arn "$MEDIA_QUEUE_ARN" \
-    --batch-size 1
+    --batch-size 10 \
+    --function-response-types ReportBatchItemFailures
   echo "✅ Event source mapping created"
 else
-  echo "✅ Event source mapping already exists"
+  aws lambda update-event-source-mapping \
+    --uuid "$EXISTING_MAPPING" \
+    --batch-size 10 \
+    --function-response-types ReportBatchItemFailures > /dev/null
+  echo "✅ Event source mapping updated for partial batch responses"
+fi
+
+# 8. Expire short-lived rows
+echo ""
+echo "🧹 Step 8: Enabling TTL on the documents table..."
+
+# IDEMPOTENCY# and CHAT_CACHE rows carry an epoch-seconds "ttl" attribute.
+# A table has a single TTL attribute, so every expiring row uses the same one.
+TTL_ATTRIBUTE=$(aws dynamodb describe-time-to-live \
+  --table-name docgpt \
+  --query "TimeToLiveDescription.AttributeName" \
+  --output text 2>/dev/null || echo "None")
+
+if [ "$TTL_ATTRIBUTE" = "ttl" ]; then
+  echo "✅ TTL already enabled on ttl"
+elif [ -z "$TTL_ATTRIBUTE" ] || [ "$TTL_ATTRIBUTE" = "None" ]; then
+  aws dynamodb update-time-to-live \
+    --table-name docgpt \
+    --time-to-live-specification "Enabled=true,AttributeName=ttl" > /dev/null
+  echo "✅ TTL enabled on ttl"
+else
+  echo "⚠️  TTL is configured on '$TTL_ATTRIBUTE'; expiring rows write 'ttl' and will not be removed"
 fi
 
 # Cleanup
@@ -300,6 +332,7 @@ echo "  S3 Bucket: docgpt-media-dev"
 echo "  SQS Queue: $MEDIA_QUEUE_URL"
 echo "  Lambda: documentgpt-media-worker"
 echo "  IAM Role: DocumentGPTMediaWorkerRole"
+echo "  TTL attribute (docgpt): ttl"
 echo ""
 echo "🔍 Next steps:"
 echo "  1. Test with: aws sqs send-message --queue-url $MEDIA_QUEUE_URL --message-body '{\"doc_id\":\"test\",\"user_id\":\"test\",\"s3_key\":\"test.jpg\",\"media_type\":\"image\"}'"